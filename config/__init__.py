@@ -1,4 +1,5 @@
 from pathlib import Path
+from functools import lru_cache
 import logging
 
 Path.read = Path.read_text
@@ -18,37 +19,57 @@ if __name__ == "__main__":
 # Get the directory path of the configuration files
 config_directory = Path(__file__).resolve().parent
 
-# Create empty classes to store data
+
+@lru_cache(maxsize=None)
+def get_config_directories() -> dict:
+    """Returns configuration directories grouped by directory name, walked once on first access"""
+    directories = {}
+    dirs_to_check = [config_directory]
+
+    # Recursively search for directories, files are resolved only when accessed
+    for path in dirs_to_check:
+        for child_path in path.iterdir():
+            if child_path.is_dir() and "__" not in child_path.stem:
+                dirs_to_check.append(child_path)
+                directories.setdefault(child_path.name, []).append(child_path)
+
+    return directories
+
+
+# Classes to resolve configuration paths lazily, resolved values are cached as attributes
 class Paths():
-    pass
 
-class Attribute():
+    def __getattr__(self, name):
+        if name.startswith("__") or name not in get_config_directories():
+            raise AttributeError(f"Configuration directory not found: {name}")
 
-    pass
+        attribute = Attribute(get_config_directories()[name])
+        setattr(self, name, attribute)
 
-# List to store all configuration file paths
-paths = Paths()
-dirs_to_check = [config_directory]
+        return attribute
 
-# Recursively search for files in all folders
-for path in dirs_to_check:
-    for child_path in path.iterdir():
 
-        # If path analyse further
-        if child_path.is_dir():
-            dirs_to_check.append(child_path)
+class Attribute():
 
-        if "__" in child_path.stem:
-            continue
+    def __init__(self, directories: list | None = None):
+        self._directories = directories or []
 
-        # Add the full path of the configuration file
-        if child_path.is_file():
-            logger.debug(f"Found config file {child_path.resolve()}")
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
 
-            if not getattr(paths, child_path.parent.name, None):
-                setattr(paths, child_path.parent.name, Attribute())
+        for directory in self._directories:
+            for child_path in directory.iterdir():
+                # Add the full path of the configuration file
+                if child_path.is_file() and child_path.stem == name and "__" not in child_path.stem:
+                    logger.debug(f"Found config file {child_path.resolve()}")
+                    setattr(self, name, child_path.resolve())
 
-            setattr(getattr(paths, child_path.parent.name), child_path.stem, child_path.resolve())
+        if name not in self.__dict__:
+            raise AttributeError(f"Configuration file not found: {name}")
 
+        return self.__dict__[name]
 
 
+# Configuration file paths, e.g. config.paths.integrations.rabbit
+paths = Paths()
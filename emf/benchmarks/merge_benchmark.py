@@ -0,0 +1,376 @@
+"""
+End-to-end benchmark of model merging on synthetic CGMES models. For each scenario (number of TSOs, buses per IGM and
+tie lines between neighbouring TSOs) IGMs, boundary set and schedules are generated, stored to local stand-ins of
+MinIO and Elasticsearch and merged with HandlerMergeModels as in the worker. Wall time, CPU time and peak memory of
+merge stages (e.g. scaling - scale_balance, post_processing - run_post_merge_processing, serialization -
+export_to_cgmes_zip) are collected from the merge trace into results file, which can be compared to baseline results:
+
+python -m emf.benchmarks.merge_benchmark
+BASELINE_FILE=baseline.json python -m emf.benchmarks.merge_benchmark  -> exits with 1 on regression
+
+The first run of scenario is cold, next repeats reuse caches of the process as warm worker does
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import datetime
+import itertools
+import threading
+import statistics
+import subprocess
+from uuid import uuid4
+from pathlib import Path
+from importlib import metadata
+import config
+from emf.common.config_parser import parse_app_properties
+from emf.common.helpers.tracing import get_rss_mb
+
+logger = logging.getLogger(__name__)
+
+parse_app_properties(caller_globals=globals(), path=config.paths.benchmarks.merge_benchmark)
+
+# Stage metrics compared with baseline
+WALL_TIME_METRICS = ["wall_s", "cpu_s"]
+MEMORY_METRICS = ["peak_rss_delta_mb"]
+
+
+def configure_local_services(directory: Path):
+    """
+    Points integrations to local stand-ins of MinIO, Elasticsearch, RabbitMQ and OPDM. Server addresses are read
+    by integration modules on import, so it has to be called before they are imported
+    :param directory: working directory of benchmark, storage of stand-ins is kept there
+    """
+    os.environ["MINIO_SERVER"] = f"local://{(directory / 'object_storage').resolve()}"
+    os.environ["ELK_SERVER"] = "local://"
+    os.environ["RMQ_SERVER"] = "local://"
+    for name in ["OPDM_SERVER", "WEBDAV_SERVER", "WEBDAV_SERVER_PUT"]:
+        os.environ[name] = f"local://{(directory / 'opdm').resolve()}"
+
+
+class RssSampler:
+    """Samples resident memory of the process in background thread, to get peak memory of stages of one run"""
+
+    def __init__(self, interval_ms: float = float(RSS_SAMPLING_INTERVAL_MS)):
+        self.interval = interval_ms / 1000
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append((time.time(), get_rss_mb()))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.samples = []
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def get_peak_mb(self, start_time: float, end_time: float) -> float | None:
+        """Returns peak of memory sampled within given period, None if there were no samples"""
+        return max((rss for sample_time, rss in self.samples if start_time <= sample_time <= end_time), default=None)
+
+
+def get_environment() -> dict:
+    """Returns description of environment, results are comparable only within the same environment"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {"git_commit": commit,
+            "python": platform.python_version(),
+            "pypowsybl": metadata.version("pypowsybl"),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()}
+
+
+def get_scenarios() -> list[dict]:
+    """Returns benchmark scenarios as combinations of configured TSO, bus and tie line counts"""
+    counts = [[int(value) for value in setting.split(",")] for setting in [TSO_COUNTS, BUS_COUNTS, TIE_LINE_COUNTS]]
+    return [{"tso_count": tso_count, "bus_count": bus_count, "tie_line_count": tie_line_count, "hvdc_count": int(HVDC_COUNT)}
+            for tso_count, bus_count, tie_line_count in itertools.product(*counts)]
+
+
+def get_scenario_name(scenario: dict) -> str:
+    return f"tso{scenario['tso_count']}-bus{scenario['bus_count']}-tie{scenario['tie_line_count']}-hvdc{scenario['hvdc_count']}"
+
+
+def create_task(scenario_timestamp: str, time_horizon: str) -> dict:
+    """Returns merge task of synthetic models, all of the merge stages are enabled except publication to OPDM"""
+    timestamp = datetime.datetime.now(datetime.UTC).isoformat()
+    return {
+        "@context": "https://example.com/task_context.jsonld",
+        "@type": "Task",
+        "@id": f"urn:uuid:{uuid4()}",
+        "process_id": "https://example.com/processes/CGM_CREATION",
+        "run_id": "https://example.com/runs/MergeBenchmark/1",
+        "job_id": f"urn:uuid:{uuid4()}",
+        "task_type": "automatic",
+        "task_initiator": "merge_benchmark",
+        "task_priority": "normal",
+        "task_creation_time": timestamp,
+        "task_update_time": "",
+        "task_status": "created",
+        "task_status_trace": [{"status": "created", "timestamp": timestamp}],
+        "task_dependencies": [],
+        "task_tags": [],
+        "task_retry_count": 0,
+        "task_timeout": "PT1H",
+        "task_properties": {
+            "timestamp_utc": scenario_timestamp,
+            "merge_type": "EU",
+            "merging_entity": "BENCHMARK",
+            "included": [],
+            "excluded": [],
+            "local_import": [],
+            "time_horizon": time_horizon,
+            "version": "001",
+            "mas": "http://www.benchmark.eu/OperationalPlanning",
+            "post_temp_fixes": "True",
+            "fix_net_interchange2": "True",
+            "replacement": "False",
+            "scaling": "True",
+            "upload_to_opdm": "False",
+            "upload_to_minio": "True",
+            "send_merge_report": "True",
+            "force_outage_fix": "False",
+            "lvl8_reporting": "False",
+        }
+    }
+
+
+def store_model_set(model_set):
+    """
+    Stores synthetic model set to local stand-ins as model retriever and schedule retriever do: model components
+    to object storage, their metadata, schedules and reference data to Elastic. Previous content is removed
+    :param model_set: synthetic model set
+    """
+    from emf.common.integrations import elastic
+    from emf.common.integrations.local_services.documents import get_document_index
+    from emf.common.integrations.object_storage import minio_service, ELASTIC_MODELS_INDEX, ELASTIC_SCHEDULES_INDEX
+    from emf.model_retriever import model_retriever
+    from emf.model_merger.model_merger import OUTPUT_MINIO_BUCKET
+
+    get_document_index().indices.clear()
+    shutil.rmtree(minio_service.client.root, ignore_errors=True)
+    for bucket_name in {model_retriever.MINIO_BUCKET, OUTPUT_MINIO_BUCKET}:
+        minio_service.client.make_bucket(bucket_name)
+
+    # Components are uploaded from copy, as handler releases their content
+    opdm_objects = [{**opdm_object, "opde:Component": [{"opdm:Profile": dict(component["opdm:Profile"])}
+                                                       for component in opdm_object["opde:Component"]]}
+                    for opdm_object in model_set.igms + [model_set.boundary]]
+    opdm_objects = json.loads(model_retriever.HandlerModelsToMinio().handle(opdm_objects, None)[0])
+    elastic.Elastic.send_to_elastic_bulk(index=ELASTIC_MODELS_INDEX,
+                                         json_message_list=opdm_objects,
+                                         id_from_metadata=True,
+                                         id_metadata_list=model_retriever.ELK_ID_FROM_METADATA_FIELDS.split(","),
+                                         hashing=True)
+    elastic.Elastic.send_to_elastic_bulk(index=ELASTIC_SCHEDULES_INDEX, json_message_list=model_set.schedules)
+    elastic.Elastic.send_to_elastic_bulk(index="config-areas", json_message_list=model_set.areas)
+    elastic.Elastic.send_to_elastic_bulk(index="config-bds-lines", json_message_list=model_set.boundary_lines)
+
+
+def run_merge(handler, sampler: RssSampler, task: dict) -> dict:
+    """
+    Runs merge task and collects metrics of its stages from merge report sent to Elastic
+    :param handler: merge handler
+    :param sampler: memory sampler, not started
+    :param task: merge task
+    :return: dictionary of stage metrics and outcome of merge
+    """
+    import pika
+    from emf.common.integrations import elastic
+    from emf.model_merger.model_merger import MERGE_REPORT_ELK_INDEX
+
+    with sampler:
+        rss_start = get_rss_mb()
+        start_time, wall_start, cpu_start = time.time(), time.perf_counter(), time.process_time()
+        handler.handle(task_object=task, properties=pika.BasicProperties(headers={}))
+        wall_s, cpu_s = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        end_time = time.time()
+    handler.cleanup()
+
+    reports = elastic.Elastic().get_docs_by_query(index=MERGE_REPORT_ELK_INDEX, query={"match": {"@task_id": task["@id"]}},
+                                                  return_df=False)
+    if not reports:
+        raise RuntimeError(f"Merge report not found for task: {task['@id']}")
+    report = reports[0]["_source"]
+
+    stages = {"total": {"wall_s": round(wall_s, 3), "cpu_s": round(cpu_s, 3),
+                        "peak_rss_delta_mb": round((sampler.get_peak_mb(start_time, end_time) or rss_start) - rss_start, 1)}}
+    for span in report.get("trace", []):
+        if span["parent"]:
+            continue
+        peak_rss = sampler.get_peak_mb(span["start_time"], span["start_time"] + span["wall_s"])
+        peak_rss = max(value for value in [peak_rss, span["rss_start_mb"], span["rss_start_mb"] + span["rss_delta_mb"]] if value is not None)
+        stages[span["name"]] = {"wall_s": span["wall_s"],
+                                "cpu_s": span["cpu_s"],
+                                "peak_rss_delta_mb": round(peak_rss - span["rss_start_mb"], 1)}
+
+    outcome = {"loadflow_status": report.get("loadflow_status"),
+               "scaled": report.get("scaled"),
+               "included": len(report.get("merge_included_entity", [])),
+               "excluded": report.get("excluded", [])}
+
+    return {"stages": stages, "outcome": outcome}
+
+
+def summarize(runs: list[dict]) -> dict:
+    """
+    Summarizes metrics of repeated runs by stage: the cold first run and median of warm runs (cold run if there was
+    only one), peak memory is maximum of all runs
+    """
+    summary = {}
+    for stage in runs[0]["stages"]:
+        values = [run["stages"][stage] for run in runs if stage in run["stages"]]
+        warm = values[1:] or values
+        summary[stage] = {"cold_wall_s": values[0]["wall_s"],
+                          **{metric: round(statistics.median(value[metric] for value in warm), 3) for metric in WALL_TIME_METRICS},
+                          **{metric: max(value[metric] for value in values) for metric in MEMORY_METRICS}}
+    return summary
+
+
+def run_benchmark(scenarios: list[dict], repeat: int = int(REPEAT)) -> dict:
+    """
+    Runs merge benchmark of given scenarios
+    :param scenarios: list of scenario parameters - tso_count, bus_count, tie_line_count and hvdc_count
+    :param repeat: number of merges of each scenario
+    :return: benchmark results
+    """
+    from emf.benchmarks.synthetic_models import create_synthetic_model_set
+    from emf.common.helpers.opdm_objects import get_opdm_objects_size_mb
+    from emf.common.helpers.profile_cache import profile_cache
+    from emf.model_merger.model_merger import HandlerMergeModels
+
+    scenario_date = datetime.datetime.fromisoformat(SCENARIO_TIMESTAMP)
+    handler = HandlerMergeModels()
+    sampler = RssSampler()
+    results = {"created": datetime.datetime.now(datetime.UTC).isoformat(),
+               "environment": get_environment(),
+               "settings": {"scenario_timestamp": SCENARIO_TIMESTAMP, "time_horizon": TIME_HORIZON, "repeat": repeat,
+                            "seed": int(SEED), "schedule_deviation": float(SCHEDULE_DEVIATION)},
+               "scenarios": {}}
+
+    for scenario in scenarios:
+        name = get_scenario_name(scenario)
+        logger.info(f"Running merge benchmark scenario: {name}")
+        generation_start = time.perf_counter()
+        model_set = create_synthetic_model_set(**scenario,
+                                               scenario_date=scenario_date,
+                                               time_horizon=TIME_HORIZON,
+                                               schedule_deviation=float(SCHEDULE_DEVIATION),
+                                               seed=int(SEED))
+        generation_s = time.perf_counter() - generation_start
+        store_model_set(model_set)
+        input_size_mb = get_opdm_objects_size_mb(model_set.igms + [model_set.boundary])
+
+        # Profiles parsed on generation are dropped, so the first merge is cold
+        profile_cache.clear()
+        del model_set
+
+        runs = [run_merge(handler, sampler, create_task(SCENARIO_TIMESTAMP, TIME_HORIZON)) for _ in range(repeat)]
+        results["scenarios"][name] = {"parameters": scenario,
+                                      "input": {"size_mb": input_size_mb, "generation_s": round(generation_s, 3)},
+                                      "outcome": runs[0]["outcome"],
+                                      "summary": summarize(runs),
+                                      "runs": [run["stages"] for run in runs]}
+        logger.info(f"Merge benchmark scenario {name} finished: {runs[0]['outcome']}")
+
+    return results
+
+
+def compare_results(results: dict,
+                    baseline: dict,
+                    wall_time_threshold: float = float(WALL_TIME_THRESHOLD),
+                    memory_threshold: float = float(MEMORY_THRESHOLD),
+                    min_wall_time_diff_s: float = float(MIN_WALL_TIME_DIFF_S),
+                    min_memory_diff_mb: float = float(MIN_MEMORY_DIFF_MB)) -> list[dict]:
+    """
+    Compares summary of benchmark results to baseline, stage metric is regressed if it exceeds baseline by relative
+    threshold and by absolute noise floor. Changed outcome of merge is also reported as regression
+    :param results: current benchmark results
+    :param baseline: baseline benchmark results
+    :param wall_time_threshold: allowed relative increase of wall and CPU time
+    :param memory_threshold: allowed relative increase of peak memory
+    :param min_wall_time_diff_s: increase of time in seconds which is ignored as noise
+    :param min_memory_diff_mb: increase of memory in MB which is ignored as noise
+    :return: list of regressions
+    """
+    if results["environment"] != baseline.get("environment"):
+        logger.warning(f"Comparing results of different environments: {results['environment']} vs {baseline.get('environment')}")
+
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        baseline_scenario = baseline.get("scenarios", {}).get(name)
+        if not baseline_scenario:
+            logger.warning(f"Scenario not available in baseline: {name}")
+            continue
+
+        for key in ["loadflow_status", "scaled"]:
+            if scenario["outcome"][key] != baseline_scenario["outcome"][key]:
+                regressions.append({"scenario": name, "stage": "outcome", "metric": key,
+                                    "baseline": baseline_scenario["outcome"][key], "current": scenario["outcome"][key]})
+
+        for stage, metrics in scenario["summary"].items():
+            baseline_metrics = baseline_scenario["summary"].get(stage)
+            if not baseline_metrics:
+                continue
+            for metric in WALL_TIME_METRICS + MEMORY_METRICS:
+                threshold, noise = (wall_time_threshold, min_wall_time_diff_s) if metric in WALL_TIME_METRICS else \
+                    (memory_threshold, min_memory_diff_mb)
+                current, reference = metrics[metric], baseline_metrics[metric]
+                if current - reference > max(abs(reference) * threshold, noise):
+                    regressions.append({"scenario": name, "stage": stage, "metric": metric, "baseline": reference,
+                                        "current": current, "change": f"{(current - reference) / abs(reference):+.0%}" if reference else None})
+
+    for regression in regressions:
+        logger.error(f"Merge benchmark regression: {regression}")
+
+    return regressions
+
+
+def log_summary(results: dict):
+    import pandas as pd
+
+    for name, scenario in results["scenarios"].items():
+        summary = pd.DataFrame(scenario["summary"]).T
+        logger.info(f"Merge benchmark scenario {name} [input: {scenario['input']['size_mb']} MB]:\n{summary.to_string()}")
+
+
+def main() -> int:
+    directory = Path(BENCHMARK_DIRECTORY)
+    configure_local_services(directory)
+
+    # Logging is configured like in merge worker, after integrations are pointed to stand-ins
+    from emf.common.logging import custom_logger  # noqa: F401
+    logging.getLogger("triplets").setLevel(logging.WARNING)
+
+    results = run_benchmark(scenarios=get_scenarios())
+    log_summary(results)
+    Path(RESULTS_FILE).write_text(json.dumps(results, indent=2, default=str))
+    logger.info(f"Merge benchmark results saved to: {Path(RESULTS_FILE).resolve()}")
+
+    if BASELINE_FILE:
+        regressions = compare_results(results=results, baseline=json.loads(Path(BASELINE_FILE).read_text()))
+        logger.info(f"Merge benchmark compared to {BASELINE_FILE}: {len(regressions)} regression(s)")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,502 @@
+import uuid
+import random
+import logging
+import datetime
+from io import BytesIO
+from zipfile import ZipFile, ZIP_DEFLATED
+from dataclasses import dataclass, field
+import pandas as pd
+import pypowsybl
+from lxml import etree
+from emf.common.helpers.opdm_objects import create_opdm_objects
+
+logger = logging.getLogger(__name__)
+
+# Countries of synthetic control areas, one per TSO. Area is identified in merged model by region name (country)
+AREA_CODES = ["LT", "LV", "EE", "PL", "FI", "SE", "NO", "DK", "DE", "NL", "BE", "FR", "ES", "PT", "CH", "AT", "CZ",
+              "SK", "HU", "SI", "HR", "RO", "BG", "GR", "IT"]
+# Boundary points of HVDC links lead to area outside of merged models
+EXTERNAL_AREA_CODE = "GB"
+# Namespace of name based identifiers, so models generated with the same parameters are identical
+SYNTHETIC_NAMESPACE = uuid.UUID("6c7c1f5e-52a4-4f0c-9a43-3b4f1e3a8d10")
+
+NAMESPACES = {"rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+              "cim": "http://iec.ch/TC57/2013/CIM-schema-cim16#",
+              "md": "http://iec.ch/TC57/61970-552/ModelDescription/1#",
+              "entsoe": "http://entsoe.eu/CIM/SchemaExtension/3/1#"}
+BOUNDARY_PROFILES = {"EQBD": ["http://entsoe.eu/CIM/EquipmentBoundary/3/1", "http://entsoe.eu/CIM/EquipmentBoundaryOperation/3/1"],
+                     "TPBD": ["http://entsoe.eu/CIM/TopologyBoundary/3/1"]}
+BOUNDARY_VOLTAGE = 330.0
+HIGH_VOLTAGE = 330.0
+LOW_VOLTAGE = 110.0
+
+
+@dataclass
+class BoundaryPoint:
+    id: str
+    name: str
+    line_eic: str
+    from_area: str
+    to_area: str
+    p: float
+    hvdc: bool = False
+
+
+def get_synthetic_id(*parts) -> str:
+    """Returns deterministic UUID of synthetic object from its name parts"""
+    return str(uuid.uuid5(SYNTHETIC_NAMESPACE, "/".join(str(part) for part in parts)))
+
+
+def get_area_eic(area: str) -> str:
+    """Returns synthetic EIC code of control area"""
+    return f"10Y{area}-SYNTHETIC".ljust(15, "-") + "X"
+
+
+def create_boundary_points(areas: list, tie_line_count: int, hvdc_count: int, seed: int = 0) -> list[BoundaryPoint]:
+    """
+    Creates boundary points between neighbouring areas, areas are connected in a ring (a chain for two areas), each
+    area has also HVDC links to external area
+    :param areas: area codes of TSOs
+    :param tie_line_count: number of tie lines between each pair of neighbouring areas
+    :param hvdc_count: number of HVDC links of each area
+    :param seed: seed of random flows
+    :return: list of boundary points
+    """
+    rng = random.Random(seed)
+    neighbours = [(areas[k], areas[(k + 1) % len(areas)]) for k in range(len(areas) if len(areas) > 2 else len(areas) - 1)]
+
+    boundary_points = []
+    for from_area, to_area in neighbours:
+        for number in range(tie_line_count):
+            name = f"X{from_area}{to_area}{number:04d}"
+            boundary_points.append(BoundaryPoint(id=get_synthetic_id("boundary", name),
+                                                 name=name,
+                                                 line_eic=f"10T-{from_area}-{to_area}-{number:04d}".ljust(15, "-") + "X",
+                                                 from_area=from_area,
+                                                 to_area=to_area,
+                                                 p=round(rng.uniform(-100, 100), 1)))
+    for area in areas:
+        for number in range(hvdc_count):
+            name = f"X{area}{EXTERNAL_AREA_CODE}H{number:03d}"
+            boundary_points.append(BoundaryPoint(id=get_synthetic_id("boundary", name),
+                                                 name=name,
+                                                 line_eic=f"10T-{area}-{EXTERNAL_AREA_CODE}-H{number:03d}".ljust(15, "-") + "X",
+                                                 from_area=area,
+                                                 to_area=EXTERNAL_AREA_CODE,
+                                                 p=round(rng.uniform(-300, 300), 1),
+                                                 hvdc=True))
+
+    return boundary_points
+
+
+def get_area_injections(area: str, boundary_points: list[BoundaryPoint]) -> dict:
+    """Returns boundary injections of area by boundary point ID, positive value is export from area"""
+    injections = {}
+    for point in boundary_points:
+        if point.from_area == area:
+            injections[point.id] = point.p
+        elif point.to_area == area:
+            injections[point.id] = -point.p
+    return injections
+
+
+def create_area_network(area: str, bus_count: int, boundary_points: list[BoundaryPoint], seed: int = 0) -> pypowsybl.network.Network:
+    """
+    Creates meshed transmission grid of one area: substations connected in a ring with chords, generators on every
+    fifth substation, conform loads on others, transformers with ratio tap changers to distribution voltage level
+    with capacitor bank on every tenth substation and dangling lines on boundary points of the area
+    :param area: area code, used as country of substations
+    :param bus_count: number of transmission buses
+    :param boundary_points: boundary points of all areas, the ones connected to area are modelled
+    :param seed: seed of random loads
+    :return: solved pypowsybl network
+    """
+    if bus_count < 4:
+        raise ValueError(f"At least 4 buses are needed for synthetic area network, given: {bus_count}")
+    rng = random.Random(f"{seed}/{area}")
+    network = pypowsybl.network.create_empty(f"{area}_SYNTHETIC")
+
+    substations = [f"{area}_S{number}" for number in range(bus_count)]
+    network.create_substations(id=substations, country=[area] * bus_count)
+    voltage_levels = [f"{area}_VL{number}" for number in range(bus_count)]
+    network.create_voltage_levels(id=voltage_levels,
+                                  substation_id=substations,
+                                  topology_kind=["BUS_BREAKER"] * bus_count,
+                                  nominal_v=[HIGH_VOLTAGE] * bus_count,
+                                  low_voltage_limit=[HIGH_VOLTAGE * 0.9] * bus_count,
+                                  high_voltage_limit=[HIGH_VOLTAGE * 1.1] * bus_count)
+    buses = [f"{area}_B{number}" for number in range(bus_count)]
+    network.create_buses(id=buses, voltage_level_id=voltage_levels)
+
+    # Ring of substations with chords across the ring
+    branches = [(number, (number + 1) % bus_count) for number in range(bus_count)]
+    branches += [(number, (number + bus_count // 2) % bus_count) for number in range(0, bus_count // 2, 3)]
+    network.create_lines(id=[f"{area}_L{number}" for number in range(len(branches))],
+                         voltage_level1_id=[voltage_levels[start] for start, end in branches],
+                         bus1_id=[buses[start] for start, end in branches],
+                         voltage_level2_id=[voltage_levels[end] for start, end in branches],
+                         bus2_id=[buses[end] for start, end in branches],
+                         r=[round(rng.uniform(0.5, 2.0), 3) for _ in branches],
+                         x=[round(rng.uniform(8.0, 20.0), 3) for _ in branches],
+                         g1=[0.0] * len(branches), b1=[1e-5] * len(branches),
+                         g2=[0.0] * len(branches), b2=[1e-5] * len(branches))
+
+    # Distribution voltage levels with transformers and tap changers
+    distribution = list(range(0, bus_count, 10))
+    network.create_voltage_levels(id=[f"{area}_VLD{number}" for number in distribution],
+                                  substation_id=[substations[number] for number in distribution],
+                                  topology_kind=["BUS_BREAKER"] * len(distribution),
+                                  nominal_v=[LOW_VOLTAGE] * len(distribution),
+                                  low_voltage_limit=[LOW_VOLTAGE * 0.9] * len(distribution),
+                                  high_voltage_limit=[LOW_VOLTAGE * 1.1] * len(distribution))
+    network.create_buses(id=[f"{area}_BD{number}" for number in distribution],
+                         voltage_level_id=[f"{area}_VLD{number}" for number in distribution])
+    network.create_2_windings_transformers(id=[f"{area}_T{number}" for number in distribution],
+                                           voltage_level1_id=[voltage_levels[number] for number in distribution],
+                                           bus1_id=[buses[number] for number in distribution],
+                                           voltage_level2_id=[f"{area}_VLD{number}" for number in distribution],
+                                           bus2_id=[f"{area}_BD{number}" for number in distribution],
+                                           rated_u1=[HIGH_VOLTAGE] * len(distribution),
+                                           rated_u2=[LOW_VOLTAGE] * len(distribution),
+                                           r=[0.5] * len(distribution), x=[20.0] * len(distribution),
+                                           g=[0.0] * len(distribution), b=[0.0] * len(distribution))
+    tap_steps = 21
+    network.create_ratio_tap_changers(
+        rtc_df=pd.DataFrame(dict(id=[f"{area}_T{number}" for number in distribution],
+                            tap=[tap_steps // 2] * len(distribution),
+                            low_tap=[0] * len(distribution),
+                            on_load=[True] * len(distribution),
+                            regulating=[False] * len(distribution),
+                            target_v=[LOW_VOLTAGE] * len(distribution),
+                            target_deadband=[0.0] * len(distribution),
+                            regulated_side=["TWO"] * len(distribution))).set_index("id"),
+        steps_df=pd.DataFrame(dict(id=[f"{area}_T{number}" for number in distribution for _ in range(tap_steps)],
+                              b=[0.0] * tap_steps * len(distribution),
+                              g=[0.0] * tap_steps * len(distribution),
+                              r=[0.0] * tap_steps * len(distribution),
+                              x=[0.0] * tap_steps * len(distribution),
+                              rho=[0.9 + 0.01 * step for _ in distribution for step in range(tap_steps)])).set_index("id"))
+
+    # Capacitor banks for voltage support of distribution voltage levels
+    shunts = [f"{area}_SH{number}" for number in distribution]
+    network.create_shunt_compensators(
+        shunt_df=pd.DataFrame(dict(id=shunts,
+                                   voltage_level_id=[f"{area}_VLD{number}" for number in distribution],
+                                   bus_id=[f"{area}_BD{number}" for number in distribution],
+                                   model_type=["LINEAR"] * len(shunts),
+                                   section_count=[1] * len(shunts),
+                                   target_v=[LOW_VOLTAGE] * len(shunts),
+                                   target_deadband=[2.0] * len(shunts))).set_index("id"),
+        linear_model_df=pd.DataFrame(dict(id=shunts,
+                                          g_per_section=[0.0] * len(shunts),
+                                          b_per_section=[1e-3] * len(shunts),
+                                          max_section_count=[2] * len(shunts))).set_index("id"))
+
+    # Conform loads on transmission buses without generation and on distribution buses
+    generation = list(range(0, bus_count, 5))
+    load_buses = [(voltage_levels[number], buses[number]) for number in range(bus_count) if number not in generation]
+    load_buses += [(f"{area}_VLD{number}", f"{area}_BD{number}") for number in distribution]
+    loads = [f"{area}_D{number}" for number in range(len(load_buses))]
+    loads_p = [round(rng.uniform(20, 80), 1) for _ in loads]
+    network.create_loads(id=loads,
+                         voltage_level_id=[voltage_level for voltage_level, bus in load_buses],
+                         bus_id=[bus for voltage_level, bus in load_buses],
+                         p0=loads_p,
+                         q0=[round(p * 0.2, 1) for p in loads_p])
+    network.create_extensions('detail', id=loads, fixed_p0=[0.0] * len(loads), variable_p0=loads_p,
+                              fixed_q0=[0.0] * len(loads), variable_q0=[round(p * 0.2, 1) for p in loads_p])
+
+    # Boundary points of area as dangling lines, connected to buses spread around the ring
+    injections = get_area_injections(area, boundary_points)
+    points = [point for point in boundary_points if point.id in injections]
+    if points:
+        dangling_lines = [f"{area}_{point.name}" for point in points]
+        connection_buses = [(number * 7 + 3) % bus_count for number in range(len(points))]
+        network.create_dangling_lines(id=dangling_lines,
+                                      name=[point.name for point in points],
+                                      voltage_level_id=[voltage_levels[number] for number in connection_buses],
+                                      bus_id=[buses[number] for number in connection_buses],
+                                      p0=[injections[point.id] for point in points],
+                                      q0=[0.0] * len(points),
+                                      r=[0.5] * len(points), x=[5.0] * len(points),
+                                      g=[0.0] * len(points), b=[0.0] * len(points),
+                                      pairing_key=[point.name for point in points])
+        # Dangling lines are exported as connected to boundary nodes of boundary set
+        network.add_elements_properties(id=dangling_lines, **{"CGMES.TopologicalNode_Boundary": [point.id for point in points]})
+
+    # Generation covers load and export of area, slack is distributed on generators
+    total_generation = (sum(loads_p) + sum(injections.values())) * 1.02
+    generators = [f"{area}_G{number}" for number in generation]
+    generators_max_p = max(total_generation / len(generators) * 2, 500.0)
+    network.create_generators(id=generators,
+                              voltage_level_id=[voltage_levels[number] for number in generation],
+                              bus_id=[buses[number] for number in generation],
+                              min_p=[0.0] * len(generators),
+                              max_p=[round(generators_max_p, 1)] * len(generators),
+                              target_p=[round(max(total_generation, 0) / len(generators), 1)] * len(generators),
+                              voltage_regulator_on=[True] * len(generators),
+                              target_v=[HIGH_VOLTAGE * 1.02] * len(generators))
+    network.create_minmax_reactive_limits(id=generators,
+                                          min_q=[-generators_max_p / 2] * len(generators),
+                                          max_q=[generators_max_p / 2] * len(generators))
+
+    # Control area with AC tie lines as boundaries, exported as ControlArea and TieFlows
+    ac_dangling_lines = [f"{area}_{point.name}" for point in points if not point.hvdc]
+    network.create_areas(id=[f"{area}_CA"],
+                         name=[area],
+                         area_type=["ControlAreaTypeKind.Interchange"],
+                         interchange_target=[round(sum(injections[point.id] for point in points if not point.hvdc), 1)])
+    # Exported as ControlArea EIC, IGMs without it can not be merged as their empty aliases would clash
+    network.add_aliases(id=[f"{area}_CA"], alias=[get_area_eic(area)], alias_type=["energyIdentCodeEic"])
+    network.create_areas_voltage_levels(id=[f"{area}_CA"] * len(network.get_voltage_levels().index),
+                                        voltage_level_id=list(network.get_voltage_levels().index))
+    if ac_dangling_lines:
+        network.create_areas_boundaries(id=[f"{area}_CA"] * len(ac_dangling_lines),
+                                        element=ac_dangling_lines,
+                                        ac=[True] * len(ac_dangling_lines))
+
+    # IGMs are provided as solved
+    result = pypowsybl.loadflow.run_ac(network, parameters=pypowsybl.loadflow.Parameters(distributed_slack=True))
+    # Setpoints are aligned to solved state, as distributed slack is not kept in exported SSH otherwise
+    generators_p = network.get_generators()["p"]
+    network.update_generators(id=generators_p.index, target_p=-generators_p)
+    logger.info(f"Created synthetic network of area {area}: {bus_count} buses, {len(points)} boundary points "
+                f"[loadflow: {result[0].status.name}]")
+
+    return network
+
+
+def _qualified_name(name: str) -> str:
+    prefix, _, local_name = name.partition(":")
+    return f"{{{NAMESPACES[prefix]}}}{local_name}"
+
+
+def _add_element(parent: etree._Element, tag: str, text=None, resource: str | None = None, **attributes) -> etree._Element:
+    element = etree.SubElement(parent, _qualified_name(tag), {_qualified_name(key.replace("_", ":", 1)): value
+                                                             for key, value in attributes.items()})
+    if text is not None:
+        element.text = str(text)
+    if resource is not None:
+        element.set(_qualified_name("rdf:resource"), resource)
+    return element
+
+
+def _add_header(rdf: etree._Element, model_id: str, scenario_date: datetime.datetime, version: int, profiles: list,
+                modeling_authority_set: str, depends_on: list | None = None):
+    header = _add_element(rdf, "md:FullModel", rdf_about=f"urn:uuid:{model_id}")
+    _add_element(header, "md:Model.scenarioTime", f"{scenario_date:%Y-%m-%dT%H:%M:%SZ}")
+    _add_element(header, "md:Model.created", f"{datetime.datetime.now(datetime.UTC):%Y-%m-%dT%H:%M:%SZ}")
+    _add_element(header, "md:Model.description", "Synthetic model for benchmarking")
+    _add_element(header, "md:Model.version", version)
+    for dependency in depends_on or []:
+        _add_element(header, "md:Model.DependentOn", resource=f"urn:uuid:{dependency}")
+    for profile in profiles:
+        _add_element(header, "md:Model.profile", profile)
+    _add_element(header, "md:Model.modelingAuthoritySet", modeling_authority_set)
+
+
+def _zip_instance(file_name: str, content: bytes) -> BytesIO:
+    """Returns profile instance xml packaged to zip, as stored in OPDM"""
+    zip_file_object = BytesIO()
+    with ZipFile(zip_file_object, "w", ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(file_name, content)
+    zip_file_object.name = file_name.replace(".xml", ".zip")
+    return zip_file_object
+
+
+def get_boundary_model_ids(valid_from: datetime.datetime, version: int) -> dict:
+    """Returns FullModel IDs of boundary set profiles, referenced by IGMs as dependencies"""
+    return {profile: get_synthetic_id("boundary-set", profile, f"{valid_from:%Y%m%d}", version) for profile in BOUNDARY_PROFILES}
+
+
+def create_boundary_set(boundary_points: list[BoundaryPoint], valid_from: datetime.datetime, version: int = 1) -> list[BytesIO]:
+    """
+    Creates boundary set of given boundary points: EQBD profile with line containers and connectivity nodes and TPBD
+    profile with topological nodes. HVDC boundary points are marked by description as in ENTSO-E boundary set
+    :param boundary_points: boundary points
+    :param valid_from: start of validity of boundary set
+    :param version: version of boundary set
+    :return: list of zipped profile instances named by OPDM convention
+    """
+    model_ids = get_boundary_model_ids(valid_from, version)
+    base_voltage = get_synthetic_id("boundary-set", "base-voltage", BOUNDARY_VOLTAGE)
+    instances = {profile: etree.Element(_qualified_name("rdf:RDF"), nsmap=NAMESPACES) for profile in BOUNDARY_PROFILES}
+    for profile, rdf in instances.items():
+        _add_header(rdf, model_ids[profile], valid_from, version, BOUNDARY_PROFILES[profile], "http://www.entsoe.eu/OperationalPlanning")
+
+    equipment, topology = instances["EQBD"], instances["TPBD"]
+    element = _add_element(equipment, "cim:BaseVoltage", rdf_ID=f"_{base_voltage}")
+    _add_element(element, "cim:IdentifiedObject.name", f"{BOUNDARY_VOLTAGE:.0f}")
+    _add_element(element, "cim:BaseVoltage.nominalVoltage", BOUNDARY_VOLTAGE)
+
+    for point in boundary_points:
+        line = get_synthetic_id("boundary-set", "line", point.name)
+        connectivity_node = get_synthetic_id("boundary-set", "connectivity-node", point.name)
+        description = f"HVDC {point.from_area}-{point.to_area}" if point.hvdc else f"{point.from_area}-{point.to_area}"
+        end_attributes = {"fromEndIsoCode": point.from_area, "fromEndName": point.from_area, "fromEndNameTso": point.from_area,
+                          "toEndIsoCode": point.to_area, "toEndName": point.to_area, "toEndNameTso": point.to_area}
+
+        element = _add_element(equipment, "cim:Line", rdf_ID=f"_{line}")
+        _add_element(element, "cim:IdentifiedObject.name", point.name)
+        _add_element(element, "entsoe:IdentifiedObject.energyIdentCodeEic", point.line_eic)
+
+        for node_type, node_id, container in [("ConnectivityNode", connectivity_node, equipment), ("TopologicalNode", point.id, topology)]:
+            element = _add_element(container, f"cim:{node_type}", rdf_ID=f"_{node_id}")
+            _add_element(element, "cim:IdentifiedObject.name", point.name)
+            _add_element(element, "cim:IdentifiedObject.description", description)
+            _add_element(element, f"cim:{node_type}.ConnectivityNodeContainer", resource=f"#_{line}")
+            if node_type == "TopologicalNode":
+                _add_element(element, "cim:TopologicalNode.BaseVoltage", resource=f"#_{base_voltage}")
+            _add_element(element, f"entsoe:{node_type}.boundaryPoint", "true")
+            for attribute, value in end_attributes.items():
+                _add_element(element, f"entsoe:{node_type}.{attribute}", value)
+
+        element = _add_element(topology, "cim:ConnectivityNode", rdf_about=f"#_{connectivity_node}")
+        _add_element(element, "cim:ConnectivityNode.TopologicalNode", resource=f"#_{point.id}")
+
+    return [_zip_instance(f"{valid_from:%Y%m%dT%H%MZ}__ENTSOE_{profile}_{version:03d}.xml",
+                          etree.tostring(rdf, xml_declaration=True, encoding="UTF-8", pretty_print=True))
+            for profile, rdf in instances.items()]
+
+
+def export_area_model(network: pypowsybl.network.Network,
+                      tso: str,
+                      scenario_date: datetime.datetime,
+                      time_horizon: str,
+                      boundary_model_ids: dict,
+                      version: int = 1) -> list[BytesIO]:
+    """
+    Exports area network to CGMES IGM, profile instances are named and their headers set as in OPDM
+    :param network: solved area network
+    :param tso: name of the TSO, used as model part reference
+    :param scenario_date: scenario timestamp
+    :param time_horizon: time horizon of the model, e.g. 1D
+    :param boundary_model_ids: FullModel IDs of boundary set profiles
+    :param version: version of the model
+    :return: list of zipped profile instances (EQ, SSH, TP and SV)
+    """
+    modeling_authority_set = f"http://www.{tso.lower()}.eu/OperationalPlanning"
+    parameters = {
+        "iidm.export.cgmes.modeling-authority-set": modeling_authority_set,
+        "iidm.export.cgmes.base-name": tso,
+        "iidm.export.cgmes.profiles": "EQ,TP,SSH,SV",
+        "iidm.export.cgmes.topology-kind": "BUS_BRANCH",
+        # Non-UUID IDs of synthetic network are replaced with name based UUIDs as in real IGMs
+        "iidm.export.cgmes.naming-strategy": "cgmes",
+        "iidm.export.cgmes.uuid-namespace": get_synthetic_id("igm", tso, f"{scenario_date:%Y%m%dT%H%MZ}", version),
+        "iidm.export.cgmes.boundary-EQ-identifier": f"urn:uuid:{boundary_model_ids['EQBD']}",
+        "iidm.export.cgmes.boundary-TP-identifier": f"urn:uuid:{boundary_model_ids['TPBD']}",
+        "iidm.export.cgmes.business-process": time_horizon,
+        "iidm.export.cgmes.model-version": str(version),
+    }
+    exported = network.save_to_binary_buffer(format="CGMES", parameters=parameters)
+
+    instances = []
+    with ZipFile(exported) as exported_zip:
+        for name in exported_zip.namelist():
+            profile = name.rsplit("_", 1)[-1].removesuffix(".xml")
+            rdf = etree.fromstring(exported_zip.read(name))
+            header = rdf.find("md:FullModel", namespaces=NAMESPACES)
+            header.find("md:Model.scenarioTime", namespaces=NAMESPACES).text = f"{scenario_date:%Y-%m-%dT%H:%M:%SZ}"
+            header.find("md:Model.description", namespaces=NAMESPACES).text = f"Synthetic {profile} model of {tso} for benchmarking"
+            file_name = f"{scenario_date:%Y%m%dT%H%MZ}_{time_horizon}_{tso}_{profile}_{version:03d}.xml"
+            instances.append(_zip_instance(file_name, etree.tostring(rdf, xml_declaration=True, encoding="UTF-8")))
+
+    return instances
+
+
+@dataclass
+class SyntheticModelSet:
+    """Input data of one merge: IGMs and boundary set as OPDM objects and reference data documents of Elastic"""
+    igms: list = field(default_factory=list)
+    boundary: dict = None
+    schedules: list = field(default_factory=list)
+    areas: list = field(default_factory=list)
+    boundary_lines: list = field(default_factory=list)
+
+
+def create_schedule_document(value: float,
+                             business_type: str,
+                             out_domain: str,
+                             in_domain: str,
+                             scenario_date: datetime.datetime,
+                             time_horizon: str,
+                             registered_resource: str | None = None) -> dict:
+    """Returns schedule point of one MTU, as stored in Elastic by schedule converter"""
+    document = {"value": round(value, 1),
+                "utc_start": scenario_date.isoformat(),
+                "utc_end": (scenario_date + datetime.timedelta(minutes=15)).isoformat(),
+                "revisionNumber": "1",
+                "@time_horizon": time_horizon,
+                "TimeSeries.businessType": business_type,
+                "TimeSeries.out_Domain.mRID": out_domain,
+                "TimeSeries.in_Domain.mRID": in_domain}
+    if registered_resource:
+        document["TimeSeries.connectingLine_RegisteredResource.mRID"] = registered_resource
+    return document
+
+
+def create_synthetic_model_set(tso_count: int,
+                               bus_count: int,
+                               tie_line_count: int,
+                               hvdc_count: int,
+                               scenario_date: datetime.datetime,
+                               time_horizon: str = "1D",
+                               schedule_deviation: float = 0.0,
+                               seed: int = 0) -> SyntheticModelSet:
+    """
+    Creates IGMs of given number of TSOs with common boundary set and schedules for scaling of their merge
+    :param tso_count: number of TSOs (areas)
+    :param bus_count: number of transmission buses of each IGM
+    :param tie_line_count: number of tie lines between each pair of neighbouring areas
+    :param hvdc_count: number of HVDC links of each area to external area
+    :param scenario_date: scenario timestamp in UTC
+    :param time_horizon: time horizon of IGMs and schedules
+    :param schedule_deviation: difference of scheduled AC net positions from IGMs in MW, so scaling has work to do
+    :param seed: seed of random flows and loads
+    :return: synthetic model set
+    """
+    if not 2 <= tso_count <= len(AREA_CODES):
+        raise ValueError(f"Number of TSOs must be between 2 and {len(AREA_CODES)}, given: {tso_count}")
+    areas = AREA_CODES[:tso_count]
+    boundary_points = create_boundary_points(areas, tie_line_count, hvdc_count, seed=seed)
+    boundary_valid_from = scenario_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    boundary_model_ids = get_boundary_model_ids(boundary_valid_from, version=1)
+    model_set = SyntheticModelSet()
+
+    # Boundary set is the official one of merging process
+    model_set.boundary = create_opdm_objects([create_boundary_set(boundary_points, boundary_valid_from)],
+                                             metadata={"opde:Object-Type": "BDS", "opde:Context": {"opde:IsOfficial": "true"}},
+                                             key_profile="EQBD")[0]
+
+    for number, area in enumerate(areas):
+        network = create_area_network(area, bus_count, boundary_points, seed=seed)
+        injections = get_area_injections(area, boundary_points)
+        ac_net_position = round(sum(injections[point.id] for point in boundary_points if point.id in injections and not point.hvdc), 1)
+        igm = create_opdm_objects([export_area_model(network, area, scenario_date, time_horizon, boundary_model_ids)])[0]
+        # Metadata added by model retriever and validator to stored models
+        igm.update({"data-source": "OPDM",
+                    "valid": True,
+                    "ac_net_position": ac_net_position,
+                    "sum_conform_load": round(float(network.get_loads()["p0"].sum()), 1)})
+        model_set.igms.append(igm)
+
+        # Deviations of consecutive areas compensate each other, so schedules stay balanced
+        deviation = 0.0 if number == len(areas) - 1 and len(areas) % 2 else schedule_deviation * (-1) ** number
+        model_set.schedules.append(create_schedule_document(ac_net_position + deviation, "B64", get_area_eic(area),
+                                                            get_area_eic(EXTERNAL_AREA_CODE), scenario_date, time_horizon))
+        model_set.areas.append({"area.eic": get_area_eic(area), "area.code": area, "party.name": area})
+
+    # HVDC schedules are published with both business types of day-ahead and other processes
+    for point in (point for point in boundary_points if point.hvdc):
+        for business_type in ["B63", "B67"]:
+            model_set.schedules.append(create_schedule_document(point.p, business_type, get_area_eic(point.from_area),
+                                                                get_area_eic(point.to_area), scenario_date, time_horizon,
+                                                                registered_resource=point.line_eic))
+        model_set.boundary_lines.append({"IdentifiedObject.energyIdentCodeEic": point.line_eic,
+                                         "IdentifiedObject.description": point.name})
+
+    logger.info(f"Created synthetic model set: {tso_count} TSOs, {bus_count} buses per TSO, "
+                f"{len(boundary_points)} boundary points")
+
+    return model_set
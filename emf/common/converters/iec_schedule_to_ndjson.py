@@ -1,5 +1,4 @@
 import pytz
-import pandas as pd
 from lxml import etree
 import aniso8601
 from json import dumps
@@ -104,6 +103,9 @@ def parse_iec_xml(element_tree: bytes, return_values_per_mtu: bool = True, mtu_r
     # TODO make return_values_per_mtu argument in parameters
     # TODO - maybe first analyse the xml, by getting all elements and try to match names, ala point_element_name = unique_element_namelist.contains("point") etc.
 
+    # Imported on first use to keep worker startup light
+    import pandas as pd
+
     # To lxml
     xml_tree = etree.fromstring(element_tree)
 
@@ -1,18 +1,21 @@
 import time
 import logging
 import functools
+from emf.common.helpers.tracing import trace_span
 
 # Start logger
 logger = logging.getLogger(__name__)
 
 
 def performance_counter(units='seconds'):
-    """Counts performance of the function"""
+    """Counts performance of the function and records it as span to active tracer"""
     def decorator_performance_counter(func):
         @functools.wraps(func)
         def wrapper_performance_counter(*args, **kwargs):
             start_time = time.perf_counter()
-            response = func(*args, **kwargs)
+            # Record also as span if tracing of current process is active
+            with trace_span(func.__name__):
+                response = func(*args, **kwargs)
             duration = round(time.perf_counter() - start_time, 2)
             if units == 'minutes':
                 duration = round(duration / 60, 2)  # counting by minutes
@@ -0,0 +1,113 @@
+import io
+import queue
+import shutil
+import logging
+import threading
+from typing import Iterable
+from zipfile import ZipFile
+
+logger = logging.getLogger(__name__)
+
+# Size of chunks passed from archive builder to reader and number of chunks kept in memory between them
+CHUNK_SIZE = 1024 ** 2
+QUEUE_SIZE = 16
+
+
+class _QueueWriter(io.RawIOBase):
+    """Non-seekable output of archive builder, written chunks are passed to the stream reader"""
+
+    def __init__(self, stream: "ArchiveStream"):
+        self._stream = stream
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        self._stream._put(bytes(data))
+        return len(data)
+
+
+class ArchiveStream(io.RawIOBase):
+    """
+    Readable zip archive which is built in background thread while it is being read, e.g. by multipart upload.
+    Entries are written through public ZipFile.open(name, "w") into non-seekable output, so only a few
+    chunks of the archive are kept in memory at once
+    """
+
+    def __init__(self, name: str, entries: Iterable):
+        """
+        :param name: name of the archive, e.g. object name in object storage
+        :param entries: iterable of (name, content) tuples, content is bytes-like or file object read from start
+        """
+        super().__init__()
+        self._name = name
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._chunk = memoryview(b"")
+        self._finished = False
+        self._cancelled = threading.Event()
+        self.size = 0
+        self._builder = threading.Thread(target=self._build, args=(entries,), name="archive-builder", daemon=True)
+        self._builder.start()
+
+    @property
+    def name(self):
+        return self._name
+
+    def _put(self, item):
+        """Passes item to reader, waits while reader is behind unless the stream is closed"""
+        while True:
+            if self._cancelled.is_set():
+                raise ValueError(f"Archive stream closed: {self._name}")
+            try:
+                self._queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _build(self, entries: Iterable):
+        try:
+            with ZipFile(_QueueWriter(self), "w") as archive:
+                for name, content in entries:
+                    with archive.open(name, "w") as entry:
+                        if isinstance(content, (bytes, bytearray, memoryview)):
+                            # Content is written in slices of the same memory, without copying it
+                            content = memoryview(content)
+                            for position in range(0, len(content), CHUNK_SIZE):
+                                entry.write(content[position:position + CHUNK_SIZE])
+                        else:
+                            content.seek(0)
+                            shutil.copyfileobj(content, entry, CHUNK_SIZE)
+                    logger.info(f"Added file to archive {self._name}: {name}")
+            self._put(None)
+        except Exception as error:
+            if self._cancelled.is_set():
+                return
+            logger.error(f"Failed to build archive {self._name}: {error}")
+            self._put(error)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._chunk and not self._finished:
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._finished = True
+                raise item
+            if item is None:
+                self._finished = True
+            else:
+                self._chunk = memoryview(item)
+
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        self.size += size
+
+        return size
+
+    def close(self):
+        """Stops the builder if archive was not read to the end"""
+        self._cancelled.set()
+        self._builder.join()
+        super().close()
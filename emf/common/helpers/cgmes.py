@@ -3,6 +3,7 @@ import json
 import pandas as pd
 import config
 from lxml import etree
+from emf.common.helpers.compact_triplets import expand_triplets
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +18,15 @@ def export_to_cgmes_zip(triplets: list):
 
     rdf_map = json.load(config.paths.cgm_worker.CGMES_v2_4_15_2014_08_07)
 
-    return pd.concat(triplets, ignore_index=True).export_to_cimxml(rdf_map=rdf_map,
-                                                                   namespace_map=namespace_map,
-                                                                   export_undefined=False,
-                                                                   export_type="xml_per_instance_zip_per_xml",
-                                                                   debug=False,
-                                                                   export_to_memory=True)
+    # Compact triplets are decoded as export groups data by INSTANCE_ID
+    data = pd.concat([expand_triplets(data) for data in triplets], ignore_index=True)
+
+    return data.export_to_cimxml(rdf_map=rdf_map,
+                                 namespace_map=namespace_map,
+                                 export_undefined=False,
+                                 export_type="xml_per_instance_zip_per_xml",
+                                 debug=False,
+                                 export_to_memory=True)
 
 
 def get_metadata_from_rdfxml(parsed_xml: etree._ElementTree):
@@ -0,0 +1,86 @@
+import logging
+import pandas as pd
+import triplets
+from pandas.api.types import union_categoricals
+
+logger = logging.getLogger(__name__)
+
+TRIPLET_COLUMNS = ["ID", "KEY", "VALUE", "INSTANCE_ID"]
+
+# Triplets library implementation, helper below calls it explicitly instead of replacing DataFrame method
+_type_tableview = triplets.rdf_parser.type_tableview
+
+
+def is_compact(data: pd.DataFrame) -> bool:
+    """Check whether any of the triplet columns is stored as category"""
+    return any(isinstance(data[column].dtype, pd.CategoricalDtype) for column in TRIPLET_COLUMNS if column in data.columns)
+
+
+def compact_triplets(data: pd.DataFrame, encode_value: bool = True) -> pd.DataFrame:
+    """
+    Converts triplets to memory compact representation where ID, KEY and INSTANCE_ID (and VALUE if requested)
+    are dictionary-encoded as pandas categories. Conversion is done column by column to avoid copying whole frame
+    :param data: triplets dataframe
+    :param encode_value: flag to encode also VALUE column, references and enumerations repeat heavily
+    :return: compact triplets dataframe
+    """
+    columns = ["ID", "KEY", "INSTANCE_ID"] + (["VALUE"] if encode_value else [])
+    # Deep memory usage walks all strings, measured only when it is logged
+    log_memory = logger.isEnabledFor(logging.DEBUG)
+    if log_memory:
+        memory_before = data.memory_usage(deep=True).sum()
+    for column in columns:
+        if column in data.columns and not isinstance(data[column].dtype, pd.CategoricalDtype):
+            data[column] = data[column].astype("category")
+    if log_memory:
+        memory_after = data.memory_usage(deep=True).sum()
+        logger.debug(f"Compacted triplets from {memory_before / 1e6:.1f} MB to {memory_after / 1e6:.1f} MB")
+
+    return data
+
+
+def expand_triplets(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts compact triplets back to plain columns as produced by triplets library
+    :param data: compact triplets dataframe
+    :return: triplets dataframe with object columns
+    """
+    if not is_compact(data):
+        return data
+
+    # Columns get back the dtype of their categories, i.e. the dtype they were parsed with
+    return data.astype({column: data[column].cat.categories.dtype for column in TRIPLET_COLUMNS
+                        if column in data.columns and isinstance(data[column].dtype, pd.CategoricalDtype)})
+
+
+def concat_triplets(data: list) -> pd.DataFrame:
+    """
+    Concatenates triplets keeping compact columns compact, category dictionaries of all parts are united.
+    Plain pandas concat would decode categories with different dictionaries back to object strings
+    :param data: list of triplets dataframes, compact or plain
+    :return: compact triplets dataframe
+    """
+    data = [compact_triplets(part) for part in data]
+    columns = {}
+    for column in TRIPLET_COLUMNS:
+        if all(column in part.columns for part in data):
+            columns[column] = union_categoricals([part[column] for part in data])
+
+    return pd.DataFrame(columns)
+
+
+def type_tableview(data: pd.DataFrame, type_name: str, string_to_number: bool = True, type_key: str = "Type"):
+    """
+    Creates a table view of all objects of same type. Works on both plain and compact triplets: for compact data
+    only the rows of the requested type are decoded before pivoting
+    :param data: triplets dataframe
+    :param type_name: name of the type, e.g. 'Terminal'
+    :param string_to_number: flag to convert numeric columns to numbers
+    :param type_key: KEY used to identify object type
+    :return: table view or None if type is not present
+    """
+    if is_compact(data):
+        type_ids = data.loc[(data["KEY"] == type_key) & (data["VALUE"] == type_name), "ID"]
+        data = expand_triplets(data[data["ID"].isin(type_ids)])
+
+    return _type_tableview(data, type_name, string_to_number=string_to_number, type_key=type_key)
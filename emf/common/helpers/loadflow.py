@@ -1,9 +1,11 @@
 import logging
 import uuid
+import hashlib
 import re
+import numpy as np
 import pandas as pd
 from io import BytesIO
-from zipfile import ZipFile, ZIP_DEFLATED
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
 import pypowsybl
 from typing import List
 
@@ -25,10 +27,10 @@ def package_for_pypowsybl(opdm_objects, return_zip: bool = False):
     with ZipFile(output_object, "w") as global_zip:
         for opdm_components in opdm_objects:
             for instance in opdm_components['opde:Component']:
-                with ZipFile(BytesIO(instance['opdm:Profile']['DATA'])) as instance_zip:
-                    for file_name in instance_zip.namelist():
-                        logger.info(f"Adding file: {file_name}")
-                        global_zip.writestr(file_name, instance_zip.open(file_name).read())
+                # Component zips are stored as nested archives, pypowsybl reads them without unpacking here
+                file_name = instance['opdm:Profile']['pmd:fileName']
+                logger.info(f"Adding file: {file_name}")
+                global_zip.writestr(file_name, instance['opdm:Profile']['DATA'], compress_type=ZIP_STORED)
 
     return output_object
 
@@ -89,6 +91,28 @@ def get_network_elements(network: pypowsybl.network,
     return elements
 
 
+def get_topology_fingerprint(network: pypowsybl.network) -> str:
+    """
+    Returns cheap fingerprint of network structure from identifiers of bus-breaker view buses, dangling lines, loads and
+    generators and connected components of buses. Model versions, injection values and load flow results do not change
+    it. Element order and bus view identifiers differ between imports of the same model, so bus-breaker view identifiers
+    are used and sorted
+    :param network: pypowsybl network
+    :return: fingerprint as hex digest
+    """
+    buses = network.get_bus_breaker_view_buses(attributes=['connected_component']).sort_index()
+
+    digest = hashlib.sha1()
+    for ids in [buses.index,
+                network.get_dangling_lines(attributes=[]).index,
+                network.get_loads(attributes=[]).index,
+                network.get_generators(attributes=[]).index]:
+        digest.update(pd.util.hash_array(np.sort(ids.to_numpy(dtype=object))).tobytes())
+    digest.update(buses['connected_component'].to_numpy(dtype=np.int64).tobytes())
+
+    return digest.hexdigest()
+
+
 def get_slack_generators(network: pypowsybl.network):
     slack_terminals = network.get_extension('slackTerminal')
     slack_generators = get_network_elements(network=network,
@@ -0,0 +1,42 @@
+import gc
+import ctypes
+import logging
+from emf.common.helpers.tracing import get_rss_mb
+
+logger = logging.getLogger(__name__)
+
+try:
+    _libc = ctypes.CDLL("libc.so.6")
+except OSError:
+    _libc = None
+
+
+def release_memory(label: str | None = None) -> float:
+    """
+    Collects unreferenced objects and returns free heap memory to the operating system
+    :param label: name of released intermediate used in log
+    :return: decrease of resident memory in MB
+    """
+    rss_before = get_rss_mb()
+    gc.collect()
+    if _libc is not None:
+        try:
+            _libc.malloc_trim(0)
+        except AttributeError:  # not glibc
+            pass
+    released = round(rss_before - get_rss_mb(), 1)
+    logger.info(f"Released {label or 'memory'}: {released} MB [resident: {round(get_rss_mb(), 1)} MB]")
+
+    return released
+
+
+def get_buffer_size(file_object) -> int:
+    """Returns size of binary buffer content in bytes"""
+    if hasattr(file_object, "getbuffer"):
+        return file_object.getbuffer().nbytes
+
+    position = file_object.tell()
+    size = file_object.seek(0, 2)
+    file_object.seek(position)
+
+    return size
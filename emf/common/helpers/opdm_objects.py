@@ -1,4 +1,5 @@
 import logging
+import functools
 from io import BytesIO
 import pandas as pd
 import triplets
@@ -6,6 +7,8 @@ from lxml import etree
 from emf.common.helpers.time import parse_datetime
 from emf.common.helpers.utils import get_xml_from_zip
 from emf.common.helpers.cgmes import get_metadata_from_rdfxml
+from emf.common.helpers.compact_triplets import compact_triplets, concat_triplets, expand_triplets
+from emf.common.helpers.profile_cache import profile_cache
 
 
 logger = logging.getLogger(__name__)
@@ -43,10 +46,60 @@ def get_opdm_component_data_bytes(opdm_component: dict):
     return data
 
 
-def load_opdm_objects_to_triplets(opdm_objects: list[dict], profile: str | None = None):
-    if profile:
-        return pd.read_RDF([get_opdm_component_data_bytes(instance) for model in opdm_objects for instance in model['opde:Component'] if instance['opdm:Profile']['pmd:cgmesProfile'] == profile])
-    return pd.read_RDF([get_opdm_component_data_bytes(instance) for model in opdm_objects for instance in model['opde:Component']])
+def read_rdf_instance(content: bytes, file_name: str) -> pd.DataFrame:
+    """Parse single profile instance content to compact triplets, used for shared static profiles"""
+    data = BytesIO(content)
+    data.name = file_name
+    return compact_triplets(pd.read_RDF([data]))
+
+
+def get_opdm_objects_size_mb(opdm_objects: list[dict]) -> float:
+    """Returns total size of components content of OPDM objects in MB"""
+    size = sum(len(instance['opdm:Profile'].get('DATA') or b"") for model in opdm_objects for instance in model['opde:Component'])
+    return round(size / 1024 ** 2, 2)
+
+
+def release_opdm_objects_data(opdm_objects: list[dict], keep_profiles: list | None = None):
+    """
+    Drops components content of OPDM objects when it is not needed anymore, metadata is kept
+    :param opdm_objects: list of OPDM objects
+    :param keep_profiles: CGMES profiles which content is kept
+    """
+    for model in opdm_objects:
+        for instance in model['opde:Component']:
+            if instance['opdm:Profile']['pmd:cgmesProfile'] not in (keep_profiles or []):
+                instance['opdm:Profile'].pop('DATA', None)
+
+
+def load_opdm_objects_to_triplets(opdm_objects: list[dict], profile: str | None = None, compact: bool = False):
+    instances = [instance for model in opdm_objects for instance in model['opde:Component']
+                 if not profile or instance['opdm:Profile']['pmd:cgmesProfile'] == profile]
+
+    # Static profiles are parsed once per content and shared in compact form, consecutive other profiles are parsed
+    # together. Parsed parts are concatenated in input order, same row order as parsing all instances at once
+    if not any(profile_cache.is_cached_profile(instance['opdm:Profile']['pmd:cgmesProfile']) for instance in instances):
+        data = pd.read_RDF([get_opdm_component_data_bytes(instance) for instance in instances])
+        # Dictionary-encode triplet columns for read-mostly usage (e.g. original models in post-processing)
+        if compact:
+            data = compact_triplets(data)
+    else:
+        data, parsed_instances = [], []
+        for instance in instances:
+            if not profile_cache.is_cached_profile(instance['opdm:Profile']['pmd:cgmesProfile']):
+                parsed_instances.append(instance)
+                continue
+            if parsed_instances:
+                data.append(pd.read_RDF([get_opdm_component_data_bytes(parsed) for parsed in parsed_instances]))
+                parsed_instances = []
+            data.append(profile_cache.get_parsed(content=instance['opdm:Profile']['DATA'],
+                                                 parser=functools.partial(read_rdf_instance, file_name=instance['opdm:Profile']['pmd:fileName']),
+                                                 parser_name="triplets"))
+        if parsed_instances:
+            data.append(pd.read_RDF([get_opdm_component_data_bytes(parsed) for parsed in parsed_instances]))
+        # Shared compact instances are concatenated without decoding them, unless plain triplets are requested
+        data = concat_triplets(data) if compact else expand_triplets(pd.concat(data, ignore_index=True))
+
+    return data
 
 
 def get_metadata_from_file_name(file_name: str, meta_separator: str = "_"):
@@ -178,7 +231,14 @@ def create_opdm_objects(models: list, metadata: dict | None = None, key_profile:
 
             # Build profile instance metadata
             opdm_profile = get_metadata_from_file_name(profile_instance.name)
-            opdm_profile.update(get_opdm_metadata_from_rdfxml(get_xml_from_zip(profile_instance)))
+            content = profile_instance.getvalue()
+            if profile_cache.is_cached_profile(opdm_profile.get('pmd:cgmesProfile')):
+                content = profile_cache.add_content(content)
+                opdm_profile.update(profile_cache.get_parsed(content=content,
+                                                             parser=lambda data: get_opdm_metadata_from_rdfxml(get_xml_from_zip(BytesIO(data))),
+                                                             parser_name="rdfxml_metadata"))
+            else:
+                opdm_profile.update(get_opdm_metadata_from_rdfxml(get_xml_from_zip(profile_instance)))
             opdm_profile['pmd:fileName'] = profile_instance.name
             opdm_profile["pmd:content-reference"] = generate_opdm_object_content_reference_from_filename(profile_instance.name)
 
@@ -191,7 +251,7 @@ def create_opdm_objects(models: list, metadata: dict | None = None, key_profile:
             opdm_object['opde:Object-Type'] = "IGM"
 
             # Add DATA
-            opdm_profile['DATA'] = profile_instance.getvalue()
+            opdm_profile['DATA'] = content
 
             # Add component to main object
             opdm_object['opde:Component'].append({'opdm:Profile': opdm_profile})
@@ -0,0 +1,126 @@
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable
+import config
+from emf.common.config_parser import parse_app_properties
+
+logger = logging.getLogger(__name__)
+
+parse_app_properties(caller_globals=globals(), path=config.paths.integrations.object_storage)
+
+
+class ProfileCache:
+    """
+    In-memory index of profile instances keyed by content hash. Identical content (e.g. same EQ profile referenced
+    by consecutive versions and timestamps of a TSO model) is stored once, and its parsed forms are created once
+    and shared by reference between all models handled in the same worker
+    """
+
+    def __init__(self, profiles: list | None = None, max_items: int = 0):
+        self.profiles = profiles or []
+        self.max_items = max_items
+        self.content = OrderedDict()
+        self.parsed = OrderedDict()
+        self.references = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0
+
+    @staticmethod
+    def get_hash(content: bytes) -> str:
+        """Returns sha256 hex digest of content"""
+        return hashlib.sha256(content).hexdigest()
+
+    def is_cached_profile(self, profile: str | None) -> bool:
+        """Check whether given CGMES profile is subject of caching"""
+        return self.enabled and profile in self.profiles
+
+    def _evict(self, storage: OrderedDict):
+        while len(storage) > self.max_items:
+            content_hash, _ = storage.popitem(last=False)
+            logger.debug(f"Evicted profile instance from cache: {content_hash}")
+
+    def get_content(self, content_hash: str | None) -> bytes | None:
+        """Returns stored content by its hash or None if not available"""
+        with self._lock:
+            content = self.content.get(content_hash)
+            if content is not None:
+                self.content.move_to_end(content_hash)
+                self.hits += 1
+            return content
+
+    def get_reference_hash(self, reference: str) -> str | None:
+        """Returns hash of content last stored for given reference (e.g. bucket and object name), None if unknown"""
+        with self._lock:
+            return self.references.get(reference)
+
+    def add_content(self, content: bytes, reference: str | None = None) -> bytes:
+        """
+        Stores content and returns the canonical instance of it, so duplicates can be released by caller
+        :param content: profile instance content
+        :param reference: optional reference of content source, e.g. bucket and object name, to find it without hashing
+        :return: already stored identical content or given content
+        """
+        if not self.enabled or not content:
+            return content
+
+        content_hash = self.get_hash(content)
+        with self._lock:
+            if reference:
+                self.references[reference] = content_hash
+                self.references.move_to_end(reference)
+                self._evict(self.references)
+            if content_hash in self.content:
+                self.content.move_to_end(content_hash)
+                self.hits += 1
+                return self.content[content_hash]
+            self.misses += 1
+            self.content[content_hash] = content
+            self._evict(self.content)
+
+        return content
+
+    def get_parsed(self, content: bytes, parser: Callable, parser_name: str | None = None):
+        """
+        Returns parsed form of content, parser is called only for content not seen before
+        :param content: profile instance content
+        :param parser: function to parse content, called with content as only argument
+        :param parser_name: name used to distinguish different parsed forms of same content
+        :return: parsed content, shared between all callers and should not be modified in place
+        """
+        if not self.enabled:
+            return parser(content)
+
+        key = (self.get_hash(content), parser_name or parser.__name__)
+        with self._lock:
+            if key in self.parsed:
+                self.parsed.move_to_end(key)
+                self.hits += 1
+                return self.parsed[key]
+
+        # Parse outside the lock, concurrent parsing of same content is harmless
+        parsed = parser(content)
+        with self._lock:
+            self.misses += 1
+            self.parsed[key] = parsed
+            self._evict(self.parsed)
+
+        return parsed
+
+    def clear(self):
+        with self._lock:
+            logger.info(f"Clearing profile cache [hits: {self.hits}, misses: {self.misses}]")
+            self.content.clear()
+            self.parsed.clear()
+            self.references.clear()
+
+
+# Worker wide profile cache instance
+profile_cache = ProfileCache(profiles=[profile.strip() for profile in PROFILE_CACHE_PROFILES.split(",")],
+                             max_items=int(PROFILE_CACHE_SIZE))
@@ -12,17 +12,28 @@ logging.basicConfig(
     handlers=[logging.StreamHandler(sys.stdout)]
 )
 
+# Keys used to walk from tie flows to boundary nodes, injections, line containers and state variables
+NODE_KEYS = ["Terminal.ConnectivityNode", "Terminal.TopologicalNode"]
+CONTAINER_KEYS = ["ConnectivityNode.ConnectivityNodeContainer", "TopologicalNode.ConnectivityNodeContainer"]
+LOAD_AND_GENERATION_KEYS = ["EnergyConsumer.p", "EnergyConsumer.q", "RotatingMachine.p", "RotatingMachine.q"]
+TIEFLOW_DATA_COLUMNS = ["EquivalentInjection.p", "EquivalentInjection.q", "SvPowerFlow.p", "SvPowerFlow.q"]
+INTERCHANGE_TYPE_SUFFIX = "ControlAreaTypeKind.Interchange"
+
+
 def sum_on_KEY(data, KEY, precision=1):
-    return round(data.query("KEY == @KEY").VALUE.astype(float).sum(), precision)
+    return round(data.loc[data["KEY"] == KEY, "VALUE"].astype(float).sum(), precision)
+
+
+def sum_on_KEYS(data, KEYS, precision=1):
+    """Sums values of all given keys in one pass over the data, missing keys sum to 0"""
+    selected = data.loc[data["KEY"].isin(KEYS), ["KEY", "VALUE"]]
+    sums = selected["VALUE"].astype(float).groupby(selected["KEY"]).sum()
+    return {KEY: round(float(sums.get(KEY, 0)), precision) for KEY in KEYS}
+
 
 def get_load_and_generation_ssh(data):
     logger.info("Getting Load and Generation data") # TODO add wrapper with timing and logging
-    return {
-        "EnergyConsumer.p": sum_on_KEY(data, 'EnergyConsumer.p'),
-        "EnergyConsumer.q": sum_on_KEY(data, 'EnergyConsumer.q'),
-        "RotatingMachine.p": sum_on_KEY(data, 'RotatingMachine.p'),
-        "RotatingMachine.q": sum_on_KEY(data, 'RotatingMachine.q'),
-    }
+    return sum_on_KEYS(data, LOAD_AND_GENERATION_KEYS)
 
 def type_tableview_merge(data, query):
     """function assumes that the relationship between entities can be represented with a direct link (PreviousEntity.NextEntity -> NextEntity.ID)"""
@@ -88,52 +99,96 @@ def type_tableview_merge(data, query):
 
     return previous_entity_data
 
+def get_tieflow_subset(data):
+    """
+    Selects triplets of objects needed for tie flow table: control areas, tie flows, their terminals and boundary
+    nodes, equivalent injections connected to boundary nodes, line containers and related state variables.
+    Lookups are done on reference rows only, so type views are later created from small subset instead of whole model
+    :param data: model triplets
+    :return: triplets of tie flow related objects
+    """
+    reference_keys = ["TieFlow.ControlArea", "TieFlow.Terminal", "Terminal.ConductingEquipment",
+                      "SvPowerFlow.Terminal", "SvVoltage.TopologicalNode"] + NODE_KEYS + CONTAINER_KEYS
+    references = data.loc[data["KEY"].isin(reference_keys), ["ID", "KEY", "VALUE"]]
+
+    def referenced(from_ids, keys):
+        return references.loc[references["KEY"].isin(keys) & references["ID"].isin(from_ids), "VALUE"]
+
+    def referencing(to_ids, keys):
+        return references.loc[references["KEY"].isin(keys) & references["VALUE"].isin(to_ids), "ID"]
+
+    tieflows = data.loc[(data["KEY"] == "Type") & (data["VALUE"] == "TieFlow"), "ID"]
+    tieflow_terminals = referenced(tieflows, ["TieFlow.Terminal"])
+    boundary_nodes = referenced(tieflow_terminals, NODE_KEYS)
+    boundary_terminals = referencing(boundary_nodes, NODE_KEYS)
+    boundary_topological_nodes = referenced(boundary_terminals, ["Terminal.TopologicalNode"])
+
+    related_ids = pd.concat([
+        tieflows,
+        referenced(tieflows, ["TieFlow.ControlArea"]),
+        tieflow_terminals,
+        boundary_nodes,
+        boundary_terminals,
+        boundary_topological_nodes,
+        referenced(boundary_terminals, ["Terminal.ConductingEquipment"]),
+        referenced(boundary_nodes, CONTAINER_KEYS),
+        referencing(tieflow_terminals, ["SvPowerFlow.Terminal"]),
+        referencing(boundary_topological_nodes, ["SvVoltage.TopologicalNode"]),
+    ], ignore_index=True).unique()
+
+    return data[data["ID"].isin(related_ids)]
+
+
+def label_cross_border(from_codes, to_codes, delimiter="-"):
+    """Returns alphabetically ordered pairs of country codes, e.g. LT-PL for both LT->PL and PL->LT"""
+    from_codes, to_codes = from_codes.astype(str), to_codes.astype(str)
+    in_order = from_codes <= to_codes
+
+    return from_codes.where(in_order, to_codes) + delimiter + to_codes.where(in_order, from_codes)
+
+
 def get_tieflow_data(data):
+    """
+    Creates pre-joined table of tie flows with their control areas, boundary nodes, equivalent injections, line
+    containers and power flow results. Single table per model is used for all tie flow based statistics
+    :param data: model triplets
+    :return: table with row per tie flow and injection
+    """
     logger.info("Getting Tieflow data")
+    data = get_tieflow_subset(data)
+
+    # Boundary nodes are ConnectivityNodes in node-breaker and TopologicalNodes in bus-branch models
+    node_type = "TopologicalNode"
+    if ((data["KEY"] == "Type") & (data["VALUE"] == "ConnectivityNode")).any():
+        node_type = "ConnectivityNode"
+
     try:
-        tieflow_data = type_tableview_merge(data, "ControlArea<-TieFlow->Terminal->ConnectivityNode")
-    except:
-        try:
-            tieflow_data = type_tableview_merge(data, "ControlArea<-TieFlow->Terminal->TopologicalNode")
-        except Exception as e:
-            logger.error(f"Failed to load Tieflow data: {e}")
+        tieflow_data = type_tableview_merge(data, f"ControlArea<-TieFlow->Terminal->{node_type}")
+    except Exception as e:
+        logger.error(f"Failed to load Tieflow data: {e}")
+        raise
 
     # TODO find a better way to identify HVDC
     # TODO - for CGMES3/CIM17 get also the Boundary objects and use correct field to identify HVDC
-    try:
-        tieflow_data["BoundaryPoint.isDirectCurrent"] = tieflow_data["IdentifiedObject.description"].str.startswith("HVDC")
-    except:
-        try:
-            tieflow_data["BoundaryPoint.isDirectCurrent"] = tieflow_data["IdentifiedObject.description_ConnectivityNode"].str.startswith("HVDC")
-        except Exception as e:
-            logger.error(f"Failed to load HVDC data: {e}")
-
-    # Add Injections
+    for description_column in ["IdentifiedObject.description", f"IdentifiedObject.description_{node_type}"]:
+        if description_column in tieflow_data.columns:
+            tieflow_data["BoundaryPoint.isDirectCurrent"] = tieflow_data[description_column].astype(str).str.startswith("HVDC")
+            break
+    else:
+        logger.error("Failed to load HVDC data: description of boundary points not available")
+
+    # Add Injections and line containers
     try:
         tieflow_data = tieflow_data.merge(type_tableview_merge(data, "EquivalentInjection<-Terminal.ConductingEquipment"),
-                                          left_on="ID_ConnectivityNode",
-                                          right_on='Terminal.ConnectivityNode',
+                                          left_on=f"ID_{node_type}",
+                                          right_on=f"Terminal.{node_type}",
                                           suffixes=("", "_EquivalentInjection"))
-        # Add line containers
         tieflow_data = tieflow_data.merge(data.type_tableview("Line"),
-                                          left_on="ConnectivityNode.ConnectivityNodeContainer",
+                                          left_on=f"{node_type}.ConnectivityNodeContainer",
                                           right_on="ID",
                                           suffixes=("", "_Line"))
-    except:
-        try:
-            tieflow_data = tieflow_data.merge(
-                type_tableview_merge(data, "EquivalentInjection<-Terminal.ConductingEquipment"),
-                left_on="ID_TopologicalNode",
-                right_on='Terminal.TopologicalNode',
-                suffixes=("", "_EquivalentInjection"))
-
-            tieflow_data = tieflow_data.merge(data.type_tableview("Line"),
-                                              left_on="TopologicalNode.ConnectivityNodeContainer",
-                                              right_on="ID",
-                                              suffixes=("", "_Line"))
-        except Exception as e:
-            print(f"Unable to map injections: {e}")
-
+    except Exception as e:
+        logger.warning(f"Unable to map injections: {e}")
 
     # Add SV results
     try:
@@ -147,58 +202,72 @@ def get_tieflow_data(data):
                                           right_on="SvVoltage.TopologicalNode",
                                           suffixes=("", "_SvVoltage"),
                                           how="left")
-    except:
-        print("No SV data available")
-
+    except Exception:
+        logger.warning("No SV data available")
 
     # Fix some names
     tieflow_data = tieflow_data.rename(columns={
         "IdentifiedObject.energyIdentCodeEic_Terminal": "IdentifiedObject.energyIdentCodeEic_ControlArea"})
 
     # Add cross borders data
-    def merge_sort_strings(row, col1, col2, delimiter='-'):
-        return delimiter.join(sorted([row[col1], row[col2]]))
-
-    # Apply the function to each row
-    try:
-        tieflow_data['cross_border'] = tieflow_data.apply(lambda row: merge_sort_strings(row, 'ConnectivityNode.fromEndIsoCode', 'ConnectivityNode.toEndIsoCode'), axis=1)
-    except:
-        tieflow_data['cross_border'] = tieflow_data.apply(lambda row: merge_sort_strings(row, 'TopologicalNode.fromEndIsoCode', 'TopologicalNode.toEndIsoCode'), axis=1)
+    tieflow_data["cross_border"] = label_cross_border(tieflow_data[f"{node_type}.fromEndIsoCode"],
+                                                      tieflow_data[f"{node_type}.toEndIsoCode"])
 
     return tieflow_data
 
+
+def get_interchange_tieflows(tieflow_data, ac_only=False):
+    """
+    Selects tie flows of interchange control areas from tie flow table
+    :param tieflow_data: table from get_tieflow_data
+    :param ac_only: exclude HVDC boundary points
+    :return: filtered tie flow table
+    """
+    mask = tieflow_data["ControlArea.type"].astype(str).str.endswith(INTERCHANGE_TYPE_SUFFIX)
+    if ac_only and "BoundaryPoint.isDirectCurrent" in tieflow_data.columns:
+        mask &= tieflow_data["BoundaryPoint.isDirectCurrent"] == False
+
+    return tieflow_data[mask]
+
+
+def get_ac_net_position(tieflow_data):
+    """Returns AC net position as sum of equivalent injections on interchange tie flows, None if not available"""
+    tieflow_values = get_interchange_tieflows(tieflow_data, ac_only=True)[TIEFLOW_DATA_COLUMNS].sum().to_dict()
+    return tieflow_values.get("EquivalentInjection.p", None)
+
+
 def get_system_metrics(data, tieflow_data=None, load_and_generation=None):
 
     if tieflow_data is None or tieflow_data.empty:
-        # Use only Interchange Control Area Tieflows
-        tieflow_type = "http://iec.ch/TC57/2013/CIM-schema-cim16#ControlAreaTypeKind.Interchange"
         tieflow_data = get_tieflow_data(data)
-        tieflow_data = tieflow_data[tieflow_data['ControlArea.type'] == tieflow_type]
 
+    # Use only Interchange Control Area Tieflows
+    tieflow_data = get_interchange_tieflows(tieflow_data)
 
-    if load_and_generation is None or load_and_generation.empty:
+    if load_and_generation is None:
         load_and_generation = get_load_and_generation_ssh(data)
 
-    data_columns = ["EquivalentInjection.p", "EquivalentInjection.q", "SvPowerFlow.p", "SvPowerFlow.q"]
+    tieflow_values = tieflow_data[TIEFLOW_DATA_COLUMNS]
+    is_direct_current = tieflow_data.get("BoundaryPoint.isDirectCurrent", pd.Series(False, index=tieflow_data.index))
 
     # Calculating the absolute sum and sum for tieflow data
-    tieflow_abs = tieflow_data[data_columns].abs().sum().to_dict()
-    tieflow_np = tieflow_data[data_columns].sum().to_dict()
+    tieflow_abs = tieflow_values.abs().sum().to_dict()
+    tieflow_np = tieflow_values.sum().to_dict()
 
     # Summing values where BoundaryPoint.isDirectCurrent is False
-    tieflow_acnp = tieflow_data[tieflow_data['BoundaryPoint.isDirectCurrent'] == False][data_columns].sum().to_dict()
+    tieflow_acnp = tieflow_values[is_direct_current == False].sum().to_dict()
 
     # Processing HVDC tieflow data
     try:
-        tieflow_hvdc = tieflow_data[tieflow_data['BoundaryPoint.isDirectCurrent'] == True][
-            ['IdentifiedObject.energyIdentCodeEic_Line'] + data_columns].set_index(
+        tieflow_hvdc = tieflow_data.loc[is_direct_current == True,
+            ['IdentifiedObject.energyIdentCodeEic_Line'] + TIEFLOW_DATA_COLUMNS].set_index(
             'IdentifiedObject.energyIdentCodeEic_Line').drop_duplicates().to_dict("index")
-    except:
+    except Exception:
         tieflow_hvdc = {}
 
     # Calculating total_load, generation, and net position
-    load = load_and_generation["EnergyConsumer.p"].sum()
-    generation = load_and_generation["RotatingMachine.p"].sum()
+    load = load_and_generation["EnergyConsumer.p"]
+    generation = load_and_generation["RotatingMachine.p"]
     net_position = tieflow_np.get("EquivalentInjection.p", 0)  # Default to 0 if key doesn't exist
 
     # Calculating losses and losses coefficient
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import logging
+import resource
+import threading
+import contextvars
+from io import BytesIO
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+
+logger = logging.getLogger(__name__)
+
+# Tracer of currently running process, used by performance_counter to record spans of decorated functions
+_current_tracer = contextvars.ContextVar("current_tracer", default=None)
+
+
+def get_rss_mb() -> float:
+    """Returns current resident set size of the process in MB"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError):
+        return get_peak_rss_mb()
+
+
+def get_peak_rss_mb() -> float:
+    """Returns peak resident set size of the process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@dataclass
+class Span:
+    name: str
+    start_time: float
+    parent: str | None = None
+    wall_s: float = None
+    cpu_s: float = None
+    rss_start_mb: float = None
+    rss_delta_mb: float = None
+    peak_rss_delta_mb: float = None
+    thread_id: int = None
+    attributes: dict = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Collects timing spans of pipeline stages. Each span records wall and CPU time, change of resident memory and
+    its peak, and optional attributes like input sizes. Spans can be attached to reports or exported as Chrome trace
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.spans = []
+        self._stack = threading.local()
+        self._token = None
+
+    def activate(self):
+        """Sets tracer as active for current context, so spans of decorated functions are recorded"""
+        self._token = _current_tracer.set(self)
+        return self
+
+    def deactivate(self):
+        """Removes tracer from current context"""
+        if self._token is not None:
+            _current_tracer.reset(self._token)
+            self._token = None
+
+    def __enter__(self):
+        return self.activate()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.deactivate()
+        return False
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Measures enclosed block as named span
+        :param name: name of the span, e.g. pipeline stage
+        :param attributes: additional attributes, more can be added to yielded span during execution
+        """
+        stack = self._stack.__dict__.setdefault("names", [])
+        span = Span(name=name,
+                    start_time=time.time(),
+                    parent=stack[-1] if stack else None,
+                    rss_start_mb=round(get_rss_mb(), 1),
+                    thread_id=threading.get_ident(),
+                    attributes=attributes)
+        peak_rss_start = get_peak_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        stack.append(name)
+        try:
+            yield span
+        except Exception as error:
+            span.attributes['error'] = str(error)
+            raise
+        finally:
+            stack.pop()
+            span.wall_s = round(time.perf_counter() - wall_start, 3)
+            span.cpu_s = round(time.process_time() - cpu_start, 3)
+            span.rss_delta_mb = round(get_rss_mb() - span.rss_start_mb, 1)
+            span.peak_rss_delta_mb = round(get_peak_rss_mb() - peak_rss_start, 1)
+            self.spans.append(span)
+            logger.debug(f"Span {name!r} finished [wall: {span.wall_s}s, cpu: {span.cpu_s}s, rss delta: {span.rss_delta_mb} MB]")
+
+    def to_report(self) -> list:
+        """Returns spans as list of dictionaries ordered by start time"""
+        return [asdict(span) for span in sorted(self.spans, key=lambda span: span.start_time)]
+
+    def to_chrome_trace(self) -> dict:
+        """Returns spans in Chrome trace event format, viewable in chrome://tracing or Perfetto"""
+        events = []
+        for span in self.spans:
+            events.append({
+                "name": span.name,
+                "cat": self.name,
+                "ph": "X",
+                "ts": int(span.start_time * 1e6),
+                "dur": int(span.wall_s * 1e6),
+                "pid": os.getpid(),
+                "tid": span.thread_id,
+                "args": {"cpu_s": span.cpu_s,
+                         "rss_start_mb": span.rss_start_mb,
+                         "rss_delta_mb": span.rss_delta_mb,
+                         "peak_rss_delta_mb": span.peak_rss_delta_mb,
+                         **span.attributes},
+            })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_name: str | None = None) -> BytesIO:
+        """
+        Exports spans as Chrome trace json file object
+        :param file_name: name of the file object, by default tracer name
+        :return: BytesIO of Chrome trace json
+        """
+        file_object = BytesIO(json.dumps(self.to_chrome_trace(), default=str).encode())
+        file_object.name = file_name or f"{self.name}.json"
+
+        return file_object
+
+
+def get_current_tracer() -> Tracer | None:
+    """Returns active tracer of current context if any"""
+    return _current_tracer.get()
+
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Records span in active tracer, does nothing if no tracer is active"""
+    tracer = get_current_tracer()
+    if tracer is None:
+        yield None
+        return
+
+    with tracer.span(name, **attributes) as span:
+        yield span
@@ -2,17 +2,19 @@ import datetime
 import requests
 import ndjson
 import logging
-import pandas as pd
 import json
 import uuid
-from typing import List, Dict
-from elasticsearch import Elasticsearch
+from typing import List, Dict, TYPE_CHECKING
 import config
 from emf.common.config_parser import parse_app_properties
+from emf.common.logging import metrics
+from emf.common.integrations import local_services
 
 import warnings
-from elasticsearch.exceptions import ElasticsearchWarning
-warnings.simplefilter('ignore', ElasticsearchWarning)
+
+# Heavy libraries are imported on first use to keep worker startup light
+if TYPE_CHECKING:
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +26,20 @@ class Elastic:
     def __init__(self, server: str = ELK_SERVER, debug: bool = False):
         self.server = server
         self.debug = debug
+
+        if local_services.is_local(self.server):
+            from emf.common.integrations.local_services.documents import get_document_index
+            self.client = get_document_index()
+            return
+
+        from elasticsearch import Elasticsearch
+        from elasticsearch.exceptions import ElasticsearchWarning
+        warnings.simplefilter('ignore', ElasticsearchWarning)
+
         self.client = Elasticsearch(self.server)
 
     @staticmethod
+    @metrics.observe_duration(metrics.ELASTIC_REQUEST_DURATION)
     def send_to_elastic(index: str,
                         json_message: dict,
                         id: str = None,
@@ -64,7 +77,12 @@ class Elastic:
         if json_message.get('args', None):  # TODO revise if this is proper solution
             json_message.pop('args')
         json_data = json.dumps(json_message, default=str, ensure_ascii=True, skipkeys=True)
-        response = requests.post(url=url, data=json_data.encode(), headers={"Content-Type": "application/json"})
+        if local_services.is_local(server):
+            from emf.common.integrations.local_services.documents import get_document_index
+            result = get_document_index().index(index=_index, document=json_data, id=id)
+            response = local_services.LocalResponse(201 if result['result'] == 'created' else 200, json.dumps(result).encode())
+        else:
+            response = requests.post(url=url, data=json_data.encode(), headers={"Content-Type": "application/json"})
         if json.loads(response.content).get('error'):
             logger.error(f"Send to Elasticsearch responded with error: {response.text}")
         if debug:
@@ -73,6 +91,7 @@ class Elastic:
         return response
 
     @staticmethod
+    @metrics.observe_duration(metrics.ELASTIC_REQUEST_DURATION)
     def send_to_elastic_bulk(index: str,
                              json_message_list: List[dict],
                              id_from_metadata: bool = False,
@@ -127,10 +146,16 @@ class Elastic:
             # Executing POST to push messages into ELK
             if debug:
                 logger.debug(f"Sending batch ({batch}-{batch + batch_size})/{len(json_message_list)} to {url}")
-            response = requests.post(url=url,
-                                     data=(ndjson.dumps(json_message_list[batch:batch + batch_size])+"\n").encode(),
-                                     timeout=None,
-                                     headers={"Content-Type": "application/x-ndjson"})
+            data = (ndjson.dumps(json_message_list[batch:batch + batch_size])+"\n").encode()
+            if local_services.is_local(server):
+                from emf.common.integrations.local_services.documents import get_document_index
+                result = get_document_index().bulk(body=data)
+                response = local_services.LocalResponse(200, json.dumps(result).encode())
+            else:
+                response = requests.post(url=url,
+                                         data=data,
+                                         timeout=None,
+                                         headers={"Content-Type": "application/x-ndjson"})
             if json.loads(response.content).get('errors'):
                 logger.error(f"Send to Elasticsearch responded with errors: {response.text}")
             if debug:
@@ -139,14 +164,17 @@ class Elastic:
 
         return all(response_list)
 
+    @metrics.observe_duration(metrics.ELASTIC_REQUEST_DURATION)
     def get_doc_by_id(self, index: str, id: str):
         response = self.client.get(index=index, id=id)
 
         return response
 
+    @metrics.observe_duration(metrics.ELASTIC_REQUEST_DURATION)
     def update_document(self, index: str, id: str, body: dict):
         return self.client.update(index=index, id=id, body={'doc': body})
 
+    @metrics.observe_duration(metrics.ELASTIC_REQUEST_DURATION)
     def get_docs_by_query(self, index: str, query: dict, size: int | None = None, return_df: bool = True):
 
         # Validate index definition to be able to search all index by pattern
@@ -158,18 +186,20 @@ class Elastic:
             logger.info(f"Returned total {response['hits']['total']['value']} document")
         response = response['hits']['hits']
         if return_df:
+            import pandas as pd
             response = pd.json_normalize(response)
             response.columns = response.columns.astype(str).map(lambda x: x.replace("_source.", ""))
 
         return response
 
+    @metrics.observe_duration(metrics.ELASTIC_REQUEST_DURATION)
     def query_schedules_from_elk(self,
                                  index: str,
                                  utc_start: str,
                                  utc_end: str,
                                  metadata: dict,
                                  period_overlap: bool = False,
-                                 latest_by_field: str | None = None) -> pd.DataFrame | None:
+                                 latest_by_field: str | None = None) -> "pd.DataFrame | None":
         """
         Method to get schedule from ELK by given metadata dictionary
         :param index: index pattern
@@ -0,0 +1,86 @@
+"""
+In-process stand-ins of external services (MinIO, Elasticsearch, RabbitMQ and OPDM) for running I/O bound paths
+locally, e.g. in benchmarks. Integration classes switch to stand-in when their server is configured with local scheme:
+
+MINIO_SERVER = local:///path/to/object/storage  -> file backed object storage
+ELK_SERVER = local://                           -> in-memory document index of the process
+RMQ_SERVER = local://                           -> in-memory broker of the process
+OPDM_SERVER = local:///path/to/opdm/storage     -> file backed OPDM catalog, also used for WEBDAV_SERVER(_PUT)
+
+Network latency and bandwidth of stand-ins are injected according to configuration
+"""
+import json
+import time
+import logging
+import config
+from urllib.parse import urlparse
+from emf.common.config_parser import parse_app_properties
+
+logger = logging.getLogger(__name__)
+
+parse_app_properties(caller_globals=globals(), path=config.paths.integrations.local_services)
+
+LOCAL_SCHEME = "local"
+
+
+def is_local(server) -> bool:
+    """Check whether service address points to local stand-in"""
+    return isinstance(server, str) and server.startswith(f"{LOCAL_SCHEME}://")
+
+
+def get_local_path(server: str) -> str:
+    """Returns filesystem path of local service address, e.g. local:///data/minio -> /data/minio"""
+    return urlparse(server).path
+
+
+class NetworkSimulator:
+    """Injects latency and bandwidth limit of network round trips to local stand-ins"""
+
+    def __init__(self, latency_ms: float | None = None, bandwidth_mbit: float | None = None):
+        """
+        :param latency_ms: latency of request round trip in milliseconds, from configuration by default
+        :param bandwidth_mbit: bandwidth in megabits per second, 0 for unlimited, from configuration by default
+        """
+        self.latency = float(LOCAL_LATENCY_IN_MS if latency_ms is None else latency_ms) / 1000
+        bandwidth_mbit = float(LOCAL_BANDWIDTH_IN_MBIT if bandwidth_mbit is None else bandwidth_mbit)
+        self.bytes_per_second = bandwidth_mbit * 1e6 / 8 if bandwidth_mbit > 0 else 0
+        self.requests = 0
+        self.transferred_bytes = 0
+
+    def get_delay(self, size: int = 0, round_trip: bool = True) -> float:
+        """Returns delay in seconds of transferring given number of bytes"""
+        delay = self.latency if round_trip else 0
+        if self.bytes_per_second and size:
+            delay += size / self.bytes_per_second
+        return delay
+
+    def transfer(self, size: int = 0, round_trip: bool = True):
+        """
+        Simulates request to service, sleeping for latency and transfer time of payload
+        :param size: size of transferred payload in bytes
+        :param round_trip: whether request waits for response, otherwise only transfer time is applied
+        """
+        self.requests += 1
+        self.transferred_bytes += size
+        delay = self.get_delay(size, round_trip)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LocalResponse:
+    """Minimal HTTP response of local stand-in for code paths expecting requests.Response"""
+
+    def __init__(self, status_code: int = 200, content: bytes = b""):
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
@@ -0,0 +1,486 @@
+import re
+import copy
+import time
+import heapq
+import logging
+import threading
+import itertools
+from collections import deque
+import pika
+from pika import spec
+from pika.frame import Method
+from pika.exceptions import ChannelClosedByBroker
+from emf.common.integrations.local_services import NetworkSimulator
+
+logger = logging.getLogger(__name__)
+
+# Waiting time of consumer loops between checks for new messages or stop request
+POLL_INTERVAL = 0.05
+
+
+class LocalMessage:
+
+    def __init__(self, body: bytes, properties: pika.BasicProperties, exchange: str, routing_key: str):
+        self.body = body
+        self.properties = properties
+        self.exchange = exchange
+        self.routing_key = routing_key
+        self.redelivered = False
+
+
+def _topic_pattern(binding_key: str) -> re.Pattern:
+    words = [r"[^.]+" if word == "*" else r".*" if word == "#" else re.escape(word) for word in binding_key.split(".")]
+    return re.compile(r"\.".join(words).replace(r"\..*", r"(\..*)?") + "$")
+
+
+class LocalBroker:
+    """
+    In-memory stand-in of RabbitMQ broker shared by all connections of the process. Supports default, direct, fanout
+    and topic exchanges (headers exchange is routed as fanout). Publishing to exchange which is not declared declares
+    fanout exchange bound to queue of the same name, so local setups work without provisioning of topology
+    """
+
+    def __init__(self):
+        self.exchanges = {}
+        self.queues = {}
+        self.condition = threading.Condition(threading.RLock())
+
+    def declare_queue(self, queue: str) -> deque:
+        with self.condition:
+            return self.queues.setdefault(queue, deque())
+
+    def declare_exchange(self, exchange: str, exchange_type: str = "direct"):
+        with self.condition:
+            self.exchanges.setdefault(exchange, {"type": exchange_type, "bindings": []})
+
+    def bind_queue(self, queue: str, exchange: str, routing_key: str | None = None):
+        with self.condition:
+            self.declare_queue(queue)
+            bindings = self.exchanges[exchange]["bindings"]
+            if (queue, routing_key or "") not in bindings:
+                bindings.append((queue, routing_key or ""))
+
+    def route(self, exchange: str, routing_key: str) -> list[str]:
+        """Returns names of queues message is routed to"""
+        if exchange == "":
+            return [routing_key] if routing_key in self.queues else []
+        if exchange not in self.exchanges:
+            self.declare_exchange(exchange, "fanout")
+            self.bind_queue(exchange, exchange)
+            logger.info(f"Declared local exchange bound to queue of the same name: {exchange}")
+
+        exchange_type, bindings = self.exchanges[exchange]["type"], self.exchanges[exchange]["bindings"]
+        if exchange_type in ["fanout", "headers"]:
+            return list(dict.fromkeys(queue for queue, _ in bindings))
+        if exchange_type == "topic":
+            return list(dict.fromkeys(queue for queue, key in bindings if _topic_pattern(key).match(routing_key)))
+        return list(dict.fromkeys(queue for queue, key in bindings if key == routing_key))
+
+    def publish(self, exchange: str, routing_key: str, body, properties: pika.BasicProperties | None = None) -> int:
+        body = body.encode() if isinstance(body, str) else bytes(body)
+        properties = properties or pika.BasicProperties()
+        with self.condition:
+            queues = self.route(exchange, routing_key)
+            for queue in queues:
+                # Each queue gets its own copy, like message serialized by broker
+                self.queues[queue].append(LocalMessage(body, copy.deepcopy(properties), exchange, routing_key))
+            if not queues:
+                logger.warning(f"Message published to {exchange or 'default exchange'} with routing key '{routing_key}' "
+                               f"was not routed to any queue")
+            self.condition.notify_all()
+        return len(queues)
+
+    def get(self, queue: str) -> LocalMessage | None:
+        with self.condition:
+            messages = self.queues.get(queue)
+            return messages.popleft() if messages else None
+
+    def requeue(self, queue: str, message: LocalMessage):
+        with self.condition:
+            message.redelivered = True
+            self.declare_queue(queue).appendleft(message)
+            self.condition.notify_all()
+
+    def wait(self, timeout: float = POLL_INTERVAL):
+        with self.condition:
+            self.condition.wait(timeout)
+
+
+class LocalChannel:
+    """
+    Channel of local broker with API of pika BlockingChannel and pika Channel of SelectConnection. Unacknowledged
+    deliveries are tracked per channel, prefetch count limits deliveries to consumers and unacknowledged messages are
+    requeued when channel is closed. In asynchronous mode callbacks are scheduled on IO loop of the connection
+    """
+
+    def __init__(self, connection, channel_number: int):
+        self.connection = connection
+        self.broker = connection.broker
+        self.network = connection.network
+        self.channel_number = channel_number
+        self.prefetch_count = 0
+        self.consumers = {}
+        self.unacked = {}
+        self.is_open = True
+        self._delivery_tags = itertools.count(1)
+        self._consumer_tags = itertools.count(1)
+        self._close_callbacks = []
+        self._cancel_callbacks = []
+        self._consuming = False
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.is_open
+
+    @property
+    def is_closing(self) -> bool:
+        return False
+
+    @property
+    def consumer_tags(self) -> list:
+        return list(self.consumers)
+
+    def _frame(self, method) -> Method:
+        return Method(self.channel_number, method)
+
+    def _schedule(self, callback, *args):
+        if callback:
+            self.connection._schedule(callback, *args)
+
+    def _check_open(self):
+        if not self.is_open:
+            raise pika.exceptions.ChannelWrongStateError("Channel is closed.")
+
+    def _close_by_broker(self, reply_code: int, reply_text: str):
+        self.close(reply_code, reply_text)
+        raise ChannelClosedByBroker(reply_code, reply_text)
+
+    # Topology
+
+    def queue_declare(self, queue: str, passive: bool = False, *args, callback=None, **kwargs) -> Method:
+        self._check_open()
+        self.network.transfer()
+        with self.broker.condition:
+            if passive and queue not in self.broker.queues:
+                self._close_by_broker(404, f"NOT_FOUND - no queue '{queue}' in vhost '/'")
+            messages = self.broker.declare_queue(queue)
+            consumers = sum(consumer_queue == queue for consumer_queue, _, _ in self.consumers.values())
+            frame = self._frame(spec.Queue.DeclareOk(queue, len(messages), consumers))
+        self._schedule(callback, frame)
+        return frame
+
+    def exchange_declare(self, exchange: str, exchange_type: str = "direct", *args, callback=None, **kwargs) -> Method:
+        self._check_open()
+        self.network.transfer()
+        self.broker.declare_exchange(exchange, str(getattr(exchange_type, "value", exchange_type)))
+        frame = self._frame(spec.Exchange.DeclareOk())
+        self._schedule(callback, frame)
+        return frame
+
+    def queue_bind(self, queue: str, exchange: str, routing_key: str | None = None, *args, callback=None, **kwargs) -> Method:
+        self._check_open()
+        self.network.transfer()
+        if exchange not in self.broker.exchanges:
+            self._close_by_broker(404, f"NOT_FOUND - no exchange '{exchange}' in vhost '/'")
+        self.broker.bind_queue(queue, exchange, routing_key)
+        frame = self._frame(spec.Queue.BindOk())
+        self._schedule(callback, frame)
+        return frame
+
+    def queue_purge(self, queue: str, callback=None) -> Method:
+        self._check_open()
+        with self.broker.condition:
+            messages = self.broker.declare_queue(queue)
+            frame = self._frame(spec.Queue.PurgeOk(len(messages)))
+            messages.clear()
+        self._schedule(callback, frame)
+        return frame
+
+    # Publishing and getting messages
+
+    def basic_publish(self, exchange: str, routing_key: str, body, properties: pika.BasicProperties | None = None, mandatory: bool = False):
+        self._check_open()
+        # Publishing does not wait for broker response, only transfer of the message is simulated
+        self.network.transfer(len(body), round_trip=False)
+        if not self.broker.publish(exchange, routing_key, body, properties) and mandatory:
+            raise pika.exceptions.UnroutableError([])
+
+    def _register_delivery(self, queue: str, message: LocalMessage, auto_ack: bool) -> int:
+        delivery_tag = next(self._delivery_tags)
+        if not auto_ack:
+            self.unacked[delivery_tag] = (queue, message)
+        return delivery_tag
+
+    def basic_get(self, queue: str, auto_ack: bool = False, callback=None):
+        self._check_open()
+        message = self.broker.get(queue)
+        if message is None:
+            self.network.transfer()
+            return None, None, None
+        self.network.transfer(len(message.body))
+        delivery_tag = self._register_delivery(queue, message, auto_ack)
+        method = spec.Basic.GetOk(delivery_tag, message.redelivered, message.exchange, message.routing_key,
+                                  len(self.broker.queues.get(queue, [])))
+        if callback:
+            self._schedule(callback, self, method, message.properties, message.body)
+        return method, message.properties, message.body
+
+    # Acknowledgements
+
+    def _settle(self, delivery_tag: int, multiple: bool) -> list[tuple]:
+        with self.broker.condition:
+            if multiple:
+                tags = [tag for tag in self.unacked if delivery_tag == 0 or tag <= delivery_tag]
+            elif delivery_tag in self.unacked:
+                tags = [delivery_tag]
+            else:
+                self._close_by_broker(406, f"PRECONDITION_FAILED - unknown delivery tag {delivery_tag}")
+            settled = [self.unacked.pop(tag) for tag in tags]
+            # Settled deliveries free prefetch window of consumers
+            self.broker.condition.notify_all()
+        return settled
+
+    def basic_ack(self, delivery_tag: int = 0, multiple: bool = False):
+        self._check_open()
+        self._settle(delivery_tag, multiple)
+
+    def basic_nack(self, delivery_tag: int = 0, multiple: bool = False, requeue: bool = True):
+        self._check_open()
+        for queue, message in reversed(self._settle(delivery_tag, multiple)):
+            if requeue:
+                self.broker.requeue(queue, message)
+            else:
+                logger.debug(f"Discarded rejected message of queue {queue}")
+
+    def basic_reject(self, delivery_tag: int, requeue: bool = True):
+        self.basic_nack(delivery_tag, multiple=False, requeue=requeue)
+
+    def basic_recover(self, requeue: bool = True, callback=None):
+        self.basic_nack(0, multiple=True, requeue=requeue)
+        self._schedule(callback, self._frame(spec.Basic.RecoverOk()))
+
+    # Consuming
+
+    def basic_qos(self, prefetch_size: int = 0, prefetch_count: int = 0, global_qos: bool = False, callback=None):
+        self._check_open()
+        self.prefetch_count = int(prefetch_count)
+        self._schedule(callback, self._frame(spec.Basic.QosOk()))
+
+    def basic_consume(self, queue: str, on_message_callback, auto_ack: bool = False, exclusive: bool = False,
+                      consumer_tag: str | None = None, arguments: dict | None = None, callback=None) -> str:
+        self._check_open()
+        self.network.transfer()
+        if queue not in self.broker.queues:
+            self._close_by_broker(404, f"NOT_FOUND - no queue '{queue}' in vhost '/'")
+        consumer_tag = consumer_tag or f"ctag{self.channel_number}.{next(self._consumer_tags)}"
+        self.consumers[consumer_tag] = (queue, on_message_callback, auto_ack)
+        self._schedule(callback, self._frame(spec.Basic.ConsumeOk(consumer_tag)))
+        return consumer_tag
+
+    def basic_cancel(self, consumer_tag: str = "", callback=None):
+        self.consumers.pop(consumer_tag, None)
+        self._schedule(callback, self._frame(spec.Basic.CancelOk(consumer_tag)))
+        if not self.consumers:
+            self._consuming = False
+
+    def deliver(self) -> int:
+        """
+        Delivers queued messages to consumers of channel within prefetch window
+        :return: number of delivered messages
+        """
+        delivered = 0
+        for consumer_tag, (queue, on_message_callback, auto_ack) in list(self.consumers.items()):
+            while self.is_open and consumer_tag in self.consumers:
+                if self.prefetch_count and len(self.unacked) >= self.prefetch_count:
+                    return delivered
+                message = self.broker.get(queue)
+                if message is None:
+                    break
+                self.network.transfer(len(message.body), round_trip=False)
+                delivery_tag = self._register_delivery(queue, message, auto_ack)
+                method = spec.Basic.Deliver(consumer_tag, delivery_tag, message.redelivered, message.exchange, message.routing_key)
+                on_message_callback(self, method, message.properties, message.body)
+                delivered += 1
+        return delivered
+
+    def start_consuming(self):
+        """Delivers messages to consumers until stop_consuming is called or all consumers are cancelled"""
+        self._consuming = True
+        while self._consuming and self.consumers and self.is_open:
+            if not self.deliver():
+                self.broker.wait()
+
+    def stop_consuming(self, consumer_tag: str | None = None):
+        for tag in [consumer_tag] if consumer_tag else list(self.consumers):
+            self.basic_cancel(tag)
+        self._consuming = False
+
+    # Callbacks and closing
+
+    def add_on_close_callback(self, callback):
+        self._close_callbacks.append(callback)
+
+    def add_on_cancel_callback(self, callback):
+        self._cancel_callbacks.append(callback)
+
+    def add_on_return_callback(self, callback):
+        pass
+
+    def confirm_delivery(self, *args, **kwargs):
+        pass
+
+    def close(self, reply_code: int = 0, reply_text: str = "Normal shutdown"):
+        if not self.is_open:
+            return
+        self.is_open = False
+        self.consumers.clear()
+        self._consuming = False
+        for queue, message in reversed(list(self.unacked.values())):
+            self.broker.requeue(queue, message)
+        self.unacked.clear()
+        reason = pika.exceptions.ChannelClosedByClient(reply_code, reply_text) if reply_code in [0, 200] else \
+            ChannelClosedByBroker(reply_code, reply_text)
+        for callback in self._close_callbacks:
+            self._schedule(callback, self, reason)
+
+
+class _LocalIOLoop:
+    """IO loop of local select connection, runs scheduled callbacks and delivers messages to consumers"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._callbacks = deque()
+        self._timers = []
+        self._timer_sequence = itertools.count()
+        self._running = False
+
+    def add_callback_threadsafe(self, callback):
+        with self.connection.broker.condition:
+            self._callbacks.append(callback)
+            self.connection.broker.condition.notify_all()
+
+    add_callback = add_callback_threadsafe
+
+    def call_later(self, delay: float, callback):
+        with self.connection.broker.condition:
+            timer = (time.monotonic() + delay, next(self._timer_sequence), callback)
+            heapq.heappush(self._timers, timer)
+            self.connection.broker.condition.notify_all()
+        return timer
+
+    def remove_timeout(self, timer):
+        with self.connection.broker.condition:
+            if timer in self._timers:
+                self._timers.remove(timer)
+                heapq.heapify(self._timers)
+
+    def process(self) -> int:
+        """Runs due callbacks and delivers pending messages, returns number of processed events"""
+        processed = 0
+        with self.connection.broker.condition:
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+            while self._timers and self._timers[0][0] <= time.monotonic():
+                callbacks.append(heapq.heappop(self._timers)[2])
+        for callback in callbacks:
+            callback()
+            processed += 1
+        for channel in list(self.connection.channels.values()):
+            if channel.is_open:
+                processed += channel.deliver()
+        return processed
+
+    def start(self):
+        self._running = True
+        while self._running:
+            if not self.process():
+                self.connection.broker.wait()
+
+    def stop(self):
+        self._running = False
+        with self.connection.broker.condition:
+            self.connection.broker.condition.notify_all()
+
+
+class LocalConnection:
+    """
+    Connection to local broker with API of pika BlockingConnection and, if callbacks are given, SelectConnection.
+    In asynchronous mode callbacks are run by IO loop, in blocking mode they are run immediately
+    """
+
+    def __init__(self,
+                 parameters: pika.ConnectionParameters | None = None,
+                 on_open_callback=None,
+                 on_open_error_callback=None,
+                 on_close_callback=None,
+                 broker: LocalBroker | None = None,
+                 network: NetworkSimulator | None = None):
+        self.parameters = parameters
+        self.broker = broker or get_broker()
+        self.network = network or NetworkSimulator()
+        self.channels = {}
+        self.is_open = True
+        self.is_closing = False
+        self.ioloop = _LocalIOLoop(self)
+        self._asynchronous = on_open_callback is not None
+        self._on_close_callback = on_close_callback
+        self._channel_numbers = itertools.count(1)
+        self.network.transfer()
+        self._schedule(on_open_callback, self)
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.is_open
+
+    def _schedule(self, callback, *args):
+        if not callback:
+            return
+        if self._asynchronous:
+            self.ioloop.add_callback_threadsafe(lambda: callback(*args))
+        else:
+            callback(*args)
+
+    def channel(self, channel_number: int | None = None, on_open_callback=None) -> LocalChannel:
+        if not self.is_open:
+            raise pika.exceptions.ConnectionWrongStateError("Connection is closed.")
+        channel = LocalChannel(self, channel_number or next(self._channel_numbers))
+        self.channels[channel.channel_number] = channel
+        self._schedule(on_open_callback, channel)
+        return channel
+
+    def process_data_events(self, time_limit: float | None = 0):
+        """Delivers pending messages to consumers of channels, waiting up to time limit if there is nothing to deliver"""
+        if not self.ioloop.process() and time_limit:
+            self.broker.wait(time_limit)
+            self.ioloop.process()
+
+    def sleep(self, duration: float):
+        deadline = time.monotonic() + duration
+        while (remaining := deadline - time.monotonic()) > 0:
+            self.process_data_events(time_limit=min(remaining, POLL_INTERVAL))
+
+    def add_callback_threadsafe(self, callback):
+        self.ioloop.add_callback_threadsafe(callback)
+
+    def close(self, reply_code: int = 200, reply_text: str = "Normal shutdown"):
+        if not self.is_open:
+            return
+        for channel in list(self.channels.values()):
+            channel.close(reply_code, reply_text)
+        self.is_open = False
+        self._schedule(self._on_close_callback, self, pika.exceptions.ConnectionClosedByClient(reply_code, reply_text))
+
+
+# Broker shared by all connections of the process, like single RabbitMQ virtual host
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> LocalBroker:
+    """Returns in-memory broker of the process, created on first use"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = LocalBroker()
+            logger.info("Using in-memory local broker")
+    return _broker
@@ -0,0 +1,403 @@
+import re
+import json
+import time
+import uuid
+import fnmatch
+import logging
+import threading
+from emf.common.integrations.local_services import NetworkSimulator, LOCAL_SCROLL_TIMEOUT_IN_SEC
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_SIZE = 10
+_TIME_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_keep_alive(value: str | None) -> float:
+    """Returns seconds of Elasticsearch time value, e.g. 1m -> 60"""
+    if not value:
+        return float(LOCAL_SCROLL_TIMEOUT_IN_SEC)
+    number, unit = re.fullmatch(r"(\d+)(ms|s|m|h|d)", str(value)).groups()
+    return int(number) * _TIME_UNITS[unit]
+
+
+def get_field(document: dict, field: str):
+    """Returns value of document field, dotted fields are resolved also through nested objects"""
+    field = field.removesuffix(".keyword")
+    if field in document:
+        return document[field]
+    value = document
+    for part in field.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _values(value) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _equals(value, expected) -> bool:
+    if value == expected:
+        return True
+    return isinstance(value, str) and str(expected).lower() == value.lower()
+
+
+def _compare(value, bound) -> int | None:
+    """Compares values of range query, numbers numerically and others (e.g. ISO timestamps) as strings"""
+    try:
+        value, bound = float(value), float(bound)
+    except (TypeError, ValueError):
+        value, bound = str(value), str(bound)
+    return (value > bound) - (value < bound)
+
+
+def _in_range(value, conditions: dict) -> bool:
+    checks = {"gt": lambda result: result > 0, "gte": lambda result: result >= 0,
+              "lt": lambda result: result < 0, "lte": lambda result: result <= 0}
+    return all(checks[operator](_compare(value, bound)) for operator, bound in conditions.items() if operator in checks)
+
+
+def matches(document_id: str, document: dict, query: dict | None) -> bool:
+    """
+    Evaluates query of Elasticsearch query DSL against document. Supported are compound bool query and leaf queries
+    match_all, match, match_phrase, term, terms, range, exists, ids, prefix and wildcard
+    :param document_id: ID of the document
+    :param document: document source
+    :param query: query DSL
+    :return: True if document matches
+    """
+    if not query:
+        return True
+    (query_type, condition), = query.items()
+
+    if query_type == "match_all":
+        return True
+    if query_type == "bool":
+        must = _values(condition.get("must", [])) + _values(condition.get("filter", []))
+        should = _values(condition.get("should", []))
+        must_not = _values(condition.get("must_not", []))
+        minimum_should_match = int(condition.get("minimum_should_match", 0 if must else 1 if should else 0))
+        return (all(matches(document_id, document, sub_query) for sub_query in must) and
+                not any(matches(document_id, document, sub_query) for sub_query in must_not) and
+                sum(matches(document_id, document, sub_query) for sub_query in should) >= minimum_should_match)
+    if query_type == "ids":
+        return document_id in condition["values"]
+
+    (field, expected), = condition.items() if query_type != "exists" else [(condition["field"], None)]
+    values = [value for value in _values(get_field(document, field)) if value is not None]
+    if query_type == "exists":
+        return bool(values)
+    if isinstance(expected, dict) and query_type != "range":
+        expected = expected.get("query", expected.get("value"))
+    if query_type in ["match", "match_phrase"]:
+        return any(_equals(value, expected) for value in values)
+    if query_type == "term":
+        return expected in values
+    if query_type == "terms":
+        return any(value in expected for value in values)
+    if query_type == "range":
+        return any(_in_range(value, expected) for value in values)
+    if query_type == "prefix":
+        return any(str(value).startswith(expected) for value in values)
+    if query_type == "wildcard":
+        return any(fnmatch.fnmatchcase(str(value), expected) for value in values)
+
+    raise ValueError(f"Query type not supported by local document index: {query_type}")
+
+
+def _sort_key(field: str, order: str):
+    def key(hit):
+        value = get_field(hit[1], field)
+        # Missing values are sorted last in both orders
+        return (value is None) != (order == "desc"), value if value is not None else ""
+    return key
+
+
+def _normalize_sort(sort) -> list[tuple[str, str]]:
+    normalized = []
+    for item in _values(sort) if sort else []:
+        if isinstance(item, str):
+            field, _, order = item.partition(":")
+            normalized.append((field, order or "asc"))
+        else:
+            for field, order in item.items():
+                normalized.append((field, order.get("order", "asc") if isinstance(order, dict) else order))
+    return normalized
+
+
+class LocalDocumentIndex:
+    """
+    In-memory stand-in of Elasticsearch client. Documents are stored as serialized JSON, so that indexing and search
+    have serialization cost similar to real service and returned hits are independent copies. Supports index, bulk,
+    get, update, delete, count and search with sort, paging, scroll and terms or composite aggregations
+    """
+
+    def __init__(self, network: NetworkSimulator | None = None):
+        self.network = network or NetworkSimulator()
+        self.indices = {}
+        self._scrolls = {}
+        self._lock = threading.RLock()
+
+    def _not_found(self, index: str, id: str):
+        from elasticsearch import NotFoundError
+        from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+        meta = ApiResponseMeta(status=404, http_version="1.1", headers=HttpHeaders(), duration=0.0,
+                               node=NodeConfig(scheme="http", host="localhost", port=9200))
+        body = {"_index": index, "_id": id, "found": False}
+        return NotFoundError(message=f"Document not found: {index}/{id}", meta=meta, body=body)
+
+    def _resolve_indices(self, index: str | list | None) -> list[str]:
+        patterns = _values(index) if index else ["*"]
+        patterns = [pattern.strip() for item in patterns for pattern in str(item).split(",")]
+        return [name for name in self.indices if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+    def _store(self, index: str, id: str | None, document: dict | str | bytes) -> tuple[str, str]:
+        raw = document if isinstance(document, str) else document.decode() if isinstance(document, bytes) else \
+            json.dumps(document, default=str)
+        id = str(id) if id is not None else uuid.uuid4().hex
+        documents = self.indices.setdefault(index, {})
+        result = "updated" if id in documents else "created"
+        documents[id] = (raw, json.loads(raw))
+        return id, result
+
+    def index(self, index: str, document: dict | None = None, body: dict | None = None, id: str | None = None, **kwargs) -> dict:
+        document = document if document is not None else body
+        with self._lock:
+            id, result = self._store(index, id, document)
+        self.network.transfer(len(self.indices[index][id][0]))
+        return {"_index": index, "_id": id, "result": result}
+
+    def bulk(self, operations=None, body=None, index: str | None = None, **kwargs) -> dict:
+        """
+        Executes bulk actions given as list of action and document pairs or newline delimited JSON
+        :return: bulk response with result of each action
+        """
+        operations = operations if operations is not None else body
+        if isinstance(operations, bytes):
+            operations = operations.decode()
+        if isinstance(operations, str):
+            self.network.transfer(len(operations))
+            operations = [json.loads(line) for line in operations.splitlines() if line.strip()]
+        else:
+            self.network.transfer()
+
+        start_time = time.perf_counter()
+        items = []
+        position = 0
+        with self._lock:
+            while position < len(operations):
+                (action, meta), = operations[position].items()
+                target_index, id = meta.get("_index", index), meta.get("_id")
+                if action == "delete":
+                    found = self.indices.get(target_index, {}).pop(str(id), None) is not None
+                    items.append({action: {"_index": target_index, "_id": id, "status": 200 if found else 404,
+                                           "result": "deleted" if found else "not_found"}})
+                    position += 1
+                    continue
+                document = operations[position + 1]
+                position += 2
+                if action == "create" and id is not None and str(id) in self.indices.get(target_index, {}):
+                    items.append({action: {"_index": target_index, "_id": id, "status": 409,
+                                           "error": {"type": "version_conflict_engine_exception"}}})
+                    continue
+                if action == "update":
+                    stored = self.indices.get(target_index, {}).get(str(id))
+                    if stored is None:
+                        items.append({action: {"_index": target_index, "_id": id, "status": 404,
+                                               "error": {"type": "document_missing_exception"}}})
+                        continue
+                    document = _merge(stored[1], document.get("doc", {}))
+                id, result = self._store(target_index, id, document)
+                items.append({action: {"_index": target_index, "_id": id, "result": result,
+                                       "status": 201 if result == "created" else 200}})
+
+        errors = any("error" in item[action] for item in items for action in item)
+        return {"took": int((time.perf_counter() - start_time) * 1000), "errors": errors, "items": items}
+
+    def get(self, index: str, id: str, **kwargs) -> dict:
+        with self._lock:
+            stored = self.indices.get(index, {}).get(str(id))
+        if stored is None:
+            self.network.transfer()
+            raise self._not_found(index, id)
+        self.network.transfer(len(stored[0]))
+        return {"_index": index, "_id": str(id), "found": True, "_source": json.loads(stored[0])}
+
+    def update(self, index: str, id: str, body: dict | None = None, doc: dict | None = None, **kwargs) -> dict:
+        doc = doc if doc is not None else (body or {}).get("doc", {})
+        self.network.transfer(len(json.dumps(doc, default=str)))
+        with self._lock:
+            stored = self.indices.get(index, {}).get(str(id))
+            if stored is None:
+                raise self._not_found(index, id)
+            self._store(index, id, _merge(stored[1], doc))
+        return {"_index": index, "_id": str(id), "result": "updated"}
+
+    def delete(self, index: str, id: str, **kwargs) -> dict:
+        self.network.transfer()
+        with self._lock:
+            if self.indices.get(index, {}).pop(str(id), None) is None:
+                raise self._not_found(index, id)
+        return {"_index": index, "_id": str(id), "result": "deleted"}
+
+    def _search_hits(self, index, query: dict | None, sort) -> list[tuple]:
+        with self._lock:
+            hits = [(name, document, raw, document_id)
+                    for name in self._resolve_indices(index)
+                    for document_id, (raw, document) in self.indices[name].items()
+                    if matches(document_id, document, query)]
+        for field, order in reversed(_normalize_sort(sort)):
+            hits.sort(key=_sort_key(field, order), reverse=order == "desc")
+        return hits
+
+    def _render_hits(self, hits: list[tuple], sorted_hits: bool, fields: list | None = None) -> list[dict]:
+        rendered = []
+        for name, document, raw, document_id in hits:
+            hit = {"_index": name, "_id": document_id, "_score": None if sorted_hits else 1.0, "_source": json.loads(raw)}
+            if fields:
+                hit["fields"] = {field: _values(get_field(document, field)) for field in fields
+                                 if get_field(document, field) is not None}
+            rendered.append(hit)
+        self.network.transfer(sum(len(hit[2]) for hit in hits))
+        return rendered
+
+    def count(self, index: str | None = None, query: dict | None = None, body: dict | None = None, **kwargs) -> dict:
+        query = query if query is not None else (body or {}).get("query")
+        self.network.transfer()
+        return {"count": len(self._search_hits(index, query, None))}
+
+    def search(self,
+               index: str | None = None,
+               query: dict | None = None,
+               size: int | str | None = None,
+               sort=None,
+               scroll: str | None = None,
+               from_: int | None = None,
+               body: dict | None = None,
+               aggs: dict | None = None,
+               fields: list | None = None,
+               **kwargs) -> dict:
+        """Searches documents of indices matching index pattern, parameters can be given also in request body"""
+        body = body or {}
+        query = query if query is not None else body.get("query")
+        size = int(size if size is not None else body.get("size", DEFAULT_SEARCH_SIZE))
+        sort = sort if sort is not None else body.get("sort")
+        from_ = int(from_ if from_ is not None else body.get("from", 0))
+        aggs = aggs if aggs is not None else body.get("aggs", body.get("aggregations"))
+        fields = fields if fields is not None else body.get("fields")
+
+        start_time = time.perf_counter()
+        hits = self._search_hits(index, query, sort)
+        response = {"took": 0, "timed_out": False,
+                    "hits": {"total": {"value": len(hits), "relation": "eq"}, "max_score": None if sort else 1.0,
+                             "hits": self._render_hits(hits[from_:from_ + size], bool(sort), fields)}}
+        if aggs:
+            response["aggregations"] = {name: _aggregate(hits, aggregation) for name, aggregation in aggs.items()}
+        if scroll:
+            scroll_id = uuid.uuid4().hex
+            with self._lock:
+                self._expire_scrolls()
+                self._scrolls[scroll_id] = {"hits": hits, "position": from_ + size, "size": size, "sorted": bool(sort),
+                                            "fields": fields, "expires": time.monotonic() + parse_keep_alive(scroll)}
+            response["_scroll_id"] = scroll_id
+        response["took"] = int((time.perf_counter() - start_time) * 1000)
+
+        return response
+
+    def _expire_scrolls(self):
+        now = time.monotonic()
+        for scroll_id in [scroll_id for scroll_id, context in self._scrolls.items() if context["expires"] < now]:
+            del self._scrolls[scroll_id]
+
+    def scroll(self, scroll_id: str | None = None, scroll: str | None = None, body: dict | None = None, **kwargs) -> dict:
+        """Returns next page of search results of scroll context, like Elasticsearch snapshot of search time is used"""
+        scroll_id = scroll_id or (body or {}).get("scroll_id")
+        with self._lock:
+            self._expire_scrolls()
+            context = self._scrolls.get(scroll_id)
+            if context is None:
+                raise self._not_found("_scroll", scroll_id)
+            page = context["hits"][context["position"]:context["position"] + context["size"]]
+            context["position"] += context["size"]
+            context["expires"] = time.monotonic() + parse_keep_alive(scroll)
+        return {"_scroll_id": scroll_id, "took": 0, "timed_out": False,
+                "hits": {"total": {"value": len(context["hits"]), "relation": "eq"},
+                         "hits": self._render_hits(page, context["sorted"], context["fields"])}}
+
+    def clear_scroll(self, scroll_id: str | list | None = None, body: dict | None = None, **kwargs) -> dict:
+        scroll_ids = _values(scroll_id or (body or {}).get("scroll_id") or [])
+        self.network.transfer()
+        with self._lock:
+            freed = sum(self._scrolls.pop(scroll_id, None) is not None for scroll_id in scroll_ids)
+        return {"succeeded": True, "num_freed": freed}
+
+
+def _merge(document: dict, update: dict) -> dict:
+    """Returns document with partial update applied, objects are merged recursively like in Elasticsearch"""
+    merged = dict(document)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _aggregate(hits: list[tuple], aggregation: dict) -> dict:
+    """Evaluates terms aggregation or composite aggregation of terms sources"""
+    (aggregation_type, definition), = aggregation.items()
+
+    if aggregation_type == "terms":
+        counts = {}
+        for _, document, _, _ in hits:
+            for value in _values(get_field(document, definition["field"])):
+                if value is not None:
+                    counts[value] = counts.get(value, 0) + 1
+        buckets = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))[:int(definition.get("size", 10))]
+        return {"doc_count_error_upper_bound": 0, "sum_other_doc_count": sum(counts.values()) - sum(count for _, count in buckets),
+                "buckets": [{"key": key, "doc_count": count} for key, count in buckets]}
+
+    if aggregation_type == "composite":
+        sources = []
+        for source in definition["sources"]:
+            (source_name, source_definition), = source.items()
+            (source_type, source_parameters), = source_definition.items()
+            if source_type != "terms":
+                raise ValueError(f"Composite source not supported by local document index: {source_type}")
+            sources.append((source_name, source_parameters["field"]))
+
+        counts = {}
+        for _, document, _, _ in hits:
+            key = tuple(get_field(document, field) for _, field in sources)
+            if None not in key:
+                counts[key] = counts.get(key, 0) + 1
+
+        keys = sorted(counts, key=lambda key: tuple(str(value) for value in key))
+        if after := definition.get("after"):
+            after_key = tuple(str(after[name]) for name, _ in sources)
+            keys = [key for key in keys if tuple(str(value) for value in key) > after_key]
+        keys = keys[:int(definition.get("size", 10))]
+        buckets = [{"key": dict(zip([name for name, _ in sources], key)), "doc_count": counts[key]} for key in keys]
+        result = {"buckets": buckets}
+        if buckets:
+            result["after_key"] = buckets[-1]["key"]
+        return result
+
+    raise ValueError(f"Aggregation not supported by local document index: {aggregation_type}")
+
+
+# Document index shared by all clients of the process, like single Elasticsearch cluster
+_document_index = None
+_document_index_lock = threading.Lock()
+
+
+def get_document_index() -> LocalDocumentIndex:
+    """Returns in-memory document index of the process, created on first use"""
+    global _document_index
+    with _document_index_lock:
+        if _document_index is None:
+            _document_index = LocalDocumentIndex()
+            logger.info("Using in-memory local document index")
+    return _document_index
@@ -0,0 +1,220 @@
+import re
+import json
+import uuid
+import base64
+import logging
+import threading
+import xmltodict
+from io import BytesIO
+from pathlib import Path
+from lxml import etree
+from requests import Response
+from requests.adapters import BaseAdapter
+from emf.common.integrations.local_services import NetworkSimulator, get_local_path
+
+logger = logging.getLogger(__name__)
+
+NAMESPACES = {"sm": "http://entsoe.eu/opde/ServiceModel/1/0",
+              "opde": "http://entsoe.eu/opde/ObjectModel/1/0",
+              "opdm": "http://entsoe.eu/opdm/ObjectModel/1/0",
+              "pmd": "http://entsoe.eu/opdm/ProfileMetaData/1/0"}
+# Catalog of OPDM objects is kept next to files of local storage
+CATALOG_DIRECTORY = ".opdm"
+
+
+def _prefixed_name(element) -> str:
+    """Returns element name with namespace prefix used in OPDM metadata, e.g. pmd:TSO"""
+    namespace, _, name = element.tag.rpartition("}")
+    prefix = next((prefix for prefix, uri in NAMESPACES.items() if f"{{{uri}" == namespace), None)
+    return f"{prefix}:{name}" if prefix else name
+
+
+def _match_condition(value: str | None, operator: str | None, expected: str | None) -> bool:
+    if operator in [None, "is"]:
+        return value == expected
+    if operator == "exist":
+        return value is not None
+    if operator == "does not exist":
+        return value is None
+    if value is None:
+        return False
+    if operator == "is not":
+        return value != expected
+    if operator == "is after":
+        return value > expected
+    if operator == "is before":
+        return value < expected
+    if operator == "contains":
+        return expected in value
+    if operator == "match regex":
+        return re.search(expected, value) is not None
+    raise ValueError(f"Metadata operator not supported by local OPDM: {operator}")
+
+
+class LocalOPDMClient:
+    """
+    Stand-in of OPDM SOAP client (zeep client of OPDM service) backed by local storage directory. Files of model
+    components are stored in the directory as on OPDM client local storage (served over WebDAV) and metadata of
+    OPDM objects in catalog directory. Query, GetContent and PublicationRequest operations are answered with XML
+    responses of the same structure as OPDM, so response parsing of OPDM client is exercised unchanged
+    """
+
+    def __init__(self, path: str, network: NetworkSimulator | None = None):
+        self.root = Path(path)
+        self.catalog = self.root / CATALOG_DIRECTORY
+        self.catalog.mkdir(parents=True, exist_ok=True)
+        self.network = network or NetworkSimulator()
+        self.publications = []
+        self._lock = threading.Lock()
+        logger.info(f"Using local OPDM storage: {self.root}")
+
+    @property
+    def service(self):
+        return self
+
+    def add_object(self, opdm_object: dict, contents: dict | None = None) -> dict:
+        """
+        Adds OPDM object to catalog and its component files to local storage
+        :param opdm_object: metadata of OPDM object, components content in DATA field is stored as file
+        :param contents: optional content of component files by file name
+        :return: metadata of stored object without content
+        """
+        contents = dict(contents or {})
+        metadata = {**opdm_object, "opde:Component": []}
+        for component in opdm_object.get("opde:Component", []):
+            profile = dict(component["opdm:Profile"])
+            data = profile.pop("DATA", None)
+            if data is not None:
+                contents[profile["pmd:fileName"]] = data
+            metadata["opde:Component"].append({"opdm:Profile": profile})
+
+        with self._lock:
+            for file_name, content in contents.items():
+                (self.root / file_name).write_bytes(content.getvalue() if isinstance(content, BytesIO) else content)
+            (self.catalog / f"{metadata['opde:Id']}.json").write_text(json.dumps(metadata))
+
+        return metadata
+
+    def get_objects(self) -> list[dict]:
+        with self._lock:
+            return [json.loads(path.read_bytes()) for path in sorted(self.catalog.glob("*.json"))]
+
+    @staticmethod
+    def _response(operation: str, name: str, parts: list) -> etree._Element:
+        header = [{"@name": "name", "#text": name},
+                  {"@name": "status", "#text": "SUCCESS"},
+                  {"@name": "count", "#text": str(len(parts))},
+                  {"@name": "provider", "#text": "local"}]
+        document = {f"sm:{operation}": {**{f"@xmlns:{prefix}": uri for prefix, uri in NAMESPACES.items()},
+                                        "sm:part": header + parts}}
+        return etree.fromstring(xmltodict.unparse(document).encode())
+
+    @staticmethod
+    def _failure(message: str) -> etree._Element:
+        logger.warning(f"Local OPDM operation failed: {message}")
+        document = {"sm:OperationFailure": {"@xmlns:sm": NAMESPACES["sm"], "sm:part": [{"@name": "error", "#text": message}]}}
+        return etree.fromstring(xmltodict.unparse(document).encode())
+
+    def _query(self, request: etree._Element) -> etree._Element:
+        name = request.findtext("sm:part[@name='name']", namespaces=NAMESPACES) or str(uuid.uuid4())
+        pattern = request.find("sm:part[@name='query']/*", namespaces=NAMESPACES)
+        conditions = [(_prefixed_name(element), element.get("operator"), element.text) for element in pattern
+                      if len(element) == 0 and _prefixed_name(element) not in ["opde:Components", "opde:Dependencies"]]
+
+        if _prefixed_name(pattern) == "opdm:Profile":
+            candidates = [("opdm:Profile", component["opdm:Profile"]) for opdm_object in self.get_objects()
+                          for component in opdm_object["opde:Component"]]
+        else:
+            candidates = [("opdm:OPDMObject", opdm_object) for opdm_object in self.get_objects()]
+
+        parts = []
+        for element_name, metadata in candidates:
+            # Object type is queried by pmd namespace, but stored in opde namespace of object metadata
+            values = {**metadata, "pmd:Object-Type": metadata.get("opde:Object-Type", metadata.get("pmd:Object-Type"))}
+            if all(_match_condition(values.get(key), operator, expected) for key, operator, expected in conditions):
+                parts.append({"@name": "metadata", element_name: metadata})
+
+        return self._response("QueryResult", name, parts)
+
+    def _get_content(self, request: etree._Element) -> etree._Element:
+        return_payload = request.findtext("sm:part[@name='content-return-mode']", namespaces=NAMESPACES) == "PAYLOAD"
+        identifiers = [element.text for element in request.iterfind("sm:part[@name='identifier']/*/opde:Id", namespaces=NAMESPACES)]
+        profiles = {component["opdm:Profile"]["opde:Id"]: component["opdm:Profile"]
+                    for opdm_object in self.get_objects() for component in opdm_object["opde:Component"]}
+
+        parts = []
+        for identifier in identifiers:
+            profile = profiles.get(identifier)
+            if profile is None or not (self.root / profile["pmd:fileName"]).is_file():
+                return self._failure(f"Content not available: {identifier}")
+            profile = dict(profile)
+            if return_payload:
+                profile["opde:Content"] = base64.b64encode((self.root / profile["pmd:fileName"]).read_bytes()).decode()
+            parts.append({"@name": "content", "opdm:Profile": profile})
+
+        return self._response("GetContentResult", str(uuid.uuid4()), parts)
+
+    def ExecuteOperation(self, operation_xml: bytes) -> etree._Element:
+        """Executes OPDM operation given as XML, returns response XML element"""
+        self.network.transfer(len(operation_xml))
+        request = etree.fromstring(operation_xml)
+        operation = etree.QName(request).localname
+        try:
+            if operation == "Query":
+                response = self._query(request)
+            elif operation == "GetContent":
+                response = self._get_content(request)
+            else:
+                response = self._failure(f"Operation not supported by local OPDM: {operation}")
+        except ValueError as error:
+            response = self._failure(str(error))
+        self.network.transfer(len(etree.tostring(response)), round_trip=False)
+
+        return response
+
+    def PublicationRequest(self, dataset: dict) -> etree._Element:
+        """Stores published file to local storage, returns publication response XML element"""
+        content = dataset["content"]
+        self.network.transfer(len(content))
+        with self._lock:
+            (self.root / dataset["id"]).write_bytes(content)
+            self.publications.append(dataset["id"])
+        logger.info(f"Published to local OPDM: {dataset['id']}")
+
+        return self._response("PublicationResult", dataset["id"], [])
+
+
+class LocalStorageAdapter(BaseAdapter):
+    """Transport adapter of requests serving GET and PUT of local scheme URLs from filesystem, stand-in of WebDAV"""
+
+    def __init__(self, network: NetworkSimulator | None = None):
+        super().__init__()
+        self.network = network or NetworkSimulator()
+
+    def send(self, request, **kwargs) -> Response:
+        path = Path(get_local_path(request.url))
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response._content = b""
+
+        if request.method == "GET":
+            if path.is_file():
+                response.status_code, response._content = 200, path.read_bytes()
+            else:
+                response.status_code, response._content = 404, b"Not Found"
+            self.network.transfer(len(response._content))
+        elif request.method == "PUT":
+            body = request.body.read() if hasattr(request.body, "read") else request.body or b""
+            self.network.transfer(len(body))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            existed = path.exists()
+            path.write_bytes(body.encode() if isinstance(body, str) else body)
+            response.status_code = 204 if existed else 201
+        else:
+            response.status_code = 405
+
+        return response
+
+    def close(self):
+        pass
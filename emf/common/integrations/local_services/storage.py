@@ -0,0 +1,204 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from io import BytesIO
+from pathlib import Path
+from datetime import datetime, timezone
+from urllib3 import HTTPHeaderDict
+from minio.error import S3Error
+from minio.datatypes import Object, Bucket
+from minio.helpers import ObjectWriteResult
+from emf.common.integrations.local_services import NetworkSimulator
+
+logger = logging.getLogger(__name__)
+
+# Object metadata is kept next to buckets, bucket names can not start with dot
+METADATA_DIRECTORY = ".metadata"
+USER_METADATA_PREFIX = "x-amz-meta-"
+LIST_PAGE_SIZE = 1000
+
+
+class LocalObjectResponse:
+    """Response of get_object, mimics urllib3 response used by minio client"""
+
+    def __init__(self, data: bytes, headers: HTTPHeaderDict):
+        self.data = data
+        self.headers = headers
+        self._stream = BytesIO(data)
+
+    def read(self, amt: int | None = None) -> bytes:
+        return self._stream.read(amt)
+
+    def stream(self, amt: int = 2 ** 16):
+        while chunk := self._stream.read(amt):
+            yield chunk
+
+    def close(self):
+        self._stream.close()
+
+    def release_conn(self):
+        pass
+
+
+class LocalObjectStorageClient:
+    """
+    File backed stand-in of minio.Minio client. Buckets are directories under root path, objects are files and their
+    content type, user metadata and tags are stored as JSON under metadata directory. Errors are raised as S3Error
+    with the same codes as MinIO, so error handling of ObjectStorage works unchanged
+    """
+
+    def __init__(self, path: str, network: NetworkSimulator | None = None):
+        self.root = Path(path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.network = network or NetworkSimulator()
+        self._lock = threading.Lock()
+        logger.info(f"Using local object storage: {self.root}")
+
+    def _error(self, code: str, message: str, bucket_name: str, object_name: str | None = None) -> S3Error:
+        resource = f"/{bucket_name}/{object_name}" if object_name else f"/{bucket_name}"
+        return S3Error(None, code, message, resource, None, None, bucket_name, object_name)
+
+    def _bucket_path(self, bucket_name: str) -> Path:
+        bucket_path = self.root / bucket_name
+        if bucket_name.startswith(".") or not bucket_path.is_dir():
+            raise self._error("NoSuchBucket", "The specified bucket does not exist", bucket_name)
+        return bucket_path
+
+    def _object_paths(self, bucket_name: str, object_name: str) -> tuple[Path, Path]:
+        bucket_path = self._bucket_path(bucket_name)
+        return bucket_path / object_name, self.root / METADATA_DIRECTORY / bucket_name / f"{object_name}.json"
+
+    def _read_info(self, bucket_name: str, object_name: str) -> dict:
+        object_path, info_path = self._object_paths(bucket_name, object_name)
+        if not object_path.is_file():
+            raise self._error("NoSuchKey", "The specified key does not exist.", bucket_name, object_name)
+        try:
+            return json.loads(info_path.read_bytes())
+        except FileNotFoundError:  # object copied to storage directory by other means
+            stat = object_path.stat()
+            return {"etag": None, "size": stat.st_size, "content_type": "application/octet-stream",
+                    "last_modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+                    "metadata": {}, "tags": {}}
+
+    @staticmethod
+    def _write_atomic(path: Path, content: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        temporary_path.write_bytes(content)
+        os.replace(temporary_path, path)
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        self.network.transfer()
+        return not bucket_name.startswith(".") and (self.root / bucket_name).is_dir()
+
+    def make_bucket(self, bucket_name: str, *args, **kwargs):
+        self.network.transfer()
+        if (self.root / bucket_name).is_dir():
+            raise self._error("BucketAlreadyOwnedByYou", "Your previous request to create the named bucket succeeded "
+                                                         "and you already own it.", bucket_name)
+        (self.root / bucket_name).mkdir(parents=True)
+
+    def list_buckets(self) -> list[Bucket]:
+        self.network.transfer()
+        return [Bucket(path.name, datetime.fromtimestamp(path.stat().st_ctime, tz=timezone.utc))
+                for path in sorted(self.root.iterdir()) if path.is_dir() and not path.name.startswith(".")]
+
+    def put_object(self,
+                   bucket_name: str,
+                   object_name: str,
+                   data,
+                   length: int,
+                   content_type: str | None = "application/octet-stream",
+                   metadata: dict | None = None,
+                   tags: dict | None = None,
+                   **kwargs) -> ObjectWriteResult:
+        object_path, info_path = self._object_paths(bucket_name, object_name)
+        content = data.read(length) if length >= 0 else data.read()
+        self.network.transfer(len(content))
+
+        etag = hashlib.md5(content).hexdigest()
+        last_modified = datetime.now(tz=timezone.utc)
+        user_metadata = {}
+        for key, value in (metadata or {}).items():
+            key = key.lower()
+            user_metadata[key if key.startswith(USER_METADATA_PREFIX) else f"{USER_METADATA_PREFIX}{key}"] = str(value)
+        info = {"etag": etag, "size": len(content), "content_type": content_type or "application/octet-stream",
+                "last_modified": last_modified.isoformat(), "metadata": user_metadata, "tags": dict(tags or {})}
+
+        with self._lock:
+            self._write_atomic(object_path, content)
+            self._write_atomic(info_path, json.dumps(info).encode())
+
+        return ObjectWriteResult(bucket_name, object_name, None, etag, HTTPHeaderDict({"etag": etag}), last_modified)
+
+    def stat_object(self, bucket_name: str, object_name: str, *args, **kwargs) -> Object:
+        self.network.transfer()
+        info = self._read_info(bucket_name, object_name)
+        headers = HTTPHeaderDict({"content-type": info["content_type"], "content-length": str(info["size"]),
+                                  **({"etag": info["etag"]} if info["etag"] else {}), **info["metadata"]})
+        return Object(bucket_name, object_name, datetime.fromisoformat(info["last_modified"]), info["etag"],
+                      info["size"], metadata=headers, content_type=info["content_type"])
+
+    def get_object(self, bucket_name: str, object_name: str, offset: int = 0, length: int = 0, *args, **kwargs) -> LocalObjectResponse:
+        info = self._read_info(bucket_name, object_name)
+        object_path, _ = self._object_paths(bucket_name, object_name)
+        with open(object_path, "rb") as file_object:
+            file_object.seek(offset)
+            content = file_object.read(length or -1)
+        self.network.transfer(len(content))
+
+        return LocalObjectResponse(content, HTTPHeaderDict({"content-type": info["content_type"], **info["metadata"]}))
+
+    def remove_object(self, bucket_name: str, object_name: str, *args, **kwargs):
+        self.network.transfer()
+        object_path, info_path = self._object_paths(bucket_name, object_name)
+        with self._lock:
+            object_path.unlink(missing_ok=True)
+            info_path.unlink(missing_ok=True)
+
+    def list_objects(self,
+                     bucket_name: str,
+                     prefix: str | None = None,
+                     recursive: bool = False,
+                     start_after: str | None = None,
+                     include_user_meta: bool = False,
+                     include_version: bool = False,
+                     *args, **kwargs):
+        """Generator of objects sorted by name, like minio one round trip is made per page of listed objects"""
+        bucket_path = self._bucket_path(bucket_name)
+        prefix = prefix or ""
+        search_path = bucket_path / prefix.rpartition("/")[0]
+
+        names = set()
+        if search_path.is_dir():
+            for path in (search_path.rglob("*") if recursive else search_path.iterdir()):
+                name = path.relative_to(bucket_path).as_posix()
+                if path.name.startswith(".") or not name.startswith(prefix):
+                    continue
+                if path.is_file():
+                    names.add(name)
+                elif not recursive:
+                    names.add(f"{name}/")
+
+        for position, name in enumerate(sorted(names)):
+            if start_after and name <= start_after:
+                continue
+            if position % LIST_PAGE_SIZE == 0:
+                self.network.transfer()
+            if name.endswith("/"):
+                yield Object(bucket_name, name)
+                continue
+            info = self._read_info(bucket_name, name)
+            metadata = None
+            if include_user_meta:
+                # Listing returns user metadata keys in canonical form, e.g. X-Amz-Meta-Bamessageid
+                metadata = {"-".join(part.capitalize() for part in key.split("-")): value
+                            for key, value in info["metadata"].items()}
+            yield Object(bucket_name, name, datetime.fromisoformat(info["last_modified"]), info["etag"], info["size"],
+                         metadata=metadata, content_type=info["content_type"])
+
+    def get_presigned_url(self, method: str, bucket_name: str, object_name: str, *args, **kwargs) -> str:
+        object_path, _ = self._object_paths(bucket_name, object_name)
+        return object_path.resolve().as_uri()
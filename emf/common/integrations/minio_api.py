@@ -10,27 +10,51 @@ import re
 import logging
 import config
 import functools
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 from typing import List
 from io import BytesIO
 from zipfile import ZipFile
 from datetime import datetime, timedelta
 from aniso8601 import parse_datetime
 from emf.common.config_parser import parse_app_properties
+from emf.common.logging import metrics
+from emf.common.integrations import local_services
 from emf.common.helpers.opdm_objects import get_metadata_from_file_name
+from emf.common.helpers.memory import get_buffer_size
 urllib3.disable_warnings()
 
 logger = logging.getLogger(__name__)
 
 parse_app_properties(globals(), config.paths.integrations.minio)
 
+# User metadata key used to store sha256 hash of object content
+CONTENT_HASH_METADATA_KEY = "content-sha256"
+
+# Upload executor is shared by all ObjectStorage instances, worker threads are started on first upload
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+
+def get_upload_executor() -> ThreadPoolExecutor:
+    """Returns process wide executor of concurrent uploads"""
+    global _upload_executor
+    with _upload_executor_lock:
+        if _upload_executor is None:
+            _upload_executor = ThreadPoolExecutor(max_workers=int(UPLOAD_WORKERS), thread_name_prefix="minio-upload")
+    return _upload_executor
+
 
 def renew_authentication_token(func):
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
-        if datetime.utcnow() >= self.token_expiration - timedelta(seconds=int(TOKEN_RENEW_MARGIN)):  # 120s margin before token expiration
-            logger.warning("Authentication token going to expire soon, renewing token")
-            self._create_client()
-        return func(self, *args, **kwargs)
+        with self.client_lock:  # concurrent uploads share the client, renew it only once
+            if datetime.utcnow() >= self.token_expiration - timedelta(seconds=int(TOKEN_RENEW_MARGIN)):  # 120s margin before token expiration
+                logger.warning("Authentication token going to expire soon, renewing token")
+                self._create_client()
+        with metrics.MINIO_REQUEST_DURATION.time(operation=func.__name__):
+            return func(self, *args, **kwargs)
 
     return wrapper
 
@@ -42,6 +66,7 @@ class ObjectStorage:
         self.username = username
         self.password = password
         self.token_expiration = datetime.utcnow()
+        self.client_lock = threading.Lock()
         self.http_client = urllib3.PoolManager(
                 maxsize=int(MAXSIZE),
                 cert_reqs='CERT_NONE',
@@ -54,6 +79,12 @@ class ObjectStorage:
 
     def _create_client(self):
         """Connect to Minio"""
+        if local_services.is_local(self.server):
+            from emf.common.integrations.local_services.storage import LocalObjectStorageClient
+            self.token_expiration = datetime.max
+            self.client = LocalObjectStorageClient(local_services.get_local_path(self.server))
+            return
+
         credentials = self._get_credentials()
         self.token_expiration = parse_datetime(credentials['Expiration']).replace(tzinfo=None)
         self.client = minio.Minio(endpoint=self.server,
@@ -108,26 +139,32 @@ class ObjectStorage:
                       ):
         """
         Method to upload file to Minio storage
-        :param file_path_or_file_object: file path or BytesIO object
+        :param file_path_or_file_object: file path or BytesIO (or other named binary buffer) object, non-seekable
+        streams of unknown size (e.g. ArchiveStream) are uploaded as multipart upload while being read
         :param bucket_name: bucket name
         :param metadata: object metadata
         :param tags: object tags
         :return: response from Minio
         """
         file_object = file_path_or_file_object
+        part_size = 0
 
         if type(file_path_or_file_object) == str:
             file_object = open(file_path_or_file_object, "rb")
             length = sys.getsizeof(file_object)
+        elif not file_object.seekable():
+            length = -1
+            part_size = int(float(PART_SIZE_MB) * 1024 ** 2)
         else:
-            length = file_object.getbuffer().nbytes
+            length = get_buffer_size(file_object)
 
         # Handle tags if provided
         if tags:
             tags = self.dict_to_tags(tags)
 
         # Just to be sure that pointer is at the beginning of the content
-        file_object.seek(0)
+        if length >= 0:
+            file_object.seek(0)
 
         # TODO - check that bucket exists and it has access to it, maybe also try to create one
 
@@ -136,6 +173,7 @@ class ObjectStorage:
             object_name=file_object.name,
             data=file_object,
             length=length,
+            part_size=part_size,
             content_type=mimetypes.guess_type(file_object.name)[0],
             metadata=metadata,
             tags=tags,
@@ -143,6 +181,102 @@ class ObjectStorage:
 
         return response
 
+    @staticmethod
+    def get_content_hash(file_object) -> str:
+        """Returns sha256 hex digest of file object content, other than in-memory buffers are read in chunks"""
+        if isinstance(file_object, BytesIO):
+            return hashlib.sha256(file_object.getbuffer()).hexdigest()
+
+        position = file_object.tell()
+        file_object.seek(0)
+        content_hash = hashlib.file_digest(file_object, "sha256").hexdigest()
+        file_object.seek(position)
+
+        return content_hash
+
+    def _upload_changed_object(self,
+                               file_object,
+                               bucket_name: str,
+                               metadata: dict | None = None,
+                               tags: dict | None = None,
+                               stored_metadata: dict | None = None,
+                               ):
+        """Uploads object with its content hash in metadata, unless it is already stored with same content"""
+        content_hash = self.get_content_hash(file_object)
+        if stored_metadata is not None:
+            if stored_metadata.get(CONTENT_HASH_METADATA_KEY) in [None, content_hash]:
+                logger.info(f"Object already stored in object storage: {file_object.name}")
+                return None
+            logger.warning(f"Object stored with different content, replacing: {file_object.name}")
+
+        logger.info(f"Uploading object to object storage: {file_object.name}")
+        return self.upload_object(file_path_or_file_object=file_object,
+                                  bucket_name=bucket_name,
+                                  metadata={**(metadata or {}), CONTENT_HASH_METADATA_KEY: content_hash},
+                                  tags=tags)
+
+    def submit_upload(self,
+                      file_object,
+                      bucket_name: str,
+                      metadata: dict | None = None,
+                      tags: dict | None = None,
+                      existing_objects: dict | None = None,
+                      ) -> Future:
+        """
+        Submits upload of single file to upload executor, so upload starts while next files are prepared.
+        Content hash is calculated in the upload thread and stored in object metadata
+        :param file_object: BytesIO (or other named binary file) object, object name is taken from name attribute
+        :param bucket_name: bucket name
+        :param metadata: object metadata
+        :param tags: object tags
+        :param existing_objects: metadata of already stored objects from get_objects_metadata, objects in it are
+        skipped if stored with same content hash (or without hash)
+        :return: future of response from Minio (None for skipped object)
+        """
+        return get_upload_executor().submit(self._upload_changed_object,
+                                            file_object=file_object,
+                                            bucket_name=bucket_name,
+                                            metadata=metadata,
+                                            tags=tags,
+                                            stored_metadata=(existing_objects or {}).get(file_object.name))
+
+    def upload_objects(self,
+                       file_objects: List[BytesIO],
+                       bucket_name: str,
+                       metadata: dict | None = None,
+                       tags: dict | None = None,
+                       skip_existing: bool = False,
+                       wait_for_completion: bool = True,
+                       ):
+        """
+        Method to upload multiple files to Minio storage concurrently. Content hash of each file is stored
+        in object metadata, which is used to skip uploading of already stored identical content
+        :param file_objects: list of BytesIO objects, object name is taken from name attribute
+        :param bucket_name: bucket name
+        :param metadata: object metadata applied to all objects
+        :param tags: object tags applied to all objects
+        :param skip_existing: do not upload objects which already exist with same content hash (or without hash)
+        :param wait_for_completion: wait until all uploads are finished, otherwise futures are returned
+        :return: list of responses from Minio (None for skipped objects) or list of futures
+        """
+        existing_objects = {}
+        if skip_existing:
+            existing_objects = self.get_objects_metadata(object_names=[file_object.name for file_object in file_objects],
+                                                         bucket_name=bucket_name)
+
+        futures = [self.submit_upload(file_object=file_object,
+                                      bucket_name=bucket_name,
+                                      metadata=metadata,
+                                      tags=tags,
+                                      existing_objects=existing_objects)
+                   for file_object in file_objects]
+
+        if not wait_for_completion:
+            return futures
+
+        wait(futures)
+        return [future.result() for future in futures]
+
     @renew_authentication_token
     def download_object(self, bucket_name: str, object_name: str):
         try:
@@ -165,6 +299,29 @@ class ObjectStorage:
 
         return exists
 
+    @renew_authentication_token
+    def get_objects_metadata(self, object_names: List[str], bucket_name: str) -> dict:
+        """
+        Batched existence check of objects. Objects are listed once per common prefix instead of stat request per object
+        :param object_names: list of object names
+        :param bucket_name: bucket name
+        :return: dictionary of existing object names and their user metadata (keys without x-amz-meta- prefix)
+        """
+        object_names = {object_name.replace("//", "/") for object_name in object_names}
+        prefixes = {object_name.rpartition("/")[0] + "/" if "/" in object_name else "" for object_name in object_names}
+
+        existing_objects = {}
+        for prefix in prefixes:
+            try:
+                for obj in self.client.list_objects(bucket_name, prefix=prefix or None, include_user_meta=True):
+                    if obj.object_name in object_names:
+                        existing_objects[obj.object_name] = {key.lower().replace("x-amz-meta-", ""): value
+                                                             for key, value in (obj.metadata or {}).items()}
+            except minio.error.S3Error as err:
+                logger.error(err)
+
+        return existing_objects
+
     @renew_authentication_token
     def list_objects(self,
                      bucket_name: str,
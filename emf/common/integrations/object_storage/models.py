@@ -3,7 +3,8 @@ from aniso8601 import parse_datetime
 import logging
 import pandas
 import sys
-from emf.common.integrations import opdm
+from emf.common.integrations import opdm, minio_api
+from emf.common.helpers.profile_cache import profile_cache
 
 logger = logging.getLogger(__name__)
 
@@ -163,11 +164,37 @@ def get_content(metadata: dict):
     logger.info(f"Getting content of metadata object from MinIO: {metadata['opde:Id']}")
     bucket_name = metadata.get("minio-bucket", "opdm-data")  # by default use "opdm-data" bucket if missing in meta
     logger.debug(f"S3 storage bucket used: {bucket_name}")
+
+    # Static profiles already cached by their object reference are validated by content hash from one listing of
+    # object metadata, references not seen before are downloaded directly without any extra request
+    cached_hashes = {}
+    for component in metadata["opde:Component"]:
+        if profile_cache.is_cached_profile(component["opdm:Profile"].get("pmd:cgmesProfile")):
+            object_name = component["opdm:Profile"]["pmd:content-reference"].replace("//", "/")
+            if content_hash := profile_cache.get_reference_hash(f"{bucket_name}/{object_name}"):
+                cached_hashes[object_name] = content_hash
+    stored_hashes = {}
+    if cached_hashes:
+        stored_objects = object_storage.minio_service.get_objects_metadata(object_names=list(cached_hashes), bucket_name=bucket_name)
+        stored_hashes = {name: meta.get(minio_api.CONTENT_HASH_METADATA_KEY) for name, meta in stored_objects.items()}
+
     components_received = []
     for component in metadata["opde:Component"]:
         content_reference = component.get("opdm:Profile").get("pmd:content-reference")
-        logger.info(f"Downloading object: {bucket_name}/{content_reference}")
-        content = object_storage.minio_service.download_object(bucket_name, content_reference)
+        cache_key = f"{bucket_name}/{content_reference}"
+        content = None
+        # Identical static profiles are shared by content hash between models, versions and timestamps
+        object_name = content_reference.replace("//", "/")
+        content_hash = cached_hashes.get(object_name)
+        if content_hash and stored_hashes.get(object_name) == content_hash:
+            content = profile_cache.get_content(content_hash)
+            if content:
+                logger.info(f"Using cached content of object: {cache_key} [hash: {content_hash}]")
+        if not content:
+            logger.info(f"Downloading object: {cache_key}")
+            reference = f"{bucket_name}/{object_name}" if profile_cache.is_cached_profile(component["opdm:Profile"].get("pmd:cgmesProfile")) else None
+            content = profile_cache.add_content(object_storage.minio_service.download_object(bucket_name, content_reference),
+                                                reference=reference)
         component["opdm:Profile"]["DATA"] = content
         components_received.append(bool(content))  # collect boolean flags of received components
 
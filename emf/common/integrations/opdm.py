@@ -1,12 +1,17 @@
 import OPDM as opdm_api
 import requests
+from requests.adapters import HTTPAdapter
 import pandas
 import logging
-import sys
 import base64
 import os
+import time
+import threading
 import config
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 from emf.common.config_parser import parse_app_properties
+from emf.common.integrations import local_services
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +21,27 @@ parse_app_properties(globals(), config.paths.integrations.opdm)
 class OPDM(opdm_api.create_client):
 
     def __init__(self, server=OPDM_SERVER, username=OPDM_USERNAME, password=OPDM_PASSWORD, debug=False, verify=False):
-        super().__init__(server, username, password, debug, verify)
+        if local_services.is_local(server):
+            # SOAP operations are answered by local catalog instead of OPDM service WSDL client
+            from emf.common.integrations.local_services.opdm import LocalOPDMClient
+            self.debug = debug
+            self.API_VERSION = opdm_api.__version__
+            self.client = LocalOPDMClient(local_services.get_local_path(server))
+            self.ruleset_client = None
+        else:
+            super().__init__(server, username, password, debug, verify)
+
+        # Pooled keep-alive session for local storage (WebDAV) requests, shared by concurrent downloads
+        self.webdav_session = requests.Session()
+        self.webdav_session.auth = (WEBDAV_USERNAME, WEBDAV_PASSWORD)
+        self.webdav_session.verify = False
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=int(DOWNLOAD_WORKERS))
+        self.webdav_session.mount("http://", adapter)
+        self.webdav_session.mount("https://", adapter)
+        if local_services.is_local(WEBDAV_SERVER) or local_services.is_local(WEBDAV_SERVER_PUT):
+            from emf.common.integrations.local_services.opdm import LocalStorageAdapter
+            self.webdav_session.mount(f"{local_services.LOCAL_SCHEME}://", LocalStorageAdapter())
+        self.download_executor = ThreadPoolExecutor(max_workers=int(DOWNLOAD_WORKERS), thread_name_prefix="opdm-download")
 
     def query(self, object_type, meta = None):
 
@@ -37,30 +62,50 @@ class OPDM(opdm_api.create_client):
 
         return response
 
+    def download_component(self, component: dict) -> bytes:
+        """
+        Downloads content of single model component, firstly from local storage if subscriptions set up and works,
+        otherwise the component is requested with get-content from OPDM and read from local storage again
+        :param component: component of OPDM object
+        :return: component content
+        """
+        file_name = component['opdm:Profile']['pmd:fileName']
+        content_data = self.get_file(file_name)
+        if content_data:
+            return content_data
+
+        logger.warning(f"Component not present on local storage, executing get-content from OPDM: {file_name}")
+        self.get_content(component['opdm:Profile']['opde:Id'], object_type="file")
+        content_data = self.get_file(file_name)
+        if not content_data:
+            raise Exception(f"{file_name} not present on local storage due to failure of get-content")
+
+        return content_data
+
+    def download_objects(self, opdm_objects: list[dict]) -> list[dict]:
+        """
+        Downloads all components of all given models concurrently, fallback to OPDM is done per component
+        :param opdm_objects: list of OPDM objects, content is added to components DATA field
+        :return: list of OPDM objects which all components were downloaded
+        """
+        futures = {}
+        for model_pos, opdm_object in enumerate(opdm_objects):
+            for component in opdm_object['opde:Component']:
+                futures[self.download_executor.submit(self.download_component, component)] = (model_pos, component)
+
+        failed_models = set()
+        for future, (model_pos, component) in futures.items():
+            try:
+                component['opdm:Profile']["DATA"] = future.result()
+            except Exception as error:
+                logger.error(f"Failed to download component: {error}")
+                failed_models.add(model_pos)
+
+        return [opdm_object for model_pos, opdm_object in enumerate(opdm_objects) if model_pos not in failed_models]
+
     def download_object(self, opdm_object: dict):
-        model_meta = opdm_object
-        party = model_meta.get('pmd:modelPartReference', model_meta.get('pmd:TSO', ''))
-
-        # Firstly, try to get all files from local storage if subscriptions set up and works
-        received = True
-        for pos, model_part in enumerate(model_meta['opde:Component']):
-            content_data = self.get_file(model_part['opdm:Profile']['pmd:fileName'])
-            if content_data:
-                opdm_object['opde:Component'][pos]['opdm:Profile']["DATA"] = content_data
-            else:
-                received = False
-                break
-
-        if not received:
-            logger.warning("Part of model content not present on local storage, executing get-content from OPDM")
-            content_meta = self.get_content(model_meta['opde:Id'], object_type="model")
-            for pos, model_part in enumerate(model_meta['opde:Component']):
-                content_data = self.get_file(model_part['opdm:Profile']['pmd:fileName'])
-                if content_data:
-                    opdm_object['opde:Component'][pos]['opdm:Profile']["DATA"] = content_data
-                else:
-                    logger.error(f"{model_part['opdm:Profile']['pmd:fileName']} not present on local storage due to failure of get-content")
-                    raise Exception("Failure in model retrieving, message going to be rejected")
+        if not self.download_objects([opdm_object]):
+            raise Exception("Failure in model retrieving, message going to be rejected")
 
         return opdm_object
 
@@ -85,11 +130,7 @@ class OPDM(opdm_api.create_client):
     def get_file(self, file_id):
 
         logger.info(f"Retrieving file from OPDM local storage with ID -> {file_id}")
-        auth = (WEBDAV_USERNAME, WEBDAV_PASSWORD)
-        response = requests.request("GET",
-                                    f"{WEBDAV_SERVER}/{file_id}",
-                                    verify=False,
-                                    auth=auth)
+        response = self.webdav_session.get(f"{WEBDAV_SERVER}/{file_id}")
 
         if response.status_code == 200:
             logger.info(f"Retrieved file with ID -> {file_id}")
@@ -104,7 +145,6 @@ class OPDM(opdm_api.create_client):
         logger.info(f"Uploading file to OPDM local storage with ID -> {file_id}")
 
         url = f"{WEBDAV_SERVER_PUT.rstrip('/')}/{str(file_id).lstrip('/')}"
-        auth = (WEBDAV_USERNAME, WEBDAV_PASSWORD)
 
         headers = {"Content-Type": "application/octet-stream"}
 
@@ -148,12 +188,10 @@ class OPDM(opdm_api.create_client):
             return False
 
         try:
-            response = requests.put(
+            response = self.webdav_session.put(
                 url,
                 data=data,
                 headers=headers,
-                auth=auth,
-                verify=False,         # consider True + proper CA in production
                 timeout=120,
             )
             if response.status_code in (200, 201, 204):
@@ -181,13 +219,13 @@ class OPDM(opdm_api.create_client):
             # Sort for highest timeHorizon (for intraday) and for highest version
             models = pandas.DataFrame([x['opdm:OPDMObject'] for x in models_metadata_raw])
             latest_models = models.sort_values(["pmd:timeHorizon", "pmd:versionNumber"], ascending=[True, False]).groupby("pmd:modelPartReference").first()
+            latest_models = latest_models.to_dict("records")
 
-            for model in latest_models.to_dict("records"):
-                try:
-                    models_downloaded.append(self.download_object(opdm_object=model))
-                except:
+            models_downloaded = self.download_objects(opdm_objects=latest_models)
+            downloaded_ids = [id(model) for model in models_downloaded]
+            for model in latest_models:
+                if id(model) not in downloaded_ids:
                     logger.error(f"Could not download model for {time_horizon} {scenario_date} {model['pmd:TSO']}")
-                    logger.error(sys.exc_info())
         else:
             logger.warning(f"Models not available on OPDE")
 
@@ -215,6 +253,125 @@ class OPDM(opdm_api.create_client):
         return self.download_object(opdm_object=latest_boundary_meta['opdm:OPDMObject'])
 
 
+# Supported ways of publication, other send type values (e.g. empty) disable publication
+PUBLICATION_SEND_TYPES = ["SOAP", "FS"]
+
+
+class PublicationFailure(Exception):
+    """OPDM rejected publication request with OperationFailure, nothing was published"""
+
+
+def is_publication_retry_safe(error: Exception, send_type: str) -> bool:
+    """
+    Checks whether failed publication can be sent again without risk of publishing the same file twice
+    :param error: error of failed attempt
+    :param send_type: SOAP for publication request or FS for upload to OPDM local storage
+    :return: True if repeating is safe
+    """
+    # Upload to local storage overwrites file of the same name
+    if send_type == "FS":
+        return True
+
+    # Publication request which may have reached OPDM (e.g. read timeout) may be processed even without response
+    return isinstance(error, (PublicationFailure, requests.exceptions.ConnectTimeout))
+
+
+class PublicationManager:
+    """
+    Publishes files to OPDM in background with bounded concurrency and retries with exponential backoff, only
+    failures that are safe to repeat are retried. Futures of publications are tracked by reference (e.g. merged
+    model name), so caller can continue with other work and collect the results before finishing the task
+    """
+
+    def __init__(self,
+                 max_workers: int = int(PUBLICATION_WORKERS),
+                 retries: int = int(PUBLICATION_RETRIES),
+                 backoff: float = float(PUBLICATION_BACKOFF_IN_SEC),
+                 opdm_service: OPDM | None = None):
+        self.retries = retries
+        self.backoff = backoff
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="opdm-publication")
+        self.publications = {}
+        self._opdm_service = opdm_service
+        self._lock = threading.Lock()
+
+    @property
+    def opdm_service(self) -> OPDM:
+        # Client is created on first publication and shared by all publications
+        with self._lock:
+            if self._opdm_service is None:
+                self._opdm_service = OPDM()
+        return self._opdm_service
+
+    def _publish_file(self, file_object, send_type: str) -> dict:
+        result = {"file": file_object.name, "send_type": send_type, "success": False, "attempts": 0, "error": None}
+        for attempt in range(1, self.retries + 2):
+            result["attempts"] = attempt
+            try:
+                if send_type == "SOAP":
+                    response = self.opdm_service.publication_request(file_path_or_file_object=file_object)
+                    logger.debug(etree.tostring(response, pretty_print=True).decode())
+                    if response is not None and response.find(".//{*}OperationFailure") is not None:
+                        raise PublicationFailure(f"OPDM responded with error: {etree.tostring(response).decode()}")
+                else:
+                    if not self.opdm_service.put_file(file_id=file_object.name, file_content=file_object):
+                        raise Exception("Upload to OPDM local storage failed")
+                result.update(success=True, error=None)
+                logger.info(f"Published to OPDM: {file_object.name} [attempt: {attempt}]")
+                return result
+            except Exception as error:
+                result["error"] = str(error)
+                if not is_publication_retry_safe(error, send_type):
+                    logger.error(f"Publication of {file_object.name} failed with error not safe to retry: {error}")
+                    break
+                if attempt <= self.retries:
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    logger.warning(f"Publication of {file_object.name} failed, retrying in {delay}s: {error}")
+                    time.sleep(delay)
+
+        logger.error(f"Publication to OPDM failed: {file_object.name} "
+                     f"[attempts: {result['attempts']}, error: {result['error']}]")
+        return result
+
+    def publish(self, file_objects: list, send_type: str, reference: str) -> list[Future]:
+        """
+        Submits files for publication to OPDM
+        :param file_objects: list of named BytesIO objects
+        :param send_type: SOAP for publication request or FS for upload to OPDM local storage
+        :param reference: reference to track publications of a task
+        :return: list of futures, each resolving to publication result dictionary
+        """
+        if send_type not in PUBLICATION_SEND_TYPES:
+            raise ValueError(f"Unknown OPDM send type: {send_type}")
+
+        futures = {}
+        for file_object in file_objects:
+            logger.info(f"Uploading to OPDM: {file_object.name}")
+            futures[self.executor.submit(self._publish_file, file_object, send_type)] = file_object.name
+        with self._lock:
+            self.publications.setdefault(reference, {}).update(futures)
+
+        return list(futures)
+
+    def wait(self, reference: str, timeout: float | None = None) -> list[dict]:
+        """
+        Waits for completion of publications of given reference
+        :param reference: reference used on publishing
+        :param timeout: maximum time to wait in seconds, unfinished publications are reported as failed
+        :return: list of publication result dictionaries
+        """
+        with self._lock:
+            futures = self.publications.pop(reference, {})
+        done, not_done = wait(futures, timeout=timeout)
+        results = [future.result() for future in futures if future in done]
+        if not_done:
+            logger.error(f"{len(not_done)} publication(s) of {reference} not finished within {timeout}s")
+            results.extend({"file": file_name, "success": False, "error": "timeout"}
+                           for future, file_name in futures.items() if future in not_done)
+
+        return results
+
+
 if __name__ == '__main__':
     # TODO add tests
     # TODO add dock-strings and type hints
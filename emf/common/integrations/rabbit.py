@@ -1,4 +1,5 @@
 import functools
+import gc
 import time
 import logging
 import pika
@@ -7,6 +8,8 @@ import traceback
 import signal
 from typing import List, Optional
 from emf.common.config_parser import parse_app_properties
+from emf.common.logging import metrics
+from emf.common.integrations import local_services
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # from pika.adapters.asyncio_connection import AsyncioConnection
@@ -18,6 +21,15 @@ logger = logging.getLogger(__name__)
 parse_app_properties(globals(), config.paths.integrations.rabbit)
 
 
+def create_blocking_connection(parameters: pika.ConnectionParameters):
+    """Opens blocking connection to RabbitMQ, or to in-memory local broker if host is local service address"""
+    if local_services.is_local(parameters.host):
+        from emf.common.integrations.local_services.broker import LocalConnection
+        return LocalConnection(parameters)
+
+    return pika.BlockingConnection(parameters)
+
+
 class BlockingClient:
 
     def __init__(self,
@@ -40,7 +52,7 @@ class BlockingClient:
 
     def _connect(self):
         # Connect to RabbitMQ server
-        self.connection = pika.BlockingConnection(
+        self.connection = create_blocking_connection(
             pika.ConnectionParameters(**self.connection_params)
         )
         self.publish_channel = self.connection.channel()
@@ -176,7 +188,10 @@ class SingleMessageConsumer:
                  blocked_connection_timeout: float = 600.0,
                  connection_attempts: int = 5,
                  retry_delay: int = 3,
-                 log_body: bool = False):
+                 log_body: bool = False,
+                 max_messages: int = int(RMQ_WARM_MAX_MESSAGES),
+                 idle_timeout: float = float(RMQ_WARM_IDLE_TIMEOUT_IN_SEC),
+                 poll_interval: float = 1.0):
         self._host, self._port, self._vhost = host, int(port), vhost
         self._queue = queue
         self._username, self._password = username, password
@@ -191,12 +206,20 @@ class SingleMessageConsumer:
         self._connection_attempts = connection_attempts
         self._retry_delay = retry_delay
 
+        # Warm worker mode, process up to max_messages in sequence within same process
+        self._max_messages = max(int(max_messages), 1)
+        self._idle_timeout = float(idle_timeout)
+        self._poll_interval = poll_interval
+
         self._connection: Optional[pika.BlockingConnection] = None
         self._channel: Optional[pika.adapters.blocking_connection.BlockingChannel] = None
         self._in_shutdown = False
 
         self._executor = ThreadPoolExecutor(max_workers=1)
 
+        # Expose runtime metrics if enabled by configuration
+        metrics.start_metrics_server()
+
         signal.signal(signal.SIGTERM, self._on_term_signal)
         signal.signal(signal.SIGINT, self._on_term_signal)
 
@@ -216,7 +239,7 @@ class SingleMessageConsumer:
 
     def connect(self):
         logger.info(f"Connecting to RabbitMQ at {self._host}:{self._port} vhost='{self._vhost}'")
-        self._connection = pika.BlockingConnection(self._params())
+        self._connection = create_blocking_connection(self._params())
         self._channel = self._connection.channel()
         logger.info("Connection established and channel opened")
 
@@ -261,7 +284,8 @@ class SingleMessageConsumer:
             for message_handler in self.message_handlers:
                 try:
                     logger.info(f"Handling message with handler: {message_handler.__class__.__name__}")
-                    body, properties = message_handler.handle(body, properties=properties, channel=None)
+                    with metrics.HANDLER_DURATION.time(handler=message_handler.__class__.__name__):
+                        body, properties = message_handler.handle(body, properties=properties, channel=None)
                     if not properties.headers.get('success', True): # stop processing next handlers if message success was set to false
                         break
 
@@ -274,12 +298,98 @@ class SingleMessageConsumer:
 
         return ack, body, properties, err, basic_deliver.delivery_tag
 
+    def _cleanup_after_message(self):
+        """Releases per-message state before next message is taken in warm worker mode"""
+        for message_handler in self.message_handlers:
+            cleanup = getattr(message_handler, "cleanup", None)
+            if callable(cleanup):
+                try:
+                    cleanup()
+                except Exception as e:
+                    logger.warning(f"Cleanup of handler {message_handler.__class__.__name__} failed: {e}")
+        gc.collect()
+
+    def _wait_for_message(self, idle_since: float):
+        """
+        Polls queue until message is available, idle timeout is reached or shutdown is requested
+        :param idle_since: monotonic time since worker is idle
+        :return: tuple of (method, properties, body), method is None if no message was received
+        """
+        while True:
+            method, properties, body = self._channel.basic_get(self._queue, auto_ack=False)
+            if method or self._in_shutdown:
+                return method, properties, body
+            if time.monotonic() - idle_since >= self._idle_timeout:
+                return None, None, None
+            # keep heartbeats flowing while waiting for next message
+            self._connection.process_data_events(time_limit=min(self._poll_interval, self._idle_timeout))
+
+    def _handle_message(self, method, properties, body) -> int:
+        """
+        Processes single received message and acknowledges or rejects it
+        :return: exit code, see run()
+        """
+        delivery_tag = method.delivery_tag
+        logger.info(f"Received message #{delivery_tag} from {getattr(properties,'app_id',None)} meta: {getattr(properties,'headers',None)}")
+        if self.log_body:
+            logger.debug(f"Message body: {body!r}")
+
+        metrics.MESSAGES_CONSUMED.inc(queue=self._queue)
+        metrics.MESSAGES_IN_FLIGHT.inc(queue=self._queue)
+        future = self._executor.submit(self._process_messages, method, properties, body)
+
+        # keep heartbeats flowing while waiting for worker completion
+        while not future.done():
+            try:
+                self._connection.process_data_events(time_limit=0)
+            except Exception:
+                pass
+            time.sleep(0.25)
+
+        ack, out_body, out_props, err, dtag = future.result()
+        metrics.MESSAGES_IN_FLIGHT.dec(queue=self._queue)
+
+        # Check if properties has some status flag set from handler
+        _success = out_props.headers.get('success', True)
+
+        if not ack or not _success:
+            logger.warning(f"Rejecting message due to handler failure or success flag: {_success}, error: {err}")
+            try:
+                self._channel.basic_reject(dtag, requeue=False)
+                metrics.MESSAGES_REJECTED.inc(queue=self._queue, requeue=False)
+            except Exception as e:
+                logger.error(f"Failed to REJECT message #{dtag}: {e}")
+                return 3
+            return 2
+
+        if self.forward:
+            logger.info(f"Publishing message to exchange/queue: {self.forward}")
+            try:
+                self._channel.basic_publish(
+                    exchange=self.forward, routing_key="", body=out_body, properties=out_props
+                )
+            except Exception as e:
+                logger.error(f"Publish failed: {e}")
+                return 3  # leave unacked for redelivery
+
+        try:
+            self._channel.basic_ack(dtag)
+            metrics.MESSAGES_ACKED.inc(queue=self._queue)
+            logger.info(f"ACKed message #{dtag}")
+            return 0
+        except Exception as e:
+            logger.error(f"Failed to ACK message #{dtag}: {e}")
+            return 3
+
     # -------- single-message main --------
     def run(self) -> int:
         """
+        Processes one message, or in warm worker mode (max_messages > 1) keeps the initialized process alive and takes
+        messages in sequence until max_messages are processed or no message arrives within idle_timeout
+
         Exit codes:
           0 -> processed OK or queue empty
-          2 -> conversion/handler failed (rejected)
+          2 -> conversion/handler failed (rejected), in warm mode if any of the messages was rejected
           3 -> connection/setup error
         """
         try:
@@ -288,60 +398,43 @@ class SingleMessageConsumer:
             logger.error(f"Failed to connect to RabbitMQ: {e}")
             return 3
 
+        exit_code = 0
+        processed = 0
         try:
-            method, properties, body = self._channel.basic_get(self._queue, auto_ack=False)
-            if not method:
-                logger.warning(f"No message available in queue '{self._queue}', exiting")
-                return 0
-
-            delivery_tag = method.delivery_tag
-            logger.info(f"Received message #{delivery_tag} from {getattr(properties,'app_id',None)} meta: {getattr(properties,'headers',None)}")
-            if self.log_body:
-                logger.debug(f"Message body: {body!r}")
-
-            future = self._executor.submit(self._process_messages, method, properties, body)
-
-            # keep heartbeats flowing while waiting for worker completion
-            while not future.done():
+            while processed < self._max_messages:
                 try:
-                    self._connection.process_data_events(time_limit=0)
-                except Exception:
-                    pass
-                time.sleep(0.25)
-
-            ack, out_body, out_props, err, dtag = future.result()
-
-            # Check if properties has some status flag set from handler
-            _success = out_props.headers.get('success', True)
-
-            if not ack or not _success:
-                logger.warning(f"Rejecting message due to handler failure or success flag: {_success}, error: {err}")
-                try:
-                    self._channel.basic_reject(dtag, requeue=False)
+                    if processed == 0:
+                        method, properties, body = self._channel.basic_get(self._queue, auto_ack=False)
+                    else:
+                        method, properties, body = self._wait_for_message(idle_since=time.monotonic())
                 except Exception as e:
-                    logger.error(f"Failed to REJECT message #{dtag}: {e}")
+                    logger.error(f"Failed to get message from queue '{self._queue}': {e}")
                     return 3
-                return 2
 
-            if self.forward:
-                logger.info(f"Publishing message to exchange/queue: {self.forward}")
-                try:
-                    self._channel.basic_publish(
-                        exchange=self.forward, routing_key="", body=out_body, properties=out_props
-                    )
-                except Exception as e:
-                    logger.error(f"Publish failed: {e}")
-                    return 3  # leave unacked for redelivery
+                if not method:
+                    if processed == 0:
+                        logger.warning(f"No message available in queue '{self._queue}', exiting")
+                    else:
+                        logger.info(f"No message received within idle timeout of {self._idle_timeout}s, exiting")
+                    break
+
+                result = self._handle_message(method, properties, body)
+                processed += 1
+                if result == 3:
+                    return result
+                exit_code = max(exit_code, result)
 
-            try:
-                self._channel.basic_ack(dtag)
-                logger.info(f"ACKed message #{dtag}")
                 if self._in_shutdown:
                     logger.info("Shutdown requested; exiting cleanly after finishing message")
-                return 0
-            except Exception as e:
-                logger.error(f"Failed to ACK message #{dtag}: {e}")
-                return 3
+                    break
+
+                if processed < self._max_messages:
+                    self._cleanup_after_message()
+
+            if self._max_messages > 1:
+                logger.info(f"Warm worker processed {processed} message(s), exiting")
+
+            return exit_code
 
         finally:
             self.close()
@@ -400,6 +493,9 @@ class RMQConsumer:
         self._executor = ThreadPoolExecutor()
         self._executor_stopped = False
 
+        # Expose runtime metrics if enabled by configuration
+        metrics.start_metrics_server()
+
         self._connection_parameters = pika.ConnectionParameters(host=self._host,
                                                                 port=self._port,
                                                                 virtual_host=self._vhost,
@@ -417,7 +513,13 @@ class RMQConsumer:
         """
         logger.info(f"Connecting to {self._host}:{self._port} @ {self._vhost} as {self._username}")
 
-        return pika.SelectConnection(
+        if local_services.is_local(self._host):
+            from emf.common.integrations.local_services.broker import LocalConnection
+            connection_class = LocalConnection
+        else:
+            connection_class = pika.SelectConnection
+
+        return connection_class(
             parameters=self._connection_parameters,
             on_open_callback=self.on_connection_open,
             on_open_error_callback=self.on_connection_open_error,
@@ -574,6 +676,7 @@ class RMQConsumer:
                 logger.error(f"Message conversion failed: {error}", exc_info=True)
                 ack = False
                 self._channel.basic_reject(basic_deliver.delivery_tag, requeue=True)
+                metrics.MESSAGES_REJECTED.inc(queue=self._queue, requeue=True)
                 # self.connection.close()
                 # self.stop()
 
@@ -581,13 +684,15 @@ class RMQConsumer:
             try:
                 for message_handler in self.message_handlers:
                     logger.info(f"Handling message with handler: {message_handler.__class__.__name__}")
-                    body, properties = message_handler.handle(body, properties=properties, channel=self._channel)
+                    with metrics.HANDLER_DURATION.time(handler=message_handler.__class__.__name__):
+                        body, properties = message_handler.handle(body, properties=properties, channel=self._channel)
                     if not properties.headers.get('success', True): # stop processing next handlers if message success was set to false
                         break
             except Exception as error:
                 logger.error(f"Message handling failed: {error}", exc_info=True)
                 ack = False
                 self._channel.basic_reject(basic_deliver.delivery_tag, requeue=True)
+                metrics.MESSAGES_REJECTED.inc(queue=self._queue, requeue=True)
                 logger.error(f"Message rejected due to handler error")
                 
                 # self.connection.close()
@@ -607,6 +712,9 @@ class RMQConsumer:
             else:
                 logger.warning(f"Task rejected due to success flag set by handler: {_success}")
                 self._channel.basic_reject(basic_deliver.delivery_tag, requeue=False)
+                metrics.MESSAGES_REJECTED.inc(queue=self._queue, requeue=False)
+
+        metrics.MESSAGES_IN_FLIGHT.dec(queue=self._queue)
 
     def on_message(self, _unused_channel, basic_deliver, properties, body):
         """Invoked by pika when a message is delivered from RabbitMQ. The
@@ -623,6 +731,8 @@ class RMQConsumer:
         logger.info(
             f"Received message # {basic_deliver.delivery_tag} from {properties.app_id} meta: {properties.headers}")
         logger.debug(f"Message body: {body}")
+        metrics.MESSAGES_CONSUMED.inc(queue=self._queue)
+        metrics.MESSAGES_IN_FLIGHT.inc(queue=self._queue)
         self._executor.submit(self._process_messages, basic_deliver, properties, body)
 
     def acknowledge_message(self, delivery_tag):
@@ -632,6 +742,7 @@ class RMQConsumer:
         """
         logger.info(f"Acknowledging message {delivery_tag}")
         self._channel.basic_ack(delivery_tag)
+        metrics.MESSAGES_ACKED.inc(queue=self._queue)
 
     def stop_consuming(self):
         """Tell RabbitMQ that you would like to stop consuming by sending the
@@ -0,0 +1,144 @@
+"""
+Warm start of AC loadflow from previous solution instead of flat or DC voltage initialization. Within one network
+previous solution is already present in network state, across networks (e.g. consecutive hours of the same merge)
+voltages are restored from snapshot stored by topology fingerprint.
+
+Related documentation:
+https://powsybl.readthedocs.io/projects/powsybl-open-loadflow/en/latest/loadflow/parameters.html
+"""
+import copy
+import logging
+import threading
+import pypowsybl
+from collections import OrderedDict
+from emf.common.helpers.loadflow import get_topology_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# OpenLoadFlow stores voltage of fictitious buses (e.g. boundary side of dangling lines) as element properties
+VOLTAGE_PROPERTIES = ['v', 'angle']
+VOLTAGE_PROPERTY_ELEMENTS = [pypowsybl.network.ElementType.DANGLING_LINE,
+                             pypowsybl.network.ElementType.THREE_WINDINGS_TRANSFORMER]
+
+# Voltage snapshots by topology fingerprint, only a few topologies are merged by one worker
+_voltage_snapshots = OrderedDict()
+_voltage_snapshots_size = 4
+_voltage_snapshots_lock = threading.Lock()
+
+
+def get_warm_start_parameters(parameters: pypowsybl.loadflow.Parameters) -> pypowsybl.loadflow.Parameters:
+    """
+    Returns copy of loadflow parameters which initializes voltages from previous values of network
+    :param parameters: loadflow parameters
+    :return: warm start loadflow parameters
+    """
+    warm_parameters = copy.deepcopy(parameters)
+    warm_parameters.voltage_init_mode = pypowsybl.loadflow.VoltageInitMode.PREVIOUS_VALUES
+    # Provider override (e.g. FULL_VOLTAGE) would replace previous values with DC initialization
+    warm_parameters.provider_parameters = {**(parameters.provider_parameters or {}), 'voltageInitModeOverride': 'NONE'}
+
+    return warm_parameters
+
+
+def has_voltages(network: pypowsybl.network.Network) -> bool:
+    """Check whether all buses of network main island have voltages, e.g. from previous loadflow or SV profile"""
+    buses = network.get_buses(attributes=['v_mag', 'connected_component'])
+    main_island_voltages = buses.loc[buses['connected_component'] == 0, 'v_mag']
+
+    return not main_island_voltages.empty and bool(main_island_voltages.notna().all())
+
+
+def run_ac(network: pypowsybl.network.Network, parameters: pypowsybl.loadflow.Parameters, warm_start: bool = False, **kwargs):
+    """
+    Runs AC loadflow, starting from previous voltages of network if warm start is requested. If warm start
+    loadflow fails or main island does not converge, loadflow is run again with initialization of given parameters
+    :param network: pypowsybl network
+    :param parameters: loadflow parameters
+    :param warm_start: flag to start from previous voltages
+    :param kwargs: other arguments of pypowsybl run_ac
+    :return: list of component results
+    """
+    if warm_start and not has_voltages(network):
+        logger.debug("Network main island has no previous voltages, using configured initialization")
+        warm_start = False
+
+    if warm_start:
+        try:
+            results = pypowsybl.loadflow.run_ac(network=network, parameters=get_warm_start_parameters(parameters), **kwargs)
+            if results[0].status == pypowsybl.loadflow.ComponentStatus.CONVERGED:
+                logger.debug(f"Warm start loadflow converged in {results[0].iteration_count} iterations")
+                return results
+            logger.warning(f"Warm start loadflow not converged: {results[0].status.name}, using configured initialization")
+        except pypowsybl.PyPowsyblError as error:
+            logger.warning(f"Warm start loadflow failed, using configured initialization: {error}")
+
+    return pypowsybl.loadflow.run_ac(network=network, parameters=parameters, **kwargs)
+
+
+class VoltageSnapshot:
+    """
+    Voltage magnitudes and angles of buses and fictitious buses of solved network. Buses are stored by bus-breaker view
+    identifiers, as bus view identifiers of the same model differ between imports
+    """
+
+    def __init__(self, network: pypowsybl.network.Network):
+        buses = network.get_bus_breaker_view_buses(attributes=['v_mag', 'v_angle'])
+        self.buses = buses.dropna()
+        self.element_properties = {}
+        for element_type in VOLTAGE_PROPERTY_ELEMENTS:
+            elements = network.get_elements(element_type=element_type, all_attributes=True)
+            elements = elements.reindex(columns=VOLTAGE_PROPERTIES).replace('', None).dropna()
+            if not elements.empty:
+                self.element_properties[element_type] = elements
+
+    def apply(self, network: pypowsybl.network.Network):
+        """Sets snapshot voltages to network of the same topology"""
+        bus_ids = network.get_bus_breaker_view_buses(attributes=['bus_id'])['bus_id']
+        buses = self.buses.join(bus_ids, how='inner').drop_duplicates(subset='bus_id')
+        network.update_buses(id=buses['bus_id'], v_mag=buses['v_mag'], v_angle=buses['v_angle'])
+        for elements in self.element_properties.values():
+            network.add_elements_properties(id=elements.index.tolist(),
+                                            **{name: elements[name].astype(str).tolist() for name in VOLTAGE_PROPERTIES})
+
+
+def store_voltage_snapshot(network: pypowsybl.network.Network, fingerprint: str | None = None) -> str:
+    """
+    Stores voltages of solved network to be used as starting point for next network of the same topology
+    :param network: pypowsybl network after converged loadflow
+    :param fingerprint: topology fingerprint of network, computed if not given
+    :return: topology fingerprint
+    """
+    fingerprint = fingerprint or get_topology_fingerprint(network)
+    snapshot = VoltageSnapshot(network)
+    with _voltage_snapshots_lock:
+        _voltage_snapshots[fingerprint] = snapshot
+        _voltage_snapshots.move_to_end(fingerprint)
+        while len(_voltage_snapshots) > _voltage_snapshots_size:
+            _voltage_snapshots.popitem(last=False)
+    logger.info(f"Stored voltage snapshot of {len(snapshot.buses.index)} buses [topology: {fingerprint}]")
+
+    return fingerprint
+
+
+def restore_voltage_snapshot(network: pypowsybl.network.Network, fingerprint: str | None = None) -> bool:
+    """
+    Sets voltages of network from stored snapshot of the same topology
+    :param network: pypowsybl network
+    :param fingerprint: topology fingerprint of network, computed if not given
+    :return: True if snapshot was found and applied
+    """
+    fingerprint = fingerprint or get_topology_fingerprint(network)
+    with _voltage_snapshots_lock:
+        snapshot = _voltage_snapshots.get(fingerprint)
+    if snapshot is None:
+        logger.info(f"Voltage snapshot not available [topology: {fingerprint}]")
+        return False
+
+    try:
+        snapshot.apply(network)
+    except pypowsybl.PyPowsyblError as error:
+        logger.warning(f"Voltage snapshot not applied [topology: {fingerprint}]: {error}")
+        return False
+    logger.info(f"Restored voltage snapshot of {len(snapshot.buses.index)} buses [topology: {fingerprint}]")
+
+    return True
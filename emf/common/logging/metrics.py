@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+import config
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from emf.common.config_parser import parse_app_properties
+
+logger = logging.getLogger(__name__)
+
+parse_app_properties(caller_globals=globals(), path=config.paths.logging.metrics)
+
+_module_load_time = time.perf_counter()
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _format_labels(label_names: tuple, label_values: tuple, extra: dict | None = None) -> str:
+    labels = dict(zip(label_names, label_values))
+    labels.update(extra or {})
+    if not labels:
+        return ""
+    escaped = {key: str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for key, value in labels.items()}
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped.items()) + "}"
+
+
+class Metric:
+    """Base class of metric with optional labels, exposed in Prometheus text format"""
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, None, value) for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for name, key, extra, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.label_names, key, extra)} {value}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (), function=None):
+        super().__init__(name, documentation, label_names)
+        self.function = function
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.function:
+            return [(self.name, (), None, self.function())]
+        return super().samples()
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            for num, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[num] += 1
+            counts[-1] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes duration of enclosed block in seconds"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    samples.append((f"{self.name}_bucket", key, {"le": "+Inf" if bound == float("inf") else bound}, count))
+                samples.append((f"{self.name}_count", key, None, counts[-1]))
+                samples.append((f"{self.name}_sum", key, None, total))
+        return samples
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        return self.metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+def get_process_uptime() -> float:
+    """Returns seconds elapsed since start of current process, including interpreter startup"""
+    try:
+        with open("/proc/self/stat") as stat:
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime:
+            return float(uptime.read().split()[0]) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _module_load_time
+
+
+def get_process_memory_bytes() -> int:
+    """Returns resident set size of current process in bytes"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+# Worker wide registry and common metrics
+registry = MetricsRegistry()
+
+MESSAGES_CONSUMED = registry.register(Counter("emf_messages_consumed_total", "Messages received from RabbitMQ", ("queue",)))
+MESSAGES_ACKED = registry.register(Counter("emf_messages_acked_total", "Messages acknowledged", ("queue",)))
+MESSAGES_REJECTED = registry.register(Counter("emf_messages_rejected_total", "Messages rejected (nack)", ("queue", "requeue")))
+MESSAGES_IN_FLIGHT = registry.register(Gauge("emf_messages_in_flight", "Messages currently being processed", ("queue",)))
+HANDLER_DURATION = registry.register(Histogram("emf_handler_duration_seconds", "Message handler latency", ("handler",)))
+MINIO_REQUEST_DURATION = registry.register(Histogram("emf_minio_request_duration_seconds", "MinIO call latency", ("operation",)))
+ELASTIC_REQUEST_DURATION = registry.register(Histogram("emf_elastic_request_duration_seconds", "Elastic call latency", ("operation",)))
+WORKER_STARTUP = registry.register(Gauge("emf_worker_startup_seconds", "Time from process start to worker startup stage", ("worker", "stage")))
+PROCESS_MEMORY = registry.register(Gauge("emf_process_resident_memory_bytes", "Resident memory of worker process", function=get_process_memory_bytes))
+
+
+def observe_duration(histogram: Histogram, **labels):
+    """Decorator to observe duration of function calls in given histogram, operation label defaults to function name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**{"operation": func.__name__, **labels}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_startup(worker: str, stage: str) -> float:
+    """
+    Records time elapsed from process start until given startup stage of worker entry point
+    :param worker: name of the worker
+    :param stage: name of the startup stage, e.g. imports, initialized
+    :return: elapsed seconds
+    """
+    elapsed = round(get_process_uptime(), 3)
+    WORKER_STARTUP.set(elapsed, worker=worker, stage=stage)
+    logger.info(f"Worker '{worker}' startup stage '{stage}' reached in {elapsed}s")
+
+    return elapsed
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ["/metrics", "/"]:
+            self.send_response(404)
+            self.end_headers()
+            return
+        content = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port: int | None = None, force: bool = False):
+    """
+    Starts embedded HTTP metrics endpoint in background thread if enabled by configuration. Safe to call many times
+    :param port: port to listen on, by default from configuration
+    :param force: start even if disabled by configuration
+    :return: HTTP server instance or None if disabled
+    """
+    global _server
+    if _server is not None:
+        return _server
+    if not force and not json.loads(ENABLE_METRICS.lower()):
+        return None
+
+    try:
+        _server = ThreadingHTTPServer(("", int(port or METRICS_PORT)), _MetricsRequestHandler)
+    except OSError as error:
+        logger.warning(f"Metrics endpoint not started: {error}")
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Metrics endpoint started on port {_server.server_port}")
+
+    return _server
@@ -1,6 +1,6 @@
-from saxonche import PySaxonProcessor
 from lxml import etree
 import logging
+import functools
 import time
 import json
 import sys
@@ -12,13 +12,18 @@ from emf.common.config_parser import parse_app_properties
 logger = logging.getLogger(__name__)
 parse_app_properties(globals(), config.paths.xslt_service.xslt)
 
-rabbit_service = rabbit.BlockingClient()
+
+
+@functools.lru_cache(maxsize=None)
+def get_rabbit_service():
+    """Returns RabbitMQ client, connection is created on first use and not at module import"""
+    return rabbit.BlockingClient()
 
 
 def run_service():
 
     logger.info(f"Shoveling from queue '{RMQ_QUEUE}' to exchange '{RMQ_EXCHANGE}'")
-    rabbit_service.shovel(RMQ_QUEUE, RMQ_EXCHANGE, do_conversion)
+    get_rabbit_service().shovel(RMQ_QUEUE, RMQ_EXCHANGE, do_conversion)
 
 
 def do_conversion(channel, method, properties, body: str):
@@ -41,6 +46,8 @@ def do_conversion(channel, method, properties, body: str):
 
 
 def xslt30_convert(source_file, stylesheet_file, output_file=None):
+    from saxonche import PySaxonProcessor  # imported on first use to keep worker startup light
+
     with PySaxonProcessor() as saxon:
         xslt30 = saxon.new_xslt30_processor()
 
@@ -108,7 +115,7 @@ if __name__ == '__main__':
     data = {"XML": xml_bytes.decode(), "XSL": xsl_bytes.decode(), "XSD": xsd_bytes.decode()}
     message_json = json.dumps(data)
 
-    rabbit_service.publish(message_json, 'emfos.xslt')
+    get_rabbit_service().publish(message_json, 'emfos.xslt')
     logger.info(f"Sending to exchange 'emfos.xslt'")
     time.sleep(2)
 
@@ -0,0 +1,150 @@
+import logging
+import threading
+import pandas as pd
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY_POINT_KEYS = {'ConnectivityNode.boundaryPoint': 'ConnectivityNode',
+                       'TopologicalNode.boundaryPoint': 'TopologicalNode'}
+TERMINAL_NODE_KEYS = {'Terminal.ConnectivityNode': 'ConnectivityNode',
+                      'Terminal.TopologicalNode': 'TopologicalNode'}
+DANGLING_LINE_ATTRIBUTES = ['name', 'pairing_key', 'paired', 'tie_line_id']
+
+# Boundary nodes by boundary set version, boundary set changes rarely so only a few versions are kept
+_boundary_nodes_cache = OrderedDict()
+_boundary_nodes_cache_size = 2
+_boundary_nodes_cache_lock = threading.Lock()
+
+
+def get_boundary_version(opdm_objects: list) -> str | None:
+    """
+    Returns version key of boundary set among input models, used to cache boundary nodes between merges
+    :param opdm_objects: input models including boundary set
+    :return: content reference of boundary set or None if not included
+    """
+    for opdm_object in opdm_objects:
+        if opdm_object.get('opde:Object-Type') == 'BDS':
+            return opdm_object.get('pmd:content-reference') or \
+                f"{opdm_object.get('pmd:fullModel_ID')}_{opdm_object.get('pmd:versionNumber')}"
+    return None
+
+
+def get_boundary_nodes(data: pd.DataFrame, boundary_version: str | None = None) -> pd.DataFrame:
+    """
+    Returns boundary points of boundary set, cached by boundary set version if given
+    :param data: triplets containing boundary set
+    :param boundary_version: version key of boundary set
+    :return: dataframe indexed by node ID with node type column
+    """
+    if boundary_version is not None:
+        with _boundary_nodes_cache_lock:
+            if boundary_version in _boundary_nodes_cache:
+                _boundary_nodes_cache.move_to_end(boundary_version)
+                logger.debug(f"Using cached boundary nodes of boundary set {boundary_version}")
+                return _boundary_nodes_cache[boundary_version]
+
+    boundary_points = data.loc[data['KEY'].isin(list(BOUNDARY_POINT_KEYS)) & (data['VALUE'] == 'true'), ['ID', 'KEY']]
+    boundary_nodes = pd.DataFrame({'node_type': boundary_points['KEY'].astype(str).map(BOUNDARY_POINT_KEYS).values},
+                                  index=pd.Index(boundary_points['ID'].astype(str).values, name='node'))
+    boundary_nodes = boundary_nodes[~boundary_nodes.index.duplicated()]
+    logger.info(f"Indexed {len(boundary_nodes.index)} boundary nodes [boundary set: {boundary_version}]")
+
+    if boundary_version is not None:
+        with _boundary_nodes_cache_lock:
+            _boundary_nodes_cache[boundary_version] = boundary_nodes
+            while len(_boundary_nodes_cache) > _boundary_nodes_cache_size:
+                _boundary_nodes_cache.popitem(last=False)
+
+    return boundary_nodes
+
+
+class BoundaryPairingIndex:
+    """
+    Index of boundary points and network elements connected to them: terminals and equivalent injections of IGMs and
+    dangling lines of merged network. Built once per merge and shared by all fixes touching boundary injections,
+    which then become joins against index tables instead of rebuilding the mapping from full triplets
+    """
+
+    def __init__(self, boundary_version: str | None = None):
+        self.boundary_version = boundary_version
+        self.boundary_nodes = None
+        self.terminals = None
+        self.injections = None
+        self.sv_voltage_count = None
+        self.dangling_lines = None
+        self._node_injections = {}
+
+    def add_models(self, data: pd.DataFrame):
+        """
+        Indexes terminals, equivalent injections and state variables of models connected to boundary points
+        :param data: input models and boundary set as triplets
+        :return: self
+        """
+        self.boundary_nodes = get_boundary_nodes(data, self.boundary_version)
+        node_ids = self.boundary_nodes.index
+
+        # Terminals connected to boundary nodes, one row per terminal and node type
+        terminal_nodes = data.loc[data['KEY'].isin(list(TERMINAL_NODE_KEYS)) & data['VALUE'].isin(node_ids),
+                                  ['ID', 'KEY', 'VALUE']].astype(str)
+        terminal_nodes = terminal_nodes.drop_duplicates(subset=['ID', 'KEY'])
+        terminal_equipment = data.loc[(data['KEY'] == 'Terminal.ConductingEquipment') & data['ID'].isin(terminal_nodes['ID']),
+                                      ['ID', 'VALUE']].astype(str).drop_duplicates(subset='ID')
+        self.terminals = pd.DataFrame({
+            'ID_Terminal': terminal_nodes['ID'].values,
+            'node': terminal_nodes['VALUE'].values,
+            'node_type': terminal_nodes['KEY'].map(TERMINAL_NODE_KEYS).values,
+        }).merge(terminal_equipment.rename(columns={'ID': 'ID_Terminal', 'VALUE': 'ConductingEquipment'}),
+                 on='ID_Terminal', how='left')
+
+        # Equivalent injections on boundary nodes and their count per node
+        injection_ids = data.loc[(data['KEY'] == 'Type') & (data['VALUE'] == 'EquivalentInjection'), 'ID'].astype(str)
+        injections = self.terminals[self.terminals['ConductingEquipment'].isin(injection_ids)]
+        injections = injections.rename(columns={'ConductingEquipment': 'ID'}).reset_index(drop=True)
+        injections['injection_count'] = injections.groupby('node')['ID'].transform('size')
+        self.injections = injections
+        self._node_injections = injections.groupby('node').indices
+
+        # Number of SvVoltages of boundary topological nodes, one per IGM using the node
+        sv_voltage_nodes = data.loc[(data['KEY'] == 'SvVoltage.TopologicalNode') & data['VALUE'].isin(node_ids), 'VALUE']
+        self.sv_voltage_count = sv_voltage_nodes.astype(str).value_counts()
+
+        logger.info(f"Indexed {len(self.terminals.index)} boundary terminals and {len(self.injections.index)} "
+                    f"boundary injections, {len(self.get_paired_injections().index)} of them paired")
+
+        return self
+
+    def add_network(self, network):
+        """
+        Indexes dangling lines of merged network by pairing key
+        :param network: pypowsybl network
+        :return: self
+        """
+        self.dangling_lines = network.get_dangling_lines(attributes=DANGLING_LINE_ATTRIBUTES)
+        return self
+
+    def get_node_injections(self, node: str) -> pd.DataFrame:
+        """Returns equivalent injections connected to given boundary node"""
+        return self.injections.iloc[self._node_injections.get(node, [])]
+
+    def is_paired(self, node: str) -> bool:
+        """Check whether boundary node has exactly two injections, i.e. models on both sides"""
+        return len(self._node_injections.get(node, [])) == 2
+
+    def get_paired_injections(self, node_type: str = 'TopologicalNode') -> pd.DataFrame:
+        """Returns injections of boundary nodes of given type which are connected to exactly two injections"""
+        injections = self.injections[self.injections['node_type'] == node_type]
+        return injections[injections['injection_count'] == 2]
+
+    def get_unpaired_injections(self, node_type: str = 'TopologicalNode') -> pd.DataFrame:
+        """Returns injections of boundary nodes of given type which are connected to single injection"""
+        injections = self.injections[self.injections['node_type'] == node_type]
+        return injections[injections['injection_count'] == 1]
+
+    def get_nodes_between_igms(self) -> pd.DataFrame:
+        """Returns boundary topological nodes which have state variables from at least two IGMs"""
+        return pd.DataFrame({'ID': self.sv_voltage_count.index[self.sv_voltage_count > 1]})
+
+    def get_paired_dangling_lines(self) -> pd.DataFrame:
+        """Returns dangling lines of merged network paired on boundary points"""
+        return self.dangling_lines[self.dangling_lines['paired'] == True]
@@ -14,9 +14,11 @@ import xml.etree.ElementTree as ET
 from emf.common.config_parser import parse_app_properties
 from emf.common.integrations import elastic
 from emf.model_merger import temporary
+from emf.model_merger.boundary_pairing import BoundaryPairingIndex, get_boundary_version
 from emf.common.helpers.time import parse_datetime
 from emf.common.helpers.loadflow import get_model_outages, get_network_elements
 from emf.common.helpers.opdm_objects import load_opdm_objects_to_triplets, filename_from_opdm_metadata
+from emf.common.helpers.compact_triplets import type_tableview
 
 
 logger = logging.getLogger(__name__)
@@ -235,7 +237,7 @@ def create_updated_ssh(models_as_triplets: pd.DataFrame | list,
         }
     ]
     # Load terminal from original data
-    terminals = models_as_triplets.type_tableview("Terminal")
+    terminals = type_tableview(models_as_triplets, "Terminal")
 
     # Update
     for update in ssh_update_map:
@@ -280,15 +282,16 @@ def create_updated_ssh(models_as_triplets: pd.DataFrame | list,
     return sv_data, ssh_data, opdm_object_meta
 
 
-def ensure_paired_equivalent_injection_compatibility(network: pypowsybl.network):
+def ensure_paired_equivalent_injection_compatibility(network: pypowsybl.network, pairing_index: BoundaryPairingIndex | None = None):
     """Where there are paired boundary points, equivalent injections need to be modified to comply
     LEVEL7 rule PairedEICompatibility
 
     Set P and Q to 0 - so that no additional consumption or production is on tie line
     """
     logger.info("Configuring paired boundary points equivalent injections: p0/q0 = 0.0")
-    dangling_lines = network.get_dangling_lines(all_attributes=True)
-    paired_dangling_lines = dangling_lines[dangling_lines['paired'] == True]
+    if pairing_index is None or pairing_index.dangling_lines is None:
+        pairing_index = BoundaryPairingIndex().add_network(network)
+    paired_dangling_lines = pairing_index.get_paired_dangling_lines()
     if paired_dangling_lines.empty:
         logger.warning(f"No paired dangling lines found in network model")
         return network
@@ -301,14 +304,18 @@ def ensure_paired_equivalent_injection_compatibility(network: pypowsybl.network)
     return network
 
 
-def ensure_paired_boundary_line_connectivity(network: pypowsybl.network):
+def ensure_paired_boundary_line_connectivity(network: pypowsybl.network, pairing_index: BoundaryPairingIndex | None = None):
     logger.info("Aligning paired boundary lines connection status")
-    dangling_lines = network.get_dangling_lines(all_attributes=True)
-    paired_dangling_lines = dangling_lines[dangling_lines['paired'] == True]
+    if pairing_index is None or pairing_index.dangling_lines is None:
+        pairing_index = BoundaryPairingIndex().add_network(network)
+    paired_dangling_lines = pairing_index.get_paired_dangling_lines()
     if paired_dangling_lines.empty:
         logger.warning(f"No paired dangling lines found in network model")
         return network
 
+    # Connection status is read from network as it can be changed by other fixes
+    paired_dangling_lines = paired_dangling_lines.join(network.get_dangling_lines(attributes=['connected']))
+
     # Identify dangling line pairs where the 'connected' status is inconsistent within each pairing_key group
     mask = paired_dangling_lines.groupby('pairing_key')['connected'].transform(lambda s: s.nunique() > 1)
     mismatched_dangling_lines = paired_dangling_lines[mask]
@@ -325,6 +332,12 @@ def ensure_paired_boundary_line_connectivity(network: pypowsybl.network):
     return network
 
 
+def get_buses_by_component(network: pypowsybl.network) -> dict:
+    """Returns count of buses in each connected component of network"""
+    buses = get_network_elements(network, pypowsybl.network.ElementType.BUS)
+    return buses.connected_component.value_counts().to_dict()
+
+
 def generate_merge_report(merged_model: object, task: dict):
     """
     Creates JSON type report of pypowsybl loadflow results
@@ -337,8 +350,11 @@ def generate_merge_report(merged_model: object, task: dict):
     """
     report = merged_model.__dict__
 
-    # Pop out pypowsybl network
+    # Pop out pypowsybl network, it may be already released and replaced by bus counts of components
     network = report.pop('network')
+    buses_by_component = report.pop('buses_by_component', None)
+    if buses_by_component is None:
+        buses_by_component = get_buses_by_component(network)
 
     # Include task data
     report.update({'@timestamp': task.get('@timestamp'),
@@ -354,10 +370,8 @@ def generate_merge_report(merged_model: object, task: dict):
                    })
 
     # Include buses count in each component
-    buses = get_network_elements(network, pypowsybl.network.ElementType.BUS)
-    buses_by_component = buses.connected_component.value_counts()
     for component in report['loadflow']:
-        component['buses'] = buses_by_component.to_dict().get(component['connected_component_num'])
+        component['buses'] = buses_by_component.get(component['connected_component_num'])
 
     # Count network components/islands
     report['component_count'] = len(report['loadflow'])
@@ -677,31 +691,31 @@ def check_net_interchanges(cgm_sv_data, cgm_ssh_data, original_models, fix_error
     :return (updated) ssh profiles
     """
     try:
-        control_areas = (original_models.type_tableview('ControlArea')
+        control_areas = (type_tableview(original_models, 'ControlArea')
                          .rename_axis('ControlArea')
                          .reset_index())[['ControlArea', 'ControlArea.netInterchange', 'ControlArea.pTolerance',
                                           'IdentifiedObject.energyIdentCodeEic', 'IdentifiedObject.name']]
     except KeyError:
-        control_areas = original_models.type_tableview('ControlArea').rename_axis('ControlArea').reset_index()
+        control_areas = type_tableview(original_models, 'ControlArea').rename_axis('ControlArea').reset_index()
         ssh_areas = cgm_ssh_data.type_tableview('ControlArea').rename_axis('ControlArea').reset_index()
         control_areas = control_areas.merge(ssh_areas, on='ControlArea')[['ControlArea', 'ControlArea.netInterchange',
                                                                           'ControlArea.pTolerance',
                                                                           'IdentifiedObject.energyIdentCodeEic',
                                                                           'IdentifiedObject.name']]
-    tie_flows = (original_models.type_tableview('TieFlow')
+    tie_flows = (type_tableview(original_models, 'TieFlow')
                  .rename_axis('TieFlow').rename(columns={'TieFlow.ControlArea': 'ControlArea',
                                                          'TieFlow.Terminal': 'Terminal'})
                  .reset_index())[['ControlArea', 'Terminal', 'TieFlow.positiveFlowIn']]
     tie_flows = tie_flows.merge(control_areas[['ControlArea']], on='ControlArea')
     try:
-        terminals = (original_models.type_tableview('Terminal')
+        terminals = (type_tableview(original_models, 'Terminal')
                      .rename_axis('Terminal').reset_index())[['Terminal', 'ACDCTerminal.connected']]
     except KeyError:
-        terminals = (original_models.type_tableview('Terminal')
+        terminals = (type_tableview(original_models, 'Terminal')
                      .rename_axis('Terminal').reset_index())[['Terminal']]
     tie_flows = tie_flows.merge(terminals, on='Terminal')
     try:
-        power_flows_pre = (original_models.type_tableview('SvPowerFlow')
+        power_flows_pre = (type_tableview(original_models, 'SvPowerFlow')
                            .rename(columns={'SvPowerFlow.Terminal': 'Terminal'})
                            .reset_index())[['Terminal', 'SvPowerFlow.p']]
         tie_flows = tie_flows.merge(power_flows_pre, on='Terminal', how='left')
@@ -750,7 +764,8 @@ def check_non_boundary_equivalent_injections(cgm_sv_data,
                                              cgm_ssh_data,
                                              original_models,
                                              threshold: float = 0,
-                                             fix_errors: bool = False):
+                                             fix_errors: bool = False,
+                                             pairing_index: BoundaryPairingIndex | None = None):
     """
     Checks equivalent injections that are not on boundary topological nodes
     :param cgm_sv_data: merged SV profile
@@ -758,15 +773,15 @@ def check_non_boundary_equivalent_injections(cgm_sv_data,
     :param original_models: igms in triplets
     :param threshold: threshold for checking
     :param fix_errors: if true then copies values from sv profile to ssh profile
+    :param pairing_index: boundary pairing index of original models
     :return cgm_ssh_data
     """
-    boundary_nodes = original_models.query('KEY == "TopologicalNode.boundaryPoint" & VALUE == "true"')[['ID']]
-    terminals = (original_models.type_tableview('Terminal').rename_axis('SvPowerFlow.Terminal').reset_index()
-                 .merge(boundary_nodes.rename(columns={'ID': 'Terminal.TopologicalNode'}),
-                        on='Terminal.TopologicalNode', how='outer', indicator=True))[['SvPowerFlow.Terminal',
-                                                                                      'Terminal.ConductingEquipment',
-                                                                                      '_merge']]
-    terminals = terminals[terminals['_merge'] == 'left_only'][['SvPowerFlow.Terminal', 'Terminal.ConductingEquipment']]
+    if pairing_index is None:
+        pairing_index = BoundaryPairingIndex().add_models(original_models)
+    boundary_terminals = pairing_index.terminals.loc[pairing_index.terminals['node_type'] == 'TopologicalNode', 'ID_Terminal']
+    terminals = type_tableview(original_models, 'Terminal').rename_axis('SvPowerFlow.Terminal').reset_index()
+    terminals = terminals[~terminals['SvPowerFlow.Terminal'].isin(boundary_terminals)][['SvPowerFlow.Terminal',
+                                                                                        'Terminal.ConductingEquipment']]
     return check_all_kind_of_injections(cgm_sv_data=cgm_sv_data,
                                         cgm_ssh_data=cgm_ssh_data,
                                         original_models=original_models,
@@ -804,7 +819,7 @@ def check_all_kind_of_injections(cgm_sv_data,
 
     fixed_fields = ['ID']
     try:
-        original_injections = original_models.type_tableview(injection_name).reset_index()
+        original_injections = type_tableview(original_models, injection_name).reset_index()
         injections = cgm_ssh_data.type_tableview(injection_name).reset_index()
     except AttributeError:
         logger.info(f"SSH profile doesn't contain data about {injection_name}")
@@ -817,7 +832,7 @@ def check_all_kind_of_injections(cgm_sv_data,
         return cgm_ssh_data
     injections_reduced = injections_reduced.merge(original_injections_reduced, on='ID', suffixes=('', '_org'))
     if terminals is None:
-        terminals = (original_models.type_tableview('Terminal')
+        terminals = (type_tableview(original_models, 'Terminal')
                      .rename_axis('SvPowerFlow.Terminal')
                      .reset_index())[['SvPowerFlow.Terminal', 'Terminal.ConductingEquipment']]
     flows = (cgm_sv_data.type_tableview('SvPowerFlow')
@@ -856,10 +871,18 @@ def run_post_merge_processing(input_models: list,
                               opdm_object_meta: dict,
                               enable_temp_fixes: bool,
                               task_properties: dict = None,
+                              pairing_index: BoundaryPairingIndex | None = None,
                               ):
 
-    # Load original input models to triplets
-    input_models_triplets = load_opdm_objects_to_triplets(opdm_objects=input_models)
+    # Load original input models to triplets, optionally compact. Original models are only read by fixes below,
+    # their table views are taken with compact aware type_tableview
+    input_models_triplets = load_opdm_objects_to_triplets(opdm_objects=input_models,
+                                                          compact=json.loads(str(COMPACT_TRIPLETS).lower()))
+
+    # Index boundary points of input models once, shared by all fixes of boundary injections
+    if pairing_index is None:
+        pairing_index = BoundaryPairingIndex(boundary_version=get_boundary_version(input_models))
+    pairing_index.add_models(input_models_triplets)
 
     # Apply corrections to SV profile
     sv_data = update_merged_model_sv(sv_data=exported_model, opdm_object_meta=opdm_object_meta)
@@ -880,11 +903,13 @@ def run_post_merge_processing(input_models: list,
         sv_data = temporary.remove_equivalent_shunt_section(sv_data, input_models_triplets)
         sv_data = temporary.add_missing_sv_tap_steps(sv_data, ssh_data)
         sv_data = temporary.remove_small_islands(sv_data, int(SMALL_ISLAND_SIZE))
-        sv_data = temporary.remove_duplicate_sv_voltages(cgm_sv_data=sv_data, original_data=input_models_triplets)
+        sv_data = temporary.remove_duplicate_sv_voltages(cgm_sv_data=sv_data, original_data=input_models_triplets,
+                                                         pairing_index=pairing_index)
         sv_data = temporary.check_and_fix_dependencies(cgm_sv_data=sv_data, cgm_ssh_data=ssh_data, original_data=input_models_triplets)
         # TODO following SSH profile fix should be removed once pypowsybl SSH export will be used
         ssh_data = temporary.set_paired_boundary_injections_to_zero(original_models=input_models_triplets,
-                                                                    cgm_ssh_data=ssh_data)
+                                                                    cgm_ssh_data=ssh_data,
+                                                                    pairing_index=pairing_index)
 
     # Run injections check and apply modification if defined in configuration
     injection_threshold = float(INJECTION_THRESHOLD)
@@ -909,7 +934,8 @@ def run_post_merge_processing(input_models: list,
                                                         cgm_ssh_data=ssh_data,
                                                         original_models=input_models_triplets,
                                                         threshold=injection_threshold,
-                                                        fix_errors=fix_injection_errors)
+                                                        fix_errors=fix_injection_errors,
+                                                        pairing_index=pairing_index)
 
     try:
         ssh_data = check_net_interchanges(cgm_sv_data=sv_data,
@@ -1,49 +1,41 @@
 import logging
+import pika
 import pypowsybl
 import config
 import json
 import time
+import copy
 from uuid import uuid4
 import datetime
 from dataclasses import dataclass, field
 from typing import List
 from emf.common.helpers.time import parse_datetime
-from io import BytesIO
-from zipfile import ZipFile
 from emf.common.config_parser import parse_app_properties
 from emf.common.integrations import opdm, minio_api, elastic, edx
 from emf.common.integrations.object_storage.models import get_latest_boundary, get_latest_models_and_download
 from emf.common.integrations.object_storage.schedules import query_acnp_schedules, query_hvdc_schedules, calculate_ac_net_position
-from emf.common.loadflow_tool import loadflow_settings, settings_manager
+from emf.common.loadflow_tool import loadflow_settings, settings_manager, warm_start
 from emf.common.helpers.utils import attr_to_dict, convert_dict_str_to_bool
 from emf.common.helpers.cgmes import export_to_cgmes_zip
-from emf.common.helpers.opdm_objects import get_opdm_component_data_bytes
-from emf.common.helpers.loadflow import load_network_model
+from emf.common.helpers.opdm_objects import get_opdm_objects_size_mb, release_opdm_objects_data
+from emf.common.helpers.memory import release_memory
+from emf.common.helpers.archive import ArchiveStream
+from emf.common.helpers.tracing import Tracer
+from emf.common.helpers.loadflow import load_network_model, get_topology_fingerprint
 from emf.common.helpers.tasks import update_task_status
 from emf.model_merger import merge_functions
 from emf.model_merger import scaler
 from emf.model_merger.merge_functions import filter_models_by_acnp
 from emf.model_merger.replacement import run_replacement, get_tsos_available_in_storage
 from emf.model_merger.temporary import handle_igm_ssh_vs_cgm_ssh_error
+from emf.model_merger.boundary_pairing import BoundaryPairingIndex, get_boundary_version
 from emf.common.logging.custom_logger import get_elk_logging_handler
-from concurrent.futures import ThreadPoolExecutor
-from lxml import etree
 
 logger = logging.getLogger(__name__)
 parse_app_properties(caller_globals=globals(), path=config.paths.cgm_worker.merger)
-executor = ThreadPoolExecutor(max_workers=20)
-
-
-def async_call(function, callback=None, *args, **kwargs):
-    future = executor.submit(function, *args, **kwargs)
-    if callback:
-        future.add_done_callback(lambda f: callback(f.result()))
-    return future
-
-
-def log_opdm_response(response):
-    logger.debug(etree.tostring(response, pretty_print=True).decode())
 
+# Input profiles included in merged model package
+PACKAGED_INPUT_PROFILES = ['EQ', 'TP', 'EQBD', 'TPBD', 'EQ_BD', 'TP_BD']
 
 @dataclass
 class MergedModel:
@@ -65,11 +57,13 @@ class MergedModel:
     excluded: List = field(default_factory=list)
     scaled_entity: List = field(default_factory=list)
     scaled_hvdc: List = field(default_factory=list)
+    scaled_iterations: List = field(default_factory=list)
     replaced_entity: List = field(default_factory=list)
     replacement_reason: List = field(default_factory=list)
     outages_updated: List = field(default_factory=list)
     outages_unmapped: List = field(default_factory=list)
     merge_included_entity: List = field(default_factory=list)
+    opdm_publication: List = field(default_factory=list)
 
 
 @dataclass(init=False)
@@ -102,7 +96,17 @@ class HandlerMergeModels:
     def __init__(self):
         self.minio_service = minio_api.ObjectStorage()
         self.elk_logging_handler = get_elk_logging_handler()
-        self.opdm_service = None
+        self.publication_manager = opdm.PublicationManager()
+
+    @staticmethod
+    def release_intermediate(label: str):
+        """Returns memory of dropped intermediate data to operating system if configured"""
+        if json.loads(RELEASE_INTERMEDIATES.lower()):
+            release_memory(label)
+
+    def cleanup(self):
+        """Resets per-message state, called between messages by warm worker"""
+        self.elk_logging_handler.stop_trace()
 
     @staticmethod
     def run_loadflow(merged_model):
@@ -115,19 +119,31 @@ class HandlerMergeModels:
         else:
             settings_list = [MERGE_LOAD_FLOW_SETTINGS]
 
+        # Start from voltages of previously solved model of the same topology, e.g. previous hour
+        topology_fingerprint = None
+        start_from_snapshot = False
+        if json.loads(WARM_START_LOADFLOW.lower()):
+            topology_fingerprint = get_topology_fingerprint(merged_model.network)
+            start_from_snapshot = warm_start.restore_voltage_snapshot(merged_model.network, fingerprint=topology_fingerprint)
+
         for lf_settings in settings_list:
             logger.info(f"Solving loadflow with settings: {lf_settings}")
             # report = pypowsybl.report.Reporter()
             manager = settings_manager.LoadflowSettingsManager(settings_keyword=lf_settings)
             pp_loadflow_parameters = manager.build_pypowsybl_parameters()
-            result = pypowsybl.loadflow.run_ac(network=merged_model.network,
-                                               parameters=pp_loadflow_parameters,
-                                               # reporter=loadflow_report,
-                                               )
+            result = warm_start.run_ac(network=merged_model.network,
+                                       parameters=pp_loadflow_parameters,
+                                       warm_start=start_from_snapshot,
+                                       # reporter=loadflow_report,
+                                       )
             if result[0].status_text == 'Converged':
                 break
             else:
                 logger.warning(f"Failed to solve loadflow with settings: {lf_settings}")
+                start_from_snapshot = False  # next settings are started from configured initialization
+
+        if topology_fingerprint and result[0].status_text == 'Converged':
+            warm_start.store_voltage_snapshot(merged_model.network, fingerprint=topology_fingerprint)
 
         result_dict = [attr_to_dict(island) for island in result]
         # Modify all nested objects to native data types
@@ -150,13 +166,75 @@ class HandlerMergeModels:
 
         return merged_model, pp_loadflow_parameters
 
+    @staticmethod
+    def publish_merged_model(body: str, headers: dict, channel=None):
+        """
+        Publishes merged model message to output exchange, same as consumer forwards handler result
+        :param body: merged model OPDM object serialized to json
+        :param headers: message headers of merged model
+        :param channel: channel of consumer if available, otherwise separate connection is used
+        """
+        logger.info(f"Publishing merged model to exchange: {OUTPUT_RMQ_EXCHANGE}")
+        if channel is not None:
+            channel.basic_publish(exchange=OUTPUT_RMQ_EXCHANGE, routing_key="", body=body,
+                                  properties=pika.BasicProperties(headers=headers))
+        else:
+            from emf.common.integrations import rabbit  # connection settings are needed only in batch mode
+            rabbit.BlockingClient().publish(payload=body, exchange_name=OUTPUT_RMQ_EXCHANGE, headers=headers)
+
+    def handle_batch(self, task: dict, properties: dict, **kwargs):
+        """
+        Merges multiple scenario timestamps of one task, e.g. all hours of a business day, one after another.
+        Each timestamp is merged by regular merge process, including network import. Static profiles (EQ, TP and
+        boundary) are downloaded once and shared between timestamps by the worker profile cache. Every merged model
+        is sent as separate message of same shape as from single timestamp task: all but last one are published here,
+        the last one is returned to be forwarded by consumer
+        :param task: task with list of timestamps in task_properties.timestamp_utc
+        :param properties: message properties
+        :return: last merged model OPDM object serialized to json and its message properties
+        """
+        task_properties = task['task_properties']
+        timestamps = task_properties['timestamp_utc']
+        schedule_starts = task_properties.get('reference_schedule_start_utc')
+        if not isinstance(schedule_starts, list):
+            # Single schedule reference can not be valid for all timestamps, default to each scenario timestamp
+            schedule_starts = [None] * len(timestamps)
+        logger.info(f"Running batch merge for {len(timestamps)} timestamps: {timestamps}")
+
+        merged_count = 0
+        last_merged_model = None
+        # Each timestamp starts from inbound message headers, as single timestamp task does
+        inbound_headers = dict(properties.headers or {})
+        for timestamp, schedule_start in zip(timestamps, schedule_starts):
+            timestamp_task = copy.deepcopy(task)
+            timestamp_task['task_properties']['timestamp_utc'] = timestamp
+            timestamp_task['task_properties']['reference_schedule_start_utc'] = schedule_start
+            properties.headers = dict(inbound_headers)
+            try:
+                merged_model_meta, properties = self.handle(task_object=timestamp_task, properties=properties, **kwargs)
+            except Exception as error:
+                logger.error(f"Batch merge failed for timestamp {timestamp}: {error}", exc_info=True)
+                continue
+            if properties.headers.get('success', True):
+                # Previous merged model is published once it is known not to be the last one
+                if last_merged_model:
+                    self.publish_merged_model(*last_merged_model, channel=kwargs.get('channel'))
+                last_merged_model = (merged_model_meta, dict(properties.headers))
+                merged_count += 1
+
+        logger.info(f"Batch merge finished with {merged_count}/{len(timestamps)} merged models")
+        if not last_merged_model:
+            properties.headers = {**inbound_headers, 'success': False}
+            return json.dumps(None), properties
+
+        merged_model_meta, properties.headers = last_merged_model
+
+        return merged_model_meta, properties
+
     def handle(self, task_object: dict, properties: dict, **kwargs):
 
         start_time = datetime.datetime.now(datetime.UTC)
 
-        # Create instance of merged model
-        merged_model = MergedModel()
-
         # Parse relevant data from Task
         task = task_object
         if not isinstance(task, dict):
@@ -165,6 +243,10 @@ class HandlerMergeModels:
         # Convert task fields to bool where necessary
         task = convert_dict_str_to_bool(task)
 
+        # Task with list of scenario timestamps is merged in batch mode
+        if isinstance(task.get('task_properties', {}).get('timestamp_utc'), list):
+            return self.handle_batch(task=task, properties=properties, **kwargs)
+
         # TODO - make it to a wrapper once it is settled/standardized how this info is exchanged
         # Initialize trace
         self.elk_logging_handler.start_trace(task)
@@ -173,6 +255,23 @@ class HandlerMergeModels:
         # Set task to started
         update_task_status(task, "started")
 
+        # Trace merge stages, tracer is removed from context also when merge fails
+        with Tracer(name=f"merge-{task.get('@id', uuid4())}") as tracer:
+            return self.run_merge(task=task, task_object=task_object, properties=properties, tracer=tracer, start_time=start_time)
+
+    def run_merge(self, task: dict, task_object: dict, properties: dict, tracer: Tracer, start_time: datetime.datetime):
+        """
+        Runs merge of single scenario timestamp task
+        :param task: parsed task
+        :param task_object: task as received in message, returned when there is nothing to merge
+        :param properties: message properties
+        :param tracer: active tracer of merge stages
+        :param start_time: start time of task handling
+        :return: merged model OPDM object serialized to json and message properties
+        """
+        # Create instance of merged model
+        merged_model = MergedModel()
+
         # Task configuration
         task_creation_time = task.get('task_creation_time')
         task_properties = task.get('task_properties', {})
@@ -205,16 +304,20 @@ class HandlerMergeModels:
         if not schedule_start:
             schedule_start = scenario_datetime
 
-        ac_schedules = query_acnp_schedules(time_horizon=schedule_time_horizon, scenario_timestamp=schedule_start)
-        dc_schedules = query_hvdc_schedules(time_horizon=schedule_time_horizon, scenario_timestamp=schedule_start)
-        acnp_dict = calculate_ac_net_position(ac_schedules)
+        with tracer.span("schedule_queries"):
+            ac_schedules = query_acnp_schedules(time_horizon=schedule_time_horizon, scenario_timestamp=schedule_start)
+            dc_schedules = query_hvdc_schedules(time_horizon=schedule_time_horizon, scenario_timestamp=schedule_start)
+            acnp_dict = calculate_ac_net_position(ac_schedules)
 
         # Collect valid models from ObjectStorage
-        downloaded_models = get_latest_models_and_download(time_horizon=time_horizon,
-                                                           scenario_date=scenario_datetime,
-                                                           valid=True,
-                                                           data_source='OPDM')
-        latest_boundary = get_latest_boundary()
+        with tracer.span("download_models") as span:
+            downloaded_models = get_latest_models_and_download(time_horizon=time_horizon,
+                                                               scenario_date=scenario_datetime,
+                                                               valid=True,
+                                                               data_source='OPDM')
+            latest_boundary = get_latest_boundary()
+            span.attributes['models'] = len(downloaded_models)
+            span.attributes['size_mb'] = get_opdm_objects_size_mb(downloaded_models + [latest_boundary])
 
         # Filter out models that are not to be used in merge
         models = merge_functions.filter_models(models=downloaded_models,
@@ -225,48 +328,49 @@ class HandlerMergeModels:
         merged_model.merge_included_entity = [ModelEntity(data_source='OPDM', quality_indicator='Valid', **model).__dict__ for model in models]
 
         # Get additional models from ObjectStorage if local import is configured
-        if local_import_models:
-            additional_models = get_latest_models_and_download(time_horizon=time_horizon,
-                                                               scenario_date=scenario_datetime,
-                                                               valid=True,
-                                                               data_source='PDN')
-            additional_models = merge_functions.filter_models(models=additional_models,
-                                                              included_models=local_import_models,
-                                                              filter_on='pmd:TSO')
-            merged_model.merge_included_entity.extend(
-                [ModelEntity(data_source='PDN', quality_indicator='Valid', **model).__dict__ for model in additional_models])
-
-            missing_local_import = [tso for tso in local_import_models if
-                                    tso not in [model['pmd:TSO'] for model in additional_models]]
-            merged_model.excluded.extend([{'tso': tso, 'reason': 'missing-pdn'} for tso in missing_local_import])
-
-            # Exclude models that are outside scheduled AC net position deadband
-            if acnp_dict:
-                additional_models = filter_models_by_acnp(additional_models, merged_model, acnp_dict, ACNP_THRESHOLD, CONFORM_LOAD_FACTOR)
-                missing_local_import = [tso for tso in local_import_models if tso not in [model['pmd:TSO'] for model in additional_models]]
-
-            # Perform local replacement if configured
-            if model_replacement and missing_local_import:
-                try:
-                    logger.info(f"Running replacement for local storage missing models: {missing_local_import}")
-                    replacement_models_local = run_replacement(tso_list=missing_local_import,
-                                                               time_horizon=time_horizon,
-                                                               scenario_date=scenario_datetime,
-                                                               data_source='PDN',
-                                                               acnp_dict=acnp_dict,
-                                                               acnp_threshold=ACNP_THRESHOLD,
-                                                               conform_load_factor=CONFORM_LOAD_FACTOR)
-
-                    logger.info(
-                        f"Local storage replacement model(s) found: {[model['pmd:fileName'] for model in replacement_models_local]}")
-                    replaced_entities_local = [ModelEntity(data_source='PDN', quality_indicator='Substituted', **model).__dict__ for model in
-                                               replacement_models_local]
-                    merged_model.replaced_entity.extend(replaced_entities_local)
-                    additional_models.extend(replacement_models_local)
-                except Exception as error:
-                    logger.error(f"Failed to run replacement: {error} {error.with_traceback()}")
-        else:
-            additional_models = []
+        with tracer.span("local_import"):
+            if local_import_models:
+                additional_models = get_latest_models_and_download(time_horizon=time_horizon,
+                                                                   scenario_date=scenario_datetime,
+                                                                   valid=True,
+                                                                   data_source='PDN')
+                additional_models = merge_functions.filter_models(models=additional_models,
+                                                                  included_models=local_import_models,
+                                                                  filter_on='pmd:TSO')
+                merged_model.merge_included_entity.extend(
+                    [ModelEntity(data_source='PDN', quality_indicator='Valid', **model).__dict__ for model in additional_models])
+
+                missing_local_import = [tso for tso in local_import_models if
+                                        tso not in [model['pmd:TSO'] for model in additional_models]]
+                merged_model.excluded.extend([{'tso': tso, 'reason': 'missing-pdn'} for tso in missing_local_import])
+
+                # Exclude models that are outside scheduled AC net position deadband
+                if acnp_dict:
+                    additional_models = filter_models_by_acnp(additional_models, merged_model, acnp_dict, ACNP_THRESHOLD, CONFORM_LOAD_FACTOR)
+                    missing_local_import = [tso for tso in local_import_models if tso not in [model['pmd:TSO'] for model in additional_models]]
+
+                # Perform local replacement if configured
+                if model_replacement and missing_local_import:
+                    try:
+                        logger.info(f"Running replacement for local storage missing models: {missing_local_import}")
+                        replacement_models_local = run_replacement(tso_list=missing_local_import,
+                                                                   time_horizon=time_horizon,
+                                                                   scenario_date=scenario_datetime,
+                                                                   data_source='PDN',
+                                                                   acnp_dict=acnp_dict,
+                                                                   acnp_threshold=ACNP_THRESHOLD,
+                                                                   conform_load_factor=CONFORM_LOAD_FACTOR)
+
+                        logger.info(
+                            f"Local storage replacement model(s) found: {[model['pmd:fileName'] for model in replacement_models_local]}")
+                        replaced_entities_local = [ModelEntity(data_source='PDN', quality_indicator='Substituted', **model).__dict__ for model in
+                                                   replacement_models_local]
+                        merged_model.replaced_entity.extend(replaced_entities_local)
+                        additional_models.extend(replacement_models_local)
+                    except Exception as error:
+                        logger.error(f"Failed to run replacement: {error} {error.with_traceback()}")
+            else:
+                additional_models = []
 
         # Check missing models for replacement
         if included_models:
@@ -295,28 +399,29 @@ class HandlerMergeModels:
                 missing_models = missing_models + excluded_incorrect
 
         # Run replacement on missing models
-        if model_replacement and missing_models:
-            try:
-                logger.info(f"Running replacement for missing models: {missing_models}")
-                replacement_models = run_replacement(missing_models,
-                                                     time_horizon,
-                                                     scenario_datetime,
-                                                     acnp_dict=acnp_dict,
-                                                     acnp_threshold=ACNP_THRESHOLD,
-                                                     conform_load_factor=CONFORM_LOAD_FACTOR)
-                if replacement_models:
-                    logger.info(
-                        f"Replacement model(s) found: {[model['pmd:fileName'] for model in replacement_models]}")
-                    replaced_entities = [ModelEntity(data_source='OPDM', quality_indicator='Substituted', **model).__dict__ for model in
-                                         replacement_models]
-                    merged_model.replaced_entity.extend(replaced_entities)
-                    models.extend(replacement_models)
-                    merged_model.replaced = True
-                else:
+        with tracer.span("replacement"):
+            if model_replacement and missing_models:
+                try:
+                    logger.info(f"Running replacement for missing models: {missing_models}")
+                    replacement_models = run_replacement(missing_models,
+                                                         time_horizon,
+                                                         scenario_datetime,
+                                                         acnp_dict=acnp_dict,
+                                                         acnp_threshold=ACNP_THRESHOLD,
+                                                         conform_load_factor=CONFORM_LOAD_FACTOR)
+                    if replacement_models:
+                        logger.info(
+                            f"Replacement model(s) found: {[model['pmd:fileName'] for model in replacement_models]}")
+                        replaced_entities = [ModelEntity(data_source='OPDM', quality_indicator='Substituted', **model).__dict__ for model in
+                                             replacement_models]
+                        merged_model.replaced_entity.extend(replaced_entities)
+                        models.extend(replacement_models)
+                        merged_model.replaced = True
+                    else:
+                        merged_model.replaced = False
+                except Exception as error:
+                    logger.error(f"Failed to run replacement: {error}")
                     merged_model.replaced = False
-            except Exception as error:
-                logger.error(f"Failed to run replacement: {error}")
-                merged_model.replaced = False
 
         # Store models together with boundary set and check whether there are enough models to merge
         input_models = models + additional_models + [latest_boundary]
@@ -327,9 +432,11 @@ class HandlerMergeModels:
 
         # Load network model and merge
         merge_start = datetime.datetime.now(datetime.UTC)
-        merged_model.network = load_network_model(opdm_objects=input_models)
-        merged_model.network_meta = attr_to_dict(instance=merged_model.network, sanitize_to_strings=True)
-        merged_model.included = [model['pmd:TSO'] for model in input_models if model.get('pmd:TSO', None)]
+        with tracer.span("import", input_size_mb=get_opdm_objects_size_mb(input_models)):
+            merged_model.network = load_network_model(opdm_objects=input_models)
+            merged_model.network_meta = attr_to_dict(instance=merged_model.network, sanitize_to_strings=True)
+            merged_model.included = [model['pmd:TSO'] for model in input_models if model.get('pmd:TSO', None)]
+        self.release_intermediate("network import buffer")
 
         # Crosscheck replaced model outages with latest UAP if at least one Baltic model was replaced
         replaced_tso_list = [entity['tso'] for entity in merged_model.replaced_entity]
@@ -349,39 +456,47 @@ class HandlerMergeModels:
         #                                                         time_horizon=time_horizon)
 
         # Various corrections from igmsshvscgmssh error
-        if json.loads(REMOVE_GENERATORS_FROM_SLACK_DISTRIBUTION.lower()):
-            merged_model.network = handle_igm_ssh_vs_cgm_ssh_error(network_pre_instance=merged_model.network)
+        with tracer.span("pre_loadflow_fixes"):
+            if json.loads(REMOVE_GENERATORS_FROM_SLACK_DISTRIBUTION.lower()):
+                merged_model.network = handle_igm_ssh_vs_cgm_ssh_error(network_pre_instance=merged_model.network)
+
+            # Index boundary points once, shared by network fixes and post-processing of boundary injections
+            pairing_index = BoundaryPairingIndex(boundary_version=get_boundary_version(input_models))
+            pairing_index.add_network(merged_model.network)
 
-        # Ensure boundary point EquivalentInjection are set to zero for paired tie lines
-        merged_model.network = merge_functions.ensure_paired_equivalent_injection_compatibility(
-            network=merged_model.network)
+            # Ensure boundary point EquivalentInjection are set to zero for paired tie lines
+            merged_model.network = merge_functions.ensure_paired_equivalent_injection_compatibility(
+                network=merged_model.network, pairing_index=pairing_index)
 
-        # Ensure boundary line connectivity consistency for paired boundary lines
-        merged_model.network = merge_functions.ensure_paired_boundary_line_connectivity(network=merged_model.network)
+            # Ensure boundary line connectivity consistency for paired boundary lines
+            merged_model.network = merge_functions.ensure_paired_boundary_line_connectivity(network=merged_model.network,
+                                                                                            pairing_index=pairing_index)
 
         # TODO - run other LF if default fails
         # Run loadflow on merged model
-        merged_model, pp_loadflow_parameters = self.run_loadflow(merged_model=merged_model)
-        logger.info(
-            f"Loadflow status of main island: {merged_model.loadflow_status} [settings: {merged_model.loadflow_settings}]")
+        with tracer.span("loadflow"):
+            merged_model, pp_loadflow_parameters = self.run_loadflow(merged_model=merged_model)
+            logger.info(
+                f"Loadflow status of main island: {merged_model.loadflow_status} [settings: {merged_model.loadflow_settings}]")
 
         # Perform scaling
-        if model_scaling:
-
-            # Scale balance if all schedules were received
-            if all([ac_schedules, dc_schedules]):
-                try:
-                    merged_model = scaler.scale_balance(model=merged_model,
-                                                        ac_schedules=ac_schedules,
-                                                        dc_schedules=dc_schedules,
-                                                        lf_settings=pp_loadflow_parameters)
-                except Exception as e:
-                    logger.error(e)
+        with tracer.span("scaling"):
+            if model_scaling:
+
+                # Scale balance if all schedules were received
+                if all([ac_schedules, dc_schedules]):
+                    try:
+                        merged_model = scaler.scale_balance(model=merged_model,
+                                                            ac_schedules=ac_schedules,
+                                                            dc_schedules=dc_schedules,
+                                                            lf_settings=pp_loadflow_parameters)
+                    except Exception as e:
+                        logger.error(e)
+                        merged_model.scaled = False
+                else:
+                    logger.warning(f"Schedule reference data not available: {schedule_time_horizon} for {schedule_start}")
+                    logger.warning(f"Network model schedule scaling not performed")
                     merged_model.scaled = False
-            else:
-                logger.warning(f"Schedule reference data not available: {schedule_time_horizon} for {schedule_start}")
-                logger.warning(f"Network model schedule scaling not performed")
-                merged_model.scaled = False
 
         # Record main merging process end
         merge_end = datetime.datetime.now(datetime.UTC)
@@ -408,84 +523,101 @@ class HandlerMergeModels:
         )
         # Export merged model
         # TODO change here to export SSH profiles as well
-        exported_model = merge_functions.export_merged_model(network=merged_model.network,
-                                                             opdm_object_meta=opdm_object_meta,
-                                                             profiles=["SV"],
-                                                             cgm_convention=False)
+        with tracer.span("export"):
+            exported_model = merge_functions.export_merged_model(network=merged_model.network,
+                                                                 opdm_object_meta=opdm_object_meta,
+                                                                 profiles=["SV"],
+                                                                 cgm_convention=False)
+
+            # Network is not used after export, keep only bus counts for merge report and release it
+            if json.loads(RELEASE_INTERMEDIATES.lower()):
+                merged_model.buses_by_component = merge_functions.get_buses_by_component(merged_model.network)
+                merged_model.network = None
+                self.release_intermediate("merged network")
 
         # Run post-processing
         post_p_start = datetime.datetime.now(datetime.UTC)
         logger.info(f"Starting merged model post-processing")
         # TODO here should be one existing network structure. IIDM model can be exported and removed to release memory
-        sv_data, ssh_data, opdm_object_meta = merge_functions.run_post_merge_processing(input_models=input_models,
-                                                                                        exported_model=exported_model,
-                                                                                        opdm_object_meta=opdm_object_meta,
-                                                                                        enable_temp_fixes=post_temp_fixes,
-                                                                                        task_properties=task_properties
-                                                                                        )
+        with tracer.span("post_processing"):
+            sv_data, ssh_data, opdm_object_meta = merge_functions.run_post_merge_processing(input_models=input_models,
+                                                                                            exported_model=exported_model,
+                                                                                            opdm_object_meta=opdm_object_meta,
+                                                                                            enable_temp_fixes=post_temp_fixes,
+                                                                                            task_properties=task_properties,
+                                                                                            pairing_index=pairing_index,
+                                                                                            )
+
+        # Exported model and input profiles, except the ones packaged with merged model, are not used anymore
+        del exported_model
+        if json.loads(RELEASE_INTERMEDIATES.lower()):
+            release_opdm_objects_data(opdm_objects=input_models, keep_profiles=PACKAGED_INPUT_PROFILES)
+        self.release_intermediate("post-processing data")
 
         # for merge report need to get the final uuid.
         merged_model.network_meta['fullModel_ID'] = opdm_object_meta['pmd:fullModel_ID']
         # Package both input models and exported CGM profiles to in memory zip files
-        serialized_data = export_to_cgmes_zip([ssh_data, sv_data])
+        with tracer.span("serialization"):
+            serialized_data = export_to_cgmes_zip([ssh_data, sv_data])
+            del ssh_data, sv_data
         post_p_end = datetime.datetime.now(datetime.UTC)
         logger.debug(f"Post processing took: {(post_p_end - post_p_start).total_seconds()} seconds")
         logger.debug(f"Merging took: {(merge_end - merge_start).total_seconds()} seconds")
 
         # Upload to OPDM 
-        if model_upload_to_opdm:
-            if merged_model.loadflow[0]['status'] == 'CONVERGED' and merged_model.scaled:  # Only upload if the model LF is solved and scaled = true
+        with tracer.span("opdm_upload"):
+            if model_upload_to_opdm:
+                if SEND_TYPE not in opdm.PUBLICATION_SEND_TYPES:
+                    logger.info(f"Model not uploaded to OPDM, publication disabled by send type: '{SEND_TYPE}'")
+                elif merged_model.loadflow[0]['status'] == 'CONVERGED' and merged_model.scaled:  # Only upload if the model LF is solved and scaled = true
+                    try:
+                        # Publication runs in background, result is collected before reporting
+                        self.publication_manager.publish(file_objects=serialized_data,
+                                                         send_type=SEND_TYPE,
+                                                         reference=merged_model.name)
+                    except Exception as error:
+                        logging.error(f"Unexpected error on uploading to OPDM: {error}", exc_info=True)
+                else:
+                    logger.info(f"Model not uploaded to OPDM due to convergence or failed scaling issues")
+
+        # Upload merged model package to Minio storage, package is built while it is being uploaded
+        with tracer.span("minio_upload") as span:
+            if model_upload_to_minio:
+                # CGM profiles are the same buffers as published to OPDM, input components are stored as they are
+                entries = [(item.name, item.getbuffer()) for item in serialized_data]
+                entries.extend((instance['opdm:Profile']['pmd:fileName'], instance['opdm:Profile']['DATA'])
+                               for input_model in input_models for instance in input_model['opde:Component']
+                               if instance['opdm:Profile']['pmd:cgmesProfile'] in PACKAGED_INPUT_PROFILES)
+                merged_model_object = ArchiveStream(name=f"{OUTPUT_MINIO_FOLDER}/{merged_model.name}.zip", entries=entries)
+                logger.info(f"Uploading merged model to MINIO: {merged_model_object.name}")
+                minio_metadata = merge_functions.evaluate_trustability(merged_model.__dict__, task['task_properties'])
                 try:
-                    self.opdm_service = opdm.OPDM()
-
-                    if SEND_TYPE == 'SOAP':
-                        for item in serialized_data:
-                            logger.info(f"Uploading to OPDM: {item.name}")
-                            #time.sleep(1) tested before with 2 and 4. Currently removing as FS gonna be default. 
-                            async_call(function=self.opdm_service.publication_request,
-                                    callback=log_opdm_response,
-                                    file_path_or_file_object=item)
-                    elif SEND_TYPE == 'FS':
-                        for item in serialized_data:
-                            logger.info(f"Uploading to OPDM: {item.name}")
-                            self.opdm_service.put_file(file_id=item.name,
-                                          file_content=item)
-
-                    merged_model.uploaded_to_opde = True
+                    response = self.minio_service.upload_object(file_path_or_file_object=merged_model_object,
+                                                                bucket_name=OUTPUT_MINIO_BUCKET,
+                                                                metadata=minio_metadata,
+                                                                )
+                    if response:
+                        merged_model.uploaded_to_minio = True
                 except Exception as error:
-                    logging.error(f"Unexpected error on uploading to OPDM: {error}", exc_info=True)
-            else:
-                logger.info(f"Model not uploaded to OPDM due to convergence or failed scaling issues")
-
-        # Create zipped model data
-        merged_model_object = BytesIO()
-        with ZipFile(merged_model_object, "w") as merged_model_zip:
-            # Include CGM model files
-            for item in serialized_data:
-                merged_model_zip.writestr(item.name, item.getvalue())
-
-            # Include original IGM files
-            for input_model in input_models:
-                for instance in input_model['opde:Component']:
-                    if instance['opdm:Profile']['pmd:cgmesProfile'] in ['EQ', 'TP', 'EQBD', 'TPBD', 'EQ_BD', 'TP_BD']:
-                        file_object = get_opdm_component_data_bytes(opdm_component=instance)
-                        logging.info(f"Adding file: {file_object.name}")
-                        merged_model_zip.writestr(file_object.name, file_object.getvalue())
-        merged_model_object.name = f"{OUTPUT_MINIO_FOLDER}/{merged_model.name}.zip"
-
-        # Upload to Minio storage
-        if model_upload_to_minio:
-            logger.info(f"Uploading merged model to MINIO: {merged_model_object.name}")
-            minio_metadata = merge_functions.evaluate_trustability(merged_model.__dict__, task['task_properties'])
-            try:
-                response = self.minio_service.upload_object(file_path_or_file_object=merged_model_object,
-                                                            bucket_name=OUTPUT_MINIO_BUCKET,
-                                                            metadata=minio_metadata,
-                                                            )
-                if response:
-                    merged_model.uploaded_to_minio = True
-            except Exception as error:
-                logging.error(f"Unexpected error on uploading to Object Storage: {error}", exc_info=True)
+                    logging.error(f"Unexpected error on uploading to Object Storage: {error}", exc_info=True)
+                finally:
+                    merged_model_object.close()
+                    del entries
+                span.attributes['size_mb'] = round(merged_model_object.size / 1024 ** 2, 2)
+
+        # Serialized profiles and input models content are packaged and not used anymore
+        del serialized_data
+        if json.loads(RELEASE_INTERMEDIATES.lower()):
+            release_opdm_objects_data(opdm_objects=input_models)
+        self.release_intermediate("packaged input data")
+
+        # Wait for OPDM publication to finish and record its result
+        with tracer.span("opdm_upload_wait"):
+            publication_results = self.publication_manager.wait(reference=merged_model.name,
+                                                                timeout=float(OPDM_PUBLICATION_TIMEOUT))
+            if publication_results:
+                merged_model.opdm_publication = publication_results
+                merged_model.uploaded_to_opde = all(result['success'] for result in publication_results)
 
         logger.info(f"Merged model creation done for: {merged_model.name}")
 
@@ -505,40 +637,50 @@ class HandlerMergeModels:
         merged_model.content_reference = merged_model_object.name
 
         # Update OPDM object data with CGM relevant data and send to Elastic
-        opdm_object_meta['pmd:content-reference'] = merged_model.content_reference
-        response = elastic.Elastic.send_to_elastic(index=OPDE_MODELS_ELK_INDEX, json_message=opdm_object_meta)
-
-        # Send merge report and OPDM object metadata to Elastic
-        merge_report = None
-        if model_merge_report_send_to_elk:
-            logger.info(f"Sending merge report to Elastic")
-            try:
-                merge_report = merge_functions.generate_merge_report(merged_model=merged_model, task=task)
+        with tracer.span("reporting"):
+            opdm_object_meta['pmd:content-reference'] = merged_model.content_reference
+            response = elastic.Elastic.send_to_elastic(index=OPDE_MODELS_ELK_INDEX, json_message=opdm_object_meta)
+
+            # Send merge report and OPDM object metadata to Elastic
+            merge_report = None
+            if model_merge_report_send_to_elk:
+                logger.info(f"Sending merge report to Elastic")
                 try:
-                    response = elastic.Elastic.send_to_elastic(index=MERGE_REPORT_ELK_INDEX, json_message=merge_report)
+                    merged_model.trace = tracer.to_report()
+                    merge_report = merge_functions.generate_merge_report(merged_model=merged_model, task=task)
+                    try:
+                        response = elastic.Elastic.send_to_elastic(index=MERGE_REPORT_ELK_INDEX, json_message=merge_report)
+                    except Exception as error:
+                        logger.error(f"Merge report sending to Elastic failed: {error}")
                 except Exception as error:
-                    logger.error(f"Merge report sending to Elastic failed: {error}")
-            except Exception as error:
-                logger.error(f"Failed to create merge report: {error}")
+                    logger.error(f"Failed to create merge report: {error}")
 
-        # Send QAS level 8 report if configured
-        if lvl8_reporting and merge_report:
-            try:
-                lvl8_report = merge_functions.lvl8_report_cgm(merge_report=merge_report)
-                service_edx = edx.EDX()
-                message_id = service_edx.send_message(receiver_EIC=QAS_EIC,
-                                                      business_type=QAS_MSG_TYPE,
-                                                      content=lvl8_report)
-                logger.info(f"QAS-Level-8 report generated and sent with ID: {message_id}")
-            except Exception as error:
-                logger.error(f"Failed to send QAS-Level-8 report with error: {error}")
-        else:
-            logger.warning(f"QAS-Level-8 not generated because merge report unavailable or disabled by configuration")
+            # Send QAS level 8 report if configured
+            if lvl8_reporting and merge_report:
+                try:
+                    lvl8_report = merge_functions.lvl8_report_cgm(merge_report=merge_report)
+                    service_edx = edx.EDX()
+                    message_id = service_edx.send_message(receiver_EIC=QAS_EIC,
+                                                          business_type=QAS_MSG_TYPE,
+                                                          content=lvl8_report)
+                    logger.info(f"QAS-Level-8 report generated and sent with ID: {message_id}")
+                except Exception as error:
+                    logger.error(f"Failed to send QAS-Level-8 report with error: {error}")
+            else:
+                logger.warning(f"QAS-Level-8 not generated because merge report unavailable or disabled by configuration")
 
         # Append message headers with OPDM root metadata
         extracted_meta = {key: value for key, value in opdm_object_meta.items() if isinstance(value, str)}
         properties.headers = extracted_meta
 
+        # Export stage spans as Chrome trace if configured
+        if json.loads(TRACE_EXPORT.lower()):
+            try:
+                trace_object = tracer.export_chrome_trace(file_name=f"{TRACE_MINIO_FOLDER}/{merged_model.name}.json")
+                self.minio_service.upload_object(file_path_or_file_object=trace_object, bucket_name=OUTPUT_MINIO_BUCKET)
+            except Exception as error:
+                logger.error(f"Failed to export merge trace: {error}")
+
         # Stop Trace
         self.elk_logging_handler.stop_trace()
 
@@ -37,15 +37,18 @@ import pandas as pd
 import numpy as np
 import json
 import copy
+import time
+import threading
 from typing import Dict, List, Union
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import config
 from emf.common.config_parser import parse_app_properties
 from emf.common.decorators import performance_counter
 from emf.common.integrations.object_storage.schedules import query_acnp_schedules, query_hvdc_schedules
 from emf.common.helpers.utils import attr_to_dict
-from emf.common.helpers.loadflow import get_network_elements, get_slack_generators, get_connected_components_data
+from emf.common.helpers.loadflow import get_network_elements, get_slack_generators, get_connected_components_data, get_topology_fingerprint
 from emf.common.loadflow_tool.loadflow_settings import EU_RELAXED
+from emf.common.loadflow_tool.warm_start import run_ac
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +57,14 @@ parse_app_properties(caller_globals=globals(), path=config.paths.cgm_worker.scal
 # Global variables
 _country_col: str = 'CGMES.regionName'
 
+# Static attributes of dangling lines which do not change during scaling
+_DANGLING_LINE_STATIC_ATTRIBUTES = ['bus_id', 'paired', 'tie_line_id', 'ucte_xnode_code', 'isHvdc', 'lineEnergyIdentificationCodeEIC']
+
+# Area mappings by topology fingerprint, the same structural model is scaled for consecutive timestamps
+_area_mapping_cache = OrderedDict()
+_area_mapping_cache_size = 2
+_area_mapping_cache_lock = threading.Lock()
+
 
 def validate_loadflow_status(results: List, components: Dict):
     # Validate all network components convergence status in order to exclude diverged non main islands
@@ -69,42 +80,6 @@ def validate_loadflow_status(results: List, components: Dict):
         return False
 
 
-def get_areas_losses(network: pp.network.Network, buses: pd.DataFrame, components: Dict):
-    # Calculate ACNP with losses (from cross-border lines)
-    dangling_lines = get_network_elements(network, pp.network.ElementType.DANGLING_LINE, all_attributes=True)
-    dangling_lines = dangling_lines.merge(buses.connected_component, how='left', left_on='bus_id', right_index=True)
-    dangling_lines = dangling_lines[dangling_lines.connected_component.isin(components.keys())]
-    dangling_lines.connected_component = dangling_lines.connected_component.astype(int)
-    dangling_lines['boundary_p'] = dangling_lines['boundary_p'] * -1  # invert boundary_p sign to match flow direction
-    ac_dangling_lines = dangling_lines[dangling_lines.isHvdc == '']
-    dc_dangling_lines = dangling_lines[dangling_lines.isHvdc == 'true']
-    acnp_with_losses = _get_series_from_df(df=ac_dangling_lines, value_col='boundary_p').groupby(level=0).sum()
-
-    # Calculate ACNP without losses (from generation and consumption)
-    generation = get_areas_metrics(network=network, buses=buses, components=components, metric='GENERATOR')
-    consumption = get_areas_metrics(network=network, buses=buses, components=components, metric='LOAD')
-    ## Need to ensure that all series in substraction has same index values. For example when area does not have HVDC connections
-    ## Otherwise we will get NaN values for areas without HVDC after regular substraction
-    present_areas = generation.index.union(consumption.index)
-    dcnp = _get_series_from_df(df=dc_dangling_lines, value_col='boundary_p').groupby(level=0).sum().reindex(present_areas, fill_value=0)
-    acnp_without_losses = generation - consumption - dcnp
-
-    # Calculate losses by regions
-    losses = acnp_without_losses - acnp_with_losses
-
-    return losses.round(1)
-
-
-def get_areas_metrics(network: pp.network.Network, buses: pd.DataFrame, components: Dict, metric: str):
-    df = get_network_elements(network, getattr(pp.network.ElementType, metric), all_attributes=True)
-    df = df.merge(buses.connected_component, how='left', left_on='bus_id', right_index=True)
-    df = df[df.connected_component.isin(components.keys())]
-    df.connected_component = df.connected_component.astype(int)
-    sign = -1 if metric == 'GENERATOR' else 1
-    series = _get_series_from_df(df=df, value_col='p')
-    return series.groupby(series.index).sum() * sign
-
-
 def validate_converged_components(dangling_lines: pd.DataFrame, converged_components: Dict):
     logger.info(f"Validating converged islands")
     for k, v in list(converged_components.items()):
@@ -137,6 +112,196 @@ def get_network_elements_map_to_areas(network: pp.network):
     return pd.concat(_temp)
 
 
+class AreaMapping:
+    """
+    Mapping of network elements to scheduling areas and connected components, created once per network topology.
+    Each (area, connected component) pair is a group with integer code, so element values can be aggregated by
+    groups with numpy in the scaling loop instead of merging network tables
+    """
+
+    def __init__(self, network: pp.network.Network, buses: pd.DataFrame, fingerprint: str | None = None):
+        self.fingerprint = fingerprint
+        self.elements_to_areas = get_network_elements_map_to_areas(network=network)[_country_col]
+        bus_components = buses['connected_component']
+
+        # Static part of dangling lines with area and connected component
+        dangling_lines = network.get_dangling_lines(all_attributes=True).reindex(columns=_DANGLING_LINE_STATIC_ATTRIBUTES, fill_value='')
+        dangling_lines[_country_col] = dangling_lines.index.map(self.elements_to_areas)
+        dangling_lines['connected_component'] = dangling_lines['bus_id'].map(bus_components)
+
+        # Loads and generators with area of substation and connected component
+        substation_areas = network.get_substations(all_attributes=True)[_country_col]
+        voltage_level_areas = network.get_voltage_levels(attributes=['substation_id'])['substation_id'].map(substation_areas)
+        loads = network.get_loads(attributes=['bus_id', 'voltage_level_id'])
+        loads[_country_col] = loads['voltage_level_id'].map(voltage_level_areas)
+        loads['connected_component'] = loads['bus_id'].map(bus_components)
+        generators = network.get_generators(attributes=['bus_id', 'voltage_level_id'])
+        generators[_country_col] = generators['voltage_level_id'].map(voltage_level_areas)
+        generators['connected_component'] = generators['bus_id'].map(bus_components)
+
+        # Groups of area and connected component present in network
+        group_keys = pd.concat([elements[[_country_col, 'connected_component']] for elements in [dangling_lines, loads, generators]])
+        group_keys = group_keys.dropna().drop_duplicates()
+        self.groups = pd.MultiIndex.from_arrays([group_keys[_country_col].astype(str), group_keys['connected_component'].astype(int)],
+                                                names=[_country_col, 'connected_component']).sort_values()
+        self.group_components = self.groups.get_level_values('connected_component').to_numpy()
+
+        dangling_lines['group'] = self.get_group_codes(dangling_lines)
+        loads['group'] = self.get_group_codes(loads)
+        generators['group'] = self.get_group_codes(generators)
+        self.dangling_lines = dangling_lines
+        self.load_groups = loads['group']
+        self.generator_groups = generators['group']
+        self.group_labels = self.groups.get_level_values(_country_col) + "-" + self.groups.get_level_values('connected_component').astype(str)
+
+        # HVDC mapping of dangling lines to line EIC and area
+        self.hvdc_lines = dangling_lines[dangling_lines.isHvdc == 'true'][['lineEnergyIdentificationCodeEIC', _country_col, 'ucte_xnode_code']]
+
+        logger.info(f"Mapped {len(self.elements_to_areas.index)} network elements to {len(self.groups)} area groups")
+
+    def get_group_codes(self, elements: pd.DataFrame) -> np.ndarray:
+        """Returns group codes of elements with area and connected component columns, -1 if not mapped"""
+        keys = pd.MultiIndex.from_arrays([elements[_country_col].astype(str),
+                                          pd.to_numeric(elements['connected_component']).fillna(-1).astype(int)])
+        return self.groups.get_indexer(keys)
+
+    def get_group_values(self, data: pd.DataFrame, value_col: str) -> np.ndarray:
+        """Returns values of dataframe with area and connected component columns as array by groups, NaN if missing"""
+        values = np.full(len(self.groups), np.nan)
+        codes = self.get_group_codes(data)
+        valid = codes >= 0
+        values[codes[valid][::-1]] = data[value_col].to_numpy(dtype=float)[valid][::-1]  # first value kept on duplicates
+        return values
+
+    def get_group_mask(self, codes: np.ndarray, components) -> np.ndarray:
+        """Returns mask of group codes belonging to given connected components"""
+        return (codes >= 0) & np.isin(self.group_components[codes], list(components))
+
+    def sum_by_group(self, codes: np.ndarray, values: np.ndarray, mask: np.ndarray | None = None) -> np.ndarray:
+        """
+        Sums element values by groups
+        :param codes: group codes of elements
+        :param values: element values aligned with codes
+        :param mask: optional mask of elements to include
+        :return: array of sums for each group
+        """
+        include = (codes >= 0) & ~np.isnan(values)
+        if mask is not None:
+            include &= mask
+        return np.bincount(codes[include], weights=values[include], minlength=len(self.groups))
+
+    def get_group_frame(self, sums: np.ndarray, present: np.ndarray, value_col: str) -> pd.DataFrame:
+        """Returns group sums as dataframe of area, connected component and value for groups present"""
+        groups = self.groups[present]
+        return pd.DataFrame({_country_col: groups.get_level_values(_country_col),
+                             'connected_component': groups.get_level_values('connected_component').astype(int),
+                             value_col: sums[present]})
+
+
+def get_area_mapping(network: pp.network.Network, buses: pd.DataFrame) -> AreaMapping:
+    """
+    Returns mapping of network elements to areas, reused from cache if network topology is unchanged
+    :param network: pypowsybl network
+    :param buses: network buses with connected components
+    :return: area mapping
+    """
+    fingerprint = get_topology_fingerprint(network=network)
+    with _area_mapping_cache_lock:
+        mapping = _area_mapping_cache.get(fingerprint)
+        if mapping is not None:
+            _area_mapping_cache.move_to_end(fingerprint)
+            logger.info(f"Using cached area mapping of network topology {fingerprint}")
+            return mapping
+
+    mapping = AreaMapping(network=network, buses=buses, fingerprint=fingerprint)
+    with _area_mapping_cache_lock:
+        _area_mapping_cache[fingerprint] = mapping
+        while len(_area_mapping_cache) > _area_mapping_cache_size:
+            _area_mapping_cache.popitem(last=False)
+
+    return mapping
+
+
+class ScalingMetrics:
+    """
+    Diagnostics of scaling iterations collected into preallocated arrays, one row per iteration (0 is pre-scale
+    state) and one column per area group of AreaMapping. Values are taken from arrays already used by the scaling
+    loop, only injections of generators and loads are additionally retrieved if area balances are requested
+    """
+    AREA_METRICS = ['acnp', 'offset_acnp', 'generation', 'consumption', 'losses']
+    ITERATION_METRICS = ['loadflow_iterations', 'distributed_power', 'total_np', 'max_offset_acnp', 'total_losses', 'duration']
+
+    def __init__(self, area_mapping: AreaMapping, max_iteration: int):
+        self.area_mapping = area_mapping
+        self.last_iteration = 0
+        rows = max_iteration + 1
+        self.areas = {name: np.full((rows, len(area_mapping.groups)), np.nan) for name in self.AREA_METRICS}
+        self.iterations = {name: np.full(rows, np.nan) for name in self.ITERATION_METRICS}
+
+    def set_area_values(self, iteration: int, name: str, values: np.ndarray):
+        self.areas[name][iteration] = values
+        self.last_iteration = max(self.last_iteration, iteration)
+
+    def set_value(self, iteration: int, name: str, value: float):
+        self.iterations[name][iteration] = value
+        self.last_iteration = max(self.last_iteration, iteration)
+
+    def collect_area_balances(self, network: pp.network.Network, iteration: int, boundary_p: np.ndarray,
+                              dangling_line_mask: np.ndarray, hvdc_dangling_lines: np.ndarray, valid_groups: np.ndarray):
+        """
+        Collects generation, consumption and losses of area groups. Losses are estimated as difference of AC net
+        position from generation and consumption and AC net position from cross-border lines
+        :param network: pypowsybl network after loadflow
+        :param iteration: iteration number
+        :param boundary_p: boundary active power of dangling lines in flow direction, aligned with area mapping
+        :param dangling_line_mask: mask of dangling lines in valid components
+        :param hvdc_dangling_lines: mask of HVDC dangling lines
+        :param valid_groups: mask of area groups in valid components
+        """
+        mapping = self.area_mapping
+        generators_p = network.get_generators(id=mapping.generator_groups.index, attributes=['p'])['p'].to_numpy()
+        loads_p = network.get_loads(id=mapping.load_groups.index, attributes=['p'])['p'].to_numpy()
+        codes = mapping.dangling_lines['group'].to_numpy()
+        generation = mapping.sum_by_group(mapping.generator_groups.to_numpy(), generators_p) * -1
+        consumption = mapping.sum_by_group(mapping.load_groups.to_numpy(), loads_p)
+        dcnp = mapping.sum_by_group(codes, boundary_p, mask=dangling_line_mask & hvdc_dangling_lines)
+        acnp = mapping.sum_by_group(codes, boundary_p, mask=dangling_line_mask & ~hvdc_dangling_lines)
+        losses = generation - consumption - dcnp - acnp
+
+        self.set_area_values(iteration, 'generation', np.where(valid_groups, generation, np.nan))
+        self.set_area_values(iteration, 'consumption', np.where(valid_groups, consumption, np.nan))
+        self.set_area_values(iteration, 'losses', np.where(valid_groups, losses, np.nan))
+        self.set_value(iteration, 'total_losses', losses[valid_groups].sum())
+
+    def get_area_table(self, name: str) -> pd.DataFrame:
+        """Returns area metric by iterations with area group labels as columns, groups without values are dropped"""
+        table = pd.DataFrame(self.areas[name][:self.last_iteration + 1], columns=self.area_mapping.group_labels)
+        return table.dropna(axis=1, how='all').rename_axis(index='iteration')
+
+    def get_iteration_table(self) -> pd.DataFrame:
+        """Returns compact table of iteration metrics together with ACNP offsets of areas"""
+        table = pd.DataFrame({name: values[:self.last_iteration + 1] for name, values in self.iterations.items()})
+        table = table.join(self.get_area_table('offset_acnp').add_prefix('offset_'))
+        return table.dropna(axis=1, how='all').rename_axis(index='iteration').round(2)
+
+    def get_area_report(self, balance_threshold: float) -> List[Dict]:
+        """
+        Returns scaling result of each area group: pre-scale and post-scale ACNP, initial and final offsets
+        :param balance_threshold: maximum absolute offset of successfully scaled area
+        :return: list of dict per area
+        """
+        report = pd.DataFrame({
+            'area': self.area_mapping.group_labels,
+            'final_offset_acnp': self.areas['offset_acnp'][self.last_iteration],
+            'initial_offset_acnp': self.areas['offset_acnp'][0],
+            'postscale_acnp': self.areas['acnp'][self.last_iteration],
+            'prescale_acnp': self.areas['acnp'][0],
+        }).dropna().round(1).sort_values('area').reset_index(drop=True)
+        report['success'] = report['final_offset_acnp'].abs() <= balance_threshold
+
+        return report.astype(object).to_dict('records')
+
+
 def get_countries_to_components(components: Dict):
     country_to_keys = defaultdict(set)
     for key, entry in components.items():
@@ -147,24 +312,23 @@ def get_countries_to_components(components: Dict):
 
 
 def get_fragmented_areas_participation(unpaired_dangling_lines: pd.DataFrame, areas_to_components: Dict):
-    fragmented_areas = []
-    for area, comps in areas_to_components.items():
-        if len(comps) > 1:
-            logger.warning(f"Fragmented area identified: {area} in components {list(comps)}")
-            area_dangling_lines = unpaired_dangling_lines[unpaired_dangling_lines[_country_col] == area]
-            fragments_acnp = {comp: area_dangling_lines[area_dangling_lines.connected_component == comp].boundary_p.sum() for comp in comps}
-            total_fragments_acnp = abs(sum(fragments_acnp.values())) or 1  # removing zero division warning
-            participation = {k: abs(v) / total_fragments_acnp for k, v in fragments_acnp.items()}
-            fragmented_areas.append(pd.DataFrame({'connected_component': list(participation.keys()),
-                                                  'participation': list(participation.values()),
-                                                  'registered_resource': area}))
-
-    if fragmented_areas:
-        fragmented_areas = pd.concat(fragmented_areas)
-    else:
-        fragmented_areas = pd.DataFrame(columns=['connected_component', 'participation', 'registered_resource'])
+    fragments = [(area, comp) for area, comps in areas_to_components.items() if len(comps) > 1 for comp in comps]
+    if not fragments:
+        return pd.DataFrame(columns=['connected_component', 'participation', 'registered_resource'])
+
+    for area in dict(fragments):
+        logger.warning(f"Fragmented area identified: {area} in components {list(areas_to_components[area])}")
+
+    # AC net position of each fragment from unpaired dangling lines, participation relative to whole area
+    fragments = pd.MultiIndex.from_tuples(fragments, names=['registered_resource', 'connected_component'])
+    unpaired_dangling_lines = unpaired_dangling_lines.dropna(subset=[_country_col, 'connected_component'])
+    fragments_acnp = (unpaired_dangling_lines.groupby([unpaired_dangling_lines[_country_col],
+                                                       unpaired_dangling_lines['connected_component'].astype(int)]).boundary_p.sum()
+                      .reindex(fragments, fill_value=0))
+    total_fragments_acnp = fragments_acnp.groupby(level=0).transform('sum').abs().replace(0, 1)  # removing zero division
+    participation = (fragments_acnp.abs() / total_fragments_acnp).rename('participation').reset_index()
 
-    return fragmented_areas
+    return participation[['connected_component', 'participation', 'registered_resource']]
 
 
 def _get_series_from_df(df: pd.DataFrame, value_col: str, area_col: str = _country_col):
@@ -202,8 +366,8 @@ def scale_balance(model: object,
 
     # Define general variables to be used in scaling algorithm
     _CONSTANT_POWER_FACTOR = json.loads(CONSTANT_POWER_FACTOR.lower())
+    _WARM_START = json.loads(WARM_START_LOADFLOW.lower())
     _components = get_connected_components_data(network=network, bus_count_threshold=5, country_col_name=_country_col)
-    _scaling_results = []
     _hvdc_results = []
     _iteration = 0
 
@@ -213,16 +377,17 @@ def scale_balance(model: object,
     else:
         logger.setLevel(logging.INFO)
 
-    # Get entire network elements mapping to areas
-    _elements_to_areas_map = get_network_elements_map_to_areas(network=network)
-
     # Get buses
     buses = network.get_buses()
 
+    # Get entire network elements mapping to areas, computed once per network topology
+    area_mapping = get_area_mapping(network=network, buses=buses)
+    metrics = ScalingMetrics(area_mapping=area_mapping, max_iteration=int(MAX_ITERATION))
+
     # Get all dangling lines and define power factor
     # dangling_lines = get_network_elements(network, pp.network.ElementType.DANGLING_LINE, all_attributes=True)
     dangling_lines = network.get_dangling_lines(all_attributes=True)
-    dangling_lines[_country_col] = dangling_lines.index.map(_elements_to_areas_map[_country_col])
+    dangling_lines[_country_col] = dangling_lines.index.map(area_mapping.elements_to_areas)
     dangling_lines = _set_power_ratio_to_dangling_lines(dangling_lines)
     dangling_lines['boundary_p'] = dangling_lines['boundary_p'] * -1  # invert boundary_p sign to match flow direction
     dangling_lines['boundary_q'] = dangling_lines['boundary_q'] * -1  # invert boundary_q sign to match flow direction (just used for printing)
@@ -247,7 +412,7 @@ def scale_balance(model: object,
 
     # Get pre-scale HVDC setpoints
     logger.info(f"Scaling HVDC network part")
-    prescale_hvdc_sp = dangling_lines[dangling_lines.isHvdc == 'true'][['lineEnergyIdentificationCodeEIC', 'boundary_p', 'boundary_q']]
+    prescale_hvdc_sp = area_mapping.hvdc_lines[['lineEnergyIdentificationCodeEIC']].join(dangling_lines[['boundary_p', 'boundary_q']])
     prescale_hvdc_sp = prescale_hvdc_sp.rename(columns={'boundary_p': 'value', 'boundary_q': 'value_q'})
     _hvdc_results.append(pd.concat([prescale_hvdc_sp.set_index('lineEnergyIdentificationCodeEIC').value,
                                     pd.Series({'KEY': 'prescale-setpoint'})]).to_dict())
@@ -255,9 +420,8 @@ def scale_balance(model: object,
         logger.info(f"[INITIAL] PRE-SCALE HVDC active power setpoint of {dclink['lineEnergyIdentificationCodeEIC']}: {round(dclink['value'], 2)} MW")
         logger.debug(f"[INITIAL] PRE-SCALE HVDC reactive power setpoint of {dclink['lineEnergyIdentificationCodeEIC']}: {round(dclink['value_q'], 2)} MVar")
 
-    # Mapping HVDC schedules to network
-    _cols_to_keep = ['lineEnergyIdentificationCodeEIC', _country_col, 'ucte_xnode_code', 'power_factor']
-    scalable_hvdc = dangling_lines[dangling_lines.isHvdc == 'true'][_cols_to_keep]
+    # Mapping HVDC schedules to network, HVDC lines with their areas are taken from area mapping
+    scalable_hvdc = area_mapping.hvdc_lines.join(dangling_lines['power_factor'])
     scalable_hvdc.reset_index(inplace=True)
     scalable_hvdc = scalable_hvdc.merge(target_hvdc_sp_df, left_on='lineEnergyIdentificationCodeEIC', right_on='registered_resource')
     mask = (scalable_hvdc[_country_col] == scalable_hvdc['in_domain']) | (scalable_hvdc[_country_col] == scalable_hvdc['out_domain'])
@@ -297,7 +461,7 @@ def scale_balance(model: object,
 
     # Solving initial loadflow
     converged_components = {}
-    pf_results = pp.loadflow.run_ac(network=network, parameters=lf_settings)
+    pf_results = run_ac(network=network, parameters=lf_settings, warm_start=_WARM_START)
     for result in [x for x in pf_results if x.connected_component_num in _components.keys()]:
         result_dict = attr_to_dict(result)
         logger.info(f"[INITIAL] Loadflow status: {result_dict.get('status').name}")
@@ -312,7 +476,7 @@ def scale_balance(model: object,
     # Get dangling lines after HVDC scaling and loadflow
     # dangling_lines = get_network_elements(network, pp.network.ElementType.DANGLING_LINE, all_attributes=True)
     dangling_lines = network.get_dangling_lines(all_attributes=True)
-    dangling_lines[_country_col] = dangling_lines.index.map(_elements_to_areas_map[_country_col])
+    dangling_lines[_country_col] = dangling_lines.index.map(area_mapping.elements_to_areas)
     ## Merge buses to dangling lines in order to know dangling lines network component
     dangling_lines = dangling_lines.merge(buses.connected_component, how='left', left_on='bus_id', right_index=True)
     dangling_lines = _set_power_ratio_to_dangling_lines(dangling_lines)
@@ -324,13 +488,11 @@ def scale_balance(model: object,
 
     # Get pre-scale total network balance by each component -> AC+DC net position
     prescale_network_np = {k: round(dangling_lines[dangling_lines.connected_component == k].boundary_p.sum()) for k, v in valid_components.items()}
-    _scaling_results.append({'KEY': 'prescale-network-np', 'GLOBAL': prescale_network_np, 'ITER': _iteration})
     logger.info(f"[ITER {_iteration}] PRE-SCALE NETWORK NP by component: {prescale_network_np}")
 
     # Get pre-scale total network balance by each component -> AC net position
     unpaired_dangling_lines = (dangling_lines.isHvdc == '') & (dangling_lines.tie_line_id == '')
     prescale_network_acnp = {k: round(dangling_lines[unpaired_dangling_lines].query("connected_component == @k").boundary_p.sum()) for k, v in valid_components.items()}
-    _scaling_results.append({'KEY': 'prescale-network-acnp', 'GLOBAL': prescale_network_acnp, 'ITER': _iteration})
     logger.info(f"[ITER {_iteration}] PRE-SCALE NETWORK ACNP by component: {prescale_network_acnp}")
 
     # Identify fragmented IGMs - where some part of network model with boundary belongs other component
@@ -369,10 +531,10 @@ def scale_balance(model: object,
         network.update_dangling_lines(id=prescale_network_acnp_target.index,
                                       p0=prescale_network_acnp_target.to_list(),
                                       q0=_component_dl_q_values.to_list())
-    _scaling_results.append({'KEY': 'target-network-acnp', 'GLOBAL': target_network_acnp, 'ITER': _iteration})
+    logger.info(f"[ITER {_iteration}] TARGET NETWORK ACNP by component: {target_network_acnp}")
 
     # Solving loadflow after aligning total network AC net position to scheduled
-    pf_results = pp.loadflow.run_ac(network=network, parameters=lf_settings)
+    pf_results = run_ac(network=network, parameters=lf_settings, warm_start=_WARM_START)
     for result in [x for x in pf_results if x.connected_component_num in _components.keys()]:
         result_dict = attr_to_dict(result)
         logger.info(f"[ITER {_iteration}] Loadflow status: {result_dict.get('status').name}")
@@ -388,26 +550,34 @@ def scale_balance(model: object,
     # Validate total network AC net position alignment
     # dangling_lines = get_network_elements(network, pp.network.ElementType.DANGLING_LINE, all_attributes=True)
     dangling_lines = network.get_dangling_lines(all_attributes=True)
-    dangling_lines[_country_col] = dangling_lines.index.map(_elements_to_areas_map[_country_col])
+    dangling_lines[_country_col] = dangling_lines.index.map(area_mapping.elements_to_areas)
     dangling_lines = dangling_lines.merge(buses.connected_component, how='left', left_on='bus_id', right_index=True)
     dangling_lines['boundary_p'] = dangling_lines['boundary_p'] * -1  # invert boundary_p sign to match flow direction
     postscale_network_acnp = {k: round(dangling_lines[unpaired_dangling_lines].query("connected_component == @k").boundary_p.sum()) for k, v in valid_components.items()}
-    _scaling_results.append({'KEY': 'postscale-network-acnp', 'GLOBAL': postscale_network_acnp, 'ITER': _iteration})
     logger.info(f"[ITER {_iteration}] POST-SCALE NETWORK ACNP by component: {postscale_network_acnp}")
 
-    # Get pre-scale generation and consumption
+    # Index arrays of scalable loads and dangling lines to their area groups for the scaling loop
+    conform_load_groups = area_mapping.load_groups.loc[conform_loads.index].to_numpy()
+    conform_load_power_factor = conform_loads['power_factor'].to_numpy()
+    dangling_line_groups = area_mapping.dangling_lines['group'].to_numpy()
+    ac_dangling_lines = (area_mapping.dangling_lines['isHvdc'] == '').to_numpy()
+    hvdc_dangling_lines = (area_mapping.dangling_lines['isHvdc'] == 'true').to_numpy()
+    not_paired_dangling_lines = (area_mapping.dangling_lines['paired'] == False).to_numpy()
+
+    # Get pre-scale generation, consumption and losses
     if debug:
-        prescale_generation = get_areas_metrics(network=network, buses=buses, components=valid_components, metric='GENERATOR')
-        prescale_consumption = get_areas_metrics(network=network, buses=buses, components=valid_components, metric='LOAD')
-        _scaling_results.append(pd.concat([prescale_generation, pd.Series({'KEY': 'generation', 'ITER': _iteration})]).to_dict())
-        _scaling_results.append(pd.concat([prescale_consumption, pd.Series({'KEY': 'consumption', 'ITER': _iteration})]).to_dict())
+        boundary_p = network.get_dangling_lines(id=area_mapping.dangling_lines.index, attributes=['boundary_p'])['boundary_p'].to_numpy() * -1
+        metrics.collect_area_balances(network=network, iteration=_iteration, boundary_p=boundary_p,
+                                      dangling_line_mask=area_mapping.get_group_mask(dangling_line_groups, valid_components.keys()),
+                                      hvdc_dangling_lines=hvdc_dangling_lines,
+                                      valid_groups=np.isin(area_mapping.group_components, list(valid_components.keys())))
 
     # Get pre-scale AC net positions for each control area
     dangling_lines = dangling_lines[dangling_lines.connected_component.isin(valid_components.keys())]
     prescale_acnp = dangling_lines[dangling_lines.isHvdc == ''].groupby([_country_col, 'connected_component']).boundary_p.sum().reset_index()
     prescale_acnp.connected_component = prescale_acnp.connected_component.astype(int)
     _pre_scale_acnp_series = _get_series_from_df(df=prescale_acnp, value_col='boundary_p')
-    _scaling_results.append(pd.concat([_pre_scale_acnp_series, pd.Series({'KEY': 'prescale-acnp', 'ITER': _iteration})]).to_dict())
+    metrics.set_area_values(_iteration, 'acnp', area_mapping.get_group_values(prescale_acnp, value_col='boundary_p'))
     logger.info(f"[ITER {_iteration}] PRE-SCALE ACNP: {_pre_scale_acnp_series.to_dict()}")
 
     # Filtering target AC net positions series by present regions in network
@@ -416,43 +586,40 @@ def scale_balance(model: object,
                                                       right_on=['connected_component', _country_col]
                                                       )
     target_acnp = _get_series_from_df(df=combined_scaling_target_df, area_col='registered_resource', value_col='value')
-    _scaling_results.append(pd.concat([target_acnp, pd.Series({'KEY': 'target-acnp', 'ITER': _iteration})]).to_dict())
     logger.info(f"[ITER {_iteration}] TARGET ACNP: {target_acnp.to_dict()}")
 
     # Get offsets between target and pre-scale AC net positions for each control area
     combined_scaling_target_df['offset_acnp'] = combined_scaling_target_df['boundary_p'] - combined_scaling_target_df['value']
     offset_acnp = _get_series_from_df(df=combined_scaling_target_df, area_col='registered_resource', value_col='offset_acnp')
-    _scaling_results.append(pd.concat([offset_acnp, pd.Series({'KEY': 'offset-acnp', 'ITER': _iteration})]).to_dict())
+    metrics.set_area_values(_iteration, 'offset_acnp', area_mapping.get_group_values(combined_scaling_target_df, value_col='offset_acnp'))
+    metrics.set_value(_iteration, 'max_offset_acnp', offset_acnp.abs().max())
     logger.info(f"[ITER {_iteration}] PRE-SCALE ACNP offset: {offset_acnp.round(1).to_dict()}")
 
     # Perform scaling of AC part schedule of the network model with loop
     logger.info(f"Scaling AC network part")
     while _iteration < int(MAX_ITERATION):
         _iteration += 1
+        _iteration_start = time.perf_counter()
 
         # Get scaling area loads participation factors
-        scalable_loads = get_network_elements(network, pp.network.ElementType.LOAD, all_attributes=True, id=conform_loads.index)
-        scalable_loads = scalable_loads.merge(buses.connected_component, left_on='bus_id', right_index=True, how='left')
-        scalable_loads['p_participation'] = scalable_loads.p0 / scalable_loads.groupby([_country_col, 'connected_component']).p0.transform('sum')
-
-        # Merge ACNP offsets to scalable loads
-        scalable_loads = scalable_loads.reset_index().merge(
-            combined_scaling_target_df[[_country_col, 'connected_component', 'offset_acnp']],
-            how='left', on=[_country_col, 'connected_component']).set_index('id')
+        scalable_loads_p0 = network.get_loads(id=conform_loads.index, attributes=['p0'])['p0'].to_numpy()
+        groups_p0 = area_mapping.sum_by_group(conform_load_groups, scalable_loads_p0)
+        groups_offset_acnp = area_mapping.get_group_values(combined_scaling_target_df, value_col='offset_acnp')
+        mapped_loads = conform_load_groups >= 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scalable_loads_participation = np.where(mapped_loads, scalable_loads_p0 / groups_p0[conform_load_groups], np.nan)
 
         # Scale loads by participation factor
-        scalable_loads_diff = scalable_loads.offset_acnp * scalable_loads.p_participation
-        scalable_loads_target = scalable_loads.p0 + scalable_loads_diff
+        scalable_loads_diff = np.where(mapped_loads, groups_offset_acnp[conform_load_groups], np.nan) * scalable_loads_participation
+        scalable_loads_target = scalable_loads_p0 + scalable_loads_diff
         ## Removing loads which target value is NaN. It can be because missing target ACNP for this area
-        scalable_loads_target.dropna(inplace=True)
-        conform_loads_na = conform_loads.merge((scalable_loads_target.reset_index())[['id']],
-                                               left_index=True, right_on='id').set_index('id')
-        network.update_loads(id=scalable_loads_target.index,
-                             p0=scalable_loads_target.to_list(),
-                             q0=(scalable_loads_target * conform_loads_na.power_factor).to_list())  # maintain power factor
+        scalable = ~np.isnan(scalable_loads_target)
+        network.update_loads(id=conform_loads.index[scalable],
+                             p0=scalable_loads_target[scalable],
+                             q0=scalable_loads_target[scalable] * conform_load_power_factor[scalable])  # maintain power factor
 
         # Solving post-scale loadflow
-        pf_results = pp.loadflow.run_ac(network=network, parameters=lf_settings)
+        pf_results = run_ac(network=network, parameters=lf_settings, warm_start=_WARM_START)
         for result in [x for x in pf_results if x.connected_component_num in _components.keys()]:
             result_dict = attr_to_dict(result)
             logger.info(f"[ITER {_iteration}] Loadflow status: {result_dict.get('status').name}")
@@ -466,37 +633,31 @@ def scale_balance(model: object,
 
         # Store distributed active power after AC part scaling
         distributed_power = round(pf_results[0].distributed_active_power, 2)
-        _scaling_results.append({'KEY': 'distributed-power', 'GLOBAL': distributed_power, 'ITER': _iteration})
-
-        # Get post-scale generation, consumption and losses
-        if debug:
-            postscale_generation = get_areas_metrics(network=network, buses=buses, components=valid_components, metric='GENERATOR')
-            postscale_consumption = get_areas_metrics(network=network, buses=buses, components=valid_components, metric='LOAD')
-            _scaling_results.append(pd.concat([postscale_generation, pd.Series({'KEY': 'generation', 'ITER': _iteration})]).to_dict())
-            _scaling_results.append(pd.concat([postscale_consumption, pd.Series({'KEY': 'consumption', 'ITER': _iteration})]).to_dict())
-
-            # Get post-scale network losses by regions
-            ## It is needed to estimate when loadflow engine balances entire network schedule with distributed slack enabled
-            postscale_losses = get_areas_losses(network=network, buses=buses, components=valid_components)
-            total_network_losses = postscale_losses.sum()
-            _scaling_results.append(pd.concat([postscale_losses, pd.Series({'GLOBAL': total_network_losses, 'KEY': 'losses', 'ITER': _iteration})]).to_dict())
-            logger.debug(f"[ITER {_iteration}] POST-SCALE LOSSES: {postscale_losses.to_dict()}")
+        metrics.set_value(_iteration, 'distributed_power', distributed_power)
+        metrics.set_value(_iteration, 'loadflow_iterations', pf_results[0].iteration_count)
 
         # Get post-scale AC net position
-        # dangling_lines = get_network_elements(network, pp.network.ElementType.DANGLING_LINE, all_attributes=True)
-        dangling_lines = network.get_dangling_lines(all_attributes=True)
-        dangling_lines[_country_col] = dangling_lines.index.map(_elements_to_areas_map[_country_col])
-        dangling_lines = dangling_lines.merge(buses.connected_component, how='left', left_on='bus_id', right_index=True)
-        dangling_lines['boundary_p'] = dangling_lines['boundary_p'] * -1  # invert boundary_p sign to match flow direction
-        dangling_lines = dangling_lines[dangling_lines.connected_component.isin(valid_components.keys())]
-        postscale_acnp = dangling_lines[dangling_lines.isHvdc == ''].groupby([_country_col, 'connected_component']).boundary_p.sum().reset_index()
-        postscale_acnp.connected_component = postscale_acnp.connected_component.astype(int)
+        valid_dangling_lines = area_mapping.get_group_mask(dangling_line_groups, valid_components.keys())
+        valid_ac_dangling_lines = valid_dangling_lines & ac_dangling_lines
+        ac_groups_present = np.bincount(dangling_line_groups[valid_ac_dangling_lines], minlength=len(area_mapping.groups)) > 0
+        boundary_p = network.get_dangling_lines(id=area_mapping.dangling_lines.index, attributes=['boundary_p'])['boundary_p'].to_numpy()
+        boundary_p = boundary_p * -1  # invert boundary_p sign to match flow direction
+        postscale_acnp_values = area_mapping.sum_by_group(dangling_line_groups, boundary_p, mask=valid_ac_dangling_lines)
+        postscale_acnp = area_mapping.get_group_frame(postscale_acnp_values, present=ac_groups_present, value_col='boundary_p')
+        metrics.set_area_values(_iteration, 'acnp', np.where(ac_groups_present, postscale_acnp_values, np.nan))
         _post_scale_acnp_series = _get_series_from_df(df=postscale_acnp, value_col='boundary_p')
-        _scaling_results.append(pd.concat([_post_scale_acnp_series, pd.Series({'KEY': 'postscale-acnp', 'ITER': _iteration})]).to_dict())
         logger.info(f"[ITER {_iteration}] POST-SCALE ACNP: {_post_scale_acnp_series.to_dict()}")
 
+        # Get post-scale generation, consumption and losses
+        ## Losses are needed to estimate when loadflow engine balances entire network schedule with distributed slack enabled
+        if debug:
+            metrics.collect_area_balances(network=network, iteration=_iteration, boundary_p=boundary_p,
+                                          dangling_line_mask=valid_dangling_lines, hvdc_dangling_lines=hvdc_dangling_lines,
+                                          valid_groups=np.isin(area_mapping.group_components, list(valid_components.keys())))
+
         # Get post-scale total network balance
-        prescale_total_np = dangling_lines[dangling_lines['paired'] == False].boundary_p.sum()
+        prescale_total_np = np.nansum(boundary_p[valid_dangling_lines & not_paired_dangling_lines])
+        metrics.set_value(_iteration, 'total_np', prescale_total_np)
         logger.info(f"[ITER {_iteration}] POST-SCALE TOTAL NP: {round(prescale_total_np, 2)}")
 
         # Get offset between target and post-scale AC net position
@@ -507,7 +668,9 @@ def scale_balance(model: object,
         ## Recalculate new offset AC net position
         combined_scaling_target_df['offset_acnp'] = combined_scaling_target_df['boundary_p'] - combined_scaling_target_df['value']
         offset_acnp = _get_series_from_df(df=combined_scaling_target_df, area_col='registered_resource', value_col='offset_acnp')
-        _scaling_results.append(pd.concat([offset_acnp, pd.Series({'KEY': 'offset-acnp', 'ITER': _iteration})]).to_dict())
+        metrics.set_area_values(_iteration, 'offset_acnp', area_mapping.get_group_values(combined_scaling_target_df, value_col='offset_acnp'))
+        metrics.set_value(_iteration, 'max_offset_acnp', offset_acnp.abs().max())
+        metrics.set_value(_iteration, 'duration', time.perf_counter() - _iteration_start)
         logger.info(f"[ITER {_iteration}] POST-SCALE ACNP offsets: {offset_acnp.to_dict()}")
 
         # Breaking scaling loop if target ac net position for all areas is reached
@@ -518,22 +681,17 @@ def scale_balance(model: object,
         logger.warning(f"Max iteration limit reached")
         # TODO actions after scale break
 
-    # Post-processing scaling results dataframe
-    ac_scaling_results_df = pd.DataFrame(_scaling_results).set_index('ITER').sort_index().round(2)
+    # Post-processing scaling results
     hvdc_results_df = pd.DataFrame(_hvdc_results).round(2)
+    iterations_df = metrics.get_iteration_table()
+    logger.info(f"Scaling iterations:\n{iterations_df.to_string()}")
+    if debug:
+        logger.debug(f"Scaling losses by areas:\n{metrics.get_area_table('losses').round(1).to_string()}")
 
     # Process data for merge report
-    filtered_df = ac_scaling_results_df.query("KEY in ['prescale-acnp', 'postscale-acnp', 'offset-acnp']")
-    filtered_df = filtered_df.loc[[0, filtered_df.index.max()]]
-    filtered_df = filtered_df.drop(columns='GLOBAL')
-    filtered_df.loc[(filtered_df.index == 0) & (filtered_df['KEY'] == 'offset-acnp'), 'KEY'] = 'initial-offset-acnp'
-    filtered_df.loc[(filtered_df.index != 0) & (filtered_df['KEY'] == 'offset-acnp'), 'KEY'] = 'final-offset-acnp'
-    filtered_df = filtered_df.dropna(axis=1)
-    filtered_df['KEY'] = filtered_df['KEY'].str.replace('-', '_')
-    ac_melted_df = filtered_df.melt(id_vars=['KEY'], var_name='area', value_name='value')
-    ac_pivoted_df = ac_melted_df.pivot(index='area', columns='KEY', values='value').reset_index()
-    ac_pivoted_df['success'] = abs(ac_pivoted_df['final_offset_acnp']) <= int(BALANCE_THRESHOLD)
-    ac_scale_report_dict = ac_pivoted_df.astype(object).where(pd.notna(ac_pivoted_df), None).to_dict('records')
+    ac_scale_report_dict = metrics.get_area_report(balance_threshold=int(BALANCE_THRESHOLD))
+    iterations_df = iterations_df.reset_index()
+    iterations_report_dict = iterations_df.astype(object).where(pd.notna(iterations_df), None).to_dict('records')
 
     hvdc_results_df['KEY'] = hvdc_results_df['KEY'].str.replace('-', '_')
     hvdc_melted_df = hvdc_results_df.melt(id_vars=['KEY'], var_name='name', value_name='value')
@@ -543,9 +701,10 @@ def scale_balance(model: object,
     # Include data in merge report
     model.scaled_entity = ac_scale_report_dict
     model.scaled_hvdc = hvdc_scale_report_dict
+    model.scaled_iterations = iterations_report_dict
 
     # Set the common scaling status flag
-    model.scaled = all(ac_pivoted_df['success'])
+    model.scaled = all(area['success'] for area in ac_scale_report_dict)
 
     return model
 
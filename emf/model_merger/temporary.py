@@ -3,17 +3,29 @@ import triplets
 import pandas as pd
 import logging
 import uuid
-from decimal import Decimal
 from emf.common.helpers.opdm_objects import load_opdm_objects_to_triplets
+from emf.model_merger.boundary_pairing import BoundaryPairingIndex
 
 logger = logging.getLogger(__name__)
 
 
+def get_key_values(data: pd.DataFrame, key: str):
+    """
+    Returns values of given key indexed by object ID, on duplicate IDs first value is kept as in type_tableview
+    :param data: triplets
+    :param key: KEY to select, e.g. SvVoltage.v
+    :return: series of VALUE indexed by ID
+    """
+    values = data.loc[data['KEY'] == key, ['ID', 'VALUE']].drop_duplicates(subset='ID')
+    return values.set_index('ID')['VALUE']
+
+
 def remove_small_islands(solved_data, island_size_limit):
     # TODO - EVALUATE LEGACY
-    small_island = pd.DataFrame(solved_data.query("KEY == 'TopologicalIsland.TopologicalNodes'").ID.value_counts()).reset_index().query("count <= @island_size_limit")
-    solved_data = triplets.rdf_parser.remove_triplet_from_triplet(solved_data, small_island, columns=["ID"])
-    logger.info(f"Removed {len(small_island)} island(s) with size <= {island_size_limit}")
+    island_sizes = solved_data.loc[solved_data['KEY'] == 'TopologicalIsland.TopologicalNodes', 'ID'].value_counts()
+    small_islands = island_sizes.index[island_sizes <= island_size_limit]
+    solved_data = solved_data[~solved_data['ID'].isin(small_islands)]
+    logger.info(f"Removed {len(small_islands)} island(s) with size <= {island_size_limit}")
     return solved_data
 
 
@@ -38,28 +50,25 @@ def add_missing_sv_tap_steps(sv_data: pd.DataFrame, ssh_data: pd.DataFrame):
     # TODO - EVALUATE LEGACY
     """Update missing tap changer tap steps in SV"""
 
-    ssh_tap_steps = ssh_data.query("KEY == 'TapChanger.step'")
-    sv_tap_steps = sv_data.query("KEY == 'SvTapStep.TapChanger'")
-
-    missing_sv_tap_steps = ssh_tap_steps.merge(sv_tap_steps[['VALUE']],
-                                               left_on='ID',
-                                               right_on="VALUE",
-                                               how='left',
-                                               indicator=True,
-                                               suffixes=('', '_SV')).query("_merge == 'left_only'")
-
-    tap_steps_to_be_added = []
-    SV_INSTANCE_ID = sv_data.INSTANCE_ID.iloc[0]
-    for tap_changer in missing_sv_tap_steps.itertuples():
-        ID = str(uuid.uuid4())
-        logger.warning(f'Missing SvTapStep for {tap_changer.ID}, adding SvTapStep {ID} and taking tap value {tap_changer.VALUE} from SSH')
-        tap_steps_to_be_added.extend([
-            (ID, 'Type', 'SvTapStep', SV_INSTANCE_ID),
-            (ID, 'SvTapStep.TapChanger', tap_changer.ID, SV_INSTANCE_ID),
-            (ID, 'SvTapStep.position', tap_changer.VALUE, SV_INSTANCE_ID),
-        ])
-
-    sv_data = pd.concat([sv_data, pd.DataFrame(tap_steps_to_be_added, columns=['ID', 'KEY', 'VALUE', 'INSTANCE_ID'])], ignore_index=True)
+    ssh_tap_steps = get_key_values(ssh_data, 'TapChanger.step')
+    sv_tap_changers = sv_data.loc[sv_data['KEY'] == 'SvTapStep.TapChanger', 'VALUE']
+    missing_sv_tap_steps = ssh_tap_steps[~ssh_tap_steps.index.isin(sv_tap_changers)]
+
+    if missing_sv_tap_steps.empty:
+        return sv_data
+
+    logger.warning(f"Missing SvTapStep for {len(missing_sv_tap_steps)} tap changer(s), adding SvTapSteps and taking "
+                   f"tap values from SSH: {missing_sv_tap_steps.index.tolist()}")
+    tap_changers = missing_sv_tap_steps.reset_index()
+    tap_changers['SV_ID'] = [str(uuid.uuid4()) for _ in range(len(tap_changers.index))]
+    tap_steps_to_be_added = pd.concat([
+        pd.DataFrame({'ID': tap_changers['SV_ID'], 'KEY': 'Type', 'VALUE': 'SvTapStep'}),
+        pd.DataFrame({'ID': tap_changers['SV_ID'], 'KEY': 'SvTapStep.TapChanger', 'VALUE': tap_changers['ID']}),
+        pd.DataFrame({'ID': tap_changers['SV_ID'], 'KEY': 'SvTapStep.position', 'VALUE': tap_changers['VALUE']}),
+    ], ignore_index=True)
+    tap_steps_to_be_added['INSTANCE_ID'] = sv_data.INSTANCE_ID.iloc[0]
+
+    sv_data = pd.concat([sv_data, tap_steps_to_be_added], ignore_index=True)
 
     return sv_data
 
@@ -232,30 +241,20 @@ def get_opdm_data_from_models(model_data: list | pd.DataFrame):
     return model_data
 
 
-def get_boundary_nodes_between_igms(model_data: list | pd.DataFrame):
+def get_boundary_nodes_between_igms(model_data: list | pd.DataFrame, pairing_index: BoundaryPairingIndex | None = None):
     # TODO - EVALUATE LEGACY
     """
     Filters out nodes that are between the igms (mentioned at least 2 igms)
     :param model_data: input models
+    :param pairing_index: boundary pairing index of input models, built from model data if not given
     : return series of node ids
     """
-    model_data = get_opdm_data_from_models(model_data=model_data)
-    all_boundary_nodes = model_data[(model_data['KEY'] == 'TopologicalNode.boundaryPoint') &
-                                    (model_data['VALUE'] == 'true')]
-    # Get boundary nodes that exist in igms
-    merged = pd.merge(all_boundary_nodes,
-                      model_data[(model_data['KEY'] == 'SvVoltage.TopologicalNode')],
-                      left_on='ID', right_on='VALUE', suffixes=('_y', ''))
-    # Get duplicates (all of them) then duplicated values. keep=False marks all duplicates True, 'first' marks first
-    # occurrence to false, 'last' marks last occurrence to false. If any of them is used then in case duplicates are 2
-    # then 1 is retrieved, if duplicates >3 then duplicates-1 retrieved. So, get all the duplicates and as a second
-    # step, drop the duplicates
-    merged = (merged[merged.duplicated(['VALUE'], keep=False)]).drop_duplicates(subset=['VALUE'])
-    in_several_igms = (merged["VALUE"]).to_frame().rename(columns={'VALUE': 'ID'})
-    return in_several_igms
-
-
-def remove_duplicate_sv_voltages(cgm_sv_data, original_data):
+    if pairing_index is None:
+        pairing_index = BoundaryPairingIndex().add_models(get_opdm_data_from_models(model_data=model_data))
+    return pairing_index.get_nodes_between_igms()
+
+
+def remove_duplicate_sv_voltages(cgm_sv_data, original_data, pairing_index: BoundaryPairingIndex | None = None):
     # TODO - EVALUATE LEGACY
     """
     Pypowsybl 1.6.0 provides multiple sets of SvVoltage values for the topological nodes that are boundary nodes (from
@@ -263,70 +262,46 @@ def remove_duplicate_sv_voltages(cgm_sv_data, original_data):
     one that is zero).
     :param cgm_sv_data: merged SV profile from where duplicate SvVoltage values are removed
     :param original_data: will be used to get boundary node ids
+    :param pairing_index: boundary pairing index of original data
     :return updated merged SV profile
     """
-    # Check that models are in triplets
-    some_data = get_opdm_data_from_models(model_data=original_data)
     # Get ids of boundary nodes that are shared by several igms
-    in_several_igms = (get_boundary_nodes_between_igms(model_data=some_data))
-    # Get SvVoltage Ids corresponding to shared boundary nodes
-    sv_voltage_ids = pd.merge(cgm_sv_data[cgm_sv_data['KEY'] == 'SvVoltage.TopologicalNode'],
-                              in_several_igms.rename(columns={'ID': 'VALUE'}), on='VALUE')
-    # Get SvVoltage voltage values for corresponding SvVoltage Ids
-    sv_voltage_values = pd.merge(cgm_sv_data[cgm_sv_data['KEY'] == 'SvVoltage.v'][['ID', 'VALUE']].
-                                 rename(columns={'VALUE': 'SvVoltage.v'}),
-                                 sv_voltage_ids[['ID', 'VALUE']].
-                                 rename(columns={'VALUE': 'SvVoltage.SvTopologicalNode'}), on='ID')
-    # Just in case convert the values to numeric
-    sv_voltage_values[['SvVoltage.v']] = (sv_voltage_values[['SvVoltage.v']].apply(lambda x: x.apply(Decimal)))
-    # Group by topological node id and by some logic take SvVoltage that will be dropped
-    voltages_to_keep = (sv_voltage_values.groupby(['SvVoltage.SvTopologicalNode']).
-                        apply(lambda x: take_best_match_for_sv_voltage(input_data=x,
-                                                                       column_name='SvVoltage.v',
-                                                                       to_keep=True), include_groups=False))
-    voltages_to_discard = sv_voltage_values.merge(voltages_to_keep['ID'], on='ID', how='left', indicator=True)
-    voltages_to_discard = voltages_to_discard[voltages_to_discard['_merge'] == 'left_only']
+    in_several_igms = get_boundary_nodes_between_igms(model_data=original_data, pairing_index=pairing_index)
+    # Get SvVoltage values of shared boundary nodes, in order of SvVoltage.v in SV profile
+    sv_voltage_nodes = get_key_values(cgm_sv_data, 'SvVoltage.TopologicalNode')
+    sv_voltage_nodes = sv_voltage_nodes[sv_voltage_nodes.isin(in_several_igms['ID'])]
+    sv_voltage_values = get_key_values(cgm_sv_data, 'SvVoltage.v')
+    sv_voltage_values = pd.DataFrame({'SvVoltage.v': pd.to_numeric(sv_voltage_values[sv_voltage_values.index.isin(sv_voltage_nodes.index)])})
+    sv_voltage_values['SvVoltage.TopologicalNode'] = sv_voltage_nodes
+    # For each topological node keep first non-zero voltage, if all are zero then keep the first one
+    non_zero = sv_voltage_values['SvVoltage.v'] != 0
+    has_non_zero = non_zero.groupby(sv_voltage_values['SvVoltage.TopologicalNode']).transform('any')
+    voltages_to_keep = (sv_voltage_values[non_zero | ~has_non_zero]
+                        .drop_duplicates(subset='SvVoltage.TopologicalNode', keep='first'))
+    voltages_to_discard = sv_voltage_values.index.difference(voltages_to_keep.index)
     if not voltages_to_discard.empty:
-        logger.info(f"Removing {len(voltages_to_discard.index)} duplicate voltage levels from boundary nodes")
-        sv_voltages_to_remove = pd.merge(cgm_sv_data, voltages_to_discard['ID'].to_frame(), on='ID')
-        cgm_sv_data = triplets.rdf_parser.remove_triplet_from_triplet(cgm_sv_data, sv_voltages_to_remove)
+        logger.info(f"Removing {len(voltages_to_discard)} duplicate voltage levels from boundary nodes")
+        cgm_sv_data = cgm_sv_data[~cgm_sv_data['ID'].isin(voltages_to_discard)]
 
     return cgm_sv_data
 
 
-def set_paired_boundary_injections_to_zero(original_models, cgm_ssh_data):
+def set_paired_boundary_injections_to_zero(original_models, cgm_ssh_data, pairing_index: BoundaryPairingIndex | None = None):
     """Where there are paired boundary points, equivalent injections need to be modified
     Set P and Q to 0 - so that no additional consumption or production is on tie line
     Set voltage control off - so that no additional consumption or production is on tie line
     Set terminal to connected - to be sure we have paired connected injections at boundary point
     In some models terminals are missing references to ConnectivityNodes
     """
-
-    topological_boundary_points = original_models.query("KEY == 'TopologicalNode.boundaryPoint' and VALUE == 'true'")[["ID"]]
-    try:
-        terminals = original_models.type_tableview("Terminal").reset_index()[['ID',
-                                                                              'Terminal.ConductingEquipment',
-                                                                              'Terminal.ConnectivityNode',
-                                                                              'Terminal.TopologicalNode']]
-    except KeyError:
-        terminals = original_models.type_tableview("Terminal").reset_index()[['ID',
-                                                                              'Terminal.ConductingEquipment',
-                                                                              'Terminal.TopologicalNode']]
-    injections = cgm_ssh_data.type_tableview('EquivalentInjection').reset_index()[['ID',
-                                                                           # 'EquivalentInjection.p',
-                                                                           # 'EquivalentInjection.q',
-                                                                           # 'EquivalentInjection.regulationStatus'
-                                                                           ]]
-    topological_boundary_points = topological_boundary_points.merge(terminals,
-                                                                    left_on="ID",
-                                                                    right_on="Terminal.TopologicalNode",
-                                                                    suffixes=('_TopologicalNode', '_Terminal'))
-    topological_injections = injections.merge(topological_boundary_points,
-                                              left_on="ID",
-                                              right_on='Terminal.ConductingEquipment',
-                                              suffixes=('_ConnectivityNode', ''))
-    paired_injections = (topological_injections.groupby("Terminal.TopologicalNode")
-                                     .filter(lambda x: len(x) == 2))
+    if pairing_index is None:
+        pairing_index = BoundaryPairingIndex().add_models(original_models)
+
+    # Injections on boundary topological nodes which are present in merged SSH
+    injections = cgm_ssh_data.loc[(cgm_ssh_data['KEY'] == 'Type') & (cgm_ssh_data['VALUE'] == 'EquivalentInjection'), 'ID']
+    terminals = pairing_index.terminals
+    topological_injections = (terminals[(terminals['node_type'] == 'TopologicalNode') & terminals['ConductingEquipment'].isin(injections)]
+                              .rename(columns={'ConductingEquipment': 'ID'}))
+    paired_injections = topological_injections[topological_injections.groupby('node')['ID'].transform('size') == 2]
 
     # Set terminal status
     updated_terminal_status = paired_injections[["ID_Terminal"]].copy().rename(columns={"ID_Terminal": "ID"})
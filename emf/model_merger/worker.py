@@ -1,7 +1,7 @@
 import logging
 import sys
 from uuid import uuid4
-from emf.common.logging import custom_logger
+from emf.common.logging import custom_logger, metrics
 
 # Supress FutureWarnings from triplets library cause by pandas to_numeric errors ignore deprecation
 import warnings
@@ -23,6 +23,7 @@ logging.getLogger('triplets').setLevel(logging.WARNING)
 parse_app_properties(caller_globals=globals(), path=config.paths.cgm_worker.merger)
 
 logger.info(f"Starting 'model-merger' worker with assigned trace uuid: {worker_uuid}")
+metrics.record_startup(worker="model-merger", stage="imports")
 
 # RabbitMQ consumer implementation
 if CONSUMER_TYPE == "SINGLE_MESSAGE":
@@ -32,6 +33,7 @@ if CONSUMER_TYPE == "SINGLE_MESSAGE":
         message_handlers=[HandlerMergeModels()],
         forward=OUTPUT_RMQ_EXCHANGE,
     )
+    metrics.record_startup(worker="model-merger", stage="initialized")
     sys.exit(consumer.run())
 elif CONSUMER_TYPE == "LONG_LIVING":
     # RabbitMQ long-living consumer implementation
@@ -39,6 +41,7 @@ elif CONSUMER_TYPE == "LONG_LIVING":
                                   message_handlers=[HandlerMergeModels()],
                                   forward=OUTPUT_RMQ_EXCHANGE,
                                   )
+    metrics.record_startup(worker="model-merger", stage="initialized")
     try:
         consumer.run()
     except KeyboardInterrupt:
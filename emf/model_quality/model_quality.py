@@ -2,13 +2,13 @@ import logging
 import pandas as pd
 import config
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from emf.common.config_parser import parse_app_properties
 from emf.common.helpers.opdm_objects import load_opdm_objects_to_triplets
 from emf.common.integrations import elastic, minio_api
 from emf.common.integrations.object_storage import models
-from triplets.rdf_parser import load_all_to_dataframe
 from emf.common.helpers.statistics import get_system_metrics, get_tieflow_data
-from emf.model_quality.quality_functions import generate_quality_report, process_zipped_cgm, set_common_metadata
+from emf.model_quality.quality_functions import generate_quality_report, load_zipped_cgm, set_common_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -21,77 +21,113 @@ class HandlerModelQuality:
         self.minio_service = minio_api.ObjectStorage()
         self.elastic_service = elastic.Elastic()
 
-    def handle(self, message: bytes, properties: dict, **kwargs):
-
-        # Load OPDM metadata objects from binary to json
-        model_metadata = json.loads(message)
-        object_type = properties.headers['opde:Object-Type']
-        common_metadata = set_common_metadata(model_metadata, object_type)
-        rule_sets = {'igm_rule_set': IGM_RULE_SET.split(','), 'cgm_rule_set': CGM_RULE_SET.split(',')}
-
-        if object_type == 'CGM':
-            model_data = self.minio_service.download_object(model_metadata.get('minio-bucket', 'opde-confidential-models'),
-                                                              model_metadata.get('pmd:content-reference'))
-            logger.info(f"Loading merged model")
-            unzipped = process_zipped_cgm(model_data)
-            network= load_all_to_dataframe(unzipped)
-
-        elif object_type == 'IGM':
-            latest_boundary = models.get_latest_boundary()
-            model_data = [models.get_content(metadata=opdm_object) for opdm_object in model_metadata]
-            try:
-                for opdm_object in model_data:
-                    network = load_opdm_objects_to_triplets(opdm_objects=[opdm_object, latest_boundary])
-            except:
-                logger.error("Failed to load IGM data")
-                network = pd.DataFrame
-        else:
-            logger.error("Object type metadata is incorrect")
-            model_data = None
-            network = pd.DataFrame
-
-        # Generate quality report and network statistics
-        if not network.empty:
+    def load_cgm(self, model_metadata: dict):
+        model_data = self.minio_service.download_object(model_metadata.get('minio-bucket', 'opde-confidential-models'),
+                                                        model_metadata.get('pmd:content-reference'))
+        logger.info(f"Loading merged model: {model_metadata.get('pmd:content-reference')}")
+
+        return load_zipped_cgm(model_data)
+
+    @staticmethod
+    def load_igm(opdm_object: dict, latest_boundary: dict):
+        opdm_object = models.get_content(metadata=opdm_object)
+        logger.info(f"Loading individual model: {opdm_object.get('pmd:content-reference')}")
+
+        return load_opdm_objects_to_triplets(opdm_objects=[opdm_object, latest_boundary])
+
+    def evaluate_model(self, network: pd.DataFrame, object_type: str, model_metadata: dict | list, rule_sets: dict):
+        """
+        Generates quality report and network statistics of single loaded model
+        :param network: model triplets
+        :param object_type: IGM or CGM
+        :param model_metadata: OPDM object metadata, for IGM as single item list
+        :param rule_sets: quality rule sets by object type
+        :return: tuple of quality report and model statistics, empty if generation failed
+        """
+        qa_report, model_statistics, tieflow_data = {}, {}, None
+        try:
             tieflow_data = get_tieflow_data(network)
-            try:
-                qa_report = generate_quality_report(self, network=network, object_type=object_type,
-                                                    model_metadata=model_metadata, rule_sets=rule_sets,
-                                                    tieflow_data=tieflow_data)
-            except Exception as e:
-                logger.error(f"Failed to generate quality report: {e}")
-            try:
-                model_statistics = get_system_metrics(network, tieflow_data=tieflow_data)
-            except Exception as e:
-                model_statistics = {}
-                logger.error(f"Failed to get model statistics: {e}")
-        else:
-            model_statistics = {}
-            qa_report = {}
-            logger.error("Model was not loaded correctly, either missing in MinIO or incorrect data")
+        except Exception as e:
+            logger.error(f"Failed to get tie flow data: {e}")
+        try:
+            qa_report = generate_quality_report(self, network=network, object_type=object_type,
+                                                model_metadata=model_metadata, rule_sets=rule_sets,
+                                                tieflow_data=tieflow_data)
+        except Exception as e:
+            logger.error(f"Failed to generate quality report: {e}")
+        try:
+            model_statistics = get_system_metrics(network, tieflow_data=tieflow_data)
+        except Exception as e:
+            logger.error(f"Failed to get model statistics: {e}")
 
+        common_metadata = set_common_metadata(model_metadata, object_type)
+        if qa_report:
+            qa_report.update(common_metadata)
         if model_statistics:
             model_statistics.update(common_metadata)
-            try:
-                response = self.elastic_service.send_to_elastic(index=ELK_STATISTICS_INDEX, json_message=model_statistics)
-            except Exception as error:
-                logger.error(f"Statistics report sending to Elastic failed: {error}")
 
-            logger.info(f"Statistics report sent to elastic index: '{ELK_STATISTICS_INDEX}'")
-        else:
-            logger.error("Statistics report generator failed, data not sent")
+        return qa_report, model_statistics
 
-        # Send validation report to Elastic
-        if qa_report:
-            qa_report.update(common_metadata)
-            try:
-                response = self.elastic_service.send_to_elastic(index=ELK_QUALITY_INDEX, json_message=qa_report)
-            except Exception as error:
-                logger.error(f"Validation report sending to Elastic failed: {error}")
+    def send_reports(self, index: str, reports: list, report_name: str):
+        if not reports:
+            logger.error(f"{report_name} generator failed, data not sent")
+            return
+        try:
+            # Reports are serialized as in single document sending, values not supported by json are sent as strings
+            reports = [json.loads(json.dumps(report, default=str)) for report in reports]
+            self.elastic_service.send_to_elastic_bulk(index=index, json_message_list=reports)
+            logger.info(f"{len(reports)} {report_name.lower()}(s) sent to elastic index: '{index}'")
+        except Exception as error:
+            logger.error(f"{report_name} sending to Elastic failed: {error}")
+
+    def handle(self, message: bytes, properties: dict, **kwargs):
 
-            logger.info(f"Quality report sent to elastic index: '{ELK_QUALITY_INDEX}'")
-        else:
-            logger.error("Error, quality report generator failed, data not sent")
+        # Load OPDM metadata objects from binary to json
+        model_metadata = json.loads(message)
+        object_type = properties.headers['opde:Object-Type']
+        rule_sets = {'igm_rule_set': IGM_RULE_SET.split(','), 'cgm_rule_set': CGM_RULE_SET.split(',')}
 
-        del model_data, model_metadata, network
+        # All models of a message are loaded concurrently, each model is evaluated with its own metadata
+        loaders = {}
+        with ThreadPoolExecutor(max_workers=int(QUALITY_WORKERS)) as executor:
+            if object_type == 'CGM':
+                loaders[executor.submit(self.load_cgm, model_metadata)] = model_metadata
+            elif object_type == 'IGM':
+                latest_boundary = models.get_latest_boundary()
+                for opdm_object in model_metadata:
+                    loaders[executor.submit(self.load_igm, opdm_object, latest_boundary)] = [opdm_object]
+            else:
+                logger.error("Object type metadata is incorrect")
+
+            qa_reports, statistics_reports = [], []
+            for future in as_completed(loaders):
+                try:
+                    network = future.result()
+                except Exception as error:
+                    logger.error(f"Failed to load {object_type} data: {error}")
+                    continue
+                if network.empty:
+                    logger.error("Model was not loaded correctly, either missing in MinIO or incorrect data")
+                    continue
+
+                # Failure of one model does not prevent reports of other models of the message
+                try:
+                    qa_report, model_statistics = self.evaluate_model(network=network,
+                                                                      object_type=object_type,
+                                                                      model_metadata=loaders.pop(future),
+                                                                      rule_sets=rule_sets)
+                except Exception as error:
+                    logger.error(f"Failed to evaluate {object_type} data: {error}")
+                    continue
+                finally:
+                    del network
+                if qa_report:
+                    qa_reports.append(qa_report)
+                if model_statistics:
+                    statistics_reports.append(model_statistics)
+
+        # Send all reports of a message to Elastic in bulk
+        self.send_reports(index=ELK_STATISTICS_INDEX, reports=statistics_reports, report_name="Statistics report")
+        self.send_reports(index=ELK_QUALITY_INDEX, reports=qa_reports, report_name="Quality report")
 
         return message, properties
@@ -1,7 +1,9 @@
 from io import BytesIO
 from zipfile import ZipFile
 import logging
+import pandas as pd
 import config
+from triplets.rdf_parser import load_RDF_to_list
 from emf.common.config_parser import parse_app_properties
 from emf.model_quality.quality_rules import *
 
@@ -65,23 +67,51 @@ def set_common_metadata(model_metadata, object_type):
     return metadata
 
 
-def process_zipped_cgm(zipped_bytes, processed=None):
-    if processed is None:
-        processed = []
-    with ZipFile(BytesIO(zipped_bytes)) as zf:
+def iter_zipped_xml(zipped_content):
+    """
+    Walks nested zip archives lazily and yields xml instance files as decompressing streams.
+    Only compressed content of currently walked nested archive is kept in memory
+    :param zipped_content: zip archive as bytes or file object
+    :return: generator of file objects with name attribute, valid until next item is requested
+    """
+    if isinstance(zipped_content, (bytes, bytearray)):
+        zipped_content = BytesIO(zipped_content)
+
+    with ZipFile(zipped_content) as zf:
         for name in zf.namelist():
-            with zf.open(name) as file:
-                content = file.read()
-                if name.endswith('.zip'):
-                    process_zipped_cgm(content, processed)
-                elif name.endswith('.xml'):
-                    file_object = BytesIO(content)
-                    file_object.name = name
-                    processed.append(file_object)
+            if name.endswith('.zip'):
+                yield from iter_zipped_xml(zf.read(name))
+            elif name.endswith('.xml'):
+                with zf.open(name) as file_object:
+                    yield file_object
+
+
+def process_zipped_cgm(zipped_bytes):
+    processed = []
+    for file in iter_zipped_xml(zipped_bytes):
+        file_object = BytesIO(file.read())
+        file_object.name = file.name
+        processed.append(file_object)
 
     return processed
 
 
+def load_zipped_cgm(zipped_content, data_type: str = "string") -> pd.DataFrame:
+    """
+    Parses all instance files of (nested) zip archive to triplets, files are decompressed and parsed one at a time
+    :param zipped_content: zip archive as bytes or file object
+    :param data_type: data type of triplet columns
+    :return: triplets dataframe
+    """
+    columns = ["ID", "KEY", "VALUE", "INSTANCE_ID"]
+    instances = [pd.DataFrame(load_RDF_to_list(file_object), columns=columns, dtype=data_type)
+                 for file_object in iter_zipped_xml(zipped_content)]
+    if not instances:
+        return pd.DataFrame(columns=columns, dtype=data_type)
+
+    return pd.concat(instances, ignore_index=True)
+
+
 def set_quality_flag(report, object_type, rule_dict):
 
     if object_type == 'CGM':
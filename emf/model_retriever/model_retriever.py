@@ -36,14 +36,18 @@ class HandlerModelsFromOPDM:
             time_horizon = opdm_object.get('pmd:timeHorizon', '') # import only filtered timeframes
             process_party_exclusion = PROCESS_PARTY.split(',')
             process_timehorizon_exclusion = PROCESS_TH.split(',')
-            if (party not in process_party_exclusion) and (time_horizon not in process_timehorizon_exclusion):
-                self.opdm_service.download_object(opdm_object=opdm_object)
-                opdm_object["data-source"] = "OPDM"
-            else:
+            if (party in process_party_exclusion) or (time_horizon in process_timehorizon_exclusion):
                 logger.warning(f"{party} and {time_horizon} message not processed due to configured filtering") # if out of filter raise exception and move on
                 properties.headers['success'] = False
                 return opdm_objects, properties
 
+        # Download components of all models concurrently
+        if len(self.opdm_service.download_objects(opdm_objects=opdm_objects)) != len(opdm_objects):
+            raise Exception("Failure in model retrieving, message going to be rejected")
+
+        for opdm_object in opdm_objects:
+            opdm_object["data-source"] = "OPDM"
+
         return opdm_objects, properties
 
 
@@ -81,7 +85,15 @@ class HandlerModelsToMinio:
         if isinstance(message, bytes):
             opdm_objects = json.loads(message)
 
-        # Download each OPDM object network model from OPDE
+        # Profiles which might be already stored in object storage (Minio) are checked in one batch before uploads
+        eq_references = [component['opdm:Profile']['pmd:content-reference'].replace('//', '/')
+                         for opdm_object in opdm_objects for component in opdm_object['opde:Component']
+                         if component['opdm:Profile']['pmd:cgmesProfile'] == "EQ"]  # TODO currently only for EQ
+        existing_objects = {}
+        if eq_references:
+            existing_objects = self.minio_service.get_objects_metadata(object_names=eq_references, bucket_name=MINIO_BUCKET)
+
+        futures = []
         for opdm_object in opdm_objects:
 
             # Put all components to bytesio zip (each component to different zip)
@@ -91,28 +103,25 @@ class HandlerModelsToMinio:
                 content_reference = component['opdm:Profile']['pmd:content-reference']
                 content_reference = content_reference.replace('//', '/')
 
-                # Check whether profile already exist in object storage (Minio)
-                if component['opdm:Profile']['pmd:cgmesProfile'] == "EQ":  # TODO currently only for EQ
-                    profile_exist = self.minio_service.object_exists(bucket_name=MINIO_BUCKET, object_name=content_reference)
-                    if profile_exist:
-                        logger.info(f"Profile already stored in object storage: {content_reference}")
-                        component['opdm:Profile']['DATA'] = None
-                        continue
-
                 # Put content data into bytes object
                 output_object = BytesIO(component['opdm:Profile']['DATA'])
+                output_object.name = content_reference
 
                 # Delete data
                 component['opdm:Profile']['DATA'] = None
 
-                # Upload components to minio storage
-                output_object.name = content_reference
-                logger.info(f"Uploading component to object storage: {output_object.name}")
-                self.minio_service.upload_object(file_path_or_file_object=output_object, bucket_name=MINIO_BUCKET)
+                # Upload starts right away, while next components are prepared
+                is_eq = component['opdm:Profile']['pmd:cgmesProfile'] == "EQ"
+                futures.append(self.minio_service.submit_upload(file_object=output_object,
+                                                                bucket_name=MINIO_BUCKET,
+                                                                existing_objects=existing_objects if is_eq else None))
 
             # Store minio bucket name in metadata object
             opdm_object["minio-bucket"] = MINIO_BUCKET
 
+        for future in futures:
+            future.result()
+
         return json.dumps(opdm_objects), properties
 
 
@@ -1,12 +1,15 @@
 import logging
+import os
+import resource
+import multiprocessing
 import pandas as pd
 import config
 import json
 import time
 import math
 import pypowsybl as pp
-import uuid
 import triplets
+from concurrent.futures import ProcessPoolExecutor
 from emf.common.config_parser import parse_app_properties
 from emf.common.integrations import elastic, minio_api, edx
 from emf.common.integrations.object_storage import models
@@ -103,35 +106,32 @@ class PostLFValidator:
     def validate_network_elements(self):
         """Run all network element validations"""
         validations = list(set(attr_to_dict(pp._pypowsybl.ValidationType).keys()) - set(["ALL", "name", "value"]))
-        _status = {}
-        for validation in validations:
-            validation_type = getattr(pp._pypowsybl.ValidationType, validation)
-            logger.info(f"Running validation: {validation_type}")
-            try:
-                # TODO figure out how to store full validation results if needed. Currently only status is taken
-                _status[validation] = pp.loadflow.run_validation(network=self.network,
-                                                                 validation_types=[validation_type]).valid.__bool__()
-            except Exception as error:
-                logger.warning(f"Failed {validation_type} validation with error: {error}")
-                continue
+        logger.info(f"Running validations: {validations}")
+        try:
+            # All validation types are evaluated in one pass, status is taken per type from result tables
+            _status = validator_functions.run_network_element_validations(network=self.network, validations=validations)
+        except Exception as error:
+            logger.warning(f"Failed single pass validation with error: {error}, running validations separately")
+            _status = {}
+            for validation in validations:
+                validation_type = getattr(pp._pypowsybl.ValidationType, validation)
+                try:
+                    _status[validation] = pp.loadflow.run_validation(network=self.network,
+                                                                     validation_types=[validation_type]).valid.__bool__()
+                except Exception as error:
+                    logger.warning(f"Failed {validation_type} validation with error: {error}")
+                    continue
         self.report['element_validation'] = _status
 
     def validate_kirchhoff_first_law(self):
         """Validates possible Kirchhoff first law errors after loadflow"""
-        # Export SV profile and check it for Kirchhoff 1st law
-        export_parameters = {"iidm.export.cgmes.profiles": 'SV',
-                             "iidm.export.cgmes.naming-strategy": "cgmes-fix-all-invalid-ids"}
-        bytes_object = self.network.save_to_binary_buffer(format="CGMES", parameters=export_parameters)
-        bytes_object.name = f"{uuid.uuid4()}.zip"
-
-        # Load SV data
-        sv_data = pd.read_RDF([bytes_object])
-
-        # Check violations after loadflow
-        violated_nodes = validator_functions.get_nodes_against_kirchhoff_first_law(original_models=self.network_triplets,
-                                                                                   cgm_sv_data=sv_data,
-                                                                                   nodes_only=True,
-                                                                                   consider_sv_injection=True)
+        # Check nodal balance directly from solved network flows, slack mismatch is treated as SV injection
+        slack_bus_results = self.report.get('loadflow', {}).get('slack_bus_results', [])
+        violated_nodes = validator_functions.get_network_nodes_against_kirchhoff_first_law(network=self.network,
+                                                                                          slack_bus_results=slack_bus_results,
+                                                                                          nodes_only=True)
+        if not violated_nodes.empty:
+            logger.warning(f"Found {len(violated_nodes.index)} nodes against Kirchhoff first law")
         kirchhoff_first_law_valid = True if violated_nodes.empty else False
         self.report['validations']['kirchhoff_first_law'] = kirchhoff_first_law_valid
 
@@ -198,6 +198,93 @@ class TemporaryPreMergeModifications:
         return self.network
 
 
+def validate_opdm_object(opdm_object: dict, latest_boundary: dict, start_time: float | None = None) -> dict:
+    """
+    Runs pre and post loadflow validations and pre-merge modifications of single network model.
+    Defined on module level to be picklable for process pool workers
+    :param opdm_object: OPDM object with downloaded content
+    :param latest_boundary: boundary OPDM object with downloaded content
+    :param start_time: reference time for report duration, by default start of this validation
+    :return: dictionary of cleaned OPDM object, validation report, modified model files and model statistics
+    """
+    start_time = start_time or time.time()
+    report = {}
+
+    # Run pre-loadflow validations
+    network_triplets = load_opdm_objects_to_triplets(opdm_objects=[opdm_object, latest_boundary])
+    pre_lf_validation = PreLFValidator(network=network_triplets)
+    pre_lf_validation.run_validation()
+
+    # Run post-loadflow validations
+    network = load_network_model(opdm_objects=[opdm_object, latest_boundary])
+    post_lf_validation = PostLFValidator(network=network, network_triplets=network_triplets)
+    post_lf_validation.run_validation()
+    del network
+
+    # Clean DATA from OPDM object as this is already converted to other formats
+    opdm_object = clean_data_from_opdm_objects(opdm_objects=[opdm_object])[0]
+
+    # Apply pre-processing modification to models
+    pre_merge_modification = TemporaryPreMergeModifications(network=network_triplets, tso=opdm_object["pmd:TSO"])
+    network_triplets = pre_merge_modification.run_pre_process_modifications()
+    cgmes_modified_model = export_to_cgmes_zip([network_triplets])
+    cgmes_files = []
+    for component in opdm_object['opde:Component']:
+        # Map exported modified file with initial inside opdm object
+        cgmes_file = [i for i in cgmes_modified_model if i.name == component['opdm:Profile']['pmd:fileName']][0]
+        cgmes_file.name = component['opdm:Profile']['pmd:content-reference'].replace('//', '/')
+        cgmes_files.append(cgmes_file)
+
+    # Collect both pre and post loadflow validation reports and merge
+    report.update(pre_lf_validation.report)
+    report.update(post_lf_validation.report)
+    report.update(pre_merge_modification.report)
+
+    # Include relevant metadata fields
+    report['@scenario_timestamp'] = opdm_object['pmd:scenarioDate']
+    report['@time_horizon'] = opdm_object['pmd:timeHorizon']
+    report['fullModel_ID'] = opdm_object['pmd:fullModel_ID']
+    report['@version'] = int(opdm_object['pmd:versionNumber'])
+    report['content_reference'] = opdm_object['pmd:content-reference']
+    report['tso'] = opdm_object['pmd:TSO']
+    report['duration_s'] = round(time.time() - start_time, 3)
+    report['minio_bucket'] = opdm_object['minio-bucket']
+
+    # Model statistics stored to OPDM metadata object
+    try:
+        model_statistics = {
+            'ac_net_position': get_ac_net_position(models_as_triplets=network_triplets),
+            'sum_conform_load': get_sum_of_loads(models_as_triplets=network_triplets, parameter_name='ConformLoad'),
+        }
+    except Exception as error:
+        logger.error(f"Model statistics calculation failed: {error}")
+        model_statistics = None
+
+    return {'opdm_object': opdm_object,
+            'report': report,
+            'cgmes_modified_model': cgmes_files,
+            'model_statistics': model_statistics}
+
+
+def _initialize_validation_worker():
+    """Process pool worker initializer, configures logging same way as main worker"""
+    from emf.common.logging import custom_logger
+    custom_logger.initialize_custom_logger(extra={'worker': 'model-validator', 'worker_pid': os.getpid()})
+
+
+def _validate_opdm_object_in_worker(opdm_object: dict, latest_boundary: dict, start_time: float,
+                                    memory_budget_mb: int = 0) -> dict:
+    """Wrapper of validate_opdm_object for process pool workers, reports peak memory against budget"""
+    result = validate_opdm_object(opdm_object=opdm_object, latest_boundary=latest_boundary, start_time=start_time)
+    peak_memory_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if memory_budget_mb and peak_memory_mb > memory_budget_mb:
+        logger.warning(f"Validation worker peak memory {peak_memory_mb:.0f} MB exceeded budget of {memory_budget_mb} MB")
+    else:
+        logger.debug(f"Validation worker peak memory {peak_memory_mb:.0f} MB")
+
+    return result
+
+
 class HandlerModelsValidator:
 
     def __init__(self):
@@ -210,6 +297,64 @@ class HandlerModelsValidator:
         index = response['hits']['hits'][0]['_index']
         self.elastic_service.update_document(index=index, id=id, body=body)
 
+    @staticmethod
+    def get_validation_workers(number_of_models: int) -> int:
+        """
+        Defines process pool size from configured number of workers, number of models and memory budget per worker
+        :param number_of_models: number of models to be validated
+        :return: number of validation workers, 1 means validation in current process
+        """
+        workers = min(int(VALIDATION_WORKERS), number_of_models)
+        memory_budget_mb = int(VALIDATION_WORKER_MEMORY_MB)
+        if workers > 1 and memory_budget_mb > 0:
+            available_memory_mb = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+            workers = min(workers, int(available_memory_mb // memory_budget_mb))
+            logger.info(f"Available memory {available_memory_mb:.0f} MB allows {workers} validation workers")
+
+        return max(workers, 1)
+
+    def run_validations(self, opdm_objects: list, latest_boundary: dict, start_time: float):
+        """
+        Validates network models sequentially or in process pool if more than one worker is configured.
+        Results are yielded in submission order, failed validation yields None as result
+        :param opdm_objects: list of OPDM objects with downloaded content
+        :param latest_boundary: boundary OPDM object with downloaded content
+        :param start_time: reference time for report duration
+        :return: generator of tuples (opdm_object, result)
+        """
+        workers = self.get_validation_workers(number_of_models=len(opdm_objects))
+
+        if workers == 1:
+            for opdm_object in opdm_objects:
+                try:
+                    yield opdm_object, validate_opdm_object(opdm_object=opdm_object,
+                                                            latest_boundary=latest_boundary,
+                                                            start_time=start_time)
+                except Exception as error:
+                    logger.error(f"Models validator failed with exception: {error}", exc_info=True)
+                    yield opdm_object, None
+            return
+
+        # Spawned workers are used as pypowsybl native runtime does not survive fork
+        logger.info(f"Validating {len(opdm_objects)} models with {workers} process pool workers")
+        max_tasks_per_child = int(VALIDATION_WORKER_MAX_TASKS) or None
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_initialize_validation_worker,
+                                 max_tasks_per_child=max_tasks_per_child) as executor:
+            futures = [executor.submit(_validate_opdm_object_in_worker,
+                                       opdm_object=opdm_object,
+                                       latest_boundary=latest_boundary,
+                                       start_time=start_time,
+                                       memory_budget_mb=int(VALIDATION_WORKER_MEMORY_MB))
+                       for opdm_object in opdm_objects]
+            for opdm_object, future in zip(opdm_objects, futures):
+                try:
+                    yield opdm_object, future.result()
+                except Exception as error:
+                    logger.error(f"Models validator failed with exception: {error}", exc_info=True)
+                    yield opdm_object, None
+
     def handle(self, message: bytes, properties: dict, **kwargs):
 
         start_time = time.time()
@@ -231,52 +376,21 @@ class HandlerModelsValidator:
 
         # logger.info(f"Validation parameters used: {VALIDATION_LOAD_FLOW_SETTINGS}")
 
-        # Run network model validations
-        for opdm_object in opdm_objects:
-            report = {}
-            try:
-                # Run pre-loadflow validations
-                network_triplets = load_opdm_objects_to_triplets(opdm_objects=[opdm_object, latest_boundary])
-                pre_lf_validation = PreLFValidator(network=network_triplets)
-                pre_lf_validation.run_validation()
-
-                # Run post-loadflow validations
-                network = load_network_model(opdm_objects=[opdm_object, latest_boundary])
-                post_lf_validation = PostLFValidator(network=network, network_triplets=network_triplets)
-                post_lf_validation.run_validation()
-
-                # Clean DATA from OPDM object as this is already converted to other formats
-                opdm_object = clean_data_from_opdm_objects(opdm_objects=[opdm_object])[0]
-
-                # Apply pre-processing modification to models and store in Minio
-                pre_merge_modification = TemporaryPreMergeModifications(network=network_triplets,
-                                                                        tso=opdm_object["pmd:TSO"])
-                network_triplets = pre_merge_modification.run_pre_process_modifications()
-                cgmes_modified_model = export_to_cgmes_zip([network_triplets])
-                for component in opdm_object['opde:Component']:
-                    # Map exported modified file with initial inside opdm object
-                    cgmes_file = [i for i in cgmes_modified_model if i.name == component['opdm:Profile']['pmd:fileName']][0]
-                    cgmes_file.name = component['opdm:Profile']['pmd:content-reference'].replace('//', '/')
-                    logger.info(f"Uploading modified model content to Minio: {cgmes_file.name}")
-                    self.minio_service.upload_object(file_path_or_file_object=cgmes_file,
-                                                     bucket_name=opdm_object['minio-bucket'],
-                                                     tags={"state": "modified"})
-
-                # Collect both pre and post loadflow validation reports and merge
-                report.update(pre_lf_validation.report)
-                report.update(post_lf_validation.report)
-                report.update(pre_merge_modification.report)
-
-                # Include relevant metadata fields
-                report['@scenario_timestamp'] = opdm_object['pmd:scenarioDate']
-                report['@time_horizon'] = opdm_object['pmd:timeHorizon']
-                report['fullModel_ID'] = opdm_object['pmd:fullModel_ID']
-                report['@version'] = int(opdm_object['pmd:versionNumber'])
-                report['content_reference'] = opdm_object['pmd:content-reference']
-                report['tso'] = opdm_object['pmd:TSO']
-                report['duration_s'] = round(time.time() - start_time, 3)
-                report['minio_bucket'] = opdm_object['minio-bucket']
+        # Run network model validations, publishing results in the order models were received
+        for opdm_object, result in self.run_validations(opdm_objects=opdm_objects,
+                                                        latest_boundary=latest_boundary,
+                                                        start_time=start_time):
+            if result is None:
+                continue
+            opdm_object = result['opdm_object']
+            report = result['report']
 
+            try:
+                # Upload all modified components concurrently
+                logger.info(f"Uploading modified model content to Minio: {[i.name for i in result['cgmes_modified_model']]}")
+                self.minio_service.upload_objects(file_objects=result['cgmes_modified_model'],
+                                                  bucket_name=opdm_object['minio-bucket'],
+                                                  tags={"state": "modified"})
             except Exception as error:
                 logger.error(f"Models validator failed with exception: {error}", exc_info=True)
                 continue
@@ -289,9 +403,9 @@ class HandlerModelsValidator:
                 logger.info("Updating OPDM metadata in Elastic with model valid status")
                 # self.update_opdm_metadata_object(id=opdm_object['opde:Id'], body={'valid': valid})
                 opdm_object["valid"] = valid
-                opdm_object['ac_net_position'] = get_ac_net_position(models_as_triplets=network_triplets)
-                opdm_object['sum_conform_load'] = get_sum_of_loads(models_as_triplets=network_triplets,
-                                                                   parameter_name='ConformLoad')
+                if result['model_statistics'] is None:
+                    raise ValueError("model statistics not available")
+                opdm_object.update(result['model_statistics'])
                 self.elastic_service.send_to_elastic_bulk(
                     index=METADATA_ELK_INDEX,
                     json_message_list=[opdm_object],
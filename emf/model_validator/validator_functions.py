@@ -1,10 +1,11 @@
 import logging
 import pandas
+import pypowsybl
 import triplets
 import xml.etree.ElementTree as ET
 import datetime
 from emf.common.helpers.opdm_objects import load_opdm_objects_to_triplets
-from emf.common.helpers.statistics import get_tieflow_data, sum_on_KEY
+from emf.common.helpers.statistics import get_tieflow_data, sum_on_KEY, get_ac_net_position as get_tieflow_ac_net_position
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,8 @@ def get_nodes_against_kirchhoff_first_law(original_models,
     :param nodes_only: if true then return unique nodes only, if false then nodes with corresponding terminals
     :param sv_injection_limit: threshold for deciding whether the node is violated by sum of flows
     """
-    original_models = load_opdm_objects_to_triplets(opdm_objects=original_models)
+    if not isinstance(original_models, pandas.DataFrame):
+        original_models = load_opdm_objects_to_triplets(opdm_objects=original_models)
     sv_injections = pandas.DataFrame()
     if cgm_sv_data is None:
         cgm_sv_data = original_models
@@ -42,9 +44,10 @@ def get_nodes_against_kirchhoff_first_law(original_models,
     terminals = original_models.type_tableview('Terminal').rename_axis('Terminal').reset_index()
     terminals = terminals[['Terminal', 'Terminal.ConductingEquipment', 'Terminal.TopologicalNode']]
     # Calculate summed flows per topological node
-    flows_summed = ((power_flow.merge(terminals, left_on='SvPowerFlow.Terminal', right_on='Terminal', how='left')
-                     .groupby('Terminal.TopologicalNode')[['SvPowerFlow.p', 'SvPowerFlow.q']]
-                     .agg(lambda x: pandas.to_numeric(x, errors='coerce').sum()))
+    power_flow = power_flow.assign(**{column: pandas.to_numeric(power_flow[column], errors='coerce')
+                                      for column in ['SvPowerFlow.p', 'SvPowerFlow.q']})
+    flows_summed = (power_flow.merge(terminals, left_on='SvPowerFlow.Terminal', right_on='Terminal', how='left')
+                    .groupby('Terminal.TopologicalNode')[['SvPowerFlow.p', 'SvPowerFlow.q']].sum()
                     .rename_axis('Terminal.TopologicalNode').reset_index())
     if not sv_injections.empty:
         flows_summed = (pandas.concat([flows_summed, sv_injections]).groupby('Terminal.TopologicalNode').sum()
@@ -62,6 +65,137 @@ def get_nodes_against_kirchhoff_first_law(original_models,
         return pandas.DataFrame()
 
 
+# Mapping of pypowsybl validation types to result tables of ValidationResult
+VALIDATION_RESULT_TABLES = {
+    'FLOWS': 'branch_flows',
+    'BUSES': 'buses',
+    'GENERATORS': 'generators',
+    'SHUNTS': 'shunts',
+    'SVCS': 'svcs',
+    'TWTS': 'twts',
+    'TWTS3W': 't3wts',
+}
+
+
+def run_network_element_validations(network: pypowsybl.network.Network, validations: list | None = None):
+    """
+    Runs all requested network element validations in one pass over solved network and reports status per type.
+    Validation is considered as passed for type if all of its elements are validated
+    :param network: solved pypowsybl network
+    :param validations: list of validation type names, e.g. ['BUSES', 'FLOWS'], by default all types
+    :return: dictionary of validation type name and its status
+    """
+    if validations is None:
+        validations = list(VALIDATION_RESULT_TABLES.keys())
+
+    validation_types = [getattr(pypowsybl._pypowsybl.ValidationType, validation) for validation in validations]
+    result = pypowsybl.loadflow.run_validation(network=network, validation_types=validation_types)
+
+    status = {}
+    for validation in validations:
+        table = getattr(result, VALIDATION_RESULT_TABLES[validation], None)
+        if table is None or table.empty:
+            status[validation] = True
+        else:
+            status[validation] = bool(table['validated'].all())
+            if not status[validation]:
+                logger.info(f"Validation {validation} failed for {int((~table['validated']).sum())} element(s)")
+
+    return status
+
+
+# Network element types with their terminal sides which carry flows
+NETWORK_TERMINAL_SIDES = {
+    pypowsybl.network.ElementType.LINE: ['1', '2'],
+    pypowsybl.network.ElementType.TWO_WINDINGS_TRANSFORMER: ['1', '2'],
+    pypowsybl.network.ElementType.THREE_WINDINGS_TRANSFORMER: ['1', '2', '3'],
+    pypowsybl.network.ElementType.GENERATOR: [''],
+    pypowsybl.network.ElementType.LOAD: [''],
+    pypowsybl.network.ElementType.BATTERY: [''],
+    pypowsybl.network.ElementType.SHUNT_COMPENSATOR: [''],
+    pypowsybl.network.ElementType.STATIC_VAR_COMPENSATOR: [''],
+    pypowsybl.network.ElementType.DANGLING_LINE: [''],
+    pypowsybl.network.ElementType.LCC_CONVERTER_STATION: [''],
+    pypowsybl.network.ElementType.VSC_CONVERTER_STATION: [''],
+}
+
+
+def get_network_terminal_flows(network: pypowsybl.network.Network):
+    """
+    Collects solved terminal flows of all network elements together with their bus-breaker view bus,
+    which corresponds to CGMES TopologicalNode
+    :param network: solved pypowsybl network
+    :return: dataframe with columns element_id, element_type, side, Terminal.TopologicalNode, p, q
+    """
+    terminal_flows = []
+    for element_type, sides in NETWORK_TERMINAL_SIDES.items():
+        elements = network.get_elements(element_type=element_type, all_attributes=True)
+        if elements.empty:
+            continue
+        for side in sides:
+            flows = (elements[[f'bus_breaker_bus{side}_id', f'p{side}', f'q{side}']]
+                     .set_axis(['Terminal.TopologicalNode', 'p', 'q'], axis=1)
+                     .rename_axis('element_id').reset_index())
+            flows['element_type'] = element_type.name
+            flows['side'] = side
+            terminal_flows.append(flows)
+
+    terminal_flows = pandas.concat(terminal_flows, ignore_index=True)
+
+    return terminal_flows[terminal_flows['Terminal.TopologicalNode'] != '']
+
+
+def get_network_nodes_against_kirchhoff_first_law(network: pypowsybl.network.Network,
+                                                  slack_bus_results: list | None = None,
+                                                  sv_injection_limit: float = 0.1,
+                                                  nodes_only: bool = False):
+    """
+    Gets dataframe of nodes in which the sum of flows exceeds the limit. Flows are taken directly from solved
+    pypowsybl network, without exporting and parsing SV profile. Flows of closed retained switches are not
+    available in pypowsybl (in exported SV profile they balance the nodes they join), so topological nodes
+    (bus-breaker view buses) joined by them are evaluated together as one electrical bus
+    :param network: solved pypowsybl network
+    :param slack_bus_results: slack bus results of loadflow [{'id': ..., 'active_power_mismatch': ...}], mismatch
+    is compensated on the node of slack terminal same as SvInjection does in exported SV profile
+    :param sv_injection_limit: threshold for deciding whether the node is violated by sum of flows
+    :param nodes_only: if true then return unique nodes only, if false then nodes with corresponding terminals
+    """
+    # Map topological nodes to electrical buses, disconnected nodes are not part of any bus
+    buses = (network.get_bus_breaker_view_buses(all_attributes=True)[['bus_id']]
+             .rename_axis('Terminal.TopologicalNode').reset_index())
+    buses = buses[buses['bus_id'] != '']
+    terminal_flows = get_network_terminal_flows(network=network).merge(buses, on='Terminal.TopologicalNode')
+
+    # Calculate summed flows per topological node
+    flows_summed = (terminal_flows.groupby('Terminal.TopologicalNode')[['p', 'q']].sum()
+                    .merge(buses.set_index('Terminal.TopologicalNode'), left_index=True, right_index=True))
+    if slack_bus_results:
+        # Slack mismatch is compensated on the node of slack terminal element, without slack terminal extension
+        # SvInjection is not exported either
+        slack_terminals = network.get_extensions('slackTerminal')
+        for slack_bus in slack_bus_results:
+            element_ids = slack_terminals.loc[slack_terminals['bus_id'] == slack_bus['id'], 'element_id']
+            slack_nodes = terminal_flows.loc[terminal_flows['element_id'].isin(element_ids) &
+                                             (terminal_flows['bus_id'] == slack_bus['id']), 'Terminal.TopologicalNode']
+            if slack_nodes.empty:
+                logger.warning(f"Slack terminal not found for bus {slack_bus['id']}, mismatch is not compensated")
+                continue
+            flows_summed.loc[slack_nodes.iloc[0], 'p'] -= slack_bus['active_power_mismatch']
+
+    # Evaluate balance per electrical bus as flows of retained switches between its nodes are unknown
+    bus_flows = flows_summed.groupby('bus_id')[['p', 'q']].transform('sum')
+    flows_summed = (bus_flows.rename(columns={'p': 'SvPowerFlow.p', 'q': 'SvPowerFlow.q'})
+                    .rename_axis('Terminal.TopologicalNode').reset_index())
+
+    # Get topological nodes that have mismatch
+    nok_nodes = flows_summed[(flows_summed['SvPowerFlow.p'].abs() > sv_injection_limit) |
+                             (flows_summed['SvPowerFlow.q'].abs() > sv_injection_limit)]
+    if nodes_only:
+        return nok_nodes[['Terminal.TopologicalNode']]
+
+    return terminal_flows.merge(nok_nodes, on='Terminal.TopologicalNode')
+
+
 def check_switch_terminals(input_data: pandas.DataFrame, column_name: str):
     """
     Checks if column of a dataframe contains only one value
@@ -116,22 +250,11 @@ def check_not_retained_switches_between_nodes(original_data, open_not_retained_s
 
 def get_ac_net_position(models_as_triplets: pandas.DataFrame):
     """
-    Taken from model_quality/statistics.py. Finds sum of EquivalentInjection on the borders
+    Finds sum of EquivalentInjection on the AC borders of interchange control areas
 
     :param models_as_triplets: input dataframe of model as triplets
     """
-    # Use only Interchange Control Area Tieflows
-    tieflow_type = "http://iec.ch/TC57/2013/CIM-schema-cim16#ControlAreaTypeKind.Interchange"
-    tieflow_data = get_tieflow_data(models_as_triplets)
-    tieflow_data = tieflow_data[tieflow_data['ControlArea.type'] == tieflow_type]
-    # AC was needed?
-    try:
-        tieflow_data = tieflow_data[tieflow_data['BoundaryPoint.isDirectCurrent'] == False]
-    except KeyError:
-        pass
-    data_columns = ["EquivalentInjection.p", "EquivalentInjection.q", "SvPowerFlow.p", "SvPowerFlow.q"]
-    tieflow_values = tieflow_data[data_columns].sum().to_dict()
-    return tieflow_values.get("EquivalentInjection.p", None)
+    return get_tieflow_ac_net_position(get_tieflow_data(models_as_triplets))
 
 
 def get_sum_of_loads(models_as_triplets: pandas.DataFrame, parameter_name: str = 'ConformLoad'):
@@ -142,15 +265,12 @@ def get_sum_of_loads(models_as_triplets: pandas.DataFrame, parameter_name: str =
     :param parameter_name: VALUE that can be used to slice the input data
 
     """
-    input_data = models_as_triplets.merge(models_as_triplets.query("KEY == 'Type' & VALUE == @parameter_name")[['ID']], on='ID') \
-        if parameter_name is not None else models_as_triplets
-    output = {
-        "EnergyConsumer.p": sum_on_KEY(input_data, 'EnergyConsumer.p'),
-        "EnergyConsumer.q": sum_on_KEY(input_data, 'EnergyConsumer.q'),
-        # "RotatingMachine.p": sum_on_KEY(input_data, 'RotatingMachine.p'),
-        # "RotatingMachine.q": sum_on_KEY(input_data, 'RotatingMachine.q')
-    }
-    return output.get("EnergyConsumer.p", None)
+    input_data = models_as_triplets
+    if parameter_name is not None:
+        type_ids = models_as_triplets.loc[(models_as_triplets["KEY"] == "Type") & (models_as_triplets["VALUE"] == parameter_name), "ID"]
+        input_data = models_as_triplets[models_as_triplets["ID"].isin(type_ids)]
+
+    return sum_on_KEY(input_data, 'EnergyConsumer.p')
 
 
 def get_lvl8_report_igm(report: dict):
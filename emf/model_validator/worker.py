@@ -1,7 +1,7 @@
 import logging
 import sys
 from uuid import uuid4
-from emf.common.logging import custom_logger
+from emf.common.logging import custom_logger, metrics
 from emf.model_validator.model_validator import HandlerModelsValidator
 
 # Initialize custom logger
@@ -19,6 +19,7 @@ from emf.common.config_parser import parse_app_properties
 parse_app_properties(caller_globals=globals(), path=config.paths.model_validator.model_validator)
 
 logger.info(f"Starting 'model-validator' worker with assigned trace uuid: {worker_uuid}")
+metrics.record_startup(worker="model-validator", stage="imports")
 
 # RabbitMQ consumer implementation
 if CONSUMER_TYPE == "SINGLE_MESSAGE":
@@ -28,6 +29,7 @@ if CONSUMER_TYPE == "SINGLE_MESSAGE":
         message_handlers=[HandlerModelsValidator()],
         forward=OUTPUT_RMQ_EXCHANGE,
     )
+    metrics.record_startup(worker="model-validator", stage="initialized")
     sys.exit(consumer.run())
 elif CONSUMER_TYPE == "LONG_LIVING":
     # RabbitMQ long-living consumer implementation
@@ -35,6 +37,7 @@ elif CONSUMER_TYPE == "LONG_LIVING":
                                   message_handlers=[HandlerModelsValidator()],
                                   forward=OUTPUT_RMQ_EXCHANGE,
                                   )
+    metrics.record_startup(worker="model-validator", stage="initialized")
     try:
         consumer.run()
     except KeyboardInterrupt:
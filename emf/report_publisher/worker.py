@@ -4,14 +4,17 @@ import logging
 from pathlib import Path
 from emf.common.integrations import rabbit, edx
 from emf.common.config_parser import parse_app_properties
+from emf.common.logging import metrics
 from emf.common.xslt_engine.saxonpy_api import validate_xml
 import xmltodict
 
 logger = logging.getLogger(__name__)
 parse_app_properties(caller_globals=globals(), path=config.paths.report_publisher.report_publisher)
+metrics.record_startup(worker="report-publisher", stage="imports")
 
 rabbit_service = rabbit.BlockingClient()
 edx_service = edx.EDX()
+metrics.record_startup(worker="report-publisher", stage="initialized")
 
 
 def run_service(from_queue):
@@ -1,7 +1,7 @@
 import logging
 import config
 import uuid
-from emf.common.logging import custom_logger
+from emf.common.logging import custom_logger, metrics
 from emf.common.config_parser import parse_app_properties
 from emf.common.integrations import edx, rabbit
 from emf.common.integrations.elastic import HandlerSendToElastic
@@ -18,6 +18,7 @@ logging.basicConfig(stream=sys.stdout,
 logger = logging.getLogger(__name__)
 
 parse_app_properties(caller_globals=globals(), path=config.paths.schedule_retriever.schedule_retriever)
+metrics.record_startup(worker="schedule-retriever", stage="imports")
 
 # Transfer schedules from EDX to Elk
 # message_types = EDX_MESSAGE_TYPE.split(",")
@@ -34,6 +35,7 @@ consumer = rabbit.RMQConsumer(
                                            id_metadata_list=ELK_ID_FROM_METADATA_FIELDS.split(','))
                       ]
 )
+metrics.record_startup(worker="schedule-retriever", stage="initialized")
 try:
     consumer.run()
 except KeyboardInterrupt:
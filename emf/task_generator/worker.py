@@ -6,11 +6,13 @@ from emf.common.helpers.utils import filter_and_flatten_dict
 from emf.common.integrations import rabbit
 from emf.common.config_parser import parse_app_properties
 from emf.common.logging.custom_logger import initialize_custom_logger
+from emf.common.logging import metrics
 
 logger = logging.getLogger("task_generator.worker")
 elk_handler = initialize_custom_logger()
 
 parse_app_properties(globals(), config.paths.task_generator.task_generator)
+metrics.record_startup(worker="task-generator", stage="imports")
 
 timeframe_conf = config.paths.task_generator.timeframe_conf
 process_conf = config.paths.task_generator.process_conf
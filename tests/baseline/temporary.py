@@ -0,0 +1,201 @@
+"""
+Frozen copy of post-processing fixes of emf/model_merger/temporary.py before they were vectorized and moved to
+boundary pairing index, reference of equivalence tests
+"""
+import triplets
+import pandas as pd
+import logging
+import uuid
+from decimal import Decimal
+from emf.common.helpers.opdm_objects import load_opdm_objects_to_triplets
+
+logger = logging.getLogger(__name__)
+
+
+def remove_small_islands(solved_data, island_size_limit):
+    # TODO - EVALUATE LEGACY
+    small_island = pd.DataFrame(solved_data.query("KEY == 'TopologicalIsland.TopologicalNodes'").ID.value_counts()).reset_index().query("count <= @island_size_limit")
+    solved_data = triplets.rdf_parser.remove_triplet_from_triplet(solved_data, small_island, columns=["ID"])
+    logger.info(f"Removed {len(small_island)} island(s) with size <= {island_size_limit}")
+    return solved_data
+
+
+def add_missing_sv_tap_steps(sv_data: pd.DataFrame, ssh_data: pd.DataFrame):
+    # TODO - EVALUATE LEGACY
+    """Update missing tap changer tap steps in SV"""
+
+    ssh_tap_steps = ssh_data.query("KEY == 'TapChanger.step'")
+    sv_tap_steps = sv_data.query("KEY == 'SvTapStep.TapChanger'")
+
+    missing_sv_tap_steps = ssh_tap_steps.merge(sv_tap_steps[['VALUE']],
+                                               left_on='ID',
+                                               right_on="VALUE",
+                                               how='left',
+                                               indicator=True,
+                                               suffixes=('', '_SV')).query("_merge == 'left_only'")
+
+    tap_steps_to_be_added = []
+    SV_INSTANCE_ID = sv_data.INSTANCE_ID.iloc[0]
+    for tap_changer in missing_sv_tap_steps.itertuples():
+        ID = str(uuid.uuid4())
+        logger.warning(f'Missing SvTapStep for {tap_changer.ID}, adding SvTapStep {ID} and taking tap value {tap_changer.VALUE} from SSH')
+        tap_steps_to_be_added.extend([
+            (ID, 'Type', 'SvTapStep', SV_INSTANCE_ID),
+            (ID, 'SvTapStep.TapChanger', tap_changer.ID, SV_INSTANCE_ID),
+            (ID, 'SvTapStep.position', tap_changer.VALUE, SV_INSTANCE_ID),
+        ])
+
+    sv_data = pd.concat([sv_data, pd.DataFrame(tap_steps_to_be_added, columns=['ID', 'KEY', 'VALUE', 'INSTANCE_ID'])], ignore_index=True)
+
+    return sv_data
+
+
+def take_best_match_for_sv_voltage(input_data, column_name: str = 'v', to_keep: bool = True):
+    # TODO - EVALUATE LEGACY
+    """
+    Returns one row for with sv voltage id for topological node
+    1) Take the first
+    2) If first is zero take first non-zero row if exists
+    :param input_data: input dataframe
+    :param column_name: name of the column
+    :param to_keep: either to keep or discard a value
+    """
+    first_row = input_data.iloc[0]
+    if to_keep:
+        remaining_rows = input_data[input_data[column_name] != 0]
+        if first_row[column_name] == 0 and not remaining_rows.empty:
+            first_row = remaining_rows.iloc[0]
+    else:
+        remaining_rows = input_data[input_data[column_name] == 0]
+        if first_row[column_name] != 0 and not remaining_rows.empty:
+            first_row = remaining_rows.iloc[0]
+    return first_row
+
+
+def get_opdm_data_from_models(model_data: list | pd.DataFrame):
+    """
+    Check if input is already parsed to triplets. Do it otherwise
+    :param model_data: input models
+    :return triplets
+    """
+    if not isinstance(model_data, pd.DataFrame):
+        model_data = load_opdm_objects_to_triplets(model_data)
+    return model_data
+
+
+def get_boundary_nodes_between_igms(model_data: list | pd.DataFrame):
+    # TODO - EVALUATE LEGACY
+    """
+    Filters out nodes that are between the igms (mentioned at least 2 igms)
+    :param model_data: input models
+    : return series of node ids
+    """
+    model_data = get_opdm_data_from_models(model_data=model_data)
+    all_boundary_nodes = model_data[(model_data['KEY'] == 'TopologicalNode.boundaryPoint') &
+                                    (model_data['VALUE'] == 'true')]
+    # Get boundary nodes that exist in igms
+    merged = pd.merge(all_boundary_nodes,
+                      model_data[(model_data['KEY'] == 'SvVoltage.TopologicalNode')],
+                      left_on='ID', right_on='VALUE', suffixes=('_y', ''))
+    # Get duplicates (all of them) then duplicated values. keep=False marks all duplicates True, 'first' marks first
+    # occurrence to false, 'last' marks last occurrence to false. If any of them is used then in case duplicates are 2
+    # then 1 is retrieved, if duplicates >3 then duplicates-1 retrieved. So, get all the duplicates and as a second
+    # step, drop the duplicates
+    merged = (merged[merged.duplicated(['VALUE'], keep=False)]).drop_duplicates(subset=['VALUE'])
+    in_several_igms = (merged["VALUE"]).to_frame().rename(columns={'VALUE': 'ID'})
+    return in_several_igms
+
+
+def remove_duplicate_sv_voltages(cgm_sv_data, original_data):
+    # TODO - EVALUATE LEGACY
+    """
+    Pypowsybl 1.6.0 provides multiple sets of SvVoltage values for the topological nodes that are boundary nodes (from
+    each IGM side that uses the corresponding boundary node). So this is a hack that removes one of them (preferably the
+    one that is zero).
+    :param cgm_sv_data: merged SV profile from where duplicate SvVoltage values are removed
+    :param original_data: will be used to get boundary node ids
+    :return updated merged SV profile
+    """
+    # Check that models are in triplets
+    some_data = get_opdm_data_from_models(model_data=original_data)
+    # Get ids of boundary nodes that are shared by several igms
+    in_several_igms = (get_boundary_nodes_between_igms(model_data=some_data))
+    # Get SvVoltage Ids corresponding to shared boundary nodes
+    sv_voltage_ids = pd.merge(cgm_sv_data[cgm_sv_data['KEY'] == 'SvVoltage.TopologicalNode'],
+                              in_several_igms.rename(columns={'ID': 'VALUE'}), on='VALUE')
+    # Get SvVoltage voltage values for corresponding SvVoltage Ids
+    sv_voltage_values = pd.merge(cgm_sv_data[cgm_sv_data['KEY'] == 'SvVoltage.v'][['ID', 'VALUE']].
+                                 rename(columns={'VALUE': 'SvVoltage.v'}),
+                                 sv_voltage_ids[['ID', 'VALUE']].
+                                 rename(columns={'VALUE': 'SvVoltage.SvTopologicalNode'}), on='ID')
+    # Just in case convert the values to numeric
+    sv_voltage_values[['SvVoltage.v']] = (sv_voltage_values[['SvVoltage.v']].apply(lambda x: x.apply(Decimal)))
+    # Group by topological node id and by some logic take SvVoltage that will be dropped
+    voltages_to_keep = (sv_voltage_values.groupby(['SvVoltage.SvTopologicalNode']).
+                        apply(lambda x: take_best_match_for_sv_voltage(input_data=x,
+                                                                       column_name='SvVoltage.v',
+                                                                       to_keep=True), include_groups=False))
+    voltages_to_discard = sv_voltage_values.merge(voltages_to_keep['ID'], on='ID', how='left', indicator=True)
+    voltages_to_discard = voltages_to_discard[voltages_to_discard['_merge'] == 'left_only']
+    if not voltages_to_discard.empty:
+        logger.info(f"Removing {len(voltages_to_discard.index)} duplicate voltage levels from boundary nodes")
+        sv_voltages_to_remove = pd.merge(cgm_sv_data, voltages_to_discard['ID'].to_frame(), on='ID')
+        cgm_sv_data = triplets.rdf_parser.remove_triplet_from_triplet(cgm_sv_data, sv_voltages_to_remove)
+
+    return cgm_sv_data
+
+
+def set_paired_boundary_injections_to_zero(original_models, cgm_ssh_data):
+    """Where there are paired boundary points, equivalent injections need to be modified
+    Set P and Q to 0 - so that no additional consumption or production is on tie line
+    Set voltage control off - so that no additional consumption or production is on tie line
+    Set terminal to connected - to be sure we have paired connected injections at boundary point
+    In some models terminals are missing references to ConnectivityNodes
+    """
+
+    topological_boundary_points = original_models.query("KEY == 'TopologicalNode.boundaryPoint' and VALUE == 'true'")[["ID"]]
+    try:
+        terminals = original_models.type_tableview("Terminal").reset_index()[['ID',
+                                                                              'Terminal.ConductingEquipment',
+                                                                              'Terminal.ConnectivityNode',
+                                                                              'Terminal.TopologicalNode']]
+    except KeyError:
+        terminals = original_models.type_tableview("Terminal").reset_index()[['ID',
+                                                                              'Terminal.ConductingEquipment',
+                                                                              'Terminal.TopologicalNode']]
+    injections = cgm_ssh_data.type_tableview('EquivalentInjection').reset_index()[['ID',
+                                                                           # 'EquivalentInjection.p',
+                                                                           # 'EquivalentInjection.q',
+                                                                           # 'EquivalentInjection.regulationStatus'
+                                                                           ]]
+    topological_boundary_points = topological_boundary_points.merge(terminals,
+                                                                    left_on="ID",
+                                                                    right_on="Terminal.TopologicalNode",
+                                                                    suffixes=('_TopologicalNode', '_Terminal'))
+    topological_injections = injections.merge(topological_boundary_points,
+                                              left_on="ID",
+                                              right_on='Terminal.ConductingEquipment',
+                                              suffixes=('_ConnectivityNode', ''))
+    paired_injections = (topological_injections.groupby("Terminal.TopologicalNode")
+                                     .filter(lambda x: len(x) == 2))
+
+    # Set terminal status
+    updated_terminal_status = paired_injections[["ID_Terminal"]].copy().rename(columns={"ID_Terminal": "ID"})
+    updated_terminal_status["KEY"] = "ACDCTerminal.connected"
+    updated_terminal_status["VALUE"] = "true"
+
+    # Set Regulation off
+    updated_regulation_status = paired_injections[["ID"]].copy()
+    updated_regulation_status["KEY"] = "EquivalentInjection.regulationStatus"
+    updated_regulation_status["VALUE"] = "false"
+
+    # Set P to 0
+    updated_p_value = paired_injections[["ID"]].copy()
+    updated_p_value["KEY"] = "EquivalentInjection.p"
+    updated_p_value["VALUE"] = 0
+
+    # Set Q to 0
+    updated_q_value = paired_injections[["ID"]].copy()
+    updated_q_value["KEY"] = "EquivalentInjection.q"
+    updated_q_value["VALUE"] = 0
+    return cgm_ssh_data.update_triplet_from_triplet(pd.concat([updated_regulation_status, updated_p_value, updated_q_value], ignore_index=True), add=False)
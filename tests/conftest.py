@@ -0,0 +1,129 @@
+import copy
+import uuid
+import shutil
+import random
+import datetime
+import tempfile
+import pytest
+import pandas as pd
+import pypowsybl
+import triplets
+from io import BytesIO
+from pathlib import Path
+from dataclasses import dataclass
+from emf.benchmarks.merge_benchmark import configure_local_services
+from emf.benchmarks.synthetic_models import SyntheticModelSet, create_synthetic_model_set
+from emf.common.helpers.loadflow import load_network_model
+from emf.common.helpers.opdm_objects import load_opdm_objects_to_triplets
+from emf.common.helpers.profile_cache import profile_cache
+from emf.model_merger.boundary_pairing import BoundaryPairingIndex, get_boundary_version
+
+SCENARIO_DATE = datetime.datetime(2025, 1, 1, 10, 30, tzinfo=datetime.UTC)
+# Scheduled AC net positions differ from IGMs, so scaling has work to do
+SCHEDULE_DEVIATION = 20.0
+
+
+def pytest_configure(config):
+    """Integrations read server addresses on import, so they are pointed to local stand-ins before test collection"""
+    config.local_services_directory = Path(tempfile.mkdtemp(prefix="emf-tests-"))
+    configure_local_services(config.local_services_directory)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(config.local_services_directory, ignore_errors=True)
+
+
+@dataclass
+class SyntheticMerge:
+    """Solved merge of synthetic model set, as passed to post-processing"""
+    input_models: list
+    exported_model: bytes
+    exported_model_name: str
+    opdm_object_meta: dict
+
+    def get_input_models(self) -> list:
+        return copy.deepcopy(self.input_models)
+
+    def get_exported_model(self) -> BytesIO:
+        exported_model = BytesIO(self.exported_model)
+        exported_model.name = self.exported_model_name
+        return exported_model
+
+
+@pytest.fixture(scope="session")
+def synthetic_model_set() -> SyntheticModelSet:
+    return create_synthetic_model_set(tso_count=3, bus_count=30, tie_line_count=2, hvdc_count=1,
+                                      scenario_date=SCENARIO_DATE, schedule_deviation=SCHEDULE_DEVIATION)
+
+
+@pytest.fixture(scope="session")
+def synthetic_merge(synthetic_model_set) -> SyntheticMerge:
+    from emf.model_merger import merge_functions  # integrations are configured by now
+    input_models = synthetic_model_set.igms + [synthetic_model_set.boundary]
+    network = load_network_model(opdm_objects=input_models)
+    assert pypowsybl.loadflow.run_ac(network)[0].status == pypowsybl.loadflow.ComponentStatus.CONVERGED
+
+    opdm_object_meta = merge_functions.create_merged_model_opdm_object(object_id=str(uuid.uuid4()),
+                                                                        time_horizon="1D",
+                                                                        merging_entity="BALTICRSC",
+                                                                        merging_area="EU",
+                                                                        scenario_date=SCENARIO_DATE.isoformat(),
+                                                                        mas="http://www.baltic-rsc.eu/OperationalPlanning")
+    exported_model = merge_functions.export_merged_model(network=network, opdm_object_meta=opdm_object_meta,
+                                                         profiles=["SV"], cgm_convention=False)
+
+    return SyntheticMerge(input_models=input_models,
+                          exported_model=exported_model.getvalue(),
+                          exported_model_name=exported_model.name,
+                          opdm_object_meta=opdm_object_meta)
+
+
+@dataclass
+class PostProcessingData:
+    """Original models and merged SV and SSH profiles, as passed to post-processing fixes"""
+    original_models: pd.DataFrame
+    sv_data: pd.DataFrame
+    ssh_data: pd.DataFrame
+
+
+@pytest.fixture(scope="session")
+def post_processing_data(synthetic_merge) -> PostProcessingData:
+    from emf.model_merger import merge_functions  # integrations are configured by now
+    input_models = synthetic_merge.get_input_models()
+    original_models = load_opdm_objects_to_triplets(opdm_objects=input_models)
+    opdm_object_meta = dict(synthetic_merge.opdm_object_meta)
+    sv_data = merge_functions.update_merged_model_sv(sv_data=synthetic_merge.get_exported_model(),
+                                                     opdm_object_meta=opdm_object_meta)
+    sv_data, ssh_data, _ = merge_functions.create_updated_ssh(models_as_triplets=original_models,
+                                                              input_models=input_models,
+                                                              sv_data=sv_data,
+                                                              opdm_object_meta=opdm_object_meta)
+
+    return PostProcessingData(original_models=original_models, sv_data=sv_data, ssh_data=ssh_data)
+
+
+@pytest.fixture(params=[False, True], ids=["own_index", "shared_index"])
+def pairing_index(request, synthetic_merge, post_processing_data) -> BoundaryPairingIndex | None:
+    """None lets each fix build its own boundary pairing index, otherwise the index is shared as in merge"""
+    if not request.param:
+        return None
+    pairing_index = BoundaryPairingIndex(boundary_version=get_boundary_version(synthetic_merge.input_models))
+    return pairing_index.add_models(post_processing_data.original_models)
+
+
+@pytest.fixture
+def fixed_uuid(monkeypatch):
+    """
+    Generates the same sequence of uuid4 values after each reset, so post-processing outputs can be compared.
+    Profile cache is cleared on reset as well, cached profiles are not parsed again and do not take their uuid4 values
+    """
+    generator = random.Random(0)
+    fixed_uuid4 = lambda: uuid.UUID(int=generator.getrandbits(128), version=4)
+    monkeypatch.setattr(uuid, "uuid4", fixed_uuid4)
+    monkeypatch.setattr(triplets.cgmes_tools, "uuid4", fixed_uuid4)
+
+    def reset():
+        generator.seed(0)
+        profile_cache.clear()
+
+    return reset
@@ -0,0 +1,47 @@
+import os
+import pytest
+from io import BytesIO
+from zipfile import ZipFile
+from emf.common.helpers import archive
+from emf.common.helpers.archive import ArchiveStream
+from emf.common.integrations.minio_api import ObjectStorage
+
+
+def create_entries() -> list:
+    profile = BytesIO(os.urandom(3 * archive.CHUNK_SIZE + 1))
+    profile.name = "CGM_SV.zip"
+    return [(profile.name, profile.getbuffer()), ("IGM_EQ.zip", os.urandom(1024)), ("IGM_TP.zip", profile)]
+
+
+def test_archive_stream_uploaded_as_multipart(tmp_path):
+    storage = ObjectStorage(server=f"local://{tmp_path}")
+    storage.client.make_bucket("models")
+    entries = create_entries()
+
+    stream = ArchiveStream(name="CGM/model.zip", entries=entries)
+    storage.upload_object(stream, bucket_name="models")
+    stream.close()
+
+    content = storage.download_object("models", "CGM/model.zip")
+    assert stream.size == len(content)
+    with ZipFile(BytesIO(content)) as archive_zip:
+        assert archive_zip.testzip() is None
+        assert {name: archive_zip.read(name) for name in archive_zip.namelist()} == \
+               {name: bytes(data.getbuffer() if isinstance(data, BytesIO) else data) for name, data in entries}
+
+
+def test_archive_stream_build_error_raised_to_reader():
+    stream = ArchiveStream(name="model.zip", entries=[("IGM_EQ.zip", b"zip"), ("IGM_TP.zip", None)])
+
+    with pytest.raises(AttributeError):
+        stream.read()
+    stream.close()
+
+
+def test_archive_stream_closed_before_read_to_end(monkeypatch):
+    monkeypatch.setattr(archive, "QUEUE_SIZE", 1)
+    stream = ArchiveStream(name="model.zip", entries=create_entries())
+    stream.read(10)
+    stream.close()
+
+    assert stream.closed
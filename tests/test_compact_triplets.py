@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+from emf.common.helpers import compact_triplets
+from emf.common.helpers.opdm_objects import load_opdm_objects_to_triplets
+from emf.common.helpers.profile_cache import profile_cache
+from emf.model_merger import merge_functions
+
+TABLE_VIEW_TYPES = ['Terminal', 'ControlArea', 'TieFlow', 'SvPowerFlow', 'ConformLoad', 'EquivalentInjection']
+
+
+def get_sorted_triplets(data: pd.DataFrame, drop_columns: list | None = None) -> pd.DataFrame:
+    data = compact_triplets.expand_triplets(data).drop(columns=drop_columns or [])
+    return data.sort_values(list(data.columns)).reset_index(drop=True)
+
+
+@pytest.fixture(params=[0, 50], ids=["without_cache", "with_cache"])
+def cache_size(request, monkeypatch):
+    monkeypatch.setattr(profile_cache, "max_items", request.param)
+    profile_cache.clear()
+    yield request.param
+    profile_cache.clear()
+
+
+def test_compact_original_models(synthetic_merge, cache_size, fixed_uuid):
+    fixed_uuid()
+    plain = load_opdm_objects_to_triplets(opdm_objects=synthetic_merge.input_models)
+    fixed_uuid()
+    compact = load_opdm_objects_to_triplets(opdm_objects=synthetic_merge.input_models, compact=True)
+
+    memory_before = plain.memory_usage(deep=True).sum()
+    memory_after = compact.memory_usage(deep=True).sum()
+    print(f"Original models in memory: {memory_before / 1e6:.2f} MB plain, {memory_after / 1e6:.2f} MB compact")
+    assert compact_triplets.is_compact(compact)
+    assert memory_after < memory_before / 3
+
+    pd.testing.assert_frame_equal(compact_triplets.expand_triplets(compact), plain)
+    for type_name in TABLE_VIEW_TYPES:
+        pd.testing.assert_frame_equal(compact_triplets.type_tableview(compact, type_name), plain.type_tableview(type_name))
+
+
+def test_post_processing_on_compact_original_models(synthetic_merge, cache_size, fixed_uuid, monkeypatch):
+    outputs = {}
+    for compact in [False, True]:
+        monkeypatch.setattr(merge_functions, "COMPACT_TRIPLETS", str(compact))
+        fixed_uuid()
+        sv_data, ssh_data, _ = merge_functions.run_post_merge_processing(input_models=synthetic_merge.get_input_models(),
+                                                                         exported_model=synthetic_merge.get_exported_model(),
+                                                                         opdm_object_meta=dict(synthetic_merge.opdm_object_meta),
+                                                                         enable_temp_fixes=True)
+        # Instance identifiers are generated by parser and creation time is taken from clock
+        outputs[compact] = [get_sorted_triplets(data[data['KEY'] != 'Model.created'], drop_columns=['INSTANCE_ID'])
+                            for data in [sv_data, ssh_data]]
+
+    for plain_output, compact_output in zip(outputs[False], outputs[True]):
+        pd.testing.assert_frame_equal(compact_output, plain_output)
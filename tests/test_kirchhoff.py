@@ -0,0 +1,75 @@
+import uuid
+import pandas as pd
+import pypowsybl
+import triplets  # registers pandas.read_RDF
+from emf.model_validator import validator_functions
+
+SLACK_VOLTAGE_LEVEL = '469df5f7-058f-4451-a998-57a48e8a56fe'
+SLACK_NODE = 'e44141af-f1dc-44d3-bfa4-b674e5c953d7'
+PARAMETERS = dict(distributed_slack=False)
+
+
+def solve(network: pypowsybl.network.Network, **parameters) -> list:
+    result = pypowsybl.loadflow.run_ac(network, pypowsybl.loadflow.Parameters(**PARAMETERS, **parameters))
+    assert result[0].status == pypowsybl.loadflow.ComponentStatus.CONVERGED
+    return [{'id': slack_bus.id, 'active_power_mismatch': slack_bus.active_power_mismatch}
+            for slack_bus in result[0].slack_bus_results]
+
+
+def get_sv_nodes(network: pypowsybl.network.Network) -> list:
+    """Runs SV profile based check on network exported to CGMES"""
+    export = network.save_to_binary_buffer(format="CGMES", parameters={"iidm.export.cgmes.profiles": 'EQ,TP,SSH,SV'})
+    export.name = 'model.zip'
+    nodes = validator_functions.get_nodes_against_kirchhoff_first_law(original_models=pd.read_RDF([export]),
+                                                                      consider_sv_injection=True,
+                                                                      nodes_only=True)
+    return sorted(nodes['Terminal.TopologicalNode'])
+
+
+def get_network_nodes(network: pypowsybl.network.Network, slack_bus_results: list | None) -> list:
+    nodes = validator_functions.get_network_nodes_against_kirchhoff_first_law(network=network,
+                                                                              slack_bus_results=slack_bus_results,
+                                                                              nodes_only=True)
+    return sorted(nodes['Terminal.TopologicalNode'])
+
+
+def add_slack_node(network: pypowsybl.network.Network) -> str:
+    """Adds topological node joined to slack node by closed retained switch and moves slack terminal to it"""
+    node_id, load_id = str(uuid.uuid4()), str(uuid.uuid4())
+    network.create_buses(id=node_id, voltage_level_id=SLACK_VOLTAGE_LEVEL)
+    network.create_switches(id=str(uuid.uuid4()), voltage_level_id=SLACK_VOLTAGE_LEVEL, bus1_id=SLACK_NODE,
+                            bus2_id=node_id, kind='BREAKER', open=False, retained=True)
+    network.create_loads(id=load_id, voltage_level_id=SLACK_VOLTAGE_LEVEL, bus_id=node_id, p0=5.0, q0=1.0)
+    network.remove_extensions('slackTerminal', [SLACK_VOLTAGE_LEVEL])
+    network.create_extensions('slackTerminal', voltage_level_id=SLACK_VOLTAGE_LEVEL, element_id=load_id)
+
+    return node_id
+
+
+def test_slack_mismatch_compensated_as_sv_injection():
+    network = pypowsybl.network.create_micro_grid_be_network()
+    slack_bus_results = solve(network)
+
+    # Without compensation slack node carries the mismatch, SvInjection balances it in exported SV profile
+    assert get_network_nodes(network, slack_bus_results=None) == [SLACK_NODE]
+    assert get_network_nodes(network, slack_bus_results=slack_bus_results) == get_sv_nodes(network) == []
+
+
+def test_slack_terminal_on_node_behind_retained_switch():
+    network = pypowsybl.network.create_micro_grid_be_network()
+    node_id = add_slack_node(network)
+    slack_bus_results = solve(network, write_slack_bus=False)
+
+    assert get_network_nodes(network, slack_bus_results=None) == sorted([node_id, SLACK_NODE])
+    assert get_network_nodes(network, slack_bus_results=slack_bus_results) == get_sv_nodes(network) == []
+
+
+def test_unbalanced_node_matches_sv_check():
+    network = pypowsybl.network.create_micro_grid_be_network()
+    slack_bus_results = solve(network)
+    load_id = network.get_loads().index[0]
+    network.update_loads(id=load_id, p=network.get_loads().loc[load_id, 'p'] + 10)
+
+    nodes = get_network_nodes(network, slack_bus_results=slack_bus_results)
+    assert len(nodes) == 1
+    assert nodes == get_sv_nodes(network)
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+from baseline import legacy as baseline_legacy
+from emf.model_merger import legacy
+from emf.model_merger.boundary_pairing import BoundaryPairingIndex
+
+
+def assert_triplets_equal(data: pd.DataFrame, expected: pd.DataFrame):
+    """Triplets are compared regardless of row order"""
+    data, expected = [frame.sort_values(['ID', 'KEY', 'VALUE', 'INSTANCE_ID'], key=lambda column: column.astype(str))
+                      .reset_index(drop=True) for frame in [data, expected]]
+    pd.testing.assert_frame_equal(data, expected, check_dtype=False)
+
+
+@pytest.fixture(params=["bus_branch", "node_breaker"])
+def original_models(request, post_processing_data) -> pd.DataFrame:
+    """
+    Original models with object columns, as legacy fixes write numeric values which string columns do not accept.
+    Synthetic models are bus-branch, in node-breaker variant terminals on boundary also refer to connectivity nodes
+    """
+    original_models = post_processing_data.original_models.astype(object)
+    if request.param == "node_breaker":
+        node_map = original_models[original_models['KEY'] == 'ConnectivityNode.TopologicalNode'].set_index('VALUE')['ID']
+        terminal_nodes = original_models[(original_models['KEY'] == 'Terminal.TopologicalNode') &
+                                         original_models['VALUE'].isin(node_map.index)]
+        terminal_nodes = terminal_nodes.assign(KEY='Terminal.ConnectivityNode', VALUE=terminal_nodes['VALUE'].map(node_map))
+        original_models = pd.concat([original_models, terminal_nodes], ignore_index=True)
+    return original_models
+
+
+@pytest.mark.parametrize("shared_index", [False, True])
+def test_configure_paired_boundarypoint_injections_by_nodes(original_models, shared_index):
+    pairing_index = BoundaryPairingIndex().add_models(original_models) if shared_index else None
+
+    updated = legacy.configure_paired_boundarypoint_injections_by_nodes(original_models.copy(), pairing_index=pairing_index)
+    expected = baseline_legacy.configure_paired_boundarypoint_injections_by_nodes(original_models.copy())
+
+    assert not updated.equals(original_models)
+    assert_triplets_equal(updated, expected)
+
+
+@pytest.mark.parametrize("original_models", ["node_breaker"], indirect=True)
+@pytest.mark.parametrize("shared_index", [False, True])
+def test_configure_paired_boundarypoint_injections(original_models, shared_index):
+    pairing_index = BoundaryPairingIndex().add_models(original_models) if shared_index else None
+
+    updated = legacy.configure_paired_boundarypoint_injections(original_models.copy(), pairing_index=pairing_index)
+    expected = baseline_legacy.configure_paired_boundarypoint_injections(original_models.copy())
+
+    assert not updated.equals(original_models)
+    assert_triplets_equal(updated, expected)
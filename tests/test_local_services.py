@@ -0,0 +1,209 @@
+import json
+import pytest
+import pika
+import requests
+from io import BytesIO
+from minio.error import S3Error
+from elasticsearch import NotFoundError
+from emf.common.integrations.local_services import NetworkSimulator
+from emf.common.integrations.local_services.broker import LocalBroker, LocalConnection
+from emf.common.integrations.local_services.documents import LocalDocumentIndex
+from emf.common.integrations.local_services.opdm import LocalStorageAdapter
+from emf.common.integrations.minio_api import ObjectStorage
+from emf.common.integrations.opdm import OPDM
+
+
+# Object storage
+
+@pytest.fixture
+def object_storage(tmp_path):
+    storage = ObjectStorage(server=f"local://{tmp_path}")
+    storage.client.make_bucket("models")
+    return storage
+
+
+def test_object_storage_round_trip(object_storage):
+    file_object = BytesIO(b"<rdf:RDF/>")
+    file_object.name = "IGM/model_EQ.xml"
+    object_storage.upload_object(file_object, bucket_name="models", metadata={"bamessageid": "001"}, tags={"tso": "LT"})
+
+    assert object_storage.download_object("models", "IGM/model_EQ.xml") == b"<rdf:RDF/>"
+    assert object_storage.object_exists("IGM/model_EQ.xml", bucket_name="models")
+    assert object_storage.get_objects_metadata(["IGM/model_EQ.xml", "IGM/missing.xml"], bucket_name="models") == \
+           {"IGM/model_EQ.xml": {"bamessageid": "001"}}
+    stat = object_storage.client.stat_object("models", "IGM/model_EQ.xml")
+    assert stat.size == len(b"<rdf:RDF/>")
+    assert stat.metadata["x-amz-meta-bamessageid"] == "001"
+
+
+def test_object_storage_listing(object_storage):
+    for name in ["IGM/b.xml", "IGM/a.xml", "CGM/c.xml"]:
+        object_storage.client.put_object("models", name, BytesIO(name.encode()), length=len(name))
+
+    assert [obj.object_name for obj in object_storage.client.list_objects("models")] == ["CGM/", "IGM/"]
+    assert [obj.object_name for obj in object_storage.client.list_objects("models", prefix="IGM/")] == ["IGM/a.xml", "IGM/b.xml"]
+    assert [obj.object_name for obj in object_storage.client.list_objects("models", recursive=True, start_after="IGM/a.xml")] == ["IGM/b.xml"]
+
+
+def test_object_storage_errors(object_storage):
+    with pytest.raises(S3Error) as error:
+        object_storage.client.stat_object("models", "missing.xml")
+    assert error.value.code == "NoSuchKey"
+
+    with pytest.raises(S3Error) as error:
+        object_storage.client.get_object("missing-bucket", "model.xml")
+    assert error.value.code == "NoSuchBucket"
+
+    with pytest.raises(S3Error) as error:
+        object_storage.client.make_bucket("models")
+    assert error.value.code == "BucketAlreadyOwnedByYou"
+
+
+# Document index
+
+@pytest.fixture
+def document_index():
+    return LocalDocumentIndex(network=NetworkSimulator(latency_ms=0, bandwidth_mbit=0))
+
+
+def test_documents_round_trip(document_index):
+    document_index.index(index="reports-202501", id="1", document={"tso": "LT", "status": "ok", "meta": {"hour": 1}})
+    document_index.update(index="reports-202501", id="1", doc={"meta": {"version": 2}})
+
+    assert document_index.get(index="reports-202501", id="1")["_source"] == \
+           {"tso": "LT", "status": "ok", "meta": {"hour": 1, "version": 2}}
+
+    document_index.delete(index="reports-202501", id="1")
+    with pytest.raises(NotFoundError):
+        document_index.get(index="reports-202501", id="1")
+
+
+def test_documents_bulk_and_search(document_index):
+    documents = [{"tso": tso, "hour": hour} for tso in ["LT", "LV", "EE"] for hour in range(4)]
+    operations = [line for position, document in enumerate(documents)
+                  for line in ({"index": {"_index": "reports-202501", "_id": str(position)}}, document)]
+    response = document_index.bulk(body="\n".join(json.dumps(line) for line in operations) + "\n")
+    assert not response["errors"] and len(response["items"]) == len(documents)
+
+    query = {"bool": {"must": [{"match": {"tso": "LT"}}, {"range": {"hour": {"gte": 1}}}]}}
+    response = document_index.search(index="reports-*", query=query, sort=[{"hour": "desc"}])
+    assert [hit["_source"]["hour"] for hit in response["hits"]["hits"]] == [3, 2, 1]
+    assert document_index.count(index="reports-*", query={"terms": {"tso": ["LV", "EE"]}})["count"] == 8
+
+
+def test_documents_scroll(document_index):
+    for position in range(7):
+        document_index.index(index="reports", id=str(position), document={"position": position})
+
+    response = document_index.search(index="reports", size=3, sort="position", scroll="1m")
+    positions = [hit["_source"]["position"] for hit in response["hits"]["hits"]]
+    while hits := (response := document_index.scroll(scroll_id=response["_scroll_id"], scroll="1m"))["hits"]["hits"]:
+        positions.extend(hit["_source"]["position"] for hit in hits)
+
+    assert positions == list(range(7))
+    assert document_index.clear_scroll(scroll_id=response["_scroll_id"])["num_freed"] == 1
+
+
+def test_documents_aggregations(document_index):
+    for position, (tso, status) in enumerate([("LT", "ok"), ("LT", "failed"), ("LV", "ok"), ("LT", "ok")]):
+        document_index.index(index="reports", id=str(position), document={"tso": tso, "status": status})
+
+    terms = document_index.search(index="reports", size=0, aggs={"tso": {"terms": {"field": "tso.keyword"}}})
+    assert terms["aggregations"]["tso"]["buckets"] == [{"key": "LT", "doc_count": 3}, {"key": "LV", "doc_count": 1}]
+
+    composite = {"composite": {"size": 2, "sources": [{"tso": {"terms": {"field": "tso"}}},
+                                                      {"status": {"terms": {"field": "status"}}}]}}
+    first_page = document_index.search(index="reports", size=0, aggs={"groups": composite})["aggregations"]["groups"]
+    composite["composite"]["after"] = first_page["after_key"]
+    second_page = document_index.search(index="reports", size=0, aggs={"groups": composite})["aggregations"]["groups"]
+    assert [bucket["key"] for bucket in first_page["buckets"] + second_page["buckets"]] == \
+           [{"tso": "LT", "status": "failed"}, {"tso": "LT", "status": "ok"}, {"tso": "LV", "status": "ok"}]
+    assert [bucket["doc_count"] for bucket in first_page["buckets"] + second_page["buckets"]] == [1, 2, 1]
+
+
+# Broker
+
+@pytest.fixture
+def channel():
+    connection = LocalConnection(broker=LocalBroker(), network=NetworkSimulator(latency_ms=0, bandwidth_mbit=0))
+    channel = connection.channel()
+    channel.queue_declare("merge-tasks")
+    yield channel
+    connection.close()
+
+
+def test_broker_round_trip(channel):
+    channel.exchange_declare("tasks", exchange_type="topic")
+    channel.queue_bind("merge-tasks", "tasks", routing_key="merge.#")
+    channel.basic_publish("tasks", "merge.cgm", b"task", properties=pika.BasicProperties(headers={"id": "1"}))
+    channel.basic_publish("tasks", "retrieve.igm", b"other")
+
+    method, properties, body = channel.basic_get("merge-tasks")
+    assert body == b"task" and properties.headers == {"id": "1"} and not method.redelivered
+    channel.basic_ack(method.delivery_tag)
+    assert channel.basic_get("merge-tasks") == (None, None, None)
+
+
+def test_broker_requeue(channel):
+    channel.basic_publish("", "merge-tasks", b"task")
+
+    method, _, _ = channel.basic_get("merge-tasks")
+    channel.basic_nack(method.delivery_tag, requeue=True)
+    method, _, body = channel.basic_get("merge-tasks")
+    assert body == b"task" and method.redelivered
+
+    # Unacknowledged messages are requeued when channel is closed
+    channel.close()
+    other_channel = channel.connection.channel()
+    assert other_channel.basic_get("merge-tasks", auto_ack=True)[2] == b"task"
+
+
+def test_broker_consume_with_prefetch(channel):
+    for position in range(3):
+        channel.basic_publish("", "merge-tasks", str(position).encode())
+
+    received = []
+    channel.basic_qos(prefetch_count=1)
+    channel.basic_consume("merge-tasks", lambda ch, method, properties, body: received.append((method.delivery_tag, body)))
+    channel.connection.process_data_events()
+    assert [body for _, body in received] == [b"0"]
+
+    channel.basic_ack(received[-1][0])
+    channel.connection.process_data_events()
+    assert [body for _, body in received] == [b"0", b"1"]
+
+
+# OPDM
+
+@pytest.fixture
+def opdm_client(tmp_path):
+    client = OPDM(server=f"local://{tmp_path}")
+    client.client.add_object({"opde:Id": "model-1", "opde:Object-Type": "IGM", "pmd:TSO": "LITGRID",
+                              "opde:Component": [{"opdm:Profile": {"opde:Id": "component-1", "pmd:fileName": "model_EQ.xml",
+                                                                   "pmd:cgmesProfile": "EQ", "DATA": b"<rdf:RDF/>"}}]})
+    return client
+
+
+def test_opdm_query_and_content(opdm_client):
+    response = opdm_client.query("IGM", {"pmd:TSO": "LITGRID"})
+    assert [part["opdm:OPDMObject"]["opde:Id"] for part in response] == ["model-1"]
+    assert opdm_client.query("IGM", {"pmd:TSO": "ELERING"}) == []
+
+    content = opdm_client.get_content("component-1", return_payload=True)
+    assert content["sm:GetContentResult"]["sm:part"][4]["opdm:Profile"]["opde:Content"] == "PHJkZjpSREYvPg=="
+
+
+def test_opdm_publication(opdm_client):
+    opdm_client.client.PublicationRequest({"id": "cgm.zip", "content": b"zip"})
+
+    assert opdm_client.client.publications == ["cgm.zip"]
+    assert (opdm_client.client.root / "cgm.zip").read_bytes() == b"zip"
+
+
+def test_local_storage_adapter(tmp_path):
+    session = requests.Session()
+    session.mount("local://", LocalStorageAdapter(network=NetworkSimulator(latency_ms=0, bandwidth_mbit=0)))
+
+    assert session.put(f"local://{tmp_path}/model.zip", data=b"zip").status_code == 201
+    assert session.get(f"local://{tmp_path}/model.zip").content == b"zip"
+    assert session.get(f"local://{tmp_path}/missing.zip").status_code == 404
@@ -0,0 +1,82 @@
+import copy
+import types
+import pandas as pd
+import pytest
+from baseline import scaler as baseline_scaler
+from emf.common.helpers.loadflow import load_network_model, get_topology_fingerprint
+from emf.model_merger import scaler
+
+# Scaled values are rounded to 0.1 MW, warm started loadflow of scaling loop may end up one step apart
+SCALED_VALUE_TOLERANCE = 0.2
+
+
+def get_schedules(model_set, business_type: str) -> list:
+    """Returns schedules of synthetic model set as given by schedule queries, areas mapped from EIC codes"""
+    area_codes = {area['area.eic']: area['area.code'] for area in model_set.areas}
+    return [{"value": document["value"],
+             "in_domain": area_codes.get(document["TimeSeries.in_Domain.mRID"]),
+             "out_domain": area_codes.get(document["TimeSeries.out_Domain.mRID"]),
+             "registered_resource": document.get("TimeSeries.connectingLine_RegisteredResource.mRID")}
+            for document in model_set.schedules if document["TimeSeries.businessType"] == business_type]
+
+
+def scale(scaler_module, model_set, debug: bool):
+    """Scales freshly imported merged network of synthetic model set with given scaler module"""
+    input_models = copy.deepcopy(model_set.igms + [model_set.boundary])
+    model = types.SimpleNamespace(network=load_network_model(opdm_objects=input_models))
+    return scaler_module.scale_balance(model=model,
+                                       ac_schedules=get_schedules(model_set, "B64"),
+                                       dc_schedules=get_schedules(model_set, "B63"),
+                                       debug=debug)
+
+
+def assert_scaled_equal(model, expected):
+    assert model.scaled == expected.scaled
+    assert [entity['area'] for entity in model.scaled_entity] == [entity['area'] for entity in expected.scaled_entity]
+    for entity, expected_entity in zip(model.scaled_entity, expected.scaled_entity):
+        assert entity == pytest.approx(expected_entity, abs=SCALED_VALUE_TOLERANCE)
+    assert model.scaled_hvdc == pytest.approx(expected.scaled_hvdc)
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["debug_off", "debug_on"])
+def baseline_scaled(request, synthetic_model_set):
+    return request.param, scale(baseline_scaler, synthetic_model_set, debug=request.param)
+
+
+def test_scale_balance(synthetic_model_set, baseline_scaled):
+    debug, expected = baseline_scaled
+    scaler._area_mapping_cache.clear()
+
+    # Area mapping is created on first scaling of network topology and reused by next ones
+    model = scale(scaler, synthetic_model_set, debug=debug)
+    fingerprint = get_topology_fingerprint(model.network)
+    area_mapping = scaler._area_mapping_cache[fingerprint]
+    cached_model = scale(scaler, synthetic_model_set, debug=debug)
+
+    assert scaler._area_mapping_cache[fingerprint] is area_mapping
+    assert expected.scaled and any(abs(entity['initial_offset_acnp']) > 2 for entity in expected.scaled_entity)
+    assert_scaled_equal(model, expected)
+    assert_scaled_equal(cached_model, expected)
+    # Area balances are collected only in debug
+    assert all(('total_losses' in iteration) == debug for iteration in model.scaled_iterations)
+
+
+@pytest.mark.parametrize("areas_to_components", [
+    {"LT": {0}, "LV": {0}},
+    {"LT": {0, 1}, "LV": {0}},
+    {"LT": {0, 1, 2}, "LV": {0, 1}, "EE": {1}},
+], ids=["not_fragmented", "fragmented", "several_fragmented"])
+def test_get_fragmented_areas_participation(areas_to_components):
+    unpaired_dangling_lines = pd.DataFrame({
+        scaler._country_col: ["LT", "LT", "LT", "LT", "LV", "LV", "LV", "EE", None],
+        'connected_component': [0, 0, 1, 2, 0, 1, 1, 1, 0],
+        'boundary_p': [100.0, -40.0, 30.0, -20.0, 50.0, -25.0, 25.0, 10.0, 5.0],
+    })
+
+    participation = scaler.get_fragmented_areas_participation(unpaired_dangling_lines, areas_to_components)
+    expected = baseline_scaler.get_fragmented_areas_participation(unpaired_dangling_lines, areas_to_components)
+
+    sort_columns = ['registered_resource', 'connected_component']
+    pd.testing.assert_frame_equal(participation.sort_values(sort_columns).reset_index(drop=True),
+                                  expected.sort_values(sort_columns).reset_index(drop=True),
+                                  check_dtype=False)
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+from baseline import temporary as baseline_temporary
+from emf.model_merger import temporary
+
+
+def assert_triplets_equal(data: pd.DataFrame, expected: pd.DataFrame):
+    """Triplets are compared regardless of row order"""
+    data, expected = [frame.sort_values(['ID', 'KEY', 'VALUE', 'INSTANCE_ID'], key=lambda column: column.astype(str))
+                      .reset_index(drop=True) for frame in [data, expected]]
+    pd.testing.assert_frame_equal(data, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("island_size_limit", [50, 200])
+def test_remove_small_islands(post_processing_data, island_size_limit):
+    sv_data = post_processing_data.sv_data
+
+    assert_triplets_equal(temporary.remove_small_islands(sv_data.copy(), island_size_limit),
+                          baseline_temporary.remove_small_islands(sv_data.copy(), island_size_limit))
+
+
+@pytest.mark.parametrize("missing_count", [0, 4])
+def test_add_missing_sv_tap_steps(post_processing_data, fixed_uuid, missing_count):
+    sv_data, ssh_data = post_processing_data.sv_data, post_processing_data.ssh_data
+    tap_steps = sv_data.loc[sv_data['KEY'] == 'SvTapStep.TapChanger', 'ID']
+    sv_data = sv_data[~sv_data['ID'].isin(tap_steps.iloc[:missing_count])]
+
+    fixed_uuid()
+    updated = temporary.add_missing_sv_tap_steps(sv_data.copy(), ssh_data)
+    fixed_uuid()
+    expected = baseline_temporary.add_missing_sv_tap_steps(sv_data.copy(), ssh_data)
+
+    assert (updated['KEY'] == 'SvTapStep.TapChanger').sum() == len(tap_steps)
+    assert_triplets_equal(updated, expected)
+
+
+@pytest.mark.parametrize("zero_voltages", [False, True], ids=["as_exported", "zero_first_voltage"])
+def test_remove_duplicate_sv_voltages(post_processing_data, pairing_index, zero_voltages):
+    sv_data, original_models = post_processing_data.sv_data.copy(), post_processing_data.original_models
+    nodes = sv_data[sv_data['KEY'] == 'SvVoltage.TopologicalNode']
+    duplicated = nodes.loc[nodes['VALUE'].duplicated(keep=False), 'ID']
+    assert not duplicated.empty
+    if zero_voltages:
+        # First voltage of each node shared by IGMs is zero, so the next one should be kept
+        first_voltages = nodes[nodes['ID'].isin(duplicated)].drop_duplicates(subset='VALUE')['ID']
+        sv_data.loc[(sv_data['KEY'] == 'SvVoltage.v') & sv_data['ID'].isin(first_voltages), 'VALUE'] = '0'
+
+    updated = temporary.remove_duplicate_sv_voltages(cgm_sv_data=sv_data, original_data=original_models,
+                                                     pairing_index=pairing_index)
+    expected = baseline_temporary.remove_duplicate_sv_voltages(cgm_sv_data=sv_data, original_data=original_models)
+
+    assert not updated.loc[updated['KEY'] == 'SvVoltage.TopologicalNode', 'VALUE'].duplicated().any()
+    assert_triplets_equal(updated, expected)
+
+
+def test_set_paired_boundary_injections_to_zero(post_processing_data, pairing_index):
+    ssh_data, original_models = post_processing_data.ssh_data, post_processing_data.original_models
+
+    updated = temporary.set_paired_boundary_injections_to_zero(original_models=original_models, cgm_ssh_data=ssh_data,
+                                                               pairing_index=pairing_index)
+    expected = baseline_temporary.set_paired_boundary_injections_to_zero(original_models=original_models, cgm_ssh_data=ssh_data)
+
+    assert not updated.equals(ssh_data)
+    assert_triplets_equal(updated, expected)
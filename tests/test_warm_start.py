@@ -0,0 +1,92 @@
+import random
+import pandas as pd
+import pypowsybl
+from emf.common.helpers.loadflow import get_topology_fingerprint
+from emf.common.loadflow_tool import warm_start
+
+AREAS = 3
+LINE_ENDS = [('00', '01'), ('01', '10'), ('10', '11'), ('11', '20'), ('20', '21'), ('00', '21')]
+
+
+def create_network(seed: int | None = None) -> pypowsybl.network.Network:
+    """Creates the same small network, elements are created in order shuffled by seed to imitate fresh import"""
+    rng = random.Random(seed)
+
+    def records(data):
+        if seed is not None:
+            rng.shuffle(data)
+        return pd.DataFrame.from_records(data=data, index='id')
+
+    network = pypowsybl.network.create_empty('warm_start')
+    network.create_substations(records([{'id': f'S{i}'} for i in range(AREAS)]))
+    network.create_voltage_levels(records([{'id': f'VL{i}', 'substation_id': f'S{i}',
+                                            'topology_kind': 'BUS_BREAKER', 'nominal_v': 400.0}
+                                           for i in range(AREAS)]))
+    network.create_buses(records([{'id': f'B{i}{j}', 'voltage_level_id': f'VL{i}'}
+                                  for i in range(AREAS) for j in range(2)]))
+    network.create_lines(records([{'id': f'L{end1}{end2}',
+                                   'voltage_level1_id': f'VL{end1[0]}', 'bus1_id': f'B{end1}',
+                                   'voltage_level2_id': f'VL{end2[0]}', 'bus2_id': f'B{end2}',
+                                   'r': 1.0, 'x': 10.0, 'g1': 0.0, 'b1': 0.0, 'g2': 0.0, 'b2': 0.0}
+                                  for end1, end2 in LINE_ENDS]))
+    network.create_generators(records([{'id': f'G{i}', 'voltage_level_id': f'VL{i}', 'bus_id': f'B{i}0',
+                                        'target_p': 100.0, 'target_v': 400.0, 'voltage_regulator_on': True,
+                                        'min_p': 0.0, 'max_p': 500.0, 'energy_source': 'THERMAL'}
+                                       for i in range(AREAS)]))
+    network.create_loads(records([{'id': f'D{i}{j}', 'voltage_level_id': f'VL{i}', 'bus_id': f'B{i}{j}',
+                                   'p0': 40.0, 'q0': 10.0}
+                                  for i in range(AREAS) for j in range(2)]))
+    network.create_dangling_lines(records([{'id': f'DL{i}', 'voltage_level_id': f'VL{i}', 'bus_id': f'B{i}1',
+                                            'p0': 10.0, 'q0': 0.0, 'r': 1.0, 'x': 10.0, 'g': 0.0, 'b': 0.0}
+                                           for i in range(AREAS)]))
+
+    return network
+
+
+def test_fingerprint_is_stable_across_element_order():
+    networks = [create_network(seed) for seed in range(5)]
+
+    # Element order of networks differs, topology is the same
+    assert len({tuple(network.get_buses(attributes=[]).index) for network in networks}) > 1
+    assert len({get_topology_fingerprint(network) for network in networks}) == 1
+
+
+def test_fingerprint_changes_with_topology():
+    network = create_network()
+    fingerprint = get_topology_fingerprint(network)
+    network.remove_elements(['D00'])
+
+    assert get_topology_fingerprint(network) != fingerprint
+
+
+def test_snapshot_restored_on_fresh_import():
+    solved_network = create_network(seed=1)
+    result = pypowsybl.loadflow.run_ac(solved_network)
+    assert result[0].status == pypowsybl.loadflow.ComponentStatus.CONVERGED
+    fingerprint = warm_start.store_voltage_snapshot(solved_network)
+
+    network = create_network(seed=2)
+    assert not warm_start.has_voltages(network)
+    assert warm_start.restore_voltage_snapshot(network, fingerprint=get_topology_fingerprint(network))
+    assert get_topology_fingerprint(network) == fingerprint
+
+    # Bus view identifiers depend on element order, voltages are compared by bus-breaker view buses
+    solved_buses = solved_network.get_bus_breaker_view_buses(attributes=['v_mag', 'v_angle'])
+    restored_buses = network.get_bus_breaker_view_buses(attributes=['v_mag', 'v_angle']).loc[solved_buses.index]
+    assert restored_buses.equals(solved_buses)
+    assert warm_start.has_voltages(network)
+
+
+def test_warm_start_converges_from_restored_voltages():
+    solved_network = create_network(seed=1)
+    pypowsybl.loadflow.run_ac(solved_network)
+    warm_start.store_voltage_snapshot(solved_network)
+
+    network = create_network(seed=3)
+    warm_start.restore_voltage_snapshot(network)
+    result = warm_start.run_ac(network, parameters=pypowsybl.loadflow.Parameters(), warm_start=True)
+
+    assert result[0].status == pypowsybl.loadflow.ComponentStatus.CONVERGED
+    solved_buses = solved_network.get_bus_breaker_view_buses(attributes=['v_mag', 'v_angle'])
+    buses = network.get_bus_breaker_view_buses(attributes=['v_mag', 'v_angle']).loc[solved_buses.index]
+    pd.testing.assert_frame_equal(buses, solved_buses, atol=1e-4)